@@ -61,6 +61,14 @@ def create_app(config_name='default'):
     # 注册模板过滤器
     register_template_filters(app)
     
+    # 静态资源指纹
+    from app.utils import static_assets
+    static_assets.init_app(app)
+    
+    # 后台导出任务
+    from app.utils import export_jobs
+    export_jobs.init_app(app)
+    
     # 运行数据库迁移（仅在生产环境）
     with app.app_context():
         run_migrations()
@@ -232,7 +240,10 @@ def run_migrations():
                     logger.warning(f"Could not add memo reference fields: {e}")
                     db.session.rollback()
         
-        # 检查sale表是否存在discount和manual_total_amount列
+        # 是否新增了快照列（新增后需要回填历史数据）
+        snapshot_columns_added = False
+        
+        # 检查sale表是否存在discount、manual_total_amount、version和customer_name列
         if 'sale' in existing_tables:
             columns = [col['name'] for col in inspector.get_columns('sale')]
             
@@ -244,6 +255,13 @@ def run_migrations():
             if 'manual_total_amount' not in columns:
                 migrations_needed.append(('manual_total_amount', 'NUMERIC(12, 2)'))
             
+            if 'version' not in columns:
+                migrations_needed.append(('version', 'INTEGER NOT NULL DEFAULT 0'))
+            
+            if 'customer_name' not in columns:
+                migrations_needed.append(('customer_name', 'VARCHAR(100)'))
+                snapshot_columns_added = True
+            
             if migrations_needed:
                 logger.info(f"Running database migrations: {len(migrations_needed)} column(s) to add")
                 
@@ -259,7 +277,288 @@ def run_migrations():
             else:
                 logger.info("✓ Database schema is up to date")
         
+        # 检查sale_item表是否存在规格快照列
+        if 'sale_item' in existing_tables:
+            columns = [col['name'] for col in inspector.get_columns('sale_item')]
+            item_columns = [
+                (name, definition)
+                for name, definition in (('spec_name', 'VARCHAR(100)'), ('kg_per_box', 'NUMERIC(10, 3)'),
+                                         ('unit_cost', 'NUMERIC(12, 4)'), ('cost_amount', 'NUMERIC(12, 2)'))
+                if name not in columns
+            ]
+            for column_name, column_def in item_columns:
+                try:
+                    db.session.execute(text(f"ALTER TABLE sale_item ADD COLUMN {column_name} {column_def}"))
+                    logger.info(f"✓ Added sale_item column: {column_name}")
+                    if column_name in ('spec_name', 'kg_per_box'):
+                        snapshot_columns_added = True
+                except Exception as e:
+                    logger.warning(f"Could not add sale_item column {column_name}: {e}")
+            db.session.commit()
+        
+        if snapshot_columns_added:
+            backfill_sale_snapshots(logger)
+        
+        # 检查customer表是否存在balance（客户账簿余额）和credit_limit列
+        if 'customer' in existing_tables:
+            columns = [col['name'] for col in inspector.get_columns('customer')]
+            customer_columns = [
+                (name, definition)
+                for name, definition in (('balance', 'NUMERIC(12, 2) NOT NULL DEFAULT 0'),
+                                         ('credit_limit', 'NUMERIC(12, 2)'))
+                if name not in columns
+            ]
+            for column_name, column_def in customer_columns:
+                try:
+                    db.session.execute(text(f"ALTER TABLE customer ADD COLUMN {column_name} {column_def}"))
+                    db.session.commit()
+                    logger.info(f"✓ Added customer column: {column_name}")
+                except Exception as e:
+                    logger.warning(f"Could not add customer column {column_name}: {e}")
+                    db.session.rollback()
+        
+        # 检查daily_profit表是否存在lot_state列（利润缓存的期末批次）
+        if 'daily_profit' in existing_tables:
+            columns = [col['name'] for col in inspector.get_columns('daily_profit')]
+            if 'lot_state' not in columns:
+                try:
+                    db.session.execute(text("ALTER TABLE daily_profit ADD COLUMN lot_state TEXT"))
+                    db.session.commit()
+                    logger.info("✓ Added daily_profit column: lot_state")
+                except Exception as e:
+                    logger.warning(f"Could not add daily_profit column lot_state: {e}")
+                    db.session.rollback()
+            # 旧缓存按商品名称匹配批次，清空后按商品ID重新遍历
+            if 'product_id' not in columns:
+                try:
+                    db.session.execute(text("ALTER TABLE daily_profit ADD COLUMN product_id INTEGER"))
+                    db.session.execute(text("DELETE FROM daily_profit"))
+                    db.session.commit()
+                    logger.info("✓ Added daily_profit column: product_id (cache cleared)")
+                except Exception as e:
+                    logger.warning(f"Could not add daily_profit column product_id: {e}")
+                    db.session.rollback()
+
+        # 检查purchase_item表是否存在product_id列（按商品ID关联，商品改名不影响库存和利润统计）
+        if 'purchase_item' in existing_tables:
+            columns = [col['name'] for col in inspector.get_columns('purchase_item')]
+            if 'product_id' not in columns:
+                try:
+                    db.session.execute(text("ALTER TABLE purchase_item ADD COLUMN product_id INTEGER REFERENCES product(id)"))
+                    # 按采购时的商品名称回填（采购时会自动创建同名商品）
+                    count = db.session.execute(text("""
+                        UPDATE purchase_item SET product_id = (
+                            SELECT product.id FROM product WHERE product.name = purchase_item.product_name
+                        )
+                        WHERE product_id IS NULL
+                    """)).rowcount
+                    db.session.commit()
+                    logger.info(f"✓ Added purchase_item column: product_id ({count} item(s) backfilled)")
+                except Exception as e:
+                    logger.warning(f"Could not add purchase_item column product_id: {e}")
+                    db.session.rollback()
+
+        # 检查stock_snapshot表是否存在product_id列；旧快照按商品名称记录，清空后由定时任务重建
+        if 'stock_snapshot' in existing_tables:
+            columns = [col['name'] for col in inspector.get_columns('stock_snapshot')]
+            if 'product_id' not in columns:
+                try:
+                    db.session.execute(text("ALTER TABLE stock_snapshot ADD COLUMN product_id INTEGER"))
+                    db.session.execute(text("DELETE FROM stock_snapshot"))
+                    db.session.commit()
+                    logger.info("✓ Added stock_snapshot column: product_id (snapshots cleared)")
+                except Exception as e:
+                    logger.warning(f"Could not add stock_snapshot column product_id: {e}")
+                    db.session.rollback()
+
+        # 创建新增模型对应的表
+        ensure_tables(existing_tables, logger)
+        
+        # 客户账簿新建时按历史销售单、回款记录生成分录和余额
+        if 'customer_ledger' not in existing_tables and 'sale' in existing_tables:
+            try:
+                from app.services.ledger_service import LedgerService
+                count = LedgerService.rebuild()
+                logger.info(f"✓ Customer ledger built: {count} entries")
+            except Exception as e:
+                logger.warning(f"Could not build customer ledger: {e}")
+        
+        # 加权平均成本表新建时按历史采购、销售重放，生成平均成本和明细成本
+        if 'product_cost' not in existing_tables and 'purchase' in existing_tables:
+            try:
+                from app.services.cost_service import CostService
+                count = CostService.rebuild()
+                logger.info(f"✓ Product costs built: {count} sale items costed")
+            except Exception as e:
+                logger.warning(f"Could not build product costs: {e}")
+        
+        # 创建缺失的索引（重新读取表名，包含上面刚创建的表）
+        ensure_indexes(inspect(db.engine).get_table_names(), logger)
+        
     except Exception as e:
         logger.error(f"Migration error: {e}")
         db.session.rollback()
         # 不抛出异常，让应用继续启动
+
+
+def backfill_sale_snapshots(logger):
+    """
+    回填销售单客户名称、销售明细规格快照（只处理快照为空的行）
+    
+    单箱重量按明细保存的小计反推（(subtotal_kg - extra_kg) / box_qty），
+    即明细创建时实际使用的值；没有箱数的明细取当前规格值。
+    SQLite 的 NUMERIC 亲和性会把 5.0 存为整数 5，乘以 1.0 强制按小数除法计算
+    """
+    from sqlalchemy import text
+    
+    statements = [
+        """
+        UPDATE sale SET customer_name = (
+            SELECT customer.name FROM customer WHERE customer.id = sale.customer_id
+        )
+        WHERE customer_name IS NULL
+        """,
+        """
+        UPDATE sale_item SET
+            spec_name = (SELECT spec.name FROM spec WHERE spec.id = sale_item.spec_id),
+            kg_per_box = CASE
+                WHEN box_qty > 0 THEN ROUND((subtotal_kg - extra_kg) * 1.0 / box_qty, 3)
+                ELSE (SELECT spec.kg_per_box FROM spec WHERE spec.id = sale_item.spec_id)
+            END
+        WHERE kg_per_box IS NULL
+        """,
+    ]
+    try:
+        counts = [db.session.execute(text(sql)).rowcount for sql in statements]
+        db.session.commit()
+        logger.info(f"✓ Backfilled snapshots: {counts[0]} sale(s), {counts[1]} sale item(s)")
+        return counts
+    except Exception as e:
+        logger.warning(f"Could not backfill sale snapshots: {e}")
+        db.session.rollback()
+        return None
+
+
+# 表迁移：按模型定义创建缺失的表（包括模型中声明的索引和约束）
+TABLE_MIGRATIONS = [
+    'stock_snapshot',
+    'idempotency_key',
+    'customer_ledger',
+    'daily_profit',
+    'product_cost',
+    'daily_close',
+    'job_lease',
+    'job_run',
+]
+
+def ensure_tables(existing_tables, logger):
+    """创建 TABLE_MIGRATIONS 中缺失的表"""
+    from app import models  # noqa: F401 确保模型已注册到 metadata
+    
+    for table_name in TABLE_MIGRATIONS:
+        if table_name in existing_tables:
+            continue
+        
+        try:
+            db.metadata.tables[table_name].create(bind=db.engine, checkfirst=True)
+            logger.info(f"✓ {table_name} table created successfully")
+        except Exception as e:
+            logger.warning(f"Could not create {table_name} table: {e}")
+
+# 索引迁移：(索引名, 表名, {方言: 建索引SQL})，'default' 用于未单独列出的方言
+INDEX_MIGRATIONS = [
+    # 名称前缀搜索（输入联想）：lower(name) 表达式索引
+    ('idx_customer_name_lower', 'customer', {
+        'postgresql': "CREATE INDEX IF NOT EXISTS idx_customer_name_lower ON customer (lower(name) text_pattern_ops)",
+        'default': "CREATE INDEX IF NOT EXISTS idx_customer_name_lower ON customer (lower(name))",
+    }),
+    ('idx_product_name_lower', 'product', {
+        'postgresql': "CREATE INDEX IF NOT EXISTS idx_product_name_lower ON product (lower(name) text_pattern_ops)",
+        'default': "CREATE INDEX IF NOT EXISTS idx_product_name_lower ON product (lower(name))",
+    }),
+    ('idx_spec_name_lower', 'spec', {
+        'postgresql': "CREATE INDEX IF NOT EXISTS idx_spec_name_lower ON spec (lower(name) text_pattern_ops)",
+        'default': "CREATE INDEX IF NOT EXISTS idx_spec_name_lower ON spec (lower(name))",
+    }),
+    # 报表：按时间过滤销售单、按销售单聚合明细
+    ('idx_sale_time', 'sale', {
+        'default': "CREATE INDEX IF NOT EXISTS idx_sale_time ON sale (sale_time)",
+    }),
+    ('idx_sale_item_sale', 'sale_item', {
+        'default': "CREATE INDEX IF NOT EXISTS idx_sale_item_sale ON sale_item (sale_id)",
+    }),
+    # 按近期销量排序
+    ('idx_sale_customer_time', 'sale', {
+        'default': "CREATE INDEX IF NOT EXISTS idx_sale_customer_time ON sale (customer_id, sale_time)",
+    }),
+    ('idx_sale_item_product', 'sale_item', {
+        'default': "CREATE INDEX IF NOT EXISTS idx_sale_item_product ON sale_item (product_id)",
+    }),
+    ('idx_sale_item_spec', 'sale_item', {
+        'default': "CREATE INDEX IF NOT EXISTS idx_sale_item_spec ON sale_item (spec_id)",
+    }),
+    # 有效单据按时间范围统计：部分索引（仅 status='active'）并覆盖统计用到的列，
+    # PostgreSQL 用 INCLUDE，SQLite 不支持 INCLUDE，把这些列放入索引键
+    ('idx_sale_active_time', 'sale', {
+        'postgresql': "CREATE INDEX IF NOT EXISTS idx_sale_active_time ON sale (sale_time) "
+                      "INCLUDE (total_kg, total_amount, payment_type, payment_status, customer_id, created_by) "
+                      "WHERE status = 'active'",
+        'default': "CREATE INDEX IF NOT EXISTS idx_sale_active_time ON sale "
+                   "(sale_time, payment_type, payment_status, customer_id, created_by, total_kg, total_amount) "
+                   "WHERE status = 'active'",
+    }),
+    ('idx_purchase_active_time', 'purchase', {
+        'postgresql': "CREATE INDEX IF NOT EXISTS idx_purchase_active_time ON purchase (purchase_time) "
+                      "INCLUDE (total_kg, total_amount) WHERE status = 'active'",
+        'default': "CREATE INDEX IF NOT EXISTS idx_purchase_active_time ON purchase "
+                   "(purchase_time, total_kg, total_amount) WHERE status = 'active'",
+    }),
+    ('idx_stock_move_active_time', 'stock_move', {
+        'postgresql': "CREATE INDEX IF NOT EXISTS idx_stock_move_active_time ON stock_move (move_time) "
+                      "INCLUDE (kg) WHERE status = 'active'",
+        'default': "CREATE INDEX IF NOT EXISTS idx_stock_move_active_time ON stock_move "
+                   "(move_time, kg) WHERE status = 'active'",
+    }),
+    # 按销售单查找库存变动（作废联动、数据一致性检查）
+    ('idx_stock_move_reference', 'stock_move', {
+        'default': "CREATE INDEX IF NOT EXISTS idx_stock_move_reference ON stock_move (reference_type, reference_id)",
+    }),
+    # 应收账龄：未结清的有效信用销售（部分索引，覆盖金额列）
+    ('idx_sale_open_credit', 'sale', {
+        'postgresql': "CREATE INDEX IF NOT EXISTS idx_sale_open_credit ON sale (customer_id, sale_time) "
+                      "INCLUDE (total_amount) "
+                      "WHERE status = 'active' AND payment_type = 'Crédito' AND payment_status <> 'paid'",
+        'default': "CREATE INDEX IF NOT EXISTS idx_sale_open_credit ON sale "
+                   "(customer_id, sale_time, total_amount) "
+                   "WHERE status = 'active' AND payment_type = 'Crédito' AND payment_status <> 'paid'",
+    }),
+    # 按销售单汇总回款金额
+    ('idx_remittance_sale_amount', 'remittance', {
+        'default': "CREATE INDEX IF NOT EXISTS idx_remittance_sale_amount ON remittance (sale_id, amount)",
+    }),
+    # 备忘录列表/日历：active + memo_date
+    ('idx_memo_active_date', 'memo', {
+        'default': "CREATE INDEX IF NOT EXISTS idx_memo_active_date ON memo (active, memo_date)",
+    }),
+]
+
+def ensure_indexes(existing_tables, logger):
+    """创建 INDEX_MIGRATIONS 中缺失的索引（每个索引单独提交，失败不影响其他索引）"""
+    from sqlalchemy import text
+    
+    dialect = db.engine.dialect.name
+    
+    for index_name, table_name, statements in INDEX_MIGRATIONS:
+        if table_name not in existing_tables:
+            continue
+        
+        sql = statements.get(dialect, statements.get('default'))
+        if not sql:
+            continue
+        
+        try:
+            db.session.execute(text(sql))
+            db.session.commit()
+        except Exception as e:
+            logger.warning(f"Could not create index {index_name}: {e}")
+            db.session.rollback()
@@ -1,10 +1,14 @@
 """
 系统管理 API
 """
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from app.models import Spec, Customer, AuditLog, Product
+from app.services.reference_data_service import ReferenceDataService
+from app.services.search_service import SearchService
+from app.services.ledger_service import LedgerService
 from app import db
 from datetime import datetime
+from decimal import Decimal, InvalidOperation
 from app.utils import timezone
 
 admin_api = Blueprint('admin_api', __name__)
@@ -17,15 +21,25 @@ def get_specs():
     try:
         active_only = request.args.get('active_only', 'true').lower() == 'true'
         
-        query = Spec.query
+        # 启用数据直接使用内存快照
         if active_only:
-            query = query.filter(Spec.active == True)
+            return jsonify({'items': ReferenceDataService.get_specs()})
         
-        specs = query.order_by(Spec.name).all()
+        specs = Spec.query.order_by(Spec.name).all()
         return jsonify({'items': [spec.to_dict() for spec in specs]})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@admin_api.route('/specs/search', methods=['GET'])
+def search_specs():
+    """规格输入联想（名称前缀，按近期销量排序）"""
+    try:
+        q = request.args.get('q', '')
+        limit = request.args.get('limit', 10, type=int)
+        return jsonify({'items': SearchService.search_specs(q, limit)})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @admin_api.route('/specs', methods=['POST'])
 def create_spec():
     """创建规格"""
@@ -155,6 +169,24 @@ def update_spec_prices(spec_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+# ==================== 基础资料快照 ====================
+
+@admin_api.route('/reference-data', methods=['GET'])
+def get_reference_data():
+    """获取启用的客户、规格、商品快照（带ETag，未变化时返回304）"""
+    try:
+        snapshot = ReferenceDataService.get_snapshot()
+        etag = '"%s"' % snapshot['version']
+        if request.headers.get('If-None-Match') == etag:
+            return '', 304
+        
+        response = current_app.response_class(str(snapshot['json']), mimetype='application/json')
+        response.headers['ETag'] = etag
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 # ==================== 系统设置 ====================
 
 @admin_api.route('/settings/prices', methods=['PUT'])
@@ -187,6 +219,86 @@ def update_system_prices():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@admin_api.route('/settings/costing-method', methods=['PUT'])
+def update_costing_method():
+    """更新成本方法（fifo / weighted_average）"""
+    try:
+        from app.services.cost_service import CostService
+        data = request.get_json() or {}
+        
+        CostService.set_method(data.get('costing_method'), updated_by=data.get('updated_by', 'admin'))
+        return jsonify({'message': 'Costing method updated successfully', 'costing_method': CostService.get_method()})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+# ==================== 定时任务 ====================
+
+@admin_api.route('/jobs', methods=['GET'])
+def get_scheduled_jobs():
+    """定时任务概览"""
+    try:
+        from app.utils.scheduler import get_overview
+        
+        return jsonify({'items': [
+            {
+                **job,
+                'next_run': job['next_run'].isoformat() if job['next_run'] else None,
+                'last_run': job['last_run'].to_dict() if job['last_run'] else None
+            }
+            for job in get_overview(current_app)
+        ]})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_api.route('/jobs/<job_name>/run', methods=['POST'])
+def run_scheduled_job(job_name):
+    """立即运行定时任务（在当前请求中执行）"""
+    try:
+        from app.utils.scheduler import run_now
+        
+        run = run_now(current_app, job_name)
+        return jsonify(run.to_dict())
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+# ==================== 数据一致性检查 ====================
+
+@admin_api.route('/integrity', methods=['GET', 'POST'])
+def check_integrity():
+    """
+    数据一致性检查
+    GET 只检查；POST 且 fix=true 时分批修正可自动修正的项目
+    参数: checks（逗号分隔的检查名称，默认全部）、fix、batch_size
+    """
+    try:
+        from app.services.integrity_service import IntegrityService
+
+        checks = request.args.get('checks')
+        fix = request.method == 'POST' and request.args.get('fix', 'false').lower() == 'true'
+        batch_size = request.args.get('batch_size', type=int)
+
+        results = IntegrityService.run(
+            names=[name.strip() for name in checks.split(',') if name.strip()] if checks else None,
+            fix=fix,
+            batch_size=batch_size
+        )
+        return jsonify({
+            'fix': fix,
+            'ok': all(result['count'] == 0 for result in results),
+            'items': results
+        })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 # ==================== 备忘录管理 ====================
 
 @admin_api.route('/memos', methods=['GET'])
@@ -210,7 +322,51 @@ def get_memos():
             query = query.filter(Memo.memo_date == timezone.get_current_date())
             
         memos = query.order_by(Memo.created_at.desc()).all()
-        return jsonify({'items': [memo.to_dict() for memo in memos]})
+        return jsonify({'items': Memo.list_to_dict(memos)})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_api.route('/memos/calendar', methods=['GET'])
+def get_memo_calendar():
+    """获取某月每天的备忘录数量（month=YYYY-MM，默认当月）"""
+    try:
+        from app.models import Memo
+        from sqlalchemy import func
+        
+        month_str = request.args.get('month')
+        if month_str:
+            try:
+                month_start = datetime.strptime(month_str, '%Y-%m').date()
+            except ValueError:
+                return jsonify({'error': '月份格式错误，应为YYYY-MM'}), 400
+        else:
+            month_start = timezone.get_current_date().replace(day=1)
+        
+        if month_start.month == 12:
+            next_month = month_start.replace(year=month_start.year + 1, month=1)
+        else:
+            next_month = month_start.replace(month=month_start.month + 1)
+        
+        rows = db.session.query(
+            Memo.memo_date,
+            func.count(Memo.id).label('count'),
+            func.sum(db.case((Memo.is_completed == True, 1), else_=0)).label('completed')
+        ).filter(
+            Memo.active == True,
+            Memo.memo_date >= month_start,
+            Memo.memo_date < next_month
+        ).group_by(Memo.memo_date).all()
+        
+        return jsonify({
+            'month': month_start.strftime('%Y-%m'),
+            'days': {
+                (row.memo_date.isoformat() if hasattr(row.memo_date, 'isoformat') else str(row.memo_date)): {
+                    'count': row.count,
+                    'completed': int(row.completed or 0)
+                }
+                for row in rows
+            }
+        })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -304,15 +460,37 @@ def get_customers():
     try:
         active_only = request.args.get('active_only', 'true').lower() == 'true'
         
-        query = Customer.query
+        # 启用数据直接使用内存快照
         if active_only:
-            query = query.filter(Customer.active == True)
+            return jsonify({'items': ReferenceDataService.get_customers()})
         
-        customers = query.order_by(Customer.name).all()
+        customers = Customer.query.order_by(Customer.name).all()
         return jsonify({'items': [customer.to_dict() for customer in customers]})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@admin_api.route('/customers/search', methods=['GET'])
+def search_customers():
+    """客户输入联想（名称前缀，按近期销量排序）"""
+    try:
+        q = request.args.get('q', '')
+        limit = request.args.get('limit', 10, type=int)
+        return jsonify({'items': SearchService.search_customers(q, limit)})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def _parse_credit_limit(value):
+    """信用额度：空值表示不限额，不能为负数"""
+    if value is None or value == '':
+        return None
+    try:
+        credit_limit = Decimal(str(value))
+    except InvalidOperation:
+        raise ValueError('信用额度格式错误')
+    if credit_limit < 0:
+        raise ValueError('信用额度不能为负数')
+    return credit_limit
+
 @admin_api.route('/customers', methods=['POST'])
 def create_customer():
     """创建客户"""
@@ -331,12 +509,16 @@ def create_customer():
         customer = Customer(
             name=data['name'],
             credit_allowed=data.get('credit_allowed', False),
+            credit_limit=_parse_credit_limit(data.get('credit_limit')),
             created_by=data.get('created_by', 'system')
         )
         db.session.add(customer)
         db.session.commit()
         
         return jsonify(customer.to_dict()), 201
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -353,6 +535,8 @@ def update_customer(customer_id):
         
         if 'credit_allowed' in data:
             customer.credit_allowed = data['credit_allowed']
+        if 'credit_limit' in data:
+            customer.credit_limit = _parse_credit_limit(data['credit_limit'])
         if 'updated_by' in data:
             customer.updated_by = data['updated_by']
         
@@ -360,10 +544,44 @@ def update_customer(customer_id):
         db.session.commit()
         
         return jsonify(customer.to_dict())
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@admin_api.route('/customers/<int:customer_id>/credit', methods=['GET'])
+def get_customer_credit(customer_id):
+    """客户信用额度、当前欠款和可用额度"""
+    try:
+        return jsonify(LedgerService.get_credit_status(customer_id))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_api.route('/customers/<int:customer_id>/statement', methods=['GET'])
+def get_customer_statement(customer_id):
+    """
+    客户对账单（键集分页）
+    
+    Query:
+        limit: 每页数量（默认50，最多200）
+        before: 游标，上一页返回的 next_cursor
+    """
+    try:
+        statement = LedgerService.get_statement(
+            customer_id,
+            limit=request.args.get('limit', type=int),
+            before_id=request.args.get('before', type=int)
+        )
+        return jsonify(statement)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 # ==================== 审计日志 ====================
 
 @admin_api.route('/audit-logs', methods=['GET'])
@@ -406,15 +624,25 @@ def get_products():
     try:
         active_only = request.args.get('active_only', 'true').lower() == 'true'
         
-        query = Product.query
+        # 启用数据直接使用内存快照
         if active_only:
-            query = query.filter(Product.active == True)
+            return jsonify({'items': ReferenceDataService.get_products()})
         
-        products = query.order_by(Product.name).all()
+        products = Product.query.order_by(Product.name).all()
         return jsonify({'items': [product.to_dict() for product in products]})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@admin_api.route('/products/search', methods=['GET'])
+def search_products():
+    """商品输入联想（名称前缀，按近期销量排序）"""
+    try:
+        q = request.args.get('q', '')
+        limit = request.args.get('limit', 10, type=int)
+        return jsonify({'items': SearchService.search_products(q, limit)})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @admin_api.route('/products', methods=['POST'])
 def create_product():
     """创建商品"""
@@ -3,6 +3,7 @@
 """
 from flask import Blueprint, request, jsonify
 from app.services.inventory_service import InventoryService
+from app.models import Product
 from app import db
 from datetime import datetime
 
@@ -91,6 +92,34 @@ def get_stock_history():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@inventory_api.route('/as-of', methods=['GET'])
+def get_stock_as_of():
+    """查询任意时刻的库存（可按商品）"""
+    try:
+        at = request.args.get('at')
+        if not at:
+            return jsonify({'error': '查询时间不能为空'}), 400
+        
+        try:
+            at = datetime.fromisoformat(at)
+        except ValueError:
+            return jsonify({'error': '时间格式错误'}), 400
+        
+        # 按商品ID查询；仍兼容按商品名称查询（取当前名称对应的商品）
+        product_id = request.args.get('product_id', type=int)
+        product_name = request.args.get('product_name') or None
+        if product_id is None and product_name:
+            product = Product.query.filter_by(name=product_name).first()
+            if not product:
+                return jsonify({'error': '商品不存在'}), 404
+            product_id = product.id
+        
+        result = InventoryService.get_stock_as_of(at, product_id=product_id)
+        return jsonify(result)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @inventory_api.route('/by-type', methods=['GET'])
 def get_stock_by_type():
     """按类型统计库存变动"""
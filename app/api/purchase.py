@@ -5,6 +5,7 @@ from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
 from app.services.purchase_service import PurchaseService
 from app.utils.decorators import permission_required
+from app.utils.idempotency import idempotent
 
 purchase_api = Blueprint('purchase_api', __name__)
 
@@ -15,6 +16,7 @@ def before_request():
     pass
 
 @purchase_api.route('/', methods=['POST'])
+@idempotent
 def create_purchase():
     """创建采购单API"""
     try:
@@ -1,8 +1,10 @@
 """
 报表统计 API
 """
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, send_file
 from app.services.report_service import ReportService
+from app.services.profit_service import ProfitService
+from app.utils.export_jobs import export_job
 from datetime import datetime
 
 reports_api = Blueprint('reports_api', __name__)
@@ -73,6 +75,7 @@ def get_extra_kg_analysis():
         date_from = request.args.get('date_from')
         date_to = request.args.get('date_to')
         min_percent = request.args.get('min_percent', 0, type=float)
+        bucket_size = request.args.get('bucket_size', 10, type=float)
         
         # 转换日期
         if date_from:
@@ -80,8 +83,9 @@ def get_extra_kg_analysis():
         if date_to:
             date_to = datetime.fromisoformat(date_to)
         
-        data = ReportService.get_extra_kg_analysis(date_from, date_to, min_percent)
-        return jsonify({'data': data})
+        return jsonify(ReportService.get_extra_kg_report(date_from, date_to, min_percent, bucket_size))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -103,9 +107,116 @@ def get_summary_stats():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@reports_api.route('/receivables-aging', methods=['GET'])
+def get_receivables_aging():
+    """应收账龄（按客户分段汇总未回款信用销售）"""
+    try:
+        as_of = request.args.get('as_of')
+        if as_of:
+            as_of = datetime.fromisoformat(as_of).date()
+        
+        data = ReportService.get_receivables_aging(as_of)
+        return jsonify(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def _comparison_args():
+    """解析期间对比参数（current_from/current_to 必填，prior_from/prior_to 可选）"""
+    current_from = request.args.get('current_from')
+    current_to = request.args.get('current_to')
+    if not current_from or not current_to:
+        raise ValueError('本期开始日期和结束日期不能为空')
+    
+    prior_from = request.args.get('prior_from')
+    prior_to = request.args.get('prior_to')
+    return {
+        'current_from': datetime.fromisoformat(current_from).date(),
+        'current_to': datetime.fromisoformat(current_to).date(),
+        'prior_from': datetime.fromisoformat(prior_from).date() if prior_from else None,
+        'prior_to': datetime.fromisoformat(prior_to).date() if prior_to else None,
+        'limit': request.args.get('limit', type=int)
+    }
+
+@reports_api.route('/compare/<report>', methods=['GET'])
+def get_period_comparison(report):
+    """期间对比（report: daily/customer/spec/representative）"""
+    try:
+        data = ReportService.get_period_comparison(report, **_comparison_args())
+        return jsonify(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@reports_api.route('/profit', methods=['GET'])
+def get_profit():
+    """利润与毛利率（FIFO成本，按日、按商品）"""
+    try:
+        date_from = request.args.get('date_from')
+        date_to = request.args.get('date_to')
+        
+        if not date_from or not date_to:
+            return jsonify({'error': '开始日期和结束日期不能为空'}), 400
+        
+        data = ProfitService.get_profit(
+            datetime.fromisoformat(date_from).date(),
+            datetime.fromisoformat(date_to).date()
+        )
+        return jsonify(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@reports_api.route('/analytics/<dataset>', methods=['GET'])
+def query_analytics(dataset):
+    """
+    即席分析查询（读取 Parquet 分析快照，不查询数据库）
+    参数: group_by（逗号分隔）、metrics（逗号分隔的 列:聚合函数）、
+          filter（可重复的 列:值）、date_from、date_to
+    例: /api/reports/analytics/sale_items?group_by=month,spec_name&metrics=subtotal_kg:sum,total_amount:sum
+    """
+    try:
+        from app.services.analytics_service import AnalyticsService
+
+        def split(name):
+            return [part.strip() for part in request.args.get(name, '').split(',') if part.strip()]
+
+        metrics = []
+        for metric in split('metrics'):
+            column, _, aggregation = metric.partition(':')
+            metrics.append((column, aggregation or 'sum'))
+
+        filters = {}
+        for item in request.args.getlist('filter'):
+            column, separator, value = item.partition(':')
+            if not separator:
+                return jsonify({'error': 'filter 格式为 列:值'}), 400
+            filters[column] = value
+
+        date_from = request.args.get('date_from')
+        date_to = request.args.get('date_to')
+
+        data = AnalyticsService.query(
+            dataset,
+            group_by=split('group_by'),
+            metrics=metrics,
+            filters=filters,
+            date_from=datetime.fromisoformat(date_from).date() if date_from else None,
+            date_to=datetime.fromisoformat(date_to).date() if date_to else None
+        )
+        return jsonify({'data': data})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 # ==================== Excel导出 ====================
 
 @reports_api.route('/export/daily-sales', methods=['GET'])
+@export_job
 def export_daily_sales():
     """导出每日销售报表"""
     try:
@@ -127,6 +238,7 @@ def export_daily_sales():
         return jsonify({'error': str(e)}), 500
 
 @reports_api.route('/export/customer-sales', methods=['GET'])
+@export_job
 def export_customer_sales():
     """导出客户销售排名"""
     try:
@@ -150,6 +262,7 @@ def export_customer_sales():
         return jsonify({'error': str(e)}), 500
 
 @reports_api.route('/export/spec-sales', methods=['GET'])
+@export_job
 def export_spec_sales():
     """导出规格使用统计"""
     try:
@@ -172,6 +285,63 @@ def export_spec_sales():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@reports_api.route('/export/receivables-aging', methods=['GET'])
+@export_job
+def export_receivables_aging():
+    """导出应收账龄报表"""
+    try:
+        from app.utils.excel_exporter import ExcelExporter
+        
+        as_of = request.args.get('as_of')
+        if as_of:
+            as_of = datetime.fromisoformat(as_of).date()
+        
+        data = ReportService.get_receivables_aging(as_of)
+        return ExcelExporter.export_receivables_aging(data)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@reports_api.route('/export/compare/<report>', methods=['GET'])
+@export_job
+def export_period_comparison(report):
+    """导出期间对比报表（两个期间并排）"""
+    try:
+        from app.utils.excel_exporter import ExcelExporter
+        
+        data = ReportService.get_period_comparison(report, **_comparison_args())
+        return ExcelExporter.export_period_comparison(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# ==================== 后台导出任务 ====================
+
+@reports_api.route('/export-jobs/<job_id>', methods=['GET'])
+def get_export_job(job_id):
+    """导出任务状态（导出接口带 async=1 提交）"""
+    jobs = current_app.extensions['export_jobs']
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': '导出任务不存在或已过期'}), 404
+    return jsonify(jobs.to_dict(job))
+
+@reports_api.route('/export-jobs/<job_id>/download', methods=['GET'])
+def download_export_job(job_id):
+    """下载导出结果"""
+    jobs = current_app.extensions['export_jobs']
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': '导出任务不存在或已过期'}), 404
+    if job['status'] != 'success':
+        return jsonify({'error': '导出尚未完成'}), 409
+    return send_file(
+        jobs.file_path(job),
+        mimetype=job['mimetype'],
+        as_attachment=True,
+        download_name=job['filename']
+    )
+
 # ==================== 销售员报表 ====================
 
 @reports_api.route('/sales-by-representative', methods=['GET'])
@@ -215,6 +385,7 @@ def get_representative_detail(representative):
         return jsonify({'error': str(e)}), 500
 
 @reports_api.route('/export/sales-by-representative', methods=['GET'])
+@export_job
 def export_sales_by_representative():
     """导出销售员销售汇总"""
     try:
@@ -237,6 +408,7 @@ def export_sales_by_representative():
         return jsonify({'error': str(e)}), 500
 
 @reports_api.route('/export/sales-by-representative/<representative>', methods=['GET'])
+@export_job
 def export_representative_detail(representative):
     """导出指定销售员的销售记录详情"""
     try:
@@ -3,9 +3,13 @@
 """
 from flask import Blueprint, request, jsonify
 from app.services.sale_service import SaleService
-from app.services.remittance_service import RemittanceService
+from app.services.remittance_service import RemittanceService, RemittanceConflictError
+from app.services.close_service import CloseService
+from app.models import DailyClose
 from app import db
-from datetime import datetime
+from app.utils.idempotency import idempotent
+from app.utils.export_jobs import streaming_export
+from datetime import datetime, time
 
 sales_api = Blueprint('sales_api', __name__)
 
@@ -44,6 +48,46 @@ def get_sales():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@sales_api.route('/export.<any(ndjson, csv):fmt>', methods=['GET'])
+@streaming_export
+def export_sale_lines(fmt):
+    """
+    流式导出销售明细原始数据（NDJSON / CSV，支持 gzip）
+    参数: date_from、date_to（只有日期时包含当天全天）、status（active/void/all，默认 active）、customer_id
+    同时进行的下载超过 EXPORT_MAX_STREAMS 时返回 429
+    """
+    try:
+        from app.utils.streaming import stream_rows
+
+        date_from = request.args.get('date_from')
+        date_to = request.args.get('date_to')
+        status = request.args.get('status', 'active')
+        customer_id = request.args.get('customer_id', type=int)
+
+        if status not in ('active', 'void', 'all'):
+            return jsonify({'error': 'status 必须是 active / void / all'}), 400
+
+        # 转换日期
+        date_from_obj = datetime.fromisoformat(date_from) if date_from else None
+        date_to_obj = None
+        if date_to:
+            date_to_obj = datetime.fromisoformat(date_to)
+            if len(date_to) == 10:
+                date_to_obj = datetime.combine(date_to_obj.date(), time.max)
+
+        batches = SaleService.iter_sale_lines(
+            date_from=date_from_obj,
+            date_to=date_to_obj,
+            status=None if status == 'all' else status,
+            customer_id=customer_id
+        )
+        filename = f"sale_lines_{date_from or 'all'}_{date_to or 'all'}.{fmt}"
+        return stream_rows(SaleService.LINE_COLUMNS, batches, fmt, filename)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @sales_api.route('/<sale_id>', methods=['GET'])
 def get_sale(sale_id):
     """获取销售单详情"""
@@ -56,6 +100,7 @@ def get_sale(sale_id):
         return jsonify({'error': str(e)}), 500
 
 @sales_api.route('', methods=['POST'])
+@idempotent
 def create_sale():
     """创建销售单"""
     try:
@@ -80,11 +125,35 @@ def create_sale():
         
         return jsonify(sale.to_dict(include_items=True)), 201
     except ValueError as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@sales_api.route('/sync', methods=['POST'])
+def sync_sales():
+    """批量同步离线销售单（逐单返回结果）"""
+    try:
+        from app.services.reference_data_service import ReferenceDataService
+        
+        data = request.get_json() or {}
+        entries = data.get('sales')
+        
+        if not isinstance(entries, list) or not entries:
+            return jsonify({'error': '销售单列表不能为空'}), 400
+        if len(entries) > SaleService.SYNC_BATCH_LIMIT:
+            return jsonify({'error': f'单次最多同步 {SaleService.SYNC_BATCH_LIMIT} 张销售单'}), 400
+        
+        results = SaleService.sync_offline_sales(
+            entries,
+            reference_data_version=ReferenceDataService.get_snapshot()['version']
+        )
+        return jsonify({'results': results})
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @sales_api.route('/<sale_id>/void', methods=['POST'])
 def void_sale(sale_id):
     """作废销售单"""
@@ -117,6 +186,60 @@ def today_summary():
         return jsonify({'error': str(e)}), 500
 
 
+# ==================== 日结 API ====================
+
+@sales_api.route('/daily/<date>/close', methods=['GET'])
+def get_daily_close(date):
+    """查询日结状态"""
+    try:
+        close_date = datetime.strptime(date, '%Y-%m-%d').date()
+        close = db.session.get(DailyClose, close_date)
+        return jsonify({
+            'close_date': close_date.isoformat(),
+            'closed': close is not None and close.status == 'closed',
+            'close': close.to_dict() if close else None
+        })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@sales_api.route('/daily/<date>/close', methods=['POST'])
+def close_day(date):
+    """日结：冻结当天汇总，之后该日单据不可修改"""
+    try:
+        data = request.get_json(silent=True) or {}
+        close_date = datetime.strptime(date, '%Y-%m-%d').date()
+        
+        close = CloseService.close_day(close_date, data.get('closed_by', 'system'))
+        return jsonify(close.to_dict())
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@sales_api.route('/daily/<date>/reopen', methods=['POST'])
+def reopen_day(date):
+    """反结账"""
+    try:
+        data = request.get_json(silent=True) or {}
+        
+        if not data.get('reason'):
+            return jsonify({'error': '反结账原因不能为空'}), 400
+        
+        close_date = datetime.strptime(date, '%Y-%m-%d').date()
+        close = CloseService.reopen_day(close_date, data['reason'], data.get('reopened_by', 'system'))
+        return jsonify(close.to_dict())
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
 # ==================== 回款管理 API ====================
 
 @sales_api.route('/credit-sales', methods=['GET'])
@@ -152,6 +275,7 @@ def get_credit_sales():
 
 
 @sales_api.route('/remittance', methods=['POST'])
+@idempotent
 def create_remittance():
     """创建回款记录"""
     try:
@@ -182,6 +306,49 @@ def create_remittance():
         )
         
         return jsonify(remittance.to_dict()), 201
+    except RemittanceConflictError as e:
+        return jsonify({'error': str(e)}), 409
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@sales_api.route('/remittances/allocate', methods=['POST'])
+@idempotent
+def allocate_remittance():
+    """按客户分配回款（从最早的未结清信用销售单开始）"""
+    try:
+        data = request.get_json()
+        
+        # 验证必填字段
+        if not data.get('customer_id'):
+            return jsonify({'error': '客户不能为空'}), 400
+        if not data.get('amount'):
+            return jsonify({'error': '回款金额不能为空'}), 400
+        if not data.get('created_by'):
+            return jsonify({'error': '创建人不能为空'}), 400
+        
+        # 解析回款时间
+        remittance_time = None
+        if data.get('remittance_time'):
+            try:
+                remittance_time = datetime.fromisoformat(data['remittance_time'])
+            except ValueError:
+                return jsonify({'error': '回款时间格式错误'}), 400
+        
+        result = RemittanceService.allocate_remittance(
+            customer_id=data['customer_id'],
+            amount=data['amount'],
+            created_by=data['created_by'],
+            notes=data.get('notes'),
+            remittance_time=remittance_time
+        )
+        
+        return jsonify(result), 201
+    except RemittanceConflictError as e:
+        return jsonify({'error': str(e)}), 409
     except ValueError as e:
         return jsonify({'error': str(e)}), 400
     except Exception as e:
@@ -24,6 +24,12 @@ class Config:
     # 业务配置
     DEFAULT_OPERATOR = 'Jose Burgueno'
     INVENTORY_WARNING_THRESHOLD = 100  # 库存预警阈值（KG）
+    REMITTANCE_LOCK_TIMEOUT_MS = 5000  # 回款时等待销售单行锁的最长时间（毫秒）
+    REMITTANCE_RETRY_ATTEMPTS = 3  # 回款并发冲突时的重试次数
+    IDEMPOTENCY_KEY_TTL_HOURS = 24  # 幂等键保留时间（小时）
+    AUTO_CLOSE_LOOKBACK_DAYS = 7  # 自动日结只处理最近几天的销售日期，更早的未日结日期需手动日结
+    AUTO_CLOSE_GRACE_DAYS = 1  # 销售日期结束后再等待的天数才自动日结，留给离线设备同步当天的销售单
+    IDEMPOTENCY_PENDING_TIMEOUT_SECONDS = 300  # 处理中的幂等键超过该时间视为中断（进程退出未完成），允许重新登记
     
     # 国际化配置
     BABEL_DEFAULT_LOCALE = 'zh'
@@ -33,6 +39,38 @@ class Config:
     # 时区配置
     TIMEZONE = 'America/Mazatlan'  # 墨西哥马萨特兰时区 (MST/MDT)
     
+    # 静态资源配置
+    STATIC_FINGERPRINT = True  # 静态文件名带内容哈希并长期缓存
+    
+    # 导出任务配置（接口带 async=1 时在后台线程池中生成文件，见 app/utils/export_jobs.py）
+    EXPORT_MAX_WORKERS = 2  # 后台导出线程数
+    EXPORT_MAX_QUEUED = 10  # 排队和运行中的后台导出上限，超过时返回 429
+    EXPORT_MAX_INLINE = 1  # 同时在请求线程中执行的导出上限（Waitress 默认 4 个线程）
+    EXPORT_MAX_STREAMS = 1  # 同时进行的流式下载上限（下载期间一直占用请求线程），超过时返回 429
+    EXPORT_TTL_SECONDS = 3600  # 导出结果文件保留时间（秒）
+    EXPORT_DIR = os.environ.get('EXPORT_DIR')  # 导出结果目录，默认系统临时目录下的 sales_exports
+    
+    # 分析数据快照目录（Parquet，按月分区），默认 instance/analytics
+    ANALYTICS_DIR = os.environ.get('ANALYTICS_DIR')
+    
+    # 定时任务配置（只在指定的一个进程中设置 SCHEDULER_ENABLED=1，由 serve.py / run.py 启动）
+    SCHEDULER_ENABLED = os.environ.get('SCHEDULER_ENABLED', '').lower() in ('1', 'true', 'yes')
+    SCHEDULER_POLL_SECONDS = 30  # 检查到期任务的间隔（秒）
+    JOB_RUN_RETENTION_DAYS = 90  # 任务运行记录保留天数
+    # 任务计划（cron 格式：分 时 日 月 星期，本地时区），值为 None 时停用该任务
+    SCHEDULER_JOBS = {
+        'purge_idempotency_keys': '17 * * * *',
+        'build_stock_snapshots': '15 0 * * *',
+        # 自动日结默认停用，确认历史日期已手动日结后可设为 '30 0 * * *'；
+        # 启用后只结 AUTO_CLOSE_GRACE_DAYS 天之前、AUTO_CLOSE_LOOKBACK_DAYS 天内有销售的日期
+        'close_previous_day': None,
+        'fix_sale_totals': '0 2 * * *',
+        'check_integrity': '30 2 * * *',
+        'rebuild_product_costs': '0 3 * * 0',
+        'export_analytics': '30 3 * * *',
+        'warm_caches': '30 5 * * *',
+    }
+    
     @staticmethod
     def init_app(app):
         pass
@@ -43,6 +81,7 @@ class DevelopmentConfig(Config):
     SQLALCHEMY_DATABASE_URI = os.environ.get('DEV_DATABASE_URL') or \
         'sqlite:///sales.db'
     SQLALCHEMY_ECHO = False  # 设置为True可以看到SQL语句
+    STATIC_FINGERPRINT = False  # 开发时静态文件频繁修改，不做指纹
 
 class ProductionConfig(Config):
     """生产环境配置"""
@@ -71,7 +110,8 @@ class ProductionConfig(Config):
 class TestingConfig(Config):
     """测试环境配置"""
     TESTING = True
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL') or \
+        'sqlite:///:memory:'
     WTF_CSRF_ENABLED = False
 
 config = {
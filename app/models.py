@@ -114,6 +114,8 @@ class Customer(db.Model):
     name = db.Column(db.String(100), unique=True, nullable=False)
     credit_allowed = db.Column(db.Boolean, default=False, nullable=False)
     active = db.Column(db.Boolean, default=True, nullable=False)
+    credit_limit = db.Column(db.Numeric(12, 2))  # 信用额度（为空表示不限额）
+    balance = db.Column(db.Numeric(12, 2), default=0, server_default='0', nullable=False)  # 当前应收余额（由客户账簿记账时维护）
     created_at = db.Column(db.DateTime, default=timezone.now, nullable=False)
     created_by = db.Column(db.String(50), nullable=False)
     updated_at = db.Column(db.DateTime, onupdate=timezone.now)
@@ -127,6 +129,7 @@ class Customer(db.Model):
             'id': self.id,
             'name': self.name,
             'credit_allowed': self.credit_allowed,
+            'credit_limit': float(self.credit_limit) if self.credit_limit is not None else None,
             'active': self.active
         }
     
@@ -185,7 +188,12 @@ class Memo(db.Model):
     updated_at = db.Column(db.DateTime, onupdate=timezone.now)
     updated_by = db.Column(db.String(50))
     
-    def to_dict(self):
+    def to_dict(self, references=None):
+        """
+        Args:
+            references: 预先批量加载的关联单据 {('sale', id): Sale, ('purchase', id): Purchase}，
+                        为None时单独查询（见 Memo.list_to_dict）
+        """
         result = {
             'id': self.id,
             'content': self.content,
@@ -200,31 +208,66 @@ class Memo(db.Model):
         
         # 如果有关联，获取关联详情
         if self.reference_type and self.reference_id:
-            if self.reference_type == 'sale':
-                sale = Sale.query.get(self.reference_id)
-                if sale:
-                    result['reference_details'] = {
-                        'type': 'sale',
-                        'id': sale.id,
-                        'customer_name': sale.customer.name if sale.customer else 'Unknown',
-                        'date': sale.sale_time.isoformat() if sale.sale_time else None,
-                        'amount': float(sale.total_amount) if sale.total_amount else 0,
-                        'weight': float(sale.total_kg) if sale.total_kg else 0
-                    }
-            elif self.reference_type == 'purchase':
-                purchase = Purchase.query.get(self.reference_id)
-                if purchase:
-                    result['reference_details'] = {
-                        'type': 'purchase',
-                        'id': purchase.id,
-                        'supplier_name': purchase.supplier,
-                        'date': purchase.purchase_time.isoformat() if purchase.purchase_time else None,
-                        'amount': float(purchase.total_amount) if purchase.total_amount else 0,
-                        'weight': float(purchase.total_weight) if purchase.total_weight else 0
-                    }
+            if references is None:
+                references = Memo.load_references([self])
+            
+            details = Memo._reference_details(
+                references.get((self.reference_type, self.reference_id))
+            )
+            if details:
+                result['reference_details'] = details
         
         return result
     
+    @staticmethod
+    def load_references(memos):
+        """
+        批量加载备忘录关联的销售单/采购单（每种类型一次IN查询，客户名称取销售单快照）
+        
+        Returns:
+            dict: {('sale', id): Sale, ('purchase', id): Purchase}
+        """
+        sale_ids = {m.reference_id for m in memos if m.reference_type == 'sale' and m.reference_id}
+        purchase_ids = {m.reference_id for m in memos if m.reference_type == 'purchase' and m.reference_id}
+        
+        references = {}
+        if sale_ids:
+            sales = Sale.query.filter(Sale.id.in_(sale_ids)).all()
+            references.update({('sale', sale.id): sale for sale in sales})
+        if purchase_ids:
+            purchases = Purchase.query.filter(Purchase.id.in_(purchase_ids)).all()
+            references.update({('purchase', purchase.id): purchase for purchase in purchases})
+        return references
+    
+    @staticmethod
+    def list_to_dict(memos):
+        """批量序列化备忘录列表"""
+        references = Memo.load_references(memos)
+        return [memo.to_dict(references=references) for memo in memos]
+    
+    @staticmethod
+    def _reference_details(reference):
+        """关联单据摘要"""
+        if isinstance(reference, Sale):
+            return {
+                'type': 'sale',
+                'id': reference.id,
+                'customer_name': reference.customer_name or 'Unknown',
+                'date': reference.sale_time.isoformat() if reference.sale_time else None,
+                'amount': float(reference.total_amount) if reference.total_amount else 0,
+                'weight': float(reference.total_kg) if reference.total_kg else 0
+            }
+        if isinstance(reference, Purchase):
+            return {
+                'type': 'purchase',
+                'id': reference.id,
+                'supplier_name': reference.supplier,
+                'date': reference.purchase_time.isoformat() if reference.purchase_time else None,
+                'amount': float(reference.total_amount) if reference.total_amount else 0,
+                'weight': float(reference.total_kg) if reference.total_kg else 0
+            }
+        return None
+    
     def __repr__(self):
         return f'<Memo {self.id}>'
 
@@ -292,6 +335,7 @@ class PurchaseItem(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     purchase_id = db.Column(db.String(50), db.ForeignKey('purchase.id'), nullable=False)
     product_name = db.Column(db.String(100), nullable=False)
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=True)  # 商品ID（商品改名后仍指向同一商品）
     kg = db.Column(db.Numeric(10, 3), nullable=False)
     unit_price = db.Column(db.Numeric(10, 2), nullable=False)
     total_amount = db.Column(db.Numeric(12, 2), nullable=False)
@@ -306,6 +350,7 @@ class PurchaseItem(db.Model):
         return {
             'id': self.id,
             'product_name': self.product_name,
+            'product_id': self.product_id,
             'kg': float(self.kg),
             'unit_price': float(self.unit_price),
             'total_amount': float(self.total_amount)
@@ -322,12 +367,14 @@ class Sale(db.Model):
     id = db.Column(db.String(50), primary_key=True)
     sale_time = db.Column(db.DateTime, nullable=False)
     customer_id = db.Column(db.Integer, db.ForeignKey('customer.id'), nullable=False)
+    customer_name = db.Column(db.String(100))  # 客户名称快照（创建时写入）
     payment_type = db.Column(db.String(20), nullable=False)
     total_kg = db.Column(db.Numeric(12, 3), default=0, nullable=False)
     total_amount = db.Column(db.Numeric(12, 2), default=0, nullable=False)  # 总金额
     discount = db.Column(db.Numeric(12, 2), default=0)  # 折扣金额
     manual_total_amount = db.Column(db.Numeric(12, 2))  # 手动设置的总金额（覆盖计算值）
     payment_status = db.Column(db.String(20), default='unpaid', nullable=False)  # 收款状态：unpaid/partial/paid
+    version = db.Column(db.Integer, default=0, server_default='0', nullable=False)  # 版本号（回款时乐观锁校验）
     status = db.Column(db.String(20), default='active', nullable=False)
     void_reason = db.Column(db.Text)
     void_time = db.Column(db.DateTime)
@@ -356,6 +403,8 @@ class Sale(db.Model):
         data = {
             'id': self.id,
             'sale_time': self.sale_time.isoformat() if self.sale_time else None,
+            'customer_id': self.customer_id,
+            'customer_name': self.customer_name,  # 创建时的客户名称快照
             'customer': self.customer.to_dict() if self.customer else None,
             'payment_type': self.payment_type,
             'payment_status': self.payment_status,
@@ -418,12 +467,16 @@ class SaleItem(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     sale_id = db.Column(db.String(50), db.ForeignKey('sale.id'), nullable=False)
     spec_id = db.Column(db.Integer, db.ForeignKey('spec.id'), nullable=False)
+    spec_name = db.Column(db.String(100))  # 规格名称快照
+    kg_per_box = db.Column(db.Numeric(10, 3))  # 单箱重量快照（之后修改规格不影响历史明细）
     product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=True)  # 商品ID(可选)
     box_qty = db.Column(db.Integer, default=0, nullable=False)
     extra_kg = db.Column(db.Numeric(10, 3), default=0, nullable=False)
     subtotal_kg = db.Column(db.Numeric(12, 3), default=0, nullable=False)
     unit_price = db.Column(db.Numeric(10, 2), nullable=True)  # 单价（每KG）
     total_amount = db.Column(db.Numeric(12, 2), default=0, nullable=False)  # 小计金额
+    unit_cost = db.Column(db.Numeric(12, 4), nullable=True)  # 创建时的加权平均成本（每KG）
+    cost_amount = db.Column(db.Numeric(12, 2), nullable=True)  # 成本金额
     created_at = db.Column(db.DateTime, default=timezone.now, nullable=False)
     
     __table_args__ = (
@@ -432,14 +485,24 @@ class SaleItem(db.Model):
     )
     
     def calculate_subtotal(self):
-        """计算小计重量"""
-        if self.spec:
-            self.subtotal_kg = self.box_qty * self.spec.kg_per_box + self.extra_kg
+        """计算小计重量（优先使用单箱重量快照）"""
+        kg_per_box = self.kg_per_box
+        if kg_per_box is None and self.spec:
+            kg_per_box = self.spec.kg_per_box
+        if kg_per_box is not None:
+            self.subtotal_kg = self.box_qty * kg_per_box + self.extra_kg
     
     def to_dict(self):
         return {
             'id': self.id,
-            'spec': self.spec.to_dict() if self.spec else None,
+            'spec_id': self.spec_id,
+            'spec_name': self.spec_name,
+            'kg_per_box': float(self.kg_per_box) if self.kg_per_box is not None else None,
+            'spec': {
+                'id': self.spec_id,
+                'name': self.spec_name,
+                'kg_per_box': float(self.kg_per_box) if self.kg_per_box is not None else None
+            },
             'product': self.product.to_dict() if self.product else None,
             'box_qty': self.box_qty,
             'extra_kg': float(self.extra_kg),
@@ -562,6 +625,262 @@ class InventoryCheck(db.Model):
         return f'<InventoryCheck {self.id}>'
 
 
+class StockSnapshot(db.Model):
+    """库存日结快照表（每日收盘库存，按商品及合计）"""
+    __tablename__ = 'stock_snapshot'
+    
+    # 合计行使用的 product_name
+    TOTAL = '__total__'
+    # 未指定商品的明细使用的 product_name
+    UNASSIGNED = '__none__'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    snapshot_date = db.Column(db.Date, nullable=False)
+    product_id = db.Column(db.Integer, nullable=True)  # 商品ID，合计行和未指定商品行为空
+    product_name = db.Column(db.String(100), nullable=False)  # 生成快照时的商品名称，合计行为 TOTAL，未指定商品为 UNASSIGNED
+    closing_kg = db.Column(db.Numeric(12, 3), default=0, nullable=False)  # 当日收盘库存
+    created_at = db.Column(db.DateTime, default=timezone.now, nullable=False)
+    
+    __table_args__ = (
+        db.UniqueConstraint('product_name', 'snapshot_date', name='uq_stock_snapshot_product_date'),
+        db.Index('idx_stock_snapshot_date', 'snapshot_date'),
+    )
+    
+    def to_dict(self):
+        return {
+            'snapshot_date': self.snapshot_date.isoformat() if self.snapshot_date else None,
+            'product_id': self.product_id,
+            'product_name': None if self.product_name == StockSnapshot.TOTAL else self.product_name,
+            'closing_kg': float(self.closing_kg)
+        }
+    
+    def __repr__(self):
+        return f'<StockSnapshot {self.snapshot_date} {self.product_name}>'
+
+
+class DailyProfit(db.Model):
+    """已结束日期的利润缓存（FIFO成本，按商品及合计）"""
+    __tablename__ = 'daily_profit'
+    
+    # 合计行使用的 product_name
+    TOTAL = '__total__'
+    # 未指定商品的销售明细
+    UNASSIGNED = '__none__'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    profit_date = db.Column(db.Date, nullable=False)
+    product_id = db.Column(db.Integer, nullable=True)  # 商品ID，合计行和未指定商品行为空
+    product_name = db.Column(db.String(100), nullable=False)  # 缓存时的商品名称，合计行为 TOTAL，未指定商品为 UNASSIGNED
+    sold_kg = db.Column(db.Numeric(12, 3), default=0, nullable=False)
+    revenue = db.Column(db.Numeric(12, 2), default=0, nullable=False)  # 销售收入（销售单金额按明细分摊）
+    cost = db.Column(db.Numeric(12, 2), default=0, nullable=False)  # FIFO成本
+    uncosted_kg = db.Column(db.Numeric(12, 3), default=0, nullable=False)  # 没有采购批次可匹配的重量
+    lot_state = db.Column(db.Text, nullable=True)  # 当日结束时剩余的 FIFO 批次（JSON），只写在每次缓存的最后一天的合计行
+    created_at = db.Column(db.DateTime, default=timezone.now, nullable=False)
+    
+    __table_args__ = (
+        db.UniqueConstraint('product_name', 'profit_date', name='uq_daily_profit_product_date'),
+        db.Index('idx_daily_profit_date', 'profit_date'),
+    )
+    
+    def __repr__(self):
+        return f'<DailyProfit {self.profit_date} {self.product_name}>'
+
+
+class ProductCost(db.Model):
+    """商品加权平均成本（每次采购、销售增量更新）"""
+    __tablename__ = 'product_cost'
+    
+    # 全部商品合计行，用于未指定商品或从未采购的商品
+    ALL_PRODUCTS = '__all__'
+    
+    product_name = db.Column(db.String(100), primary_key=True)
+    qty_kg = db.Column(db.Numeric(14, 3), default=0, nullable=False)  # 按成本记录的结存重量
+    avg_cost = db.Column(db.Numeric(12, 4), default=0, nullable=False)  # 加权平均成本（每KG）
+    updated_at = db.Column(db.DateTime, default=timezone.now, onupdate=timezone.now)
+    
+    def to_dict(self):
+        return {
+            'product_name': self.product_name,
+            'qty_kg': float(self.qty_kg),
+            'avg_cost': float(self.avg_cost),
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+    
+    def __repr__(self):
+        return f'<ProductCost {self.product_name} {self.avg_cost}>'
+
+
+class DailyClose(db.Model):
+    """日结记录（结账时冻结的每日汇总，结账后该日单据不可修改，需先反结账）"""
+    __tablename__ = 'daily_close'
+    
+    # 冻结的汇总字段（与 SaleService.get_sales_by_date 返回的汇总一致）
+    SUMMARY_FIELDS = (
+        'total_kg', 'total_amount', 'cash_kg', 'credit_kg', 'cash_amount', 'credit_amount',
+        'total_cost', 'profit', 'remittances_amount', 'daily_cash_income'
+    )
+    
+    close_date = db.Column(db.Date, primary_key=True)
+    status = db.Column(db.String(20), default='closed', nullable=False)  # closed/reopened
+    order_count = db.Column(db.Integer, default=0, nullable=False)
+    total_kg = db.Column(db.Numeric(12, 3), default=0, nullable=False)
+    total_amount = db.Column(db.Numeric(12, 2), default=0, nullable=False)
+    cash_kg = db.Column(db.Numeric(12, 3), default=0, nullable=False)
+    credit_kg = db.Column(db.Numeric(12, 3), default=0, nullable=False)
+    cash_amount = db.Column(db.Numeric(12, 2), default=0, nullable=False)
+    credit_amount = db.Column(db.Numeric(12, 2), default=0, nullable=False)
+    total_cost = db.Column(db.Numeric(12, 2), default=0, nullable=False)
+    profit = db.Column(db.Numeric(12, 2), default=0, nullable=False)
+    remittances_amount = db.Column(db.Numeric(12, 2), default=0, nullable=False)  # 当天销售的回款（结账后的回款累加）
+    daily_cash_income = db.Column(db.Numeric(12, 2), default=0, nullable=False)
+    costing_method = db.Column(db.String(20))  # 结账时的成本方法
+    closed_at = db.Column(db.DateTime, default=timezone.now, nullable=False)
+    closed_by = db.Column(db.String(50), nullable=False)
+    reopened_at = db.Column(db.DateTime)
+    reopened_by = db.Column(db.String(50))
+    reopen_reason = db.Column(db.Text)
+    
+    __table_args__ = (
+        CheckConstraint("status IN ('closed', 'reopened')", name='check_daily_close_status'),
+    )
+    
+    def to_summary(self):
+        """与 get_sales_by_date 相同结构的汇总字典"""
+        return {field: float(getattr(self, field)) for field in self.SUMMARY_FIELDS}
+    
+    def to_dict(self):
+        return {
+            'close_date': self.close_date.isoformat(),
+            'status': self.status,
+            'order_count': self.order_count,
+            'summary': self.to_summary(),
+            'costing_method': self.costing_method,
+            'closed_at': self.closed_at.isoformat() if self.closed_at else None,
+            'closed_by': self.closed_by,
+            'reopened_at': self.reopened_at.isoformat() if self.reopened_at else None,
+            'reopened_by': self.reopened_by,
+            'reopen_reason': self.reopen_reason
+        }
+    
+    def __repr__(self):
+        return f'<DailyClose {self.close_date} {self.status}>'
+
+
+class JobLease(db.Model):
+    """定时任务租约（多个进程启用调度器时，每次计划执行只由一个进程运行）"""
+    __tablename__ = 'job_lease'
+    
+    job_name = db.Column(db.String(50), primary_key=True)
+    last_slot = db.Column(db.DateTime)  # 最近一次被领取的计划执行时间
+    owner = db.Column(db.String(100))  # 持有租约的进程（主机名:进程号）
+    lease_until = db.Column(db.DateTime)  # 租约到期时间（进程异常退出后到期释放）
+    
+    def __repr__(self):
+        return f'<JobLease {self.job_name} {self.owner}>'
+
+
+class JobRun(db.Model):
+    """定时任务运行记录"""
+    __tablename__ = 'job_run'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    job_name = db.Column(db.String(50), nullable=False)
+    trigger = db.Column(db.String(20), default='schedule', nullable=False)  # schedule/manual
+    owner = db.Column(db.String(100), nullable=False)
+    started_at = db.Column(db.DateTime, nullable=False)
+    finished_at = db.Column(db.DateTime)
+    duration_ms = db.Column(db.Integer)
+    status = db.Column(db.String(20), default='running', nullable=False)  # running/success/failed
+    message = db.Column(db.Text)  # 任务返回的结果说明或错误信息
+    
+    __table_args__ = (
+        db.Index('idx_job_run_job', 'job_name', 'id'),
+        db.Index('idx_job_run_started_at', 'started_at'),
+        CheckConstraint("status IN ('running', 'success', 'failed')", name='check_job_run_status'),
+    )
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'job_name': self.job_name,
+            'trigger': self.trigger,
+            'owner': self.owner,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'duration_ms': self.duration_ms,
+            'status': self.status,
+            'message': self.message
+        }
+    
+    def __repr__(self):
+        return f'<JobRun {self.job_name} {self.status}>'
+
+
+class IdempotencyKey(db.Model):
+    """幂等键表（客户端重试时返回首次请求的结果）"""
+    __tablename__ = 'idempotency_key'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(100), nullable=False)  # 客户端提供的 Idempotency-Key
+    endpoint = db.Column(db.String(100), nullable=False)  # 接口（幂等键按接口隔离）
+    request_hash = db.Column(db.String(64), nullable=False)  # 请求体哈希，防止同一个键用于不同请求
+    status = db.Column(db.String(20), default='pending', nullable=False)  # pending/completed
+    response_status = db.Column(db.Integer)
+    response_body = db.Column(db.Text)
+    response_mimetype = db.Column(db.String(100))
+    created_at = db.Column(db.DateTime, default=timezone.now, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    
+    __table_args__ = (
+        db.UniqueConstraint('endpoint', 'key', name='uq_idempotency_endpoint_key'),
+        db.Index('idx_idempotency_expires_at', 'expires_at'),
+        CheckConstraint("status IN ('pending','completed')", name='check_idempotency_status'),
+    )
+    
+    def __repr__(self):
+        return f'<IdempotencyKey {self.endpoint} {self.key}>'
+
+
+class CustomerLedger(db.Model):
+    """客户账簿（赊销、回款、作废冲销，记录每笔记账后的余额）"""
+    __tablename__ = 'customer_ledger'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    customer_id = db.Column(db.Integer, db.ForeignKey('customer.id'), nullable=False)
+    entry_time = db.Column(db.DateTime, nullable=False)  # 业务时间（销售时间/回款时间/作废时间）
+    entry_type = db.Column(db.String(20), nullable=False)  # charge/payment/void
+    reference_type = db.Column(db.String(20), nullable=False)  # sale/remittance
+    reference_id = db.Column(db.String(50), nullable=False)
+    amount = db.Column(db.Numeric(12, 2), nullable=False)  # 正数增加应收（赊销），负数减少应收（回款、作废）
+    balance = db.Column(db.Numeric(12, 2), nullable=False)  # 按记账顺序累计的余额
+    created_at = db.Column(db.DateTime, default=timezone.now, nullable=False)
+    created_by = db.Column(db.String(50), nullable=False)
+    
+    __table_args__ = (
+        db.UniqueConstraint('reference_type', 'reference_id', 'entry_type', name='uq_customer_ledger_reference'),
+        db.Index('idx_customer_ledger_customer', 'customer_id', 'id'),
+        db.Index('idx_customer_ledger_entry_time', 'entry_time'),
+        CheckConstraint("entry_type IN ('charge','payment','void')", name='check_customer_ledger_entry_type'),
+    )
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'customer_id': self.customer_id,
+            'entry_time': self.entry_time.isoformat() if self.entry_time else None,
+            'entry_type': self.entry_type,
+            'reference_type': self.reference_type,
+            'reference_id': self.reference_id,
+            'amount': float(self.amount),
+            'balance': float(self.balance),
+            'created_by': self.created_by
+        }
+    
+    def __repr__(self):
+        return f'<CustomerLedger {self.id} {self.entry_type} {self.reference_id}>'
+
+
 # ==================== 权限管理模型 ====================
 
 roles_permissions = db.Table('roles_permissions',
@@ -645,14 +964,38 @@ class AnonymousUser(AnonymousUserMixin):
 
 # ==================== SQLAlchemy事件监听器（模拟触发器） ====================
 
+def _snapshot_spec(connection, target):
+    """把规格名称和单箱重量写入销售明细快照"""
+    row = connection.execute(
+        db.select(Spec.name, Spec.kg_per_box).where(Spec.id == target.spec_id)
+    ).first()
+    if row:
+        target.spec_name, target.kg_per_box = row.name, row.kg_per_box
+
+
+def _calculate_subtotal_from_snapshot(target):
+    if target.kg_per_box is not None:
+        target.subtotal_kg = target.box_qty * target.kg_per_box + target.extra_kg
+
+
 @event.listens_for(SaleItem, 'before_insert')
+def calculate_sale_item_subtotal_on_insert(mapper, connection, target):
+    """新增明细时保存规格快照并计算小计"""
+    if target.spec_id and target.kg_per_box is None:
+        _snapshot_spec(connection, target)
+    _calculate_subtotal_from_snapshot(target)
+
+
 @event.listens_for(SaleItem, 'before_update')
-def calculate_sale_item_subtotal(mapper, connection, target):
-    """自动计算销售明细小计"""
-    if target.spec_id:
-        spec = db.session.query(Spec).get(target.spec_id)
-        if spec:
-            target.subtotal_kg = target.box_qty * spec.kg_per_box + target.extra_kg
+def calculate_sale_item_subtotal_on_update(mapper, connection, target):
+    """
+    修改明细时重新计算小计
+    只有更换规格时才刷新快照，规格本身的修改不影响已有明细
+    """
+    if target.spec_id and (target.kg_per_box is None
+                           or db.inspect(target).attrs.spec_id.history.has_changes()):
+        _snapshot_spec(connection, target)
+    _calculate_subtotal_from_snapshot(target)
 
 # DISABLED: This event listener conflicts with manual total_kg calculation in create_sale()
 # The manual calculation using database queries is more reliable and avoids
@@ -670,14 +1013,22 @@ def calculate_sale_item_subtotal(mapper, connection, target):
 #         sale.total_kg = total
 
 
+@event.listens_for(Sale, 'before_insert')
+def snapshot_sale_customer(mapper, connection, target):
+    """销售单创建时保存客户名称快照"""
+    if target.customer_name is None and target.customer_id:
+        target.customer_name = connection.scalar(
+            db.select(Customer.name).where(Customer.id == target.customer_id)
+        )
+
+
 @event.listens_for(Sale, 'after_insert')
 def create_stock_move_on_sale(mapper, connection, target):
     """销售时自动创建库存变动记录"""
     if target.status == 'active' and target.total_kg > 0:
-        customer = db.session.query(Customer).get(target.customer_id)
         stock_move = StockMove(
             move_type='销售',
-            source=customer.name if customer else 'Unknown',
+            source=target.customer_name or 'Unknown',
             kg=-target.total_kg,
             move_time=target.sale_time,
             reference_id=target.id,
@@ -705,6 +1056,102 @@ def void_stock_move_on_sale_void(mapper, connection, target):
             move.void_by = target.void_by
 
 
+def _earliest_closed_day(target, time_attr, tracked_attrs=None):
+    """单据变化影响到的最早的已结束日期（没有影响已结束日期时返回 None）"""
+    moments = [getattr(target, time_attr)]
+    if tracked_attrs is not None:
+        state = db.inspect(target)
+        if not any(state.attrs[attr].history.has_changes() for attr in tracked_attrs):
+            return None
+        # 修改了单据时间时，原日期同样受影响
+        moments.extend(state.attrs[time_attr].history.deleted or ())
+    
+    days = [moment.date() for moment in moments if moment is not None]
+    if not days:
+        return None
+    
+    day = min(days)
+    return day if day < timezone.get_current_date() else None
+
+
+def _invalidate_stock_snapshots(connection, target, time_attr, tracked_attrs=None):
+    """
+    已日结日期的单据发生变化（补录、作废、修改）时，删除该日期及之后的库存快照，
+    快照会在下次查询时按需重建
+    """
+    day = _earliest_closed_day(target, time_attr, tracked_attrs)
+    if day is None:
+        return
+    
+    connection.execute(
+        StockSnapshot.__table__.delete().where(StockSnapshot.snapshot_date >= day)
+    )
+
+
+def _invalidate_daily_profit(connection, target, time_attr, tracked_attrs=None):
+    """
+    已结束日期的销售/采购发生变化时，删除该日期及之后的利润缓存
+    （FIFO成本依赖之前的全部单据，之后每天的成本都可能变化）
+    """
+    day = _earliest_closed_day(target, time_attr, tracked_attrs)
+    if day is None:
+        return
+    
+    connection.execute(
+        DailyProfit.__table__.delete().where(DailyProfit.profit_date >= day)
+    )
+
+
+@event.listens_for(StockMove, 'after_insert')
+def invalidate_snapshots_on_stock_move_insert(mapper, connection, target):
+    _invalidate_stock_snapshots(connection, target, 'move_time')
+
+
+@event.listens_for(StockMove, 'after_update')
+def invalidate_snapshots_on_stock_move_update(mapper, connection, target):
+    _invalidate_stock_snapshots(connection, target, 'move_time', ('status', 'kg', 'move_time'))
+
+
+@event.listens_for(Sale, 'after_insert')
+def invalidate_snapshots_on_sale_insert(mapper, connection, target):
+    _invalidate_stock_snapshots(connection, target, 'sale_time')
+
+
+@event.listens_for(Sale, 'after_update')
+def invalidate_snapshots_on_sale_update(mapper, connection, target):
+    _invalidate_stock_snapshots(connection, target, 'sale_time', ('status', 'total_kg', 'sale_time'))
+
+
+@event.listens_for(Purchase, 'after_insert')
+def invalidate_snapshots_on_purchase_insert(mapper, connection, target):
+    _invalidate_stock_snapshots(connection, target, 'purchase_time')
+
+
+@event.listens_for(Purchase, 'after_update')
+def invalidate_snapshots_on_purchase_update(mapper, connection, target):
+    _invalidate_stock_snapshots(connection, target, 'purchase_time', ('status', 'total_kg', 'purchase_time'))
+
+
+@event.listens_for(Sale, 'after_insert')
+def invalidate_profit_on_sale_insert(mapper, connection, target):
+    _invalidate_daily_profit(connection, target, 'sale_time')
+
+
+@event.listens_for(Sale, 'after_update')
+def invalidate_profit_on_sale_update(mapper, connection, target):
+    _invalidate_daily_profit(connection, target, 'sale_time', ('status', 'total_kg', 'total_amount', 'sale_time'))
+
+
+@event.listens_for(Purchase, 'after_insert')
+def invalidate_profit_on_purchase_insert(mapper, connection, target):
+    _invalidate_daily_profit(connection, target, 'purchase_time')
+
+
+@event.listens_for(Purchase, 'after_update')
+def invalidate_profit_on_purchase_update(mapper, connection, target):
+    _invalidate_daily_profit(connection, target, 'purchase_time', ('status', 'total_kg', 'total_amount', 'purchase_time'))
+
+
 @event.listens_for(InventoryCheck, 'before_insert')
 @event.listens_for(InventoryCheck, 'before_update')
 def calculate_inventory_difference(mapper, connection, target):
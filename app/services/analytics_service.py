@@ -0,0 +1,283 @@
+"""
+分析数据快照服务
+把销售单、销售明细、采购单、回款按月导出为 Parquet 文件（hive 分区：<数据集>/month=YYYY-MM/），
+每次只重写新增或有变化的月份；即席分析查询直接用 pandas/pyarrow 读取这些文件做向量化聚合，
+不再占用生产数据库
+"""
+import json
+import os
+from datetime import date, datetime, timedelta
+from flask import current_app
+from sqlalchemy import func, select
+from app import db
+from app.models import Sale, SaleItem, Purchase, Remittance
+from app.utils import timezone
+
+
+class AnalyticsService:
+    """分析数据快照"""
+
+    DATASETS = ('sales', 'sale_items', 'purchases', 'remittances')
+
+    MANIFEST_FILE = '_manifest.json'
+    PARTITION_FILE = 'part-0.parquet'
+
+    # 导出时流式读取的每批行数
+    STREAM_BATCH_SIZE = 5000
+
+    # 即席查询支持的聚合函数
+    AGGREGATIONS = ('sum', 'mean', 'min', 'max', 'count', 'nunique')
+    MAX_QUERY_ROWS = 5000
+
+    @staticmethod
+    def get_directory():
+        return current_app.config.get('ANALYTICS_DIR') or os.path.join(current_app.instance_path, 'analytics')
+
+    @staticmethod
+    def _month(column):
+        """时间列 -> 'YYYY-MM'"""
+        dialect = db.engine.dialect.name
+        if dialect == 'postgresql':
+            return func.to_char(column, 'YYYY-MM')
+        if dialect == 'mysql':
+            return func.date_format(column, '%Y-%m')
+        return func.strftime('%Y-%m', column)
+
+    @staticmethod
+    def _dataset(name):
+        """
+        数据集定义
+
+        Returns:
+            tuple: (导出查询, 分区时间列, 指纹表达式)
+                   指纹表达式按月聚合，任何一项变化说明该月数据有新增或修改
+        """
+        if name == 'sales':
+            changed = func.max(func.coalesce(Sale.updated_at, Sale.void_time, Sale.created_at))
+            return (
+                select(*Sale.__table__.columns),
+                Sale.sale_time,
+                (func.count(), changed, func.sum(Sale.total_kg), func.sum(Sale.total_amount))
+            )
+        if name == 'sale_items':
+            # 明细按所属销售单的月份分区；成本重算会修改 cost_amount
+            changed = func.max(func.coalesce(Sale.updated_at, Sale.void_time, Sale.created_at))
+            return (
+                select(*SaleItem.__table__.columns, Sale.sale_time, Sale.status.label('sale_status'))
+                .join(Sale, SaleItem.sale_id == Sale.id),
+                Sale.sale_time,
+                (func.count(), changed, func.sum(SaleItem.subtotal_kg), func.sum(SaleItem.total_amount),
+                 func.sum(SaleItem.cost_amount))
+            )
+        if name == 'purchases':
+            changed = func.max(func.coalesce(Purchase.updated_at, Purchase.void_time, Purchase.created_at))
+            return (
+                select(*Purchase.__table__.columns),
+                Purchase.purchase_time,
+                (func.count(), changed, func.sum(Purchase.total_kg), func.sum(Purchase.total_amount))
+            )
+        if name == 'remittances':
+            return (
+                select(*Remittance.__table__.columns),
+                Remittance.remittance_time,
+                (func.count(), func.max(Remittance.created_at), func.sum(Remittance.amount))
+            )
+        raise ValueError(f"未知的数据集: {name}（可选：{', '.join(AnalyticsService.DATASETS)}）")
+
+    @staticmethod
+    def _fingerprints(name):
+        """{月份: 指纹}（一条按月分组的聚合查询）"""
+        query, time_column, fingerprint = AnalyticsService._dataset(name)
+        month = AnalyticsService._month(time_column)
+        statement = query.with_only_columns(month, *fingerprint, maintain_column_froms=True).group_by(month)
+        return {
+            row[0]: [str(value) if value is not None else None for value in row[1:]]
+            for row in db.session.execute(statement)
+        }
+
+    @staticmethod
+    def _load_manifest(directory):
+        path = os.path.join(directory, AnalyticsService.MANIFEST_FILE)
+        if not os.path.exists(path):
+            return {}
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+
+    @staticmethod
+    def _save_manifest(directory, manifest):
+        path = os.path.join(directory, AnalyticsService.MANIFEST_FILE)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(path + '.tmp', path)
+
+    @staticmethod
+    def _partition_dir(directory, name, month):
+        return os.path.join(directory, name, f'month={month}')
+
+    @staticmethod
+    def _write_month(directory, name, month):
+        """
+        导出一个月份的数据（先写临时文件再替换，读取方不会看到写了一半的文件）
+
+        Returns:
+            int: 行数
+        """
+        import pandas as pd
+
+        query, time_column, _ = AnalyticsService._dataset(name)
+        start = datetime.strptime(month, '%Y-%m')
+        end = (start + timedelta(days=32)).replace(day=1)
+        statement = query.where(time_column >= start, time_column < end).order_by(time_column)
+
+        columns = [column.name for column in statement.selected_columns]
+        numeric = [column.name for column in statement.selected_columns if isinstance(column.type, db.Numeric)]
+
+        result = db.session.execute(statement, execution_options={'yield_per': AnalyticsService.STREAM_BATCH_SIZE})
+        frames = [pd.DataFrame.from_records(rows, columns=columns) for rows in result.partitions()]
+        frame = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+        # Decimal 转为浮点数，便于向量化计算
+        for column in numeric:
+            frame[column] = pd.to_numeric(frame[column]).astype('float64')
+
+        partition_dir = AnalyticsService._partition_dir(directory, name, month)
+        os.makedirs(partition_dir, exist_ok=True)
+        path = os.path.join(partition_dir, AnalyticsService.PARTITION_FILE)
+        frame.to_parquet(path + '.tmp', engine='pyarrow', index=False)
+        os.replace(path + '.tmp', path)
+        return len(frame)
+
+    @staticmethod
+    def export(datasets=None, full=False):
+        """
+        增量导出：按月比较指纹，只重写新增或有变化的月份，删除数据库中已不存在的月份
+
+        Args:
+            datasets: 数据集名称列表（默认全部）
+            full: 为 True 时忽略已有快照，全部重写
+
+        Returns:
+            dict: {数据集: {'months': 重写的月份列表, 'rows': 行数, 'removed': 删除的月份列表}}
+        """
+        import shutil
+
+        datasets = list(datasets or AnalyticsService.DATASETS)
+        unknown = [name for name in datasets if name not in AnalyticsService.DATASETS]
+        if unknown:
+            raise ValueError(f"未知的数据集: {', '.join(unknown)}")
+        directory = AnalyticsService.get_directory()
+        os.makedirs(directory, exist_ok=True)
+        manifest = {} if full else AnalyticsService._load_manifest(directory)
+
+        summary = {}
+        for name in datasets:
+            if full:
+                shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+            fingerprints = AnalyticsService._fingerprints(name)
+            previous = manifest.get(name, {})
+            changed = sorted(month for month, fingerprint in fingerprints.items() if previous.get(month) != fingerprint)
+            removed = sorted(set(previous) - set(fingerprints))
+
+            rows = 0
+            for month in changed:
+                rows += AnalyticsService._write_month(directory, name, month)
+                previous[month] = fingerprints[month]
+                manifest[name] = previous
+                # 每个月份写完即记录，中断后重新运行只补做剩下的月份
+                AnalyticsService._save_manifest(directory, manifest)
+
+            for month in removed:
+                shutil.rmtree(AnalyticsService._partition_dir(directory, name, month), ignore_errors=True)
+                previous.pop(month, None)
+
+            manifest[name] = previous
+            summary[name] = {'months': changed, 'rows': rows, 'removed': removed}
+
+        manifest['_exported_at'] = timezone.now().isoformat()
+        AnalyticsService._save_manifest(directory, manifest)
+        return summary
+
+    @staticmethod
+    def load(name, date_from=None, date_to=None, columns=None):
+        """
+        读取快照为 DataFrame（只读取日期范围涉及的月份分区）
+
+        Args:
+            name: 数据集名称
+            date_from: 开始日期（含）
+            date_to: 结束日期（含）
+            columns: 读取的列（默认全部）
+
+        Returns:
+            DataFrame: 含分区列 month
+        """
+        import pandas as pd
+
+        _, time_column, _ = AnalyticsService._dataset(name)
+        path = os.path.join(AnalyticsService.get_directory(), name)
+        if not os.path.isdir(path):
+            return pd.DataFrame(columns=list(columns or []))
+
+        filters = []
+        if date_from:
+            filters.append(('month', '>=', date_from.strftime('%Y-%m')))
+        if date_to:
+            filters.append(('month', '<=', date_to.strftime('%Y-%m')))
+        if columns is not None and (date_from or date_to) and time_column.name not in columns:
+            columns = [*columns, time_column.name]
+
+        frame = pd.read_parquet(path, engine='pyarrow', columns=columns, filters=filters or None)
+        if date_from:
+            frame = frame[frame[time_column.name] >= pd.Timestamp(date_from)]
+        if date_to:
+            end = date_to + timedelta(days=1) if type(date_to) is date else date_to
+            frame = frame[frame[time_column.name] < pd.Timestamp(end)]
+        return frame
+
+    @staticmethod
+    def query(name, group_by=None, metrics=None, filters=None, date_from=None, date_to=None):
+        """
+        即席分析查询：按列过滤、分组，向量化聚合
+
+        Args:
+            name: 数据集名称
+            group_by: 分组列（可包含 month）
+            metrics: [(列, 聚合函数), ...]，默认只统计行数
+            filters: {列: 值}，按字符串相等过滤
+            date_from / date_to: 日期范围（含）
+
+        Returns:
+            list: 结果行（最多 MAX_QUERY_ROWS 行）
+        """
+        import pandas as pd
+
+        group_by = list(group_by or [])
+        metrics = list(metrics or [])
+        filters = dict(filters or {})
+
+        for _, aggregation in metrics:
+            if aggregation not in AnalyticsService.AGGREGATIONS:
+                raise ValueError(f"聚合函数必须是 {' / '.join(AnalyticsService.AGGREGATIONS)}")
+
+        frame = AnalyticsService.load(name, date_from, date_to)
+        unknown = {*group_by, *filters, *(column for column, _ in metrics)} - set(frame.columns)
+        if unknown and not frame.empty:
+            raise ValueError(f"未知的列: {', '.join(sorted(unknown))}")
+        if frame.empty:
+            return []
+
+        for column, value in filters.items():
+            frame = frame[frame[column].astype(str) == str(value)]
+
+        aggregations = {f'{column}_{aggregation}': (column, aggregation) for column, aggregation in metrics}
+        if group_by:
+            grouped = frame.groupby(group_by, observed=True, dropna=False)
+            result = grouped.agg(**aggregations) if aggregations else grouped.size().to_frame('rows')
+            result = result.reset_index()
+        elif aggregations:
+            result = pd.DataFrame([{
+                key: frame[column].agg(aggregation) for key, (column, aggregation) in aggregations.items()
+            }])
+        else:
+            return [{'rows': len(frame)}]
+
+        return json.loads(result.head(AnalyticsService.MAX_QUERY_ROWS).to_json(orient='records', date_format='iso'))
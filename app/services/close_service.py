@@ -0,0 +1,191 @@
+"""
+日结业务逻辑服务
+结账时把当天的销售汇总（含成本、利润、回款、入账）冻结到 daily_close，
+之后该日的销售单、采购单不能新增或作废，需先反结账；历史日期的汇总直接读取日结记录
+"""
+from app import db
+from flask import current_app
+from app.models import DailyClose, Sale, AuditLog
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from sqlalchemy import func, update
+import json
+from app.utils import timezone
+
+
+class DayClosedError(ValueError):
+    """单据日期已日结"""
+
+    def __init__(self, day):
+        super().__init__(f'{day.isoformat()} 已日结，修改该日单据需先反结账')
+        self.day = day
+
+
+class CloseService:
+    """日结业务逻辑"""
+
+    @staticmethod
+    def get_close(close_date):
+        """有效的日结记录（未结账或已反结账时返回 None）"""
+        close = db.session.get(DailyClose, close_date)
+        return close if close is not None and close.status == 'closed' else None
+
+    @staticmethod
+    def ensure_open(moment):
+        """
+        校验单据时间所在日期未日结
+
+        Raises:
+            DayClosedError: 该日期已日结
+        """
+        if moment is None:
+            return
+        day = moment.date() if hasattr(moment, 'date') else moment
+        if CloseService.get_close(day) is not None:
+            raise DayClosedError(day)
+
+    @staticmethod
+    def close_day(close_date, closed_by):
+        """
+        日结：按当前数据计算当天汇总并冻结
+
+        Args:
+            close_date: 日结日期（date，不能晚于今天）
+            closed_by: 操作人
+
+        Returns:
+            DailyClose: 日结记录
+        """
+        from app.services.sale_service import SaleService
+        from app.services.cost_service import CostService
+
+        if close_date > timezone.get_current_date():
+            raise ValueError('不能对未来日期日结')
+
+        close = db.session.get(DailyClose, close_date)
+        if close is not None and close.status == 'closed':
+            raise ValueError(f'{close_date.isoformat()} 已日结')
+
+        sales, summary = SaleService.get_sales_by_date(close_date, use_close=False)
+        costing_method = CostService.get_method()
+
+        action = 'INSERT' if close is None else 'UPDATE'
+        if close is None:
+            close = DailyClose(close_date=close_date)
+        close.status = 'closed'
+        close.order_count = len(sales)
+        for field in DailyClose.SUMMARY_FIELDS:
+            setattr(close, field, Decimal(str(round(summary[field], 3))))
+        close.costing_method = costing_method
+        close.closed_at = timezone.now()
+        close.closed_by = closed_by
+        db.session.add(close)
+
+        db.session.add(AuditLog(
+            table_name='daily_close',
+            record_id=close_date.isoformat(),
+            action=action,
+            new_value=json.dumps({'status': 'closed', 'order_count': close.order_count, **summary}),
+            created_by=closed_by
+        ))
+        db.session.commit()
+        return close
+
+    @staticmethod
+    def reopen_day(close_date, reason, reopened_by):
+        """
+        反结账：该日恢复为可修改，汇总重新实时计算，再次日结时重新冻结
+
+        Returns:
+            DailyClose: 日结记录（状态为 reopened）
+        """
+        if not reason:
+            raise ValueError('反结账原因不能为空')
+
+        close = CloseService.get_close(close_date)
+        if close is None:
+            raise ValueError(f'{close_date.isoformat()} 未日结')
+
+        close.status = 'reopened'
+        close.reopened_at = timezone.now()
+        close.reopened_by = reopened_by
+        close.reopen_reason = reason
+
+        db.session.add(AuditLog(
+            table_name='daily_close',
+            record_id=close_date.isoformat(),
+            action='UPDATE',
+            old_value=json.dumps({'status': 'closed'}),
+            new_value=json.dumps({'status': 'reopened', 'reason': reason}),
+            created_by=reopened_by
+        ))
+        db.session.commit()
+        return close
+
+    @staticmethod
+    def close_pending(until_date, closed_by, lookback_days=None):
+        """
+        日结 until_date 及之前 lookback_days 天内有销售、尚未日结的日期（定时任务使用）
+
+        更早的未日结日期不自动处理（首次启用时不会一次结掉全部历史，需要时手动日结）；
+        没有销售的日期不生成日结记录
+
+        Args:
+            until_date: 最晚日结到哪一天（含）
+            closed_by: 操作人
+            lookback_days: 向前检查的天数（含 until_date），默认配置 AUTO_CLOSE_LOOKBACK_DAYS
+
+        Returns:
+            list: 本次日结的日期
+        """
+        lookback_days = lookback_days or current_app.config.get('AUTO_CLOSE_LOOKBACK_DAYS', 7)
+        since_date = until_date - timedelta(days=lookback_days - 1)
+        start = datetime.combine(since_date, datetime.min.time())
+        end = datetime.combine(until_date + timedelta(days=1), datetime.min.time())
+        sale_days = {
+            day if isinstance(day, date) else date.fromisoformat(day)
+            for (day,) in db.session.query(func.date(Sale.sale_time)).filter(
+                Sale.status == 'active',
+                Sale.sale_time >= start,
+                Sale.sale_time < end
+            ).distinct()
+        }
+        closed_days = {
+            day for (day,) in db.session.query(DailyClose.close_date).filter(
+                DailyClose.status == 'closed',
+                DailyClose.close_date >= since_date,
+                DailyClose.close_date <= until_date
+            )
+        }
+
+        closed = []
+        for day in sorted(sale_days - closed_days):
+            CloseService.close_day(day, closed_by)
+            closed.append(day)
+        return closed
+
+    @staticmethod
+    def post_remittances(remittances):
+        """
+        已日结日期的销售收到回款时，累加到该日日结记录的回款和入账金额（不提交）
+
+        回款计入销售日期，结账后收到的回款不属于修改当天单据，不需要反结账
+        """
+        amounts = defaultdict(Decimal)
+        sale_ids = {remittance.sale_id for remittance in remittances}
+        sale_days = dict(db.session.query(Sale.id, Sale.sale_time).filter(Sale.id.in_(sale_ids)).all())
+        for remittance in remittances:
+            amounts[sale_days[remittance.sale_id].date()] += Decimal(str(remittance.amount))
+
+        for day, amount in amounts.items():
+            db.session.execute(
+                update(DailyClose).where(
+                    DailyClose.close_date == day,
+                    DailyClose.status == 'closed'
+                ).values(
+                    remittances_amount=DailyClose.remittances_amount + amount,
+                    daily_cash_income=DailyClose.daily_cash_income + amount
+                ),
+                execution_options={'synchronize_session': False}
+            )
@@ -0,0 +1,309 @@
+"""
+成本核算业务逻辑服务
+成本方法由系统配置 costing_method 选择：fifo（默认，按日 FIFO 计算）或 weighted_average；
+加权平均成本在每次采购、销售时增量更新，销售明细创建时记录当时的成本
+"""
+from app import db
+from app.models import (
+    Purchase, PurchaseItem, Sale, SaleItem, Product, ProductCost, SystemConfig
+)
+from decimal import Decimal
+from heapq import merge
+from itertools import groupby
+from sqlalchemy import case, update
+from sqlalchemy.exc import IntegrityError
+
+
+class CostService:
+    """成本核算业务逻辑"""
+
+    METHOD_FIFO = 'fifo'
+    METHOD_WEIGHTED_AVERAGE = 'weighted_average'
+    METHODS = (METHOD_FIFO, METHOD_WEIGHTED_AVERAGE)
+
+    # 重建时流式读取的每批行数
+    STREAM_BATCH_SIZE = 1000
+
+    @staticmethod
+    def get_method():
+        """当前成本方法"""
+        method = SystemConfig.get_value('costing_method', CostService.METHOD_FIFO)
+        return method if method in CostService.METHODS else CostService.METHOD_FIFO
+
+    @staticmethod
+    def set_method(method, updated_by=None):
+        if method not in CostService.METHODS:
+            raise ValueError(f'成本方法必须是 {" / ".join(CostService.METHODS)}')
+        SystemConfig.set_value(
+            'costing_method',
+            method,
+            description='成本方法（fifo / weighted_average）',
+            updated_by=updated_by
+        )
+
+    @staticmethod
+    def _receive(product_name, kg, unit_cost):
+        """
+        按单价入库：平均成本 = (结存重量 × 平均成本 + 入库重量 × 单价) / (结存重量 + 入库重量)
+
+        一条 UPDATE 完成计算（PostgreSQL 上持有行锁直到事务结束），
+        结存不大于 0 时平均成本直接取入库单价
+        """
+        kg = Decimal(str(kg))
+        unit_cost = Decimal(str(unit_cost))
+        statement = update(ProductCost).where(
+            ProductCost.product_name == product_name
+        ).values(
+            avg_cost=case(
+                (ProductCost.qty_kg > 0,
+                 (ProductCost.qty_kg * ProductCost.avg_cost + kg * unit_cost) / (ProductCost.qty_kg + kg)),
+                else_=unit_cost
+            ),
+            qty_kg=ProductCost.qty_kg + kg
+        )
+        result = db.session.execute(statement, execution_options={'synchronize_session': False})
+        if result.rowcount:
+            return
+
+        try:
+            with db.session.begin_nested():
+                db.session.add(ProductCost(product_name=product_name, qty_kg=kg, avg_cost=unit_cost))
+        except IntegrityError:
+            # 同时入库的请求已创建该商品的成本记录
+            db.session.execute(statement, execution_options={'synchronize_session': False})
+
+    @staticmethod
+    def _issue(product_name, kg):
+        """按当前平均成本出库，返回平均成本（没有成本记录时返回 None）"""
+        return db.session.execute(
+            update(ProductCost).where(
+                ProductCost.product_name == product_name
+            ).values(
+                qty_kg=ProductCost.qty_kg - Decimal(str(kg))
+            ).returning(ProductCost.avg_cost),
+            execution_options={'synchronize_session': False}
+        ).scalar_one_or_none()
+
+    @staticmethod
+    def _reverse(product_name, kg, amount):
+        """按重量和金额扣除入库（结存不大于 0 或金额为负时保留原平均成本）"""
+        remaining_amount = ProductCost.qty_kg * ProductCost.avg_cost - amount
+        db.session.execute(
+            update(ProductCost).where(
+                ProductCost.product_name == product_name
+            ).values(
+                avg_cost=case(
+                    (db.and_(ProductCost.qty_kg > kg, remaining_amount > 0),
+                     remaining_amount / (ProductCost.qty_kg - kg)),
+                    else_=ProductCost.avg_cost
+                ),
+                qty_kg=ProductCost.qty_kg - kg
+            ),
+            execution_options={'synchronize_session': False}
+        )
+
+    @staticmethod
+    def _product_names(items):
+        product_ids = {item.product_id for item in items if item.product_id}
+        if not product_ids:
+            return {}
+        return dict(db.session.query(Product.id, Product.name).filter(Product.id.in_(product_ids)).all())
+
+    @staticmethod
+    def _by_product(lines):
+        """
+        按商品名称排序分组：[(product_name, [(kg, 单价), ...]), ...]，并返回合计 (重量, 金额)
+
+        一张单据内的成本记录按固定顺序加锁（先按名称排序的商品行，最后全部商品行只更新一次），
+        避免商品顺序不同的两张单据并发时在 PostgreSQL 上互相等待对方的行锁（死锁）
+        """
+        groups = {}
+        total_kg = Decimal('0')
+        total_amount = Decimal('0')
+        for product_name, kg, unit_cost in lines:
+            kg = Decimal(str(kg))
+            unit_cost = Decimal(str(unit_cost))
+            if product_name:
+                groups.setdefault(product_name, []).append((kg, unit_cost))
+            total_kg += kg
+            total_amount += kg * unit_cost
+        return sorted(groups.items()), total_kg, total_amount
+
+    @staticmethod
+    def receive_purchase(purchase):
+        """采购入库，更新对应商品及全部商品的平均成本（不提交）"""
+        groups, total_kg, total_amount = CostService._by_product(
+            (item.product_name, item.kg, item.unit_price) for item in purchase.items
+        )
+        for product_name, lines in groups:
+            for kg, unit_cost in lines:
+                CostService._receive(product_name, kg, unit_cost)
+        if total_kg > 0:
+            CostService._receive(ProductCost.ALL_PRODUCTS, total_kg, total_amount / total_kg)
+
+    @staticmethod
+    def reverse_purchase(purchase):
+        """
+        作废采购单，从平均成本中扣除该采购（不提交）
+
+        扣除后结存不大于 0 或金额为负时保留原平均成本，需要精确结果时运行 rebuild
+        """
+        groups, total_kg, total_amount = CostService._by_product(
+            (item.product_name, item.kg, item.unit_price) for item in purchase.items
+        )
+        for product_name, lines in groups:
+            for kg, unit_cost in lines:
+                CostService._reverse(product_name, kg, kg * unit_cost)
+        if total_kg > 0:
+            CostService._reverse(ProductCost.ALL_PRODUCTS, total_kg, total_amount)
+
+    @staticmethod
+    def cost_sale(sale):
+        """
+        销售出库：每条明细按当前平均成本记录 unit_cost/cost_amount（不提交）
+
+        明细未指定商品或商品从未采购时使用全部商品的平均成本；
+        没有任何采购时成本为空。出库不改变平均成本，同一商品的明细合并为一次扣减
+        """
+        items = list(sale.items)
+        names = CostService._product_names(items)
+        groups, total_kg, _ = CostService._by_product(
+            (names.get(item.product_id), item.subtotal_kg or 0, 0) for item in items
+        )
+
+        product_costs = {
+            product_name: CostService._issue(product_name, sum(kg for kg, _ in lines))
+            for product_name, lines in groups
+        }
+        overall_cost = CostService._issue(ProductCost.ALL_PRODUCTS, total_kg) if items else None
+
+        for item in items:
+            kg = Decimal(str(item.subtotal_kg or 0))
+            unit_cost = product_costs.get(names.get(item.product_id))
+            if unit_cost is None:
+                unit_cost = overall_cost
+
+            if unit_cost is not None:
+                item.unit_cost = unit_cost
+                item.cost_amount = (kg * Decimal(str(unit_cost))).quantize(Decimal('0.01'))
+
+    @staticmethod
+    def restore_sale(sale):
+        """作废销售单，按明细记录的成本退回结存（不提交）"""
+        items = [item for item in sale.items if item.unit_cost is not None and item.subtotal_kg]
+        names = CostService._product_names(items)
+        groups, total_kg, total_amount = CostService._by_product(
+            (names.get(item.product_id), item.subtotal_kg, item.unit_cost) for item in items
+        )
+        for product_name, lines in groups:
+            for kg, unit_cost in lines:
+                CostService._receive(product_name, kg, unit_cost)
+        if total_kg > 0:
+            CostService._receive(ProductCost.ALL_PRODUCTS, total_kg, total_amount / total_kg)
+
+    @staticmethod
+    def get_daily_cost(start_datetime, end_datetime):
+        """时间范围内有效销售单已记录的成本合计"""
+        total = db.session.query(
+            db.func.sum(SaleItem.cost_amount)
+        ).join(
+            Sale, SaleItem.sale_id == Sale.id
+        ).filter(
+            Sale.status == 'active',
+            Sale.sale_time >= start_datetime,
+            Sale.sale_time <= end_datetime
+        ).scalar()
+        return float(total or 0)
+
+    @staticmethod
+    def rebuild():
+        """
+        按时间顺序重放全部有效采购和销售，重新计算平均成本和销售明细成本（提交）
+
+        用于新建 product_cost 表、作废单据后校正，以及补录历史单据之后
+
+        Returns:
+            int: 更新成本的销售明细数
+        """
+        purchases = (
+            ((row.purchase_time, 0), row)
+            for row in db.session.query(
+                Purchase.purchase_time, PurchaseItem.product_name, PurchaseItem.kg, PurchaseItem.unit_price
+            ).join(
+                PurchaseItem, PurchaseItem.purchase_id == Purchase.id
+            ).filter(
+                Purchase.status == 'active'
+            ).order_by(
+                Purchase.purchase_time, Purchase.id, PurchaseItem.id
+            ).execution_options(yield_per=CostService.STREAM_BATCH_SIZE)
+        )
+        sale_rows = db.session.query(
+            Sale.id, Sale.sale_time, SaleItem.id.label('item_id'), SaleItem.subtotal_kg,
+            Product.name.label('product_name')
+        ).join(
+            SaleItem, SaleItem.sale_id == Sale.id
+        ).outerjoin(
+            Product, SaleItem.product_id == Product.id
+        ).filter(
+            Sale.status == 'active'
+        ).order_by(
+            Sale.sale_time, Sale.id, SaleItem.id
+        ).execution_options(yield_per=CostService.STREAM_BATCH_SIZE)
+        sales = (
+            ((items[0].sale_time, 1), items)
+            for items in (list(group) for _, group in groupby(sale_rows, key=lambda row: row.id))
+        )
+
+        # {商品名称: [结存重量, 平均成本]}
+        costs = {}
+        item_costs = []
+
+        def receive(name, kg, unit_cost):
+            state = costs.setdefault(name, [Decimal('0'), unit_cost])
+            if state[0] > 0:
+                # 与 avg_cost 列的精度一致
+                state[1] = ((state[0] * state[1] + kg * unit_cost) / (state[0] + kg)).quantize(Decimal('0.0001'))
+            else:
+                state[1] = unit_cost
+            state[0] += kg
+
+        for (_, kind), payload in merge(purchases, sales, key=lambda event: event[0]):
+            if kind == 0:
+                kg, unit_cost = Decimal(str(payload.kg)), Decimal(str(payload.unit_price))
+                receive(payload.product_name, kg, unit_cost)
+                receive(ProductCost.ALL_PRODUCTS, kg, unit_cost)
+                continue
+
+            for item in payload:
+                kg = Decimal(str(item.subtotal_kg or 0))
+                state = costs.get(item.product_name) if item.product_name else None
+                overall = costs.get(ProductCost.ALL_PRODUCTS)
+                if state is not None:
+                    state[0] -= kg
+                if overall is not None:
+                    overall[0] -= kg
+                source = state or overall
+                if source is not None:
+                    unit_cost = source[1]
+                    item_costs.append({
+                        'id': item.item_id,
+                        'unit_cost': unit_cost,
+                        'cost_amount': (kg * unit_cost).quantize(Decimal('0.01'))
+                    })
+
+        db.session.execute(
+            update(SaleItem).values(unit_cost=None, cost_amount=None),
+            execution_options={'synchronize_session': False}
+        )
+        if item_costs:
+            # 按主键批量更新
+            db.session.execute(update(SaleItem), item_costs)
+
+        db.session.execute(ProductCost.__table__.delete())
+        if costs:
+            db.session.execute(ProductCost.__table__.insert(), [
+                {'product_name': name, 'qty_kg': qty_kg, 'avg_cost': avg_cost}
+                for name, (qty_kg, avg_cost) in costs.items()
+            ])
+        db.session.commit()
+        return len(item_costs)
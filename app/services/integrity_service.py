@@ -0,0 +1,352 @@
+"""
+数据一致性检查服务（取代 check_*/fix_* 系列脚本）
+每项检查是一条集合查询（聚合子查询 + 连接），只返回不一致的单据；
+修正模式按主键分批执行集合 UPDATE/INSERT，每批单独提交
+"""
+from app import db
+from app.models import (
+    Sale, SaleItem, StockMove, Remittance, DailyClose, DailyProfit, StockSnapshot
+)
+from datetime import date
+from sqlalchemy import case, func, insert, literal, select, update
+from app.utils import timezone
+
+
+class IntegrityService:
+    """数据一致性检查"""
+
+    # 每项检查返回的不一致单据样例数
+    SAMPLE_SIZE = 20
+
+    # 修正模式每批处理的单据数
+    DEFAULT_BATCH_SIZE = 1000
+    MAX_BATCH_SIZE = 10000
+
+    # 金额比较容差（明细金额逐条保留两位小数）
+    AMOUNT_TOLERANCE = 0.01
+
+    FIXED_BY = 'integrity_check'
+
+    @staticmethod
+    def _local_now():
+        """当前本地时间（naive，与数据库中保存的时间一致）"""
+        return timezone.now().replace(tzinfo=None)
+
+    @staticmethod
+    def _item_totals():
+        """按销售单汇总明细重量和金额"""
+        return select(
+            SaleItem.sale_id,
+            func.sum(SaleItem.subtotal_kg).label('items_kg'),
+            func.sum(func.coalesce(SaleItem.total_amount, 0)).label('items_amount')
+        ).group_by(SaleItem.sale_id).subquery()
+
+    @staticmethod
+    def _move_totals():
+        """按销售单汇总有效库存变动"""
+        return select(
+            StockMove.reference_id,
+            func.sum(StockMove.kg).label('moves_kg')
+        ).where(
+            StockMove.reference_type == 'sale',
+            StockMove.status == 'active'
+        ).group_by(StockMove.reference_id).subquery()
+
+    @staticmethod
+    def _active_move_exists():
+        return select(literal(1)).where(
+            StockMove.reference_type == 'sale',
+            StockMove.reference_id == Sale.id,
+            StockMove.status == 'active'
+        ).exists()
+
+    @staticmethod
+    def _expected_payment_status(paid):
+        """现金销售为 paid；信用销售按回款合计：无回款 unpaid，足额 paid，其余 partial"""
+        return case(
+            (Sale.payment_type == '现金', 'paid'),
+            (paid <= 0, 'unpaid'),
+            (paid >= Sale.total_amount, 'paid'),
+            else_='partial'
+        )
+
+    # ------------------------------------------------------------------
+    # 检查：返回 (Sale.id, Sale.sale_time) 的查询，只包含不一致的单据
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def check_total_kg():
+        items = IntegrityService._item_totals()
+        return select(Sale.id, Sale.sale_time).outerjoin(
+            items, items.c.sale_id == Sale.id
+        ).where(
+            Sale.status == 'active',
+            Sale.total_kg != func.coalesce(items.c.items_kg, 0)
+        )
+
+    @staticmethod
+    def check_total_amount():
+        items = IntegrityService._item_totals()
+        expected = func.coalesce(
+            Sale.manual_total_amount,
+            func.coalesce(items.c.items_amount, 0) - func.coalesce(Sale.discount, 0)
+        )
+        return select(Sale.id, Sale.sale_time).outerjoin(
+            items, items.c.sale_id == Sale.id
+        ).where(
+            Sale.status == 'active',
+            func.abs(Sale.total_amount - expected) > IntegrityService.AMOUNT_TOLERANCE
+        )
+
+    @staticmethod
+    def check_missing_stock_move():
+        return select(Sale.id, Sale.sale_time).where(
+            Sale.status == 'active',
+            Sale.total_kg > 0,
+            ~IntegrityService._active_move_exists()
+        )
+
+    @staticmethod
+    def check_stock_move_kg():
+        moves = IntegrityService._move_totals()
+        return select(Sale.id, Sale.sale_time).join(
+            moves, moves.c.reference_id == Sale.id
+        ).where(
+            Sale.status == 'active',
+            moves.c.moves_kg != -Sale.total_kg
+        )
+
+    @staticmethod
+    def check_void_stock_move():
+        return select(Sale.id, Sale.sale_time).where(
+            Sale.status == 'void',
+            IntegrityService._active_move_exists()
+        )
+
+    @staticmethod
+    def check_payment_status():
+        paid = select(
+            Remittance.sale_id,
+            func.sum(Remittance.amount).label('paid')
+        ).group_by(Remittance.sale_id).subquery()
+        expected = IntegrityService._expected_payment_status(func.coalesce(paid.c.paid, 0))
+        return select(Sale.id, Sale.sale_time).outerjoin(
+            paid, paid.c.sale_id == Sale.id
+        ).where(
+            Sale.status == 'active',
+            Sale.payment_status != expected
+        )
+
+    # ------------------------------------------------------------------
+    # 修正：参数为一批销售单ID（不提交），返回受影响的库存/利润缓存类型
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _touch_sales(sale_ids, **values):
+        db.session.execute(
+            update(Sale).where(Sale.id.in_(sale_ids)).values(
+                version=Sale.version + 1,
+                updated_by=IntegrityService.FIXED_BY,
+                updated_at=IntegrityService._local_now(),
+                **values
+            ),
+            execution_options={'synchronize_session': False}
+        )
+
+    @staticmethod
+    def _void_moves(sale_ids, reason):
+        db.session.execute(
+            update(StockMove).where(
+                StockMove.reference_type == 'sale',
+                StockMove.reference_id.in_(sale_ids),
+                StockMove.status == 'active'
+            ).values(
+                status='void',
+                void_reason=reason,
+                void_time=IntegrityService._local_now(),
+                void_by=IntegrityService.FIXED_BY
+            ),
+            execution_options={'synchronize_session': False}
+        )
+
+    @staticmethod
+    def _insert_moves(sale_ids):
+        """按销售单当前重量补建库存变动（与销售单 after_insert 监听器字段一致）"""
+        db.session.execute(insert(StockMove).from_select(
+            ['move_type', 'source', 'kg', 'move_time', 'reference_id', 'reference_type',
+             'status', 'created_at', 'created_by'],
+            select(
+                literal('销售'),
+                func.coalesce(Sale.customer_name, 'Unknown'),
+                -Sale.total_kg,
+                Sale.sale_time,
+                Sale.id,
+                literal('sale'),
+                literal('active'),
+                literal(IntegrityService._local_now()),
+                Sale.created_by
+            ).where(
+                Sale.id.in_(sale_ids),
+                Sale.status == 'active',
+                Sale.total_kg > 0
+            )
+        ))
+
+    @staticmethod
+    def fix_total_kg(sale_ids):
+        """total_kg 重新取明细小计合计（库存变动由之后的 stock_move_kg 检查同步）"""
+        IntegrityService._touch_sales(sale_ids, total_kg=select(
+            func.coalesce(func.sum(SaleItem.subtotal_kg), 0)
+        ).where(SaleItem.sale_id == Sale.id).scalar_subquery())
+        return (StockSnapshot, DailyProfit)
+
+    @staticmethod
+    def fix_missing_stock_move(sale_ids):
+        IntegrityService._insert_moves(sale_ids)
+        return (StockSnapshot,)
+
+    @staticmethod
+    def fix_stock_move_kg(sale_ids):
+        """作废原库存变动（含重复记录），按销售单重量重建一条"""
+        IntegrityService._void_moves(sale_ids, '数据校验：重量与销售单不一致')
+        IntegrityService._insert_moves(sale_ids)
+        return (StockSnapshot,)
+
+    @staticmethod
+    def fix_void_stock_move(sale_ids):
+        IntegrityService._void_moves(sale_ids, '数据校验：销售单已作废')
+        return (StockSnapshot,)
+
+    @staticmethod
+    def fix_payment_status(sale_ids):
+        paid = select(
+            func.coalesce(func.sum(Remittance.amount), 0)
+        ).where(Remittance.sale_id == Sale.id).scalar_subquery()
+        IntegrityService._touch_sales(
+            sale_ids, payment_status=IntegrityService._expected_payment_status(paid)
+        )
+        return ()
+
+    # 检查名称 -> (检查查询, 修正函数, 说明)；按顺序执行，total_kg 先于库存变动修正
+    # 金额不一致涉及客户账簿和已收款项，只报告，需人工核对
+    CHECKS = {
+        'sale_total_kg': (check_total_kg, fix_total_kg, '销售单总重量与明细小计合计一致'),
+        'sale_total_amount': (check_total_amount, None, '销售单总金额与明细金额、折扣、手动金额一致'),
+        'missing_stock_move': (check_missing_stock_move, fix_missing_stock_move, '有效销售单有库存变动'),
+        'stock_move_kg': (check_stock_move_kg, fix_stock_move_kg, '库存变动重量与销售单总重量一致'),
+        'void_stock_move': (check_void_stock_move, fix_void_stock_move, '作废销售单的库存变动已作废'),
+        'payment_status': (check_payment_status, fix_payment_status, '收款状态与回款合计一致'),
+    }
+
+    @staticmethod
+    def _invalidate_caches(day, caches):
+        """集合 UPDATE 不触发模型监听器，按修正单据的最早日期删除之后的库存快照/利润缓存"""
+        if day >= timezone.get_current_date():
+            return
+        for model in caches:
+            date_column = model.snapshot_date if model is StockSnapshot else model.profit_date
+            db.session.execute(model.__table__.delete().where(date_column >= day))
+
+    @staticmethod
+    def _check(query):
+        """不一致单据数和按ID排序的样例（一次查询，总数用窗口函数）"""
+        rows = db.session.execute(
+            select(query.c.id, func.count().over().label('total'))
+            .order_by(query.c.id)
+            .limit(IntegrityService.SAMPLE_SIZE)
+        ).all()
+        return (rows[0].total if rows else 0), [row.id for row in rows]
+
+    @staticmethod
+    def _fix(query, fix, batch_size, closed_days):
+        """
+        按销售单ID分批修正（键集分页），每批提交一次；已日结日期的单据只报告
+
+        Returns:
+            tuple: (修正数, 跳过的单据ID)
+        """
+        fixed, skipped = 0, []
+        last_id = None
+        while True:
+            batch = select(query.c.id, query.c.sale_time)
+            if last_id is not None:
+                batch = batch.where(query.c.id > last_id)
+            rows = db.session.execute(batch.order_by(query.c.id).limit(batch_size)).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            sale_ids, days = [], []
+            for row in rows:
+                day = row.sale_time.date() if row.sale_time is not None else None
+                if day in closed_days:
+                    skipped.append(row.id)
+                    continue
+                sale_ids.append(row.id)
+                if day is not None:
+                    days.append(day)
+
+            if sale_ids:
+                caches = fix(sale_ids)
+                if days:
+                    IntegrityService._invalidate_caches(min(days), caches)
+                db.session.commit()
+                fixed += len(sale_ids)
+
+            if len(rows) < batch_size:
+                break
+        return fixed, skipped
+
+    @staticmethod
+    def run(names=None, fix=False, batch_size=None):
+        """
+        运行一致性检查
+
+        Args:
+            names: 检查名称列表（默认全部）
+            fix: 是否修正可自动修正的项目
+            batch_size: 修正时每批单据数
+
+        Returns:
+            list: [{'name', 'description', 'count', 'sample', 'fixable', 'fixed', 'skipped'}, ...]
+                  count/sample 为修正之前的结果
+        """
+        names = list(names or IntegrityService.CHECKS)
+        unknown = [name for name in names if name not in IntegrityService.CHECKS]
+        if unknown:
+            raise ValueError(f"未知的检查项目: {', '.join(unknown)}")
+
+        batch_size = batch_size or IntegrityService.DEFAULT_BATCH_SIZE
+        if batch_size < 1 or batch_size > IntegrityService.MAX_BATCH_SIZE:
+            raise ValueError(f'batch_size 必须在 1 到 {IntegrityService.MAX_BATCH_SIZE} 之间')
+
+        closed_days = set()
+        if fix:
+            closed_days = {
+                day if isinstance(day, date) else date.fromisoformat(day)
+                for (day,) in db.session.query(DailyClose.close_date).filter(DailyClose.status == 'closed')
+            }
+
+        results = []
+        for name in IntegrityService.CHECKS:
+            if name not in names:
+                continue
+            check, fixer, description = IntegrityService.CHECKS[name]
+            query = check().subquery()
+            count, sample = IntegrityService._check(query)
+
+            result = {
+                'name': name,
+                'description': description,
+                'count': count,
+                'sample': sample,
+                'fixable': fixer is not None,
+                'fixed': 0,
+                'skipped': []
+            }
+            if fix and fixer is not None and count:
+                result['fixed'], result['skipped'] = IntegrityService._fix(
+                    query, fixer, batch_size, closed_days
+                )
+            results.append(result)
+        return results
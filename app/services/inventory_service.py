@@ -2,9 +2,10 @@
 库存业务逻辑服务
 """
 from app import db
-from app.models import StockMove, InventoryCheck
-from datetime import datetime, timedelta
+from app.models import StockMove, InventoryCheck, StockSnapshot
+from datetime import datetime, date, time, timedelta
 from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
 from app.utils import timezone
 
 class InventoryService:
@@ -181,41 +182,316 @@ class InventoryService:
     @staticmethod
     def get_stock_history(days=30):
         """
-        获取库存历史趋势
+        获取库存历史趋势（读取每日收盘快照，今天使用实时库存）
+        
+        定时任务尚未生成快照的日期在内存中补算，查询本身不写快照
         
         Args:
             days: 查询天数
             
         Returns:
-            list: 每日库存变动历史
+            list: 每日库存 [{'date', 'daily_change', 'cumulative_stock'}, ...]
         """
-        end_date = timezone.now()
-        start_date = end_date - timedelta(days=days)
-        
-        # 按日期分组统计
-        moves = db.session.query(
-            func.date(StockMove.move_time).label('date'),
-            func.sum(StockMove.kg).label('daily_change')
+        today = timezone.get_current_date()
+        start_day = today - timedelta(days=days)
+        yesterday = today - timedelta(days=1)
+        
+        # 多取一天作为第一天变动量的基数
+        closing = dict(db.session.query(
+            StockSnapshot.snapshot_date,
+            StockSnapshot.closing_kg
         ).filter(
-            StockMove.status == 'active',
-            StockMove.move_time >= start_date
-        ).group_by(
-            func.date(StockMove.move_time)
-        ).order_by('date').all()
+            StockSnapshot.product_name == StockSnapshot.TOTAL,
+            StockSnapshot.snapshot_date >= start_day - timedelta(days=1),
+            StockSnapshot.snapshot_date <= yesterday
+        ).all())
+        for day, balances in InventoryService._closing_balances(yesterday):
+            if day >= start_day - timedelta(days=1):
+                closing[day] = balances.get(StockSnapshot.TOTAL, 0.0)
+        closing[today] = InventoryService.get_current_stock()['current_stock_kg']
         
-        # 计算累计库存
         history = []
-        cumulative = 0
-        for move in moves:
-            cumulative += float(move.daily_change)
+        previous = float(closing.get(start_day - timedelta(days=1)) or 0)
+        day = start_day
+        while day <= today:
+            # 快照之前没有任何库存变动的日期按0处理
+            current = float(closing.get(day) or 0)
             history.append({
-                'date': move.date.isoformat(),
-                'daily_change': float(move.daily_change),
-                'cumulative_stock': cumulative
+                'date': day.isoformat(),
+                'daily_change': current - previous,
+                'cumulative_stock': current
             })
+            previous = current
+            day += timedelta(days=1)
         
         return history
     
+    @staticmethod
+    def get_stock_as_of(at, product_id=None):
+        """
+        查询任意时刻的库存：最近一天的收盘快照 + 快照之后到该时刻的变动
+        
+        只读取已有快照，不生成快照（快照由定时任务生成）
+        
+        Args:
+            at: 查询时刻（datetime，带时区时转换为本地时间）
+            product_id: 商品ID，为空时返回总库存
+            
+        Returns:
+            dict: {'at', 'product_id', 'stock_kg', 'snapshot_date'}
+        """
+        if at.tzinfo is not None:
+            at = timezone.to_local(at).replace(tzinfo=None)
+        
+        # 只有已结束的日期才有快照
+        previous_day = min(at.date(), timezone.get_current_date()) - timedelta(days=1)
+        
+        if product_id is not None:
+            key_filter = StockSnapshot.product_id == product_id
+        else:
+            key_filter = StockSnapshot.product_name == StockSnapshot.TOTAL
+        snapshot = StockSnapshot.query.filter(
+            key_filter,
+            StockSnapshot.snapshot_date <= previous_day
+        ).order_by(StockSnapshot.snapshot_date.desc()).first()
+        
+        if snapshot:
+            base_kg = float(snapshot.closing_kg)
+            since = datetime.combine(snapshot.snapshot_date + timedelta(days=1), time.min)
+        else:
+            # 该商品在快照范围内没有任何记录（或尚无快照）：从头累计
+            base_kg = 0.0
+            since = None
+        
+        if product_id is not None:
+            delta = InventoryService._product_change(product_id, since, at)
+        else:
+            query = db.session.query(func.sum(StockMove.kg)).filter(
+                StockMove.status == 'active',
+                StockMove.move_time <= at
+            )
+            if since is not None:
+                query = query.filter(StockMove.move_time >= since)
+            delta = float(query.scalar() or 0)
+        
+        return {
+            'at': at.isoformat(),
+            'product_id': product_id,
+            'stock_kg': base_kg + delta,
+            'snapshot_date': snapshot.snapshot_date.isoformat() if snapshot else None
+        }
+    
+    @staticmethod
+    def build_snapshots(until_day=None):
+        """
+        从最近一次快照开始，逐日生成收盘库存快照（按商品及合计）
+        
+        只由定时任务调用；已有快照的日期不会重复计算。
+        补录或作废历史单据时，模型监听器会删除受影响日期之后的快照。
+        
+        Args:
+            until_day: 生成到哪一天（含），默认昨天；不会超过昨天
+            
+        Returns:
+            int: 新生成的快照天数
+        """
+        from app.models import Product
+        
+        yesterday = timezone.get_current_date() - timedelta(days=1)
+        until_day = min(until_day or yesterday, yesterday)
+        
+        closing_days = InventoryService._closing_balances(until_day)
+        if not closing_days:
+            return 0
+        
+        names = dict(db.session.query(Product.id, Product.name).all())
+        created_at = timezone.now()
+        rows = [
+            {
+                'snapshot_date': day,
+                'product_id': key if isinstance(key, int) else None,
+                'product_name': names.get(key, f'#{key}') if isinstance(key, int) else key,
+                'closing_kg': round(kg, 3),
+                'created_at': created_at
+            }
+            for day, balances in closing_days
+            for key, kg in balances.items()
+        ]
+        
+        try:
+            db.session.execute(StockSnapshot.__table__.insert(), rows)
+            db.session.commit()
+        except IntegrityError:
+            # 其他进程已生成相同日期的快照
+            db.session.rollback()
+            return 0
+        
+        return len(closing_days)
+    
+    @staticmethod
+    def _snapshot_key(row):
+        """快照行的统计键：商品ID，合计行和未指定商品行为 TOTAL / UNASSIGNED"""
+        return row.product_id if row.product_id is not None else row.product_name
+    
+    @staticmethod
+    def _closing_balances(until_day):
+        """
+        从最近一次快照之后逐日累计到 until_day，返回尚无快照的各日收盘库存（只计算，不写入）
+        
+        Returns:
+            list: [(date, {商品ID / TOTAL / UNASSIGNED: kg}), ...]
+        """
+        latest_day = db.session.query(
+            func.max(StockSnapshot.snapshot_date)
+        ).filter(
+            StockSnapshot.product_name == StockSnapshot.TOTAL,
+            StockSnapshot.snapshot_date <= until_day
+        ).scalar()
+        
+        if latest_day is not None:
+            balances = {
+                InventoryService._snapshot_key(row): float(row.closing_kg)
+                for row in StockSnapshot.query.filter_by(snapshot_date=latest_day).all()
+            }
+            start_day = latest_day + timedelta(days=1)
+        else:
+            start_day = InventoryService._first_activity_day()
+            if start_day is None:
+                return []
+            balances = {StockSnapshot.TOTAL: 0.0}
+        
+        if start_day > until_day:
+            return []
+        
+        changes = InventoryService._daily_changes(start_day, until_day)
+        
+        result = []
+        day = start_day
+        while day <= until_day:
+            for key, kg in changes.get(day, {}).items():
+                balances[key] = balances.get(key, 0.0) + kg
+            result.append((day, dict(balances)))
+            day += timedelta(days=1)
+        
+        return result
+    
+    @staticmethod
+    def _as_date(value):
+        """func.date() 在 SQLite 返回字符串，PostgreSQL 返回 date"""
+        if isinstance(value, str):
+            return date.fromisoformat(value)
+        return value
+    
+    @staticmethod
+    def _first_activity_day():
+        """最早的库存相关单据日期"""
+        from app.models import Purchase, Sale
+        
+        candidates = [
+            db.session.query(func.min(StockMove.move_time)).scalar(),
+            db.session.query(func.min(Purchase.purchase_time)).scalar(),
+            db.session.query(func.min(Sale.sale_time)).scalar()
+        ]
+        candidates = [value for value in candidates if value is not None]
+        if not candidates:
+            return None
+        return min(candidates).date()
+    
+    @staticmethod
+    def _daily_changes(start_day, end_day):
+        """
+        统计日期范围内每天的库存变动（合计取自库存变动表，商品按采购入库减销售出库）
+        
+        商品按商品ID统计（商品改名不影响归属），未指定商品的明细计入 UNASSIGNED
+        
+        Returns:
+            dict: {date: {商品ID / TOTAL / UNASSIGNED: kg}}
+        """
+        from app.models import PurchaseItem, SaleItem, Purchase, Sale
+        
+        since = datetime.combine(start_day, time.min)
+        until = datetime.combine(end_day + timedelta(days=1), time.min)
+        changes = {}
+        
+        def add(day, key, kg):
+            if key is None:
+                key = StockSnapshot.UNASSIGNED
+            day_changes = changes.setdefault(InventoryService._as_date(day), {})
+            day_changes[key] = day_changes.get(key, 0.0) + float(kg or 0)
+        
+        total_rows = db.session.query(
+            func.date(StockMove.move_time).label('day'),
+            func.sum(StockMove.kg).label('kg')
+        ).filter(
+            StockMove.status == 'active',
+            StockMove.move_time >= since,
+            StockMove.move_time < until
+        ).group_by(func.date(StockMove.move_time)).all()
+        for row in total_rows:
+            add(row.day, StockSnapshot.TOTAL, row.kg)
+        
+        purchase_rows = db.session.query(
+            func.date(Purchase.purchase_time).label('day'),
+            PurchaseItem.product_id,
+            func.sum(PurchaseItem.kg).label('kg')
+        ).join(
+            Purchase, PurchaseItem.purchase_id == Purchase.id
+        ).filter(
+            Purchase.status == 'active',
+            Purchase.purchase_time >= since,
+            Purchase.purchase_time < until
+        ).group_by(func.date(Purchase.purchase_time), PurchaseItem.product_id).all()
+        for row in purchase_rows:
+            add(row.day, row.product_id, row.kg)
+        
+        sale_rows = db.session.query(
+            func.date(Sale.sale_time).label('day'),
+            SaleItem.product_id,
+            func.sum(SaleItem.subtotal_kg).label('kg')
+        ).join(
+            Sale, SaleItem.sale_id == Sale.id
+        ).filter(
+            Sale.status == 'active',
+            Sale.sale_time >= since,
+            Sale.sale_time < until
+        ).group_by(func.date(Sale.sale_time), SaleItem.product_id).all()
+        for row in sale_rows:
+            add(row.day, row.product_id, -float(row.kg or 0))
+        
+        return changes
+    
+    @staticmethod
+    def _product_change(key, since, until):
+        """单个商品（商品ID 或 UNASSIGNED）在 (since, until] 内的采购入库减销售出库"""
+        from app.models import PurchaseItem, SaleItem, Purchase, Sale
+        
+        if key == StockSnapshot.UNASSIGNED:
+            purchase_filter = PurchaseItem.product_id.is_(None)
+            sale_filter = SaleItem.product_id.is_(None)
+        else:
+            purchase_filter = PurchaseItem.product_id == key
+            sale_filter = SaleItem.product_id == key
+        
+        purchased = db.session.query(func.sum(PurchaseItem.kg)).join(
+            Purchase, PurchaseItem.purchase_id == Purchase.id
+        ).filter(
+            Purchase.status == 'active',
+            purchase_filter,
+            Purchase.purchase_time <= until
+        )
+        sold = db.session.query(func.sum(SaleItem.subtotal_kg)).join(
+            Sale, SaleItem.sale_id == Sale.id
+        ).filter(
+            Sale.status == 'active',
+            sale_filter,
+            Sale.sale_time <= until
+        )
+        if since is not None:
+            purchased = purchased.filter(Purchase.purchase_time >= since)
+            sold = sold.filter(Sale.sale_time >= since)
+        
+        return float(purchased.scalar() or 0) - float(sold.scalar() or 0)
+    
     @staticmethod
     def get_stock_by_type():
         """
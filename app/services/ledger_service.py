@@ -0,0 +1,388 @@
+"""
+客户账簿业务逻辑服务
+赊销、作废、回款时在同一事务内记账，客户当前余额保存在 customer.balance，
+对账单按账簿分页读取，月结对账单批量导出时使用进程池生成 Excel
+"""
+from app import db
+from app.models import Customer, CustomerLedger, Sale, Remittance
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, date, time
+from decimal import Decimal
+from sqlalchemy import func, update, select, literal, cast, String
+import os
+from app.utils import timezone
+
+
+class CreditLimitExceededError(ValueError):
+    """赊销后欠款将超过客户信用额度"""
+
+
+def _render_statement(statement, path):
+    """进程池任务：生成单个客户的月结对账单文件（只接收普通数据，不访问数据库）"""
+    from app.utils.excel_exporter import ExcelExporter
+    ExcelExporter.build_customer_statement(statement).save(path)
+    return path
+
+
+class LedgerService:
+    """客户账簿业务逻辑"""
+
+    # 对账单分页大小
+    DEFAULT_PAGE_SIZE = 50
+    MAX_PAGE_SIZE = 200
+
+    @staticmethod
+    def post(customer_id, entries, created_by, enforce_credit_limit=False):
+        """
+        记账（不提交，由调用方的事务一起提交）
+
+        先用一条 UPDATE customer SET balance = balance + 合计 RETURNING balance 更新余额，
+        PostgreSQL 上该行锁一直持有到事务结束，同一客户的记账按顺序执行，
+        每笔分录的余额由更新后的余额倒推
+
+        Args:
+            customer_id: 客户ID
+            entries: [{'entry_type', 'reference_type', 'reference_id', 'amount', 'entry_time'}, ...]
+            created_by: 记账人
+            enforce_credit_limit: 为 True 时额度校验放在同一条 UPDATE 的条件中，
+                                  超过额度时不更新并抛出 CreditLimitExceededError
+
+        Returns:
+            Decimal: 记账后的客户余额
+        """
+        entries = [entry for entry in entries if entry['amount']]
+        if not entries:
+            return None
+
+        total = sum((Decimal(str(entry['amount'])) for entry in entries), Decimal('0'))
+        statement = update(Customer).where(Customer.id == customer_id)
+        if enforce_credit_limit:
+            statement = statement.where(db.or_(
+                Customer.credit_limit.is_(None),
+                Customer.balance + total <= Customer.credit_limit
+            ))
+        new_balance = db.session.execute(
+            statement.values(balance=Customer.balance + total).returning(Customer.balance),
+            execution_options={'synchronize_session': False}
+        ).scalar_one_or_none()
+
+        if new_balance is None:
+            row = db.session.query(Customer.balance, Customer.credit_limit)\
+                .filter(Customer.id == customer_id).first()
+            if row is None:
+                raise ValueError(f"客户 {customer_id} 不存在")
+            raise CreditLimitExceededError(
+                f"超出信用额度：额度 ${float(row.credit_limit):.2f}，"
+                f"当前欠款 ${float(row.balance):.2f}，本单 ${float(total):.2f}"
+            )
+
+        balance = Decimal(str(new_balance)) - total
+        rows = []
+        for entry in entries:
+            amount = Decimal(str(entry['amount']))
+            balance += amount
+            rows.append(CustomerLedger(
+                customer_id=customer_id,
+                entry_time=entry['entry_time'],
+                entry_type=entry['entry_type'],
+                reference_type=entry['reference_type'],
+                reference_id=str(entry['reference_id']),
+                amount=amount,
+                balance=balance,
+                created_by=created_by
+            ))
+        db.session.add_all(rows)
+        return new_balance
+
+    @staticmethod
+    def post_sale(sale, created_by):
+        """赊销记账并校验信用额度（现金销售不产生应收）"""
+        if sale.payment_type != 'Crédito':
+            return None
+        return LedgerService.post(sale.customer_id, [{
+            'entry_type': 'charge',
+            'reference_type': 'sale',
+            'reference_id': sale.id,
+            'amount': sale.total_amount,
+            'entry_time': sale.sale_time
+        }], created_by, enforce_credit_limit=True)
+
+    @staticmethod
+    def post_void(sale, created_by):
+        """作废赊销单时冲销全部应收（已回款部分成为客户余额）"""
+        if sale.payment_type != 'Crédito':
+            return None
+        return LedgerService.post(sale.customer_id, [{
+            'entry_type': 'void',
+            'reference_type': 'sale',
+            'reference_id': sale.id,
+            'amount': -sale.total_amount,
+            'entry_time': sale.void_time or timezone.now()
+        }], created_by)
+
+    @staticmethod
+    def post_remittances(customer_id, remittances, created_by):
+        """回款记账（回款记录需已 flush 取得ID）"""
+        return LedgerService.post(customer_id, [
+            {
+                'entry_type': 'payment',
+                'reference_type': 'remittance',
+                'reference_id': remittance.id,
+                'amount': -remittance.amount,
+                'entry_time': remittance.remittance_time
+            }
+            for remittance in remittances
+        ], created_by)
+
+    @staticmethod
+    def get_balance(customer_id):
+        """客户当前应收余额（读取 customer.balance，不汇总账簿）"""
+        balance = db.session.query(Customer.balance).filter(Customer.id == customer_id).scalar()
+        return float(balance or 0)
+
+    @staticmethod
+    def get_credit_status(customer_id):
+        """
+        客户信用额度使用情况（单行读取）
+
+        Returns:
+            dict: {'customer_id', 'credit_limit', 'balance', 'available'}，不限额时 available 为 None
+        """
+        row = db.session.query(Customer.balance, Customer.credit_limit)\
+            .filter(Customer.id == customer_id).first()
+        if row is None:
+            raise ValueError(f"客户 {customer_id} 不存在")
+        balance = float(row.balance or 0)
+        credit_limit = float(row.credit_limit) if row.credit_limit is not None else None
+        return {
+            'customer_id': customer_id,
+            'credit_limit': credit_limit,
+            'balance': balance,
+            'available': round(credit_limit - balance, 2) if credit_limit is not None else None
+        }
+
+    @staticmethod
+    def get_statement(customer_id, limit=None, before_id=None):
+        """
+        客户对账单（按记账顺序倒序，键集分页）
+
+        Args:
+            customer_id: 客户ID
+            limit: 每页数量
+            before_id: 上一页最后一条分录的ID（游标），为空时从最新开始
+
+        Returns:
+            dict: {'customer', 'balance', 'entries', 'next_cursor'}
+        """
+        customer = db.session.get(Customer, customer_id)
+        if not customer:
+            raise ValueError(f"客户 {customer_id} 不存在")
+
+        limit = max(1, min(limit or LedgerService.DEFAULT_PAGE_SIZE, LedgerService.MAX_PAGE_SIZE))
+
+        query = CustomerLedger.query.filter(CustomerLedger.customer_id == customer_id)
+        if before_id:
+            query = query.filter(CustomerLedger.id < before_id)
+
+        # 多取一条判断是否还有下一页
+        rows = query.order_by(CustomerLedger.id.desc()).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        return {
+            'customer': customer.to_dict(),
+            'balance': float(customer.balance or 0),
+            'entries': [row.to_dict() for row in rows],
+            'next_cursor': rows[-1].id if has_more else None
+        }
+
+    @staticmethod
+    def _month_range(year, month):
+        start = datetime.combine(date(year, month, 1), time.min)
+        if month == 12:
+            end = datetime.combine(date(year + 1, 1, 1), time.min)
+        else:
+            end = datetime.combine(date(year, month + 1, 1), time.min)
+        return start, end
+
+    @staticmethod
+    def build_monthly_statements(year, month):
+        """
+        生成所有客户某月的对账单数据（两次查询：期初余额、当月分录）
+
+        当月分录按业务时间排序，余额从期初余额重新累计，
+        离线补录的销售单也会出现在其业务时间所在的月份
+
+        Returns:
+            list: [{'customer_id', 'customer_name', 'year', 'month', 'opening_balance',
+                    'closing_balance', 'entries': [...]}, ...]
+                  只包含期初余额不为0或当月有分录的客户
+        """
+        start, end = LedgerService._month_range(year, month)
+
+        opening = dict(db.session.query(
+            CustomerLedger.customer_id,
+            func.sum(CustomerLedger.amount)
+        ).filter(
+            CustomerLedger.entry_time < start
+        ).group_by(CustomerLedger.customer_id).all())
+
+        rows = CustomerLedger.query.filter(
+            CustomerLedger.entry_time >= start,
+            CustomerLedger.entry_time < end
+        ).order_by(
+            CustomerLedger.customer_id, CustomerLedger.entry_time, CustomerLedger.id
+        ).all()
+
+        entries_by_customer = {}
+        for row in rows:
+            entries_by_customer.setdefault(row.customer_id, []).append(row)
+
+        customer_ids = {cid for cid, amount in opening.items() if amount} | set(entries_by_customer)
+        if not customer_ids:
+            return []
+        names = dict(db.session.query(Customer.id, Customer.name).filter(Customer.id.in_(customer_ids)).all())
+
+        statements = []
+        for customer_id in sorted(customer_ids, key=lambda cid: names.get(cid, '')):
+            balance = Decimal(str(opening.get(customer_id) or 0))
+            opening_balance = balance
+            entries = []
+            for row in entries_by_customer.get(customer_id, []):
+                balance += row.amount
+                entries.append({
+                    'entry_time': row.entry_time.isoformat() if row.entry_time else None,
+                    'entry_type': row.entry_type,
+                    'reference_type': row.reference_type,
+                    'reference_id': row.reference_id,
+                    'amount': float(row.amount),
+                    'balance': float(balance)
+                })
+            statements.append({
+                'customer_id': customer_id,
+                'customer_name': names.get(customer_id, ''),
+                'year': year,
+                'month': month,
+                'opening_balance': float(opening_balance),
+                'closing_balance': float(balance),
+                'entries': entries
+            })
+        return statements
+
+    @staticmethod
+    def export_monthly_statements(year, month, output_dir, workers=None):
+        """
+        导出所有客户的月结对账单（每个客户一个 Excel 文件）
+
+        数据在主进程一次查出，Excel 生成交给进程池并行执行
+
+        Args:
+            year: 年
+            month: 月
+            output_dir: 输出目录
+            workers: 进程数（默认 CPU 核数）
+
+        Returns:
+            list: 生成的文件路径
+        """
+        statements = LedgerService.build_monthly_statements(year, month)
+        if not statements:
+            return []
+
+        os.makedirs(output_dir, exist_ok=True)
+        paths = [
+            os.path.join(output_dir, f'statement_{year}{month:02d}_{statement["customer_id"]}.xlsx')
+            for statement in statements
+        ]
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(_render_statement, statements, paths))
+
+    @staticmethod
+    def rebuild():
+        """
+        按销售单、回款记录重建客户账簿和客户余额（集合操作，不逐行处理）
+
+        赊销按销售时间记账，作废按作废时间冲销，回款按回款时间记账；
+        余额用窗口函数按业务时间累计
+
+        Returns:
+            int: 写入的分录数
+        """
+        now = timezone.now()
+
+        charges = select(
+            Sale.customer_id,
+            Sale.sale_time.label('entry_time'),
+            literal(0).label('seq'),
+            literal('charge').label('entry_type'),
+            literal('sale').label('reference_type'),
+            Sale.id.label('reference_id'),
+            Sale.total_amount.label('amount'),
+            Sale.created_by.label('created_by')
+        ).where(Sale.payment_type == 'Crédito', Sale.total_amount != 0)
+
+        voids = select(
+            Sale.customer_id,
+            func.coalesce(Sale.void_time, Sale.updated_at, Sale.sale_time).label('entry_time'),
+            literal(2).label('seq'),
+            literal('void').label('entry_type'),
+            literal('sale').label('reference_type'),
+            Sale.id.label('reference_id'),
+            (-Sale.total_amount).label('amount'),
+            func.coalesce(Sale.void_by, Sale.created_by).label('created_by')
+        ).where(Sale.payment_type == 'Crédito', Sale.status == 'void', Sale.total_amount != 0)
+
+        payments = select(
+            Sale.customer_id,
+            Remittance.remittance_time.label('entry_time'),
+            literal(1).label('seq'),
+            literal('payment').label('entry_type'),
+            literal('remittance').label('reference_type'),
+            cast(Remittance.id, String).label('reference_id'),
+            (-Remittance.amount).label('amount'),
+            Remittance.created_by.label('created_by')
+        ).join(Sale, Remittance.sale_id == Sale.id)
+
+        entries = charges.union_all(voids, payments).subquery()
+        ordering = (entries.c.entry_time, entries.c.seq, entries.c.reference_id)
+        running_balance = func.sum(entries.c.amount).over(
+            partition_by=entries.c.customer_id, order_by=ordering
+        )
+
+        source = select(
+            entries.c.customer_id,
+            entries.c.entry_time,
+            entries.c.entry_type,
+            entries.c.reference_type,
+            entries.c.reference_id,
+            entries.c.amount,
+            running_balance,
+            literal(now),
+            entries.c.created_by
+        ).order_by(entries.c.customer_id, *ordering)
+
+        try:
+            db.session.query(CustomerLedger).delete(synchronize_session=False)
+            count = db.session.execute(
+                CustomerLedger.__table__.insert().from_select(
+                    ['customer_id', 'entry_time', 'entry_type', 'reference_type', 'reference_id',
+                     'amount', 'balance', 'created_at', 'created_by'],
+                    source
+                )
+            ).rowcount
+
+            db.session.execute(
+                update(Customer).values(balance=func.coalesce(
+                    select(func.sum(CustomerLedger.amount))
+                    .where(CustomerLedger.customer_id == Customer.id)
+                    .scalar_subquery(),
+                    0
+                )),
+                execution_options={'synchronize_session': False}
+            )
+            db.session.commit()
+            return count
+        except Exception:
+            db.session.rollback()
+            raise
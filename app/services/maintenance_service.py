@@ -0,0 +1,122 @@
+"""
+定时维护任务
+每个任务返回一行结果说明（记录在任务运行记录中），任务计划见配置 SCHEDULER_JOBS
+"""
+from app import db
+from app.models import IdempotencyKey, JobRun
+from datetime import timedelta
+from flask import current_app
+from app.utils import timezone
+
+
+class MaintenanceService:
+    """定时维护任务"""
+
+    # 缓存预热的利润报表天数
+    WARM_PROFIT_DAYS = 90
+
+    @staticmethod
+    def _local_now():
+        """当前本地时间（naive，与数据库中保存的时间一致）"""
+        return timezone.now().replace(tzinfo=None)
+
+    @staticmethod
+    def purge_idempotency_keys():
+        """删除过期的幂等键和超过保留期的任务运行记录"""
+        now = MaintenanceService._local_now()
+        keys = IdempotencyKey.query.filter(
+            IdempotencyKey.expires_at < now
+        ).delete(synchronize_session=False)
+
+        retention = timedelta(days=current_app.config.get('JOB_RUN_RETENTION_DAYS', 90))
+        runs = JobRun.query.filter(
+            JobRun.started_at < now - retention,
+            JobRun.status != 'running'
+        ).delete(synchronize_session=False)
+
+        db.session.commit()
+        return f'删除过期幂等键 {keys} 条，任务运行记录 {runs} 条'
+
+    @staticmethod
+    def build_stock_snapshots():
+        """生成截至昨天的库存收盘快照"""
+        from app.services.inventory_service import InventoryService
+        days = InventoryService.build_snapshots()
+        return f'生成 {days} 天库存快照'
+
+    @staticmethod
+    def close_previous_day():
+        """
+        日结最近几天（AUTO_CLOSE_LOOKBACK_DAYS）有销售、尚未日结的日期
+
+        销售日期结束后再等待 AUTO_CLOSE_GRACE_DAYS 天，离线设备在此期间同步的销售单仍可入账
+        """
+        from app.services.close_service import CloseService
+        grace_days = current_app.config.get('AUTO_CLOSE_GRACE_DAYS', 1)
+        until_date = timezone.get_current_date() - timedelta(days=1 + grace_days)
+        closed = CloseService.close_pending(until_date, 'scheduler')
+        return f'日结 {len(closed)} 天' + (f"：{', '.join(day.isoformat() for day in closed)}" if closed else '')
+
+    @staticmethod
+    def fix_sale_totals():
+        """
+        修正 total_kg 与明细小计合计不一致的有效销售单（原 fix_total_kg.py）
+
+        已日结日期的单据只报告，不修改
+        """
+        from app.services.integrity_service import IntegrityService
+        result, = IntegrityService.run(['sale_total_kg'], fix=True)
+        message = f"修正 {result['fixed']} 张销售单的 total_kg"
+        if result['skipped']:
+            message += f"；已日结未修改：{', '.join(result['skipped'])}"
+        return message
+
+    @staticmethod
+    def check_integrity():
+        """运行全部数据一致性检查（只报告）"""
+        from app.services.integrity_service import IntegrityService
+        failed = [result for result in IntegrityService.run() if result['count']]
+        if not failed:
+            return '数据一致性检查全部通过'
+        return '；'.join(
+            f"{result['name']} {result['count']} 条（如 {', '.join(result['sample'][:5])}）" for result in failed
+        )
+
+    @staticmethod
+    def rebuild_product_costs():
+        """按历史单据重建加权平均成本"""
+        from app.services.cost_service import CostService
+        count = CostService.rebuild()
+        return f'重算 {count} 条销售明细成本'
+
+    @staticmethod
+    def export_analytics():
+        """增量导出分析数据快照（Parquet）"""
+        from app.services.analytics_service import AnalyticsService
+        summary = AnalyticsService.export()
+        return '；'.join(
+            f"{name} 重写 {len(result['months'])} 个月 {result['rows']} 行" for name, result in summary.items()
+        )
+
+    @staticmethod
+    def warm_caches():
+        """预热基础资料快照和最近的利润报表缓存"""
+        from app.services.reference_data_service import ReferenceDataService
+        from app.services.profit_service import ProfitService
+
+        snapshot = ReferenceDataService.get_snapshot()
+        yesterday = timezone.get_current_date() - timedelta(days=1)
+        ProfitService.get_profit(yesterday - timedelta(days=MaintenanceService.WARM_PROFIT_DAYS - 1), yesterday)
+        return f"基础资料快照 {snapshot['version']}，利润缓存 {MaintenanceService.WARM_PROFIT_DAYS} 天"
+
+    # 任务名称 -> (执行函数, 说明)
+    JOBS = {
+        'purge_idempotency_keys': (purge_idempotency_keys, '清理过期幂等键和旧的任务运行记录'),
+        'build_stock_snapshots': (build_stock_snapshots, '生成每日库存收盘快照'),
+        'close_previous_day': (close_previous_day, '日结近期有销售的日期'),
+        'fix_sale_totals': (fix_sale_totals, '修正销售单总重量'),
+        'check_integrity': (check_integrity, '数据一致性检查'),
+        'rebuild_product_costs': (rebuild_product_costs, '重建加权平均成本'),
+        'export_analytics': (export_analytics, '导出分析数据快照'),
+        'warm_caches': (warm_caches, '预热基础资料和利润报表缓存'),
+    }
@@ -0,0 +1,362 @@
+"""
+利润报表业务逻辑服务
+按时间顺序遍历一次采购和销售，用 FIFO 批次计算销售成本，
+已结束日期的结果缓存在 daily_profit 表中，缓存的最后一天同时保存期末批次，
+下次从该日继续遍历
+"""
+import json
+from app import db
+from app.models import Purchase, PurchaseItem, Sale, SaleItem, Product, DailyProfit
+from collections import deque
+from datetime import datetime, timedelta
+from heapq import merge
+from itertools import groupby
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from app.utils import timezone
+
+
+class ProfitService:
+    """利润报表业务逻辑"""
+
+    # 流式读取时每批行数
+    STREAM_BATCH_SIZE = 1000
+
+    @staticmethod
+    def get_profit(date_from, date_to):
+        """
+        日期区间的利润报表（按日、按商品）
+
+        已结束且已缓存的日期直接读取缓存；缺少缓存时从保存了期末批次的最近一个缓存日期继续遍历
+        （没有时从最早的单据开始），同时补齐缓存（今天的数据不缓存）
+
+        Args:
+            date_from: 开始日期（date，含）
+            date_to: 结束日期（date，含）
+
+        Returns:
+            dict: {'date_from', 'date_to', 'days': [...], 'products': [...], 'totals': {...}}
+                  每项包含 sold_kg/revenue/cost/margin/margin_percent/uncosted_kg
+        """
+        if date_from > date_to:
+            raise ValueError('开始日期不能晚于结束日期')
+
+        today = timezone.get_current_date()
+        date_to = min(date_to, today)
+        yesterday = today - timedelta(days=1)
+
+        latest_cached = db.session.query(
+            func.max(DailyProfit.profit_date)
+        ).filter(
+            DailyProfit.product_name == DailyProfit.TOTAL
+        ).scalar()
+
+        if latest_cached is not None and latest_cached >= date_to:
+            by_day = ProfitService._load_cached(date_from, date_to)
+        else:
+            resume = DailyProfit.query.filter(
+                DailyProfit.product_name == DailyProfit.TOTAL,
+                DailyProfit.lot_state.isnot(None)
+            ).order_by(DailyProfit.profit_date.desc()).first()
+
+            store_until = min(date_to, yesterday)
+            if resume is not None:
+                by_day, lot_state = ProfitService._sweep(
+                    date_to, resume.profit_date + timedelta(days=1), resume.lot_state, store_until
+                )
+                if date_from <= resume.profit_date:
+                    by_day.update(ProfitService._load_cached(date_from, resume.profit_date))
+            else:
+                by_day, lot_state = ProfitService._sweep(date_to, snapshot_day=store_until)
+            ProfitService._store(by_day, latest_cached, store_until, lot_state)
+
+        return ProfitService._summarize(by_day, date_from, date_to)
+
+    @staticmethod
+    def _sweep(until_day, start_day=None, lot_state=None, snapshot_day=None):
+        """
+        按时间顺序遍历一次 start_day 至 until_day 的采购和销售
+
+        同一天内先入库当天的全部采购，再按时间扣减当天的销售（与按日计算成本的口径一致）；
+        销售明细按商品ID匹配该商品的采购批次（商品改名不影响匹配），未指定商品或该商品从未采购时使用全部批次
+
+        Args:
+            until_day: 结束日期（含）
+            start_day: 开始日期（含），为空时从最早的单据开始
+            lot_state: start_day 前一天结束时的批次（_dump_lots 的结果）
+            snapshot_day: 记录该日结束时的批次
+
+        Returns:
+            tuple: ({date: {商品ID 或 UNASSIGNED: {'sold_kg', 'revenue', 'cost', 'uncosted_kg'}}}, snapshot_day 的批次)
+        """
+        end = datetime.combine(until_day + timedelta(days=1), datetime.min.time())
+        start = datetime.combine(start_day, datetime.min.time()) if start_day else None
+
+        purchase_rows = db.session.query(
+            Purchase.purchase_time,
+            PurchaseItem.product_id,
+            PurchaseItem.kg,
+            PurchaseItem.unit_price
+        ).join(
+            PurchaseItem, PurchaseItem.purchase_id == Purchase.id
+        ).filter(
+            Purchase.status == 'active',
+            Purchase.purchase_time < end,
+            *([Purchase.purchase_time >= start] if start else [])
+        ).order_by(
+            Purchase.purchase_time, Purchase.id, PurchaseItem.id
+        ).execution_options(yield_per=ProfitService.STREAM_BATCH_SIZE)
+
+        sale_rows = db.session.query(
+            Sale.id,
+            Sale.sale_time,
+            Sale.total_amount.label('sale_amount'),
+            SaleItem.subtotal_kg,
+            SaleItem.total_amount,
+            SaleItem.product_id
+        ).join(
+            SaleItem, SaleItem.sale_id == Sale.id
+        ).filter(
+            Sale.status == 'active',
+            Sale.sale_time < end,
+            *([Sale.sale_time >= start] if start else [])
+        ).order_by(
+            Sale.sale_time, Sale.id, SaleItem.id
+        ).execution_options(yield_per=ProfitService.STREAM_BATCH_SIZE)
+
+        purchases = (
+            ((row.purchase_time.date(), 0, row.purchase_time), row)
+            for row in purchase_rows
+        )
+        sales = (
+            ((items[0].sale_time.date(), 1, items[0].sale_time), items)
+            for items in (list(group) for _, group in groupby(sale_rows, key=lambda row: row.id))
+        )
+
+        # 批次：[剩余重量, 单价, 商品ID]，同一个批次同时在商品队列和全部批次队列中
+        # （没有关联商品的历史采购明细只在全部批次队列中）
+        product_lots, all_lots = ProfitService._restore_lots(lot_state)
+        by_day = {}
+        snapshot = None
+
+        for (day, kind, _), payload in merge(purchases, sales, key=lambda event: event[0]):
+            if snapshot is None and snapshot_day is not None and day > snapshot_day:
+                snapshot = ProfitService._dump_lots(product_lots, all_lots)
+
+            if kind == 0:
+                lot = [float(payload.kg), float(payload.unit_price), payload.product_id]
+                if payload.product_id is not None:
+                    product_lots.setdefault(payload.product_id, deque()).append(lot)
+                all_lots.append(lot)
+                continue
+
+            day_totals = by_day.setdefault(day, {})
+            for item, revenue in ProfitService._allocate_revenue(payload):
+                kg = float(item.subtotal_kg or 0)
+                lots = product_lots.get(item.product_id) if item.product_id is not None else None
+                cost, uncosted = ProfitService._consume(lots if lots is not None else all_lots, kg)
+
+                key = item.product_id if item.product_id is not None else DailyProfit.UNASSIGNED
+                totals = day_totals.setdefault(key, {'sold_kg': 0.0, 'revenue': 0.0, 'cost': 0.0, 'uncosted_kg': 0.0})
+                totals['sold_kg'] += kg
+                totals['revenue'] += revenue
+                totals['cost'] += cost
+                totals['uncosted_kg'] += uncosted
+
+        if snapshot is None and snapshot_day is not None:
+            snapshot = ProfitService._dump_lots(product_lots, all_lots)
+        return by_day, snapshot
+
+    @staticmethod
+    def _dump_lots(product_lots, all_lots):
+        """
+        批次序列化为 JSON：未用完的批次按入库顺序保存，
+        另外保存采购过的商品（批次已用完的商品仍按商品匹配，不能改用全部批次）
+        """
+        return json.dumps({
+            'products': sorted(product_lots),
+            'lots': [lot for lot in all_lots if lot[0] > 0]
+        })
+
+    @staticmethod
+    def _restore_lots(lot_state):
+        """_dump_lots 的逆操作，返回 (商品批次队列, 全部批次队列)"""
+        product_lots = {}
+        all_lots = deque()
+        if not lot_state:
+            return product_lots, all_lots
+
+        data = json.loads(lot_state)
+        for product_id in data['products']:
+            product_lots[product_id] = deque()
+        for lot in data['lots']:
+            if lot[2] is not None:
+                product_lots.setdefault(lot[2], deque()).append(lot)
+            all_lots.append(lot)
+        return product_lots, all_lots
+
+    @staticmethod
+    def _allocate_revenue(items):
+        """
+        销售单金额（已含折扣、手动金额）按明细金额比例分摊到明细；
+        明细没有金额时按重量分摊
+        """
+        sale_amount = float(items[0].sale_amount or 0)
+        weights = [float(item.total_amount or 0) for item in items]
+        if not any(weights):
+            weights = [float(item.subtotal_kg or 0) for item in items]
+        total_weight = sum(weights)
+        if not total_weight:
+            weights, total_weight = [1.0] + [0.0] * (len(items) - 1), 1.0
+        return [(item, sale_amount * weight / total_weight) for item, weight in zip(items, weights)]
+
+    @staticmethod
+    def _consume(lots, kg):
+        """从批次队列头部扣减重量，返回 (成本, 无批次可扣的重量)"""
+        cost = 0.0
+        while kg > 0 and lots:
+            lot = lots[0]
+            if lot[0] <= 0:
+                # 已被其他队列用完的批次
+                lots.popleft()
+                continue
+            used = min(kg, lot[0])
+            cost += used * lot[1]
+            lot[0] -= used
+            kg -= used
+            if lot[0] <= 0:
+                lots.popleft()
+        return cost, max(kg, 0.0)
+
+    @staticmethod
+    def _store(by_day, latest_cached, until_day, lot_state=None):
+        """
+        缓存 latest_cached 之后到 until_day 的每日结果（没有销售的日期也写入合计行），
+        until_day 的合计行同时保存当日结束时的批次
+        """
+        if latest_cached is not None:
+            day = latest_cached + timedelta(days=1)
+        elif by_day:
+            day = min(min(by_day), until_day)
+        else:
+            # 还没有销售：只缓存 until_day，保存期末批次
+            day = until_day
+
+        names = ProfitService._product_names()
+        created_at = timezone.now()
+        rows = []
+        while day <= until_day:
+            products = by_day.get(day, {})
+            total = {'sold_kg': 0.0, 'revenue': 0.0, 'cost': 0.0, 'uncosted_kg': 0.0}
+            for key, values in products.items():
+                rows.append(ProfitService._cache_row(day, key, values, created_at, names))
+                for key in total:
+                    total[key] += values[key]
+            rows.append(ProfitService._cache_row(
+                day, DailyProfit.TOTAL, total, created_at, names, lot_state if day == until_day else None
+            ))
+            day += timedelta(days=1)
+
+        if not rows:
+            return
+        try:
+            db.session.execute(DailyProfit.__table__.insert(), rows)
+            db.session.commit()
+        except IntegrityError:
+            # 其他请求已写入相同日期的缓存
+            db.session.rollback()
+
+    @staticmethod
+    def _cache_row(day, key, values, created_at, names, lot_state=None):
+        product_id = key if isinstance(key, int) else None
+        return {
+            'profit_date': day,
+            'product_id': product_id,
+            'product_name': names.get(product_id, f'#{product_id}') if product_id is not None else key,
+            'sold_kg': round(values['sold_kg'], 3),
+            'revenue': round(values['revenue'], 2),
+            'cost': round(values['cost'], 2),
+            'uncosted_kg': round(values['uncosted_kg'], 3),
+            'lot_state': lot_state,
+            'created_at': created_at
+        }
+
+    @staticmethod
+    def _load_cached(date_from, date_to):
+        """读取缓存，结构与 _sweep 的结果相同"""
+        rows = DailyProfit.query.filter(
+            DailyProfit.profit_date >= date_from,
+            DailyProfit.profit_date <= date_to,
+            DailyProfit.product_name != DailyProfit.TOTAL
+        ).all()
+
+        by_day = {}
+        for row in rows:
+            key = row.product_id if row.product_id is not None else row.product_name
+            by_day.setdefault(row.profit_date, {})[key] = {
+                'sold_kg': float(row.sold_kg),
+                'revenue': float(row.revenue),
+                'cost': float(row.cost),
+                'uncosted_kg': float(row.uncosted_kg)
+            }
+        return by_day
+
+    @staticmethod
+    def _product_names():
+        """商品ID -> 当前名称"""
+        return dict(db.session.query(Product.id, Product.name).all())
+
+    @staticmethod
+    def _metrics(values):
+        revenue = round(values['revenue'], 2)
+        cost = round(values['cost'], 2)
+        margin = round(revenue - cost, 2)
+        return {
+            'sold_kg': round(values['sold_kg'], 3),
+            'revenue': revenue,
+            'cost': cost,
+            'margin': margin,
+            'margin_percent': round(margin * 100.0 / revenue, 2) if revenue else None,
+            'uncosted_kg': round(values['uncosted_kg'], 3)
+        }
+
+    @staticmethod
+    def _summarize(by_day, date_from, date_to):
+        """汇总区间内的按日、按商品结果"""
+        keys = ('sold_kg', 'revenue', 'cost', 'uncosted_kg')
+        days = []
+        products = {}
+        totals = dict.fromkeys(keys, 0.0)
+
+        day = date_from
+        while day <= date_to:
+            day_total = dict.fromkeys(keys, 0.0)
+            for product_key, values in by_day.get(day, {}).items():
+                product = products.setdefault(product_key, dict.fromkeys(keys, 0.0))
+                for key in keys:
+                    product[key] += values[key]
+                    day_total[key] += values[key]
+            for key in keys:
+                totals[key] += day_total[key]
+            days.append({'date': day.isoformat(), **ProfitService._metrics(day_total)})
+            day += timedelta(days=1)
+
+        # 商品按ID汇总，名称取当前名称（改名前后的数据合并为同一商品）
+        names = ProfitService._product_names() if products else {}
+        product_list = [
+            {
+                'product_id': None if product_key == DailyProfit.UNASSIGNED else product_key,
+                'product_name': None if product_key == DailyProfit.UNASSIGNED else names.get(product_key),
+                **ProfitService._metrics(values)
+            }
+            for product_key, values in products.items()
+        ]
+        product_list.sort(key=lambda item: -item['revenue'])
+
+        return {
+            'date_from': date_from.isoformat(),
+            'date_to': date_to.isoformat(),
+            'days': days,
+            'products': product_list,
+            'totals': ProfitService._metrics(totals)
+        }
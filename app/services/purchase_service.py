@@ -3,6 +3,8 @@
 """
 from app import db
 from app.models import Purchase, PurchaseItem, Product, StockMove, AuditLog
+from app.services.cost_service import CostService
+from app.services.close_service import CloseService
 from datetime import datetime
 from sqlalchemy import func
 from decimal import Decimal
@@ -53,10 +55,14 @@ class PurchaseService:
         if not items_data or len(items_data) == 0:
             raise ValueError('采购明细不能为空')
         
+        # 已日结的日期不能补录采购单（会改变该日的成本）
+        purchase_time = purchase_time or timezone.now()
+        CloseService.ensure_open(purchase_time)
+        
         # 创建采购单
         purchase = Purchase(
             id=PurchaseService.generate_purchase_id(),
-            purchase_time=purchase_time or timezone.now(),
+            purchase_time=purchase_time,
             supplier=supplier,
             notes=notes,
             created_by=created_by
@@ -76,9 +82,23 @@ class PurchaseService:
             unit_price = Decimal(str(item_data['unit_price']))
             total_amount = kg * unit_price
             
+            # 自动创建Product记录，明细按商品ID关联（商品改名后库存、利润仍归属同一商品）
+            product = Product.query.filter_by(name=item_data['product_name']).first()
+            if not product:
+                product = Product(
+                    name=item_data['product_name'],
+                    cash_price=unit_price,
+                    credit_price=unit_price,
+                    active=True,
+                    created_by=created_by
+                )
+                db.session.add(product)
+                db.session.flush()
+            
             item = PurchaseItem(
                 purchase_id=purchase.id,
                 product_name=item_data['product_name'],
+                product_id=product.id,
                 kg=kg,
                 unit_price=unit_price,
                 total_amount=total_amount
@@ -97,6 +117,9 @@ class PurchaseService:
         purchase.total_kg = total_kg
         purchase.total_amount = total_amount
         
+        # 更新加权平均成本
+        CostService.receive_purchase(purchase)
+        
         # 创建库存变动记录
         stock_move = StockMove(
             move_type='进货',
@@ -110,20 +133,6 @@ class PurchaseService:
         )
         db.session.add(stock_move)
         
-        # 自动创建/更新Product记录
-        for item in purchase.items:
-            product = Product.query.filter_by(name=item.product_name).first()
-            if not product:
-                # 创建新商品
-                product = Product(
-                    name=item.product_name,
-                    cash_price=item.unit_price,
-                    credit_price=item.unit_price,
-                    active=True,
-                    created_by=created_by
-                )
-                db.session.add(product)
-        
         # 记录审计日志
         audit_log = AuditLog(
             table_name='purchase',
@@ -171,6 +180,8 @@ class PurchaseService:
             
         if purchase.status == 'void':
             raise ValueError('采购单已作废')
+        
+        CloseService.ensure_open(purchase.purchase_time)
             
         # 作废采购单
         purchase.status = 'void'
@@ -191,6 +202,9 @@ class PurchaseService:
         )
         db.session.add(stock_move)
         
+        # 从加权平均成本中扣除该采购
+        CostService.reverse_purchase(purchase)
+        
         # 记录审计日志
         audit_log = AuditLog(
             table_name='purchase',
@@ -0,0 +1,115 @@
+"""
+基础资料快照服务
+客户、规格、商品的启用数据缓存在进程内存中，只有在这三类数据新增、修改、
+启用或禁用并提交后才重建
+"""
+from app import db
+from app.models import Customer, Spec, Product
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from markupsafe import Markup
+import hashlib
+import json
+import threading
+
+
+class ReferenceDataService:
+    """基础资料快照（进程内缓存）"""
+
+    _lock = threading.Lock()
+    _snapshot = None
+
+    @staticmethod
+    def get_snapshot():
+        """
+        获取当前快照，失效后首次访问时重建
+
+        Returns:
+            dict: {'version', 'customers', 'specs', 'products', 'json'}
+        """
+        snapshot = ReferenceDataService._snapshot
+        if snapshot is not None:
+            return snapshot
+
+        with ReferenceDataService._lock:
+            if ReferenceDataService._snapshot is None:
+                ReferenceDataService._snapshot = ReferenceDataService._build()
+            return ReferenceDataService._snapshot
+
+    @staticmethod
+    def invalidate():
+        """使快照失效（下次访问时重建）"""
+        with ReferenceDataService._lock:
+            ReferenceDataService._snapshot = None
+
+    @staticmethod
+    def get_customers():
+        """启用的客户列表（按名称排序）"""
+        return ReferenceDataService.get_snapshot()['customers']
+
+    @staticmethod
+    def get_specs():
+        """启用的规格列表（按名称排序）"""
+        return ReferenceDataService.get_snapshot()['specs']
+
+    @staticmethod
+    def get_products():
+        """启用的商品列表（按名称排序）"""
+        return ReferenceDataService.get_snapshot()['products']
+
+    @staticmethod
+    def _build():
+        """从数据库构建快照"""
+        customers = [c.to_dict() for c in Customer.query.filter_by(active=True).order_by(Customer.name).all()]
+        specs = [s.to_dict() for s in Spec.query.filter_by(active=True).order_by(Spec.name).all()]
+        products = [p.to_dict() for p in Product.query.filter_by(active=True).order_by(Product.name).all()]
+
+        payload = json.dumps({
+            'customers': customers,
+            'specs': specs,
+            'products': products
+        }, separators=(',', ':'), ensure_ascii=False)
+        version = hashlib.md5(payload.encode('utf-8')).hexdigest()[:12]
+
+        # 与 Jinja 的 tojson 一样转义，便于直接嵌入 <script>
+        embedded = payload.replace('<', '\\u003c').replace('>', '\\u003e')\
+            .replace('&', '\\u0026').replace("'", '\\u0027')
+
+        return {
+            'version': version,
+            'customers': customers,
+            'specs': specs,
+            'products': products,
+            'json': Markup(embedded)
+        }
+
+
+# ==================== 失效监听 ====================
+
+@event.listens_for(Customer, 'after_insert')
+@event.listens_for(Customer, 'after_update')
+@event.listens_for(Customer, 'after_delete')
+@event.listens_for(Spec, 'after_insert')
+@event.listens_for(Spec, 'after_update')
+@event.listens_for(Spec, 'after_delete')
+@event.listens_for(Product, 'after_insert')
+@event.listens_for(Product, 'after_update')
+@event.listens_for(Product, 'after_delete')
+def mark_reference_data_changed(mapper, connection, target):
+    """基础资料写入时在会话上打标记，提交后再失效快照"""
+    session = object_session(target)
+    if session is not None:
+        session.info['reference_data_changed'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def invalidate_reference_data_on_commit(session):
+    """事务提交后使快照失效"""
+    if session.info.pop('reference_data_changed', False):
+        ReferenceDataService.invalidate()
+
+
+@event.listens_for(Session, 'after_rollback')
+def clear_reference_data_flag_on_rollback(session):
+    """事务回滚时丢弃标记"""
+    session.info.pop('reference_data_changed', None)
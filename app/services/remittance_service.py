@@ -2,14 +2,24 @@
 回款业务逻辑服务
 """
 from app import db
-from app.models import Sale, Remittance, AuditLog
+from flask import current_app
+from app.models import Sale, Remittance, AuditLog, Customer
+from app.services.ledger_service import LedgerService
+from app.services.close_service import CloseService
 from datetime import datetime
 from decimal import Decimal
-from sqlalchemy import func
+from sqlalchemy import func, update, text, tuple_
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import selectinload
 import json
 from app.utils import timezone
 
 
+class RemittanceConflictError(ValueError):
+    """并发回款冲突（行锁等待超时，或销售单已被其他回款修改）"""
+    pass
+
+
 class RemittanceService:
     """回款业务逻辑"""
     
@@ -26,7 +36,8 @@ class RemittanceService:
         Returns:
             Pagination: 分页对象，包含销售单及回款信息
         """
-        query = Sale.query.filter(
+        # 一次IN查询加载本页客户（to_dict 包含完整客户信息）
+        query = Sale.query.options(selectinload(Sale.customer)).filter(
             Sale.payment_type == 'Crédito',
             Sale.status == 'active'
         )
@@ -54,11 +65,61 @@ class RemittanceService:
         
         return pagination
     
+    @staticmethod
+    def _lock_sales(query):
+        """
+        读取并锁定销售单
+        
+        PostgreSQL 使用 SELECT ... FOR UPDATE，锁等待不超过 REMITTANCE_LOCK_TIMEOUT_MS；
+        SQLite 不支持行锁，直接读取，写入时由 _update_sales 校验版本号（乐观锁）
+        """
+        if db.engine.dialect.name == 'postgresql':
+            timeout = int(current_app.config.get('REMITTANCE_LOCK_TIMEOUT_MS', 5000))
+            db.session.execute(text(f"SET LOCAL lock_timeout = {timeout}"))
+            query = query.with_for_update()
+        return query.populate_existing().all()
+    
+    @staticmethod
+    def _update_sales(versions, **values):
+        """
+        按读取时的版本号更新销售单并递增版本号
+        
+        Args:
+            versions: {sale_id: 读取时的version}
+            values: 要更新的字段
+            
+        Raises:
+            RemittanceConflictError: 有销售单在读取后已被修改
+        """
+        result = db.session.execute(
+            update(Sale).where(
+                tuple_(Sale.id, Sale.version).in_(list(versions.items()))
+            ).values(version=Sale.version + 1, **values),
+            execution_options={'synchronize_session': False}
+        )
+        if result.rowcount != len(versions):
+            raise RemittanceConflictError("销售单已被其他回款修改，请刷新后重试")
+    
+    @staticmethod
+    def _run_with_retry(operation):
+        """执行回款事务，并发冲突时回滚并重试（最多 REMITTANCE_RETRY_ATTEMPTS 次）"""
+        attempts = max(1, int(current_app.config.get('REMITTANCE_RETRY_ATTEMPTS', 3)))
+        for attempt in range(attempts):
+            try:
+                return operation()
+            except RemittanceConflictError:
+                db.session.rollback()
+                if attempt == attempts - 1:
+                    raise
+    
     @staticmethod
     def create_remittance(sale_id, amount, created_by, notes=None, remittance_time=None):
         """
         创建回款记录并更新相关数据
         
+        校验未回款金额与写入回款在同一事务内完成，期间销售单被锁定
+        （PostgreSQL 行锁，SQLite 版本号校验），并发回款不会超付
+        
         Args:
             sale_id: 销售单号
             amount: 回款金额
@@ -71,84 +132,262 @@ class RemittanceService:
             
         Raises:
             ValueError: 业务规则违反时抛出异常
+            RemittanceConflictError: 并发冲突重试后仍失败
         """
-        # 1. 验证销售单
-        sale = Sale.query.get(sale_id)
-        if not sale:
-            raise ValueError(f"销售单 {sale_id} 不存在")
-        
-        if sale.status != 'active':
-            raise ValueError("只能对有效的销售单进行回款")
-        
-        if sale.payment_type != 'Crédito':
-            raise ValueError("只能对信用销售进行回款")
+        amount_decimal = Decimal(str(amount))
+        if amount_decimal <= 0:
+            raise ValueError("回款金额必须大于0")
         
-        if sale.payment_status == 'paid':
-            raise ValueError("该销售单已全额回款")
+        return RemittanceService._run_with_retry(
+            lambda: RemittanceService._post_remittance(
+                sale_id, amount_decimal, created_by, notes, remittance_time
+            )
+        )
+    
+    @staticmethod
+    def _post_remittance(sale_id, amount_decimal, created_by, notes, remittance_time):
+        """create_remittance 的单次事务"""
+        try:
+            # 1. 锁定并验证销售单
+            sales = RemittanceService._lock_sales(Sale.query.filter(Sale.id == sale_id))
+            sale = sales[0] if sales else None
+            if not sale:
+                raise ValueError(f"销售单 {sale_id} 不存在")
+            
+            if sale.status != 'active':
+                raise ValueError("只能对有效的销售单进行回款")
+            
+            if sale.payment_type != 'Crédito':
+                raise ValueError("只能对信用销售进行回款")
+            
+            if sale.payment_status == 'paid':
+                raise ValueError("该销售单已全额回款")
+            
+            # 2. 计算已回款金额
+            paid_amount = db.session.query(func.sum(Remittance.amount))\
+                .filter(Remittance.sale_id == sale_id)\
+                .scalar() or Decimal('0')
+            
+            unpaid_amount = sale.total_amount - paid_amount
+            
+            # 3. 验证回款金额
+            if amount_decimal > unpaid_amount:
+                raise ValueError(f"回款金额不能超过未回款金额 ${float(unpaid_amount):.2f}")
+            
+            # 4. 更新销售单收款状态（校验版本号）
+            payment_status = 'paid' if paid_amount + amount_decimal >= sale.total_amount else 'partial'
+            RemittanceService._update_sales(
+                {sale.id: sale.version},
+                payment_status=payment_status,
+                updated_by=created_by,
+                updated_at=timezone.now()
+            )
+            
+            # 5. 创建回款记录
+            remittance = Remittance(
+                sale_id=sale_id,
+                amount=amount_decimal,
+                notes=notes,
+                remittance_time=remittance_time or timezone.now(),
+                created_by=created_by
+            )
+            db.session.add(remittance)
+            db.session.flush()
+            LedgerService.post_remittances(sale.customer_id, [remittance], created_by)
+            CloseService.post_remittances([remittance])
+            
+            # 6. 记录审计日志
+            db.session.add(AuditLog(
+                table_name='remittance',
+                record_id=str(remittance.id),
+                action='INSERT',
+                new_value=json.dumps({
+                    'sale_id': sale_id,
+                    'amount': float(amount_decimal),
+                    'payment_status': payment_status,
+                    'notes': notes
+                }),
+                created_by=created_by
+            ))
+            
+            # 7. 提交事务
+            db.session.commit()
+            return remittance
+        except ValueError:
+            db.session.rollback()
+            raise
+        except OperationalError as e:
+            # 锁等待超时 / SQLite 数据库被其他写事务占用
+            db.session.rollback()
+            raise RemittanceConflictError(f"销售单正在被其他操作处理，请稍后重试: {e.orig}")
+        except Exception as e:
+            db.session.rollback()
+            raise ValueError(f"创建回款记录失败: {str(e)}")
+    
+    @staticmethod
+    def allocate_remittance(customer_id, amount, created_by, notes=None, remittance_time=None):
+        """
+        将客户的一笔回款按销售时间从早到晚分配到其未结清的信用销售单（单个事务）
         
-        # 2. 计算已回款金额
-        paid_amount = db.session.query(func.sum(Remittance.amount))\
-            .filter(Remittance.sale_id == sale_id)\
-            .scalar() or Decimal('0')
+        先按固定顺序锁定该客户未结清的销售单行（SELECT ... FOR UPDATE，SQLite 用版本号校验），
+        同一客户的并发分配会在行锁上排队，不需要锁表；
+        回款记录、审计日志批量写入，收款状态按结果批量更新
         
-        unpaid_amount = sale.total_amount - paid_amount
+        Args:
+            customer_id: 客户ID
+            amount: 回款总金额
+            created_by: 创建人
+            notes: 备注
+            remittance_time: 回款时间（默认当前时间）
+            
+        Returns:
+            dict: {'customer_id', 'amount', 'allocations': [{'sale_id', 'amount', 'unpaid_amount', 'payment_status', 'remittance_id'}, ...]}
+            
+        Raises:
+            ValueError: 业务规则违反时抛出异常
+            RemittanceConflictError: 并发冲突重试后仍失败
+        """
+        customer = db.session.get(Customer, customer_id)
+        if not customer:
+            raise ValueError(f"客户 {customer_id} 不存在")
         
-        # 3. 验证回款金额
         amount_decimal = Decimal(str(amount))
         if amount_decimal <= 0:
             raise ValueError("回款金额必须大于0")
         
-        if amount_decimal > unpaid_amount:
-            raise ValueError(f"回款金额不能超过未回款金额 ${float(unpaid_amount):.2f}")
+        remittance_time = remittance_time or timezone.now()
         
-        # 4. 创建回款记录
-        remittance = Remittance(
-            sale_id=sale_id,
-            amount=amount_decimal,
-            notes=notes,
-            remittance_time=remittance_time or timezone.now(),
-            created_by=created_by
+        return RemittanceService._run_with_retry(
+            lambda: RemittanceService._allocate(
+                customer_id, amount_decimal, created_by, notes, remittance_time
+            )
         )
-        db.session.add(remittance)
-        
-        # 5. 更新销售单收款状态
-        new_paid_amount = paid_amount + amount_decimal
-        if new_paid_amount >= sale.total_amount:
-            sale.payment_status = 'paid'
-        else:
-            sale.payment_status = 'partial'
-        
-        sale.updated_by = created_by
-        sale.updated_at = timezone.now()
-        
-        # 6. 记录审计日志
-        audit_log = AuditLog(
-            table_name='remittance',
-            record_id=str(remittance.id) if remittance.id else 'pending',
-            action='INSERT',
-            new_value=json.dumps({
-                'sale_id': sale_id,
-                'amount': float(amount_decimal),
-                'payment_status': sale.payment_status,
-                'notes': notes
-            }),
-            created_by=created_by
-        )
-        db.session.add(audit_log)
+    
+    @staticmethod
+    def _allocate(customer_id, amount_decimal, created_by, notes, remittance_time):
+        """allocate_remittance 的单次事务"""
+        now = timezone.now()
         
-        # 7. 提交事务
         try:
-            db.session.commit()
+            # 1. 锁定未结清的信用销售单（按销售时间、单号排序，避免并发分配互相死锁）
+            open_sales = RemittanceService._lock_sales(db.session.query(
+                Sale.id, Sale.total_amount, Sale.version
+            ).filter(
+                Sale.customer_id == customer_id,
+                Sale.status == 'active',
+                Sale.payment_type == 'Crédito',
+                Sale.payment_status != 'paid'
+            ).order_by(
+                Sale.sale_time.asc(), Sale.id.asc()
+            ))
             
-            # 更新审计日志的record_id
-            if audit_log.record_id == 'pending':
-                audit_log.record_id = str(remittance.id)
-                db.session.commit()
-                
-            return remittance
+            if not open_sales:
+                raise ValueError("该客户没有未结清的信用销售单")
+            
+            # 2. 一次查询已回款金额
+            paid = dict(db.session.query(
+                Remittance.sale_id,
+                func.sum(Remittance.amount)
+            ).filter(
+                Remittance.sale_id.in_([sale.id for sale in open_sales])
+            ).group_by(Remittance.sale_id).all())
+            
+            unpaid_total = sum(
+                sale.total_amount - (paid.get(sale.id) or Decimal('0')) for sale in open_sales
+            )
+            if amount_decimal > unpaid_total:
+                raise ValueError(f"回款金额不能超过未回款总额 ${float(unpaid_total):.2f}")
+            
+            # 3. 从最早的销售单开始分配
+            remaining = amount_decimal
+            allocations = []
+            for sale in open_sales:
+                if remaining <= 0:
+                    break
+                unpaid = sale.total_amount - (paid.get(sale.id) or Decimal('0'))
+                if unpaid <= 0:
+                    continue
+                applied = min(unpaid, remaining)
+                remaining -= applied
+                allocations.append({
+                    'sale_id': sale.id,
+                    'version': sale.version,
+                    'amount': applied,
+                    'unpaid_amount': unpaid - applied,
+                    'payment_status': 'paid' if applied >= unpaid else 'partial'
+                })
+            
+            # 4. 批量写入回款记录
+            remittances = [
+                Remittance(
+                    sale_id=item['sale_id'],
+                    amount=item['amount'],
+                    notes=notes,
+                    remittance_time=remittance_time,
+                    created_by=created_by
+                )
+                for item in allocations
+            ]
+            db.session.add_all(remittances)
+            db.session.flush()
+            LedgerService.post_remittances(customer_id, remittances, created_by)
+            CloseService.post_remittances(remittances)
+            
+            # 5. 按结果批量更新收款状态（校验版本号）
+            for status in ('paid', 'partial'):
+                versions = {
+                    item['sale_id']: item['version']
+                    for item in allocations if item['payment_status'] == status
+                }
+                if versions:
+                    RemittanceService._update_sales(
+                        versions,
+                        payment_status=status,
+                        updated_by=created_by,
+                        updated_at=now
+                    )
+            
+            # 6. 批量写入审计日志
+            db.session.add_all([
+                AuditLog(
+                    table_name='remittance',
+                    record_id=str(remittance.id),
+                    action='INSERT',
+                    new_value=json.dumps({
+                        'sale_id': item['sale_id'],
+                        'amount': float(item['amount']),
+                        'payment_status': item['payment_status'],
+                        'customer_id': customer_id,
+                        'allocated_from': float(amount_decimal),
+                        'notes': notes
+                    }),
+                    created_by=created_by
+                )
+                for remittance, item in zip(remittances, allocations)
+            ])
+            
+            db.session.commit()
+        except ValueError:
+            db.session.rollback()
+            raise
+        except OperationalError as e:
+            db.session.rollback()
+            raise RemittanceConflictError(f"销售单正在被其他操作处理，请稍后重试: {e.orig}")
         except Exception as e:
             db.session.rollback()
-            raise ValueError(f"创建回款记录失败: {str(e)}")
+            raise ValueError(f"分配回款失败: {str(e)}")
+        
+        for remittance, item in zip(remittances, allocations):
+            del item['version']
+            item['remittance_id'] = remittance.id
+            item['amount'] = float(item['amount'])
+            item['unpaid_amount'] = float(item['unpaid_amount'])
+        
+        return {
+            'customer_id': customer_id,
+            'amount': float(amount_decimal),
+            'allocations': allocations
+        }
     
     @staticmethod
     def get_remittance_history(sale_id):
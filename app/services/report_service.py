@@ -2,9 +2,10 @@
 报表统计业务逻辑服务
 """
 from app import db
-from app.models import Sale, SaleItem, Customer, Spec
+from app.models import Sale, SaleItem, Remittance
 from datetime import datetime, timedelta
 from sqlalchemy import func
+from app.utils import timezone
 
 class ReportService:
     """报表统计业务逻辑"""
@@ -69,15 +70,14 @@ class ReportService:
         Returns:
             list: 客户销售统计数据
         """
+        # 客户名称取销售单快照，不需要关联客户表
         query = db.session.query(
-            Customer.id.label('customer_id'),
-            Customer.name.label('customer_name'),
+            Sale.customer_id.label('customer_id'),
+            func.max(Sale.customer_name).label('customer_name'),
             func.count(Sale.id).label('order_count'),
             func.sum(Sale.total_kg).label('total_kg'),
             func.avg(Sale.total_kg).label('avg_kg_per_order'),
             func.max(Sale.sale_time).label('last_sale_time')
-        ).join(
-            Sale, Customer.id == Sale.customer_id
         ).filter(
             Sale.status == 'active'
         )
@@ -89,7 +89,7 @@ class ReportService:
             query = query.filter(Sale.sale_time <= date_to)
         
         result = query.group_by(
-            Customer.id, Customer.name
+            Sale.customer_id
         ).order_by(
             func.sum(Sale.total_kg).desc()
         ).limit(limit).all()
@@ -119,16 +119,15 @@ class ReportService:
         Returns:
             list: 规格销售统计数据
         """
+        # 规格名称和单箱重量取明细快照；规格修改过单箱重量时按新旧重量分别统计
         query = db.session.query(
-            Spec.id.label('spec_id'),
-            Spec.name.label('spec_name'),
-            Spec.kg_per_box,
+            SaleItem.spec_id.label('spec_id'),
+            SaleItem.spec_name.label('spec_name'),
+            SaleItem.kg_per_box,
             func.count(SaleItem.id).label('usage_count'),
             func.sum(SaleItem.box_qty).label('total_boxes'),
             func.sum(SaleItem.extra_kg).label('total_extra_kg'),
             func.sum(SaleItem.subtotal_kg).label('total_kg')
-        ).join(
-            SaleItem, Spec.id == SaleItem.spec_id
         ).join(
             Sale, SaleItem.sale_id == Sale.id
         ).filter(
@@ -142,7 +141,7 @@ class ReportService:
             query = query.filter(Sale.sale_time <= date_to)
         
         result = query.group_by(
-            Spec.id, Spec.name, Spec.kg_per_box
+            SaleItem.spec_id, SaleItem.spec_name, SaleItem.kg_per_box
         ).order_by(
             func.sum(SaleItem.subtotal_kg).desc()
         ).limit(limit).all()
@@ -151,7 +150,7 @@ class ReportService:
             {
                 'spec_id': row.spec_id,
                 'spec_name': row.spec_name,
-                'kg_per_box': float(row.kg_per_box),
+                'kg_per_box': float(row.kg_per_box or 0),
                 'usage_count': row.usage_count,
                 'total_boxes': row.total_boxes or 0,
                 'total_extra_kg': float(row.total_extra_kg or 0),
@@ -161,35 +160,22 @@ class ReportService:
         ]
     
     @staticmethod
-    def get_extra_kg_analysis(date_from=None, date_to=None, min_percent=0):
+    def _extra_kg_query(date_from=None, date_to=None):
         """
-        散货占比分析
-        
-        Args:
-            date_from: 开始日期
-            date_to: 结束日期
-            min_percent: 最小占比（百分比）
-            
-        Returns:
-            list: 散货占比分析数据
+        每个销售单的散货总量及占比（日期条件直接作用于聚合，只扫描区间内的明细）
         """
-        # 子查询：计算每个销售单的散货总量
-        subquery = db.session.query(
-            SaleItem.sale_id,
-            func.sum(SaleItem.extra_kg).label('extra_kg')
-        ).group_by(SaleItem.sale_id).subquery()
+        extra_kg = func.sum(SaleItem.extra_kg)
+        extra_percent = extra_kg * 100.0 / Sale.total_kg
         
         query = db.session.query(
             Sale.id.label('sale_id'),
             Sale.sale_time,
-            Customer.name.label('customer_name'),
+            Sale.customer_name,
             Sale.total_kg,
-            subquery.c.extra_kg,
-            (subquery.c.extra_kg * 100.0 / Sale.total_kg).label('extra_percent')
+            extra_kg.label('extra_kg'),
+            extra_percent.label('extra_percent')
         ).join(
-            Customer, Sale.customer_id == Customer.id
-        ).join(
-            subquery, Sale.id == subquery.c.sale_id
+            SaleItem, SaleItem.sale_id == Sale.id
         ).filter(
             Sale.status == 'active',
             Sale.total_kg > 0
@@ -201,75 +187,167 @@ class ReportService:
         if date_to:
             query = query.filter(Sale.sale_time <= date_to)
         
-        if min_percent > 0:
-            query = query.filter(
-                (subquery.c.extra_kg * 100.0 / Sale.total_kg) >= min_percent
-            )
-        
-        result = query.order_by(
-            (subquery.c.extra_kg * 100.0 / Sale.total_kg).desc()
-        ).all()
+        query = query.group_by(
+            Sale.id, Sale.sale_time, Sale.customer_name, Sale.total_kg
+        )
         
-        return [
-            {
-                'sale_id': row.sale_id,
-                'sale_time': row.sale_time.isoformat() if row.sale_time and hasattr(row.sale_time, 'isoformat') else (str(row.sale_time) if row.sale_time else None),
-                'customer_name': row.customer_name,
-                'total_kg': float(row.total_kg),
-                'extra_kg': float(row.extra_kg or 0),
-                'extra_percent': round(float(row.extra_percent or 0), 2)
-            }
-            for row in result
-        ]
+        return query, extra_percent
     
     @staticmethod
-    def get_summary_stats(date_from=None, date_to=None):
+    def _extra_kg_row(row):
+        return {
+            'sale_id': row.sale_id,
+            'sale_time': row.sale_time.isoformat() if row.sale_time and hasattr(row.sale_time, 'isoformat') else (str(row.sale_time) if row.sale_time else None),
+            'customer_name': row.customer_name,
+            'total_kg': float(row.total_kg),
+            'extra_kg': float(row.extra_kg or 0),
+            'extra_percent': round(float(row.extra_percent or 0), 2)
+        }
+    
+    @staticmethod
+    def get_extra_kg_report(date_from=None, date_to=None, min_percent=0, bucket_size=10):
         """
-        获取汇总统计数据
+        散货占比分析与分布（一次查询同时得到明细和分布）
         
         Args:
             date_from: 开始日期
             date_to: 结束日期
+            min_percent: 明细的最小占比（百分比），分布始终统计全部销售单
+            bucket_size: 分段宽度（百分比，0 < bucket_size <= 100）
             
         Returns:
-            dict: 汇总统计数据
-        """
-        query = db.session.query(Sale).filter(Sale.status == 'active')
-        
-        if date_from:
-            query = query.filter(Sale.sale_time >= date_from)
+            dict: {
+                'data': [{'sale_id', 'sale_time', 'customer_name', 'total_kg', 'extra_kg', 'extra_percent'}, ...],
+                'distribution': {'sale_count', 'percentiles': {'p10': .., ...}, 'buckets': [{'from', 'to', 'count', 'ratio'}, ...]}
+            }
         
-        if date_to:
-            query = query.filter(Sale.sale_time <= date_to)
+        Raises:
+            ValueError: 分段宽度超出范围
+        """
+        if not 0 < bucket_size <= 100:
+            raise ValueError('分段宽度必须大于0且不超过100')
         
-        total_orders = query.count()
-        total_kg = db.session.query(func.sum(Sale.total_kg)).filter(
-            Sale.status == 'active'
-        )
+        query, extra_percent = ReportService._extra_kg_query(date_from, date_to)
+        result = query.order_by(extra_percent.desc()).all()
         
-        if date_from:
-            total_kg = total_kg.filter(Sale.sale_time >= date_from)
-        if date_to:
-            total_kg = total_kg.filter(Sale.sale_time <= date_to)
+        return {
+            'data': [
+                ReportService._extra_kg_row(row)
+                for row in result
+                if min_percent <= 0 or float(row.extra_percent or 0) >= min_percent
+            ],
+            'distribution': ReportService._distribution(
+                sorted(float(row.extra_percent or 0) for row in result), bucket_size
+            )
+        }
+    
+    @staticmethod
+    def _distribution(values, bucket_size=10):
+        """由已排序的占比列表计算百分位数与分段统计"""
+        sale_count = len(values)
+        
+        def percentile(p):
+            # 线性插值百分位数
+            if not values:
+                return 0
+            position = (sale_count - 1) * p / 100.0
+            lower = int(position)
+            upper = min(lower + 1, sale_count - 1)
+            return round(values[lower] + (values[upper] - values[lower]) * (position - lower), 2)
+        
+        bucket_count = int(100 / bucket_size)
+        counts = [0] * bucket_count
+        for value in values:
+            index = min(int(value // bucket_size), bucket_count - 1)
+            counts[max(index, 0)] += 1
         
-        total_kg = total_kg.scalar() or 0
+        return {
+            'sale_count': sale_count,
+            'percentiles': {f'p{p}': percentile(p) for p in (10, 25, 50, 75, 90, 95)},
+            'buckets': [
+                {
+                    'from': i * bucket_size,
+                    'to': (i + 1) * bucket_size,
+                    'count': count,
+                    'ratio': round(count / sale_count, 4) if sale_count else 0
+                }
+                for i, count in enumerate(counts)
+            ]
+        }
+    
+    @staticmethod
+    def _aggregate_if(agg, condition, value):
+        """
+        条件聚合：PostgreSQL 使用 agg(...) FILTER (WHERE ...)，
+        其他数据库（SQLite等）回退为 agg(CASE WHEN ... THEN value END)
+        """
+        if db.engine.dialect.name == 'postgresql':
+            return agg(value).filter(condition)
+        return agg(db.case((condition, value), else_=None))
+    
+    @staticmethod
+    def get_summary_stats(date_from=None, date_to=None):
+        """
+        获取汇总统计数据（有效单据一次扫描，条件聚合算出全部指标）
         
-        # 统计客户数量
-        customer_count = db.session.query(func.count(func.distinct(Sale.customer_id))).filter(
-            Sale.status == 'active'
-        )
-        if date_from:
-            customer_count = customer_count.filter(Sale.sale_time >= date_from)
-        if date_to:
-            customer_count = customer_count.filter(Sale.sale_time <= date_to)
+        状态条件放在 WHERE 中，以便命中 idx_sale_active_time 部分索引；
+        作废单数量单独用一条小查询统计
         
-        customer_count = customer_count.scalar() or 0
+        Args:
+            date_from: 开始日期
+            date_to: 结束日期
+            
+        Returns:
+            dict: 汇总统计数据
+        """
+        agg_if = ReportService._aggregate_if
+        cash = Sale.payment_type == '现金'
+        credit = Sale.payment_type == 'Crédito'
+        
+        def in_range(query):
+            if date_from:
+                query = query.filter(Sale.sale_time >= date_from)
+            if date_to:
+                query = query.filter(Sale.sale_time <= date_to)
+            return query
+        
+        row = in_range(db.session.query(
+            func.count(Sale.id).label('total_orders'),
+            func.sum(Sale.total_kg).label('total_kg'),
+            func.sum(Sale.total_amount).label('total_amount'),
+            func.count(func.distinct(Sale.customer_id)).label('customer_count'),
+            agg_if(func.count, cash, Sale.id).label('cash_orders'),
+            agg_if(func.sum, cash, Sale.total_kg).label('cash_kg'),
+            agg_if(func.sum, cash, Sale.total_amount).label('cash_amount'),
+            agg_if(func.count, credit, Sale.id).label('credit_orders'),
+            agg_if(func.sum, credit, Sale.total_kg).label('credit_kg'),
+            agg_if(func.sum, credit, Sale.total_amount).label('credit_amount')
+        ).filter(Sale.status == 'active')).one()
+        
+        void = in_range(db.session.query(
+            func.count(Sale.id).label('void_count'),
+            func.sum(Sale.total_kg).label('void_kg')
+        ).filter(Sale.status == 'void')).one()
+        
+        total_orders = row.total_orders or 0
+        total_kg = float(row.total_kg or 0)
+        total_amount = float(row.total_amount or 0)
         
         return {
             'total_orders': total_orders,
-            'total_kg': float(total_kg),
-            'avg_kg_per_order': float(total_kg / total_orders) if total_orders > 0 else 0,
-            'customer_count': customer_count
+            'total_kg': total_kg,
+            'total_amount': total_amount,
+            'avg_kg_per_order': total_kg / total_orders if total_orders > 0 else 0,
+            'avg_amount_per_order': total_amount / total_orders if total_orders > 0 else 0,
+            'customer_count': row.customer_count or 0,
+            'cash_orders': row.cash_orders or 0,
+            'cash_kg': float(row.cash_kg or 0),
+            'cash_amount': float(row.cash_amount or 0),
+            'credit_orders': row.credit_orders or 0,
+            'credit_kg': float(row.credit_kg or 0),
+            'credit_amount': float(row.credit_amount or 0),
+            'void_count': void.void_count or 0,
+            'void_kg': float(void.void_kg or 0)
         }
     
     @staticmethod
@@ -362,3 +440,289 @@ class ReportService:
         sales = query.order_by(Sale.sale_time.desc()).all()
         
         return [sale.to_dict(include_items=True) for sale in sales]
+    
+    # 应收账龄分段：(键, 最小天数, 最大天数)，最大天数为 None 表示不设上限
+    AGING_BUCKETS = [
+        ('days_0_15', 0, 15),
+        ('days_16_30', 16, 30),
+        ('days_31_60', 31, 60),
+        ('days_60_plus', 61, None),
+    ]
+    
+    @staticmethod
+    def get_receivables_aging(as_of=None):
+        """
+        应收账龄：按客户汇总未结清信用销售的未回款金额，并按账龄分段
+        
+        未回款金额 = 销售金额 - 该销售单在 as_of 当天及之前的回款合计（回款按销售单分组汇总后关联），
+        账龄按销售日期到 as_of 的天数计算，分段由条件聚合一次算出。
+        指定历史日期时按当时的未回款金额判断，之后才结清的销售单仍计入
+        
+        Args:
+            as_of: 账龄计算日期（date，默认今天）
+            
+        Returns:
+            dict: {'as_of', 'buckets', 'customers': [...], 'totals': {...}}
+        """
+        today = timezone.get_current_date()
+        as_of = as_of or today
+        agg_if = ReportService._aggregate_if
+        
+        # 账龄分段转换为销售时间的区间（按天计算，可以直接使用时间索引）
+        def day_start(days):
+            return datetime.combine(as_of - timedelta(days=days), datetime.min.time())
+        
+        paid = db.session.query(
+            Remittance.sale_id.label('sale_id'),
+            func.sum(Remittance.amount).label('paid_amount')
+        ).filter(
+            Remittance.remittance_time < day_start(-1)
+        ).group_by(Remittance.sale_id).subquery()
+        
+        outstanding = Sale.total_amount - func.coalesce(paid.c.paid_amount, 0)
+        
+        bucket_columns = []
+        for key, min_days, max_days in ReportService.AGING_BUCKETS:
+            conditions = [Sale.sale_time < day_start(min_days - 1)]
+            if max_days is not None:
+                conditions.append(Sale.sale_time >= day_start(max_days))
+            bucket_columns.append(
+                func.coalesce(agg_if(func.sum, db.and_(*conditions), outstanding), 0).label(key)
+            )
+        
+        query = db.session.query(
+            Sale.customer_id.label('customer_id'),
+            func.max(Sale.customer_name).label('customer_name'),
+            func.count(Sale.id).label('invoice_count'),
+            func.sum(outstanding).label('total_outstanding'),
+            func.min(Sale.sale_time).label('oldest_sale_time'),
+            *bucket_columns
+        ).outerjoin(
+            paid, paid.c.sale_id == Sale.id
+        ).filter(
+            Sale.status == 'active',
+            Sale.payment_type == 'Crédito',
+            Sale.sale_time < day_start(-1),
+            outstanding > 0
+        )
+        if as_of >= today:
+            # 当前账龄：已结清的销售单不可能有未回款金额，加上该条件以命中未结清信用销售的部分索引
+            query = query.filter(Sale.payment_status != 'paid')
+        
+        rows = query.group_by(
+            Sale.customer_id
+        ).order_by(
+            func.sum(outstanding).desc()
+        ).all()
+        
+        bucket_keys = [key for key, _, _ in ReportService.AGING_BUCKETS]
+        customers = []
+        totals = {key: 0.0 for key in bucket_keys}
+        totals['invoice_count'] = 0
+        totals['total_outstanding'] = 0.0
+        
+        for row in rows:
+            item = {
+                'customer_id': row.customer_id,
+                'customer_name': row.customer_name,
+                'invoice_count': row.invoice_count,
+                'total_outstanding': round(float(row.total_outstanding or 0), 2),
+                'oldest_sale_time': row.oldest_sale_time.isoformat() if row.oldest_sale_time else None
+            }
+            for key in bucket_keys:
+                item[key] = round(float(getattr(row, key) or 0), 2)
+                totals[key] += item[key]
+            totals['invoice_count'] += item['invoice_count']
+            totals['total_outstanding'] += item['total_outstanding']
+            customers.append(item)
+        
+        return {
+            'as_of': as_of.isoformat(),
+            'buckets': [
+                {'key': key, 'min_days': min_days, 'max_days': max_days}
+                for key, min_days, max_days in ReportService.AGING_BUCKETS
+            ],
+            'customers': customers,
+            'totals': {key: round(value, 2) if isinstance(value, float) else value for key, value in totals.items()}
+        }
+    
+    # 同比/环比报表的维度：分组键、显示名称、指标（指标名, 聚合函数, 列）
+    # 日报按日期分组，两个期间按第几天对齐
+    COMPARISON_REPORTS = {
+        'daily': {
+            'key': lambda: func.date(Sale.sale_time),
+            'label': None,
+            'metrics': lambda: [
+                ('order_count', func.count, Sale.id),
+                ('total_kg', func.sum, Sale.total_kg),
+                ('total_amount', func.sum, Sale.total_amount),
+            ],
+        },
+        'customer': {
+            'key': lambda: Sale.customer_id,
+            'label': lambda: func.max(Sale.customer_name),
+            'metrics': lambda: [
+                ('order_count', func.count, Sale.id),
+                ('total_kg', func.sum, Sale.total_kg),
+                ('total_amount', func.sum, Sale.total_amount),
+            ],
+        },
+        'spec': {
+            'key': lambda: SaleItem.spec_id,
+            'label': lambda: func.max(SaleItem.spec_name),
+            'metrics': lambda: [
+                ('usage_count', func.count, SaleItem.id),
+                ('total_boxes', func.sum, SaleItem.box_qty),
+                ('total_kg', func.sum, SaleItem.subtotal_kg),
+            ],
+            'items': True,
+        },
+        'representative': {
+            'key': lambda: Sale.created_by,
+            'label': None,
+            'metrics': lambda: [
+                ('order_count', func.count, Sale.id),
+                ('total_kg', func.sum, Sale.total_kg),
+                ('total_amount', func.sum, Sale.total_amount),
+            ],
+        },
+    }
+    
+    @staticmethod
+    def _growth(current, prior):
+        """增长百分比（上期为0时无法计算，返回 None）"""
+        if not prior:
+            return None
+        return round((current - prior) * 100.0 / prior, 2)
+    
+    @staticmethod
+    def _compare_values(metrics, current, prior):
+        """组装本期、上期、差额、增长率"""
+        return {
+            'current': current,
+            'prior': prior,
+            'delta': {name: round(current[name] - prior[name], 3) for name in metrics},
+            'growth': {name: ReportService._growth(current[name], prior[name]) for name in metrics}
+        }
+    
+    @staticmethod
+    def get_period_comparison(report, current_from, current_to, prior_from=None, prior_to=None, limit=None):
+        """
+        期间对比报表（本期 vs 上期）
+        
+        两个期间在一次分组查询中完成：WHERE 只取两个期间的单据，
+        每个指标按期间条件分别聚合（PostgreSQL 用 FILTER，其他数据库用 CASE）
+        
+        Args:
+            report: daily/customer/spec/representative
+            current_from: 本期开始日期（date，含）
+            current_to: 本期结束日期（date，含）
+            prior_from: 上期开始日期（默认为紧接本期之前、天数相同的期间）
+            prior_to: 上期结束日期
+            limit: 返回行数（按本期重量排序后截取，合计不受影响）
+            
+        Returns:
+            dict: {'report', 'current', 'prior', 'metrics', 'rows': [...], 'totals': {...}}
+        """
+        config = ReportService.COMPARISON_REPORTS.get(report)
+        if config is None:
+            raise ValueError(f'不支持的对比报表: {report}')
+        
+        if current_from > current_to:
+            raise ValueError('本期开始日期不能晚于结束日期')
+        if prior_from is None or prior_to is None:
+            days = (current_to - current_from).days + 1
+            prior_to = current_from - timedelta(days=1)
+            prior_from = prior_to - timedelta(days=days - 1)
+        if prior_from > prior_to:
+            raise ValueError('上期开始日期不能晚于结束日期')
+        
+        def period(date_from, date_to):
+            start = datetime.combine(date_from, datetime.min.time())
+            end = datetime.combine(date_to + timedelta(days=1), datetime.min.time())
+            return db.and_(Sale.sale_time >= start, Sale.sale_time < end)
+        
+        in_current = period(current_from, current_to)
+        in_prior = period(prior_from, prior_to)
+        agg_if = ReportService._aggregate_if
+        
+        key = config['key']()
+        metrics = config['metrics']()
+        metric_names = [name for name, _, _ in metrics]
+        columns = [key.label('key')]
+        if config['label']:
+            columns.append(config['label']().label('label'))
+        for name, agg, column in metrics:
+            columns.append(agg_if(agg, in_current, column).label(f'current_{name}'))
+            columns.append(agg_if(agg, in_prior, column).label(f'prior_{name}'))
+        
+        query = db.session.query(*columns)
+        if config.get('items'):
+            query = query.select_from(SaleItem).join(Sale, SaleItem.sale_id == Sale.id)
+        rows = query.filter(
+            Sale.status == 'active',
+            db.or_(in_current, in_prior)
+        ).group_by(key).all()
+        
+        def number(value):
+            # 计数、箱数保持整数，重量、金额保留3位小数
+            value = value or 0
+            return value if isinstance(value, int) else round(float(value), 3)
+        
+        def values(row, prefix):
+            return {name: number(getattr(row, f'{prefix}_{name}')) for name in metric_names}
+        
+        results = []
+        if report == 'daily':
+            # 日期转换为期间内的第几天，两个期间按天对齐
+            by_day = {}
+            for row in rows:
+                day = row.key if hasattr(row.key, 'isoformat') else datetime.fromisoformat(str(row.key)).date()
+                by_day[day] = row
+            empty = {name: 0 for name in metric_names}
+            span = max((current_to - current_from).days, (prior_to - prior_from).days) + 1
+            for offset in range(span):
+                current_day = current_from + timedelta(days=offset)
+                prior_day = prior_from + timedelta(days=offset)
+                current_row = by_day.get(current_day) if current_day <= current_to else None
+                prior_row = by_day.get(prior_day) if prior_day <= prior_to else None
+                item = {
+                    'key': offset,
+                    'label': current_day.isoformat() if current_day <= current_to else None,
+                    'prior_label': prior_day.isoformat() if prior_day <= prior_to else None
+                }
+                item.update(ReportService._compare_values(
+                    metric_names,
+                    values(current_row, 'current') if current_row else dict(empty),
+                    values(prior_row, 'prior') if prior_row else dict(empty)
+                ))
+                results.append(item)
+        else:
+            for row in rows:
+                item = {
+                    'key': row.key,
+                    'label': row.label if config['label'] else row.key
+                }
+                item.update(ReportService._compare_values(
+                    metric_names, values(row, 'current'), values(row, 'prior')
+                ))
+                results.append(item)
+            results.sort(key=lambda item: (-item['current']['total_kg'], -item['prior']['total_kg']))
+        
+        totals = ReportService._compare_values(
+            metric_names,
+            {name: number(sum(item['current'][name] for item in results)) for name in metric_names},
+            {name: number(sum(item['prior'][name] for item in results)) for name in metric_names}
+        )
+        
+        if limit:
+            results = results[:limit]
+        
+        return {
+            'report': report,
+            'current': {'date_from': current_from.isoformat(), 'date_to': current_to.isoformat()},
+            'prior': {'date_from': prior_from.isoformat(), 'date_to': prior_to.isoformat()},
+            'metrics': metric_names,
+            'rows': results,
+            'totals': totals
+        }
@@ -3,8 +3,12 @@
 """
 from app import db
 from app.models import Sale, SaleItem, Customer, Spec, StockMove, AuditLog, Product
+from app.services.ledger_service import LedgerService, CreditLimitExceededError
+from app.services.cost_service import CostService
+from app.services.close_service import CloseService, DayClosedError
 from datetime import datetime
 from sqlalchemy import func
+from sqlalchemy.orm import selectinload
 import json
 from app.utils import timezone
 
@@ -49,6 +53,7 @@ class SaleService:
             
         Raises:
             ValueError: 业务规则违反时抛出异常
+            CreditLimitExceededError: 赊销后欠款超过客户信用额度
         """
         # 验证客户
         customer = Customer.query.get(customer_id)
@@ -66,14 +71,19 @@ class SaleService:
         if not items_data or len(items_data) == 0:
             raise ValueError('销售明细不能为空')
         
+        # 已日结的日期不能补录销售单
+        sale_time = sale_time or timezone.now()
+        CloseService.ensure_open(sale_time)
+        
         # 创建销售单
         # 现金销售默认为已收款，信用销售默认为未收款
         payment_status = 'paid' if payment_type == '现金' else 'unpaid'
         
         sale = Sale(
             id=SaleService.generate_sale_id(),
-            sale_time=sale_time or timezone.now(),
+            sale_time=sale_time,
             customer_id=customer_id,
+            customer_name=customer.name,  # 客户名称快照
             payment_type=payment_type,
             payment_status=payment_status,
             discount=discount,
@@ -120,6 +130,8 @@ class SaleService:
             item = SaleItem(
                 sale_id=sale.id,
                 spec_id=item_data['spec_id'],
+                spec_name=spec.name,  # 规格快照（之后修改规格不影响历史明细）
+                kg_per_box=spec.kg_per_box,
                 product_id=product_id,  # 保存商品ID
                 box_qty=item_data.get('box_qty', 0),
                 extra_kg=Decimal(str(item_data.get('extra_kg', 0))),
@@ -154,6 +166,15 @@ class SaleService:
              # 否则使用计算金额减去折扣
              sale.total_amount = calculated_subtotal_amount - (discount or 0)
         
+        # 按当前加权平均成本记录明细成本
+        CostService.cost_sale(sale)
+        
+        # 赊销记入客户账簿（同时校验信用额度）
+        try:
+            LedgerService.post_sale(sale, created_by)
+        except CreditLimitExceededError:
+            db.session.rollback()
+            raise
         
         # 记录审计日志
         audit_log = AuditLog(
@@ -176,6 +197,119 @@ class SaleService:
         
         return sale
     
+    # 离线同步接口单次最多接收的销售单数量
+    SYNC_BATCH_LIMIT = 50
+    
+    # 离线销售单去重使用的幂等键接口名：与 POST /api/sales 相同，
+    # 联网提交超时后转入离线队列的销售单同步时也能识别为重复
+    SYNC_ENDPOINT = 'sales_api.create_sale'
+    
+    @staticmethod
+    def sync_offline_sales(entries, reference_data_version=None):
+        """
+        批量同步浏览器离线队列中的销售单（每张单据单独提交，互不影响）
+        
+        每张单据携带客户端生成的 client_id（即联网提交时使用的 Idempotency-Key），作为幂等键去重：
+        网络中断后重发的单据返回首次提交的结果，不会重复创建
+        
+        Args:
+            entries: [{'client_id', 'customer_id', 'payment_type', 'items', 'discount',
+                       'manual_total_amount', 'created_by', 'sale_time', 'reference_data_version'}, ...]
+            reference_data_version: 当前基础资料快照版本，用于提示离线期间价格/资料已变化
+            
+        Returns:
+            list: [{'client_id', 'status', 'sale_id', 'error', 'reference_data_changed', 'closed_date'}, ...]
+                  status: created/duplicate/rejected/day_closed/conflict
+                  day_closed: 销售日期在离线期间已日结，反结账后可用同一个 client_id 重新提交
+        """
+        import hashlib
+        from app.utils.idempotency import claim_key, complete_key, release_key
+        
+        results = []
+        for entry in entries:
+            if not isinstance(entry, dict):
+                results.append({'client_id': None, 'sale_id': None, 'status': 'rejected', 'error': '销售单格式错误'})
+                continue
+            
+            client_id = str(entry.get('client_id') or '').strip()
+            result = {'client_id': client_id or None, 'sale_id': None, 'error': None}
+            
+            if not client_id or len(client_id) > 100:
+                results.append(dict(result, status='rejected', error='client_id 无效'))
+                continue
+            
+            payload = json.dumps(entry, sort_keys=True, ensure_ascii=False, default=str)
+            request_hash = hashlib.sha256(payload.encode('utf-8')).hexdigest()
+            
+            existing = claim_key(client_id, SaleService.SYNC_ENDPOINT, request_hash)
+            if existing is not None:
+                if existing.status != 'completed':
+                    results.append(dict(result, status='conflict', error='该销售单正在同步中'))
+                    continue
+                
+                # 首次提交的结果：同步接口保存 sale_id，POST /api/sales 保存销售单（id）
+                previous = json.loads(existing.response_body or '{}')
+                if existing.response_status >= 400:
+                    results.append(dict(result, status='rejected', error=previous.get('error')))
+                else:
+                    results.append(dict(
+                        result,
+                        status='duplicate',
+                        sale_id=previous.get('sale_id') or previous.get('id'),
+                        reference_data_changed=previous.get('reference_data_changed', False)
+                    ))
+                continue
+            
+            try:
+                if not entry.get('customer_id'):
+                    raise ValueError('客户ID不能为空')
+                if not entry.get('payment_type'):
+                    raise ValueError('支付方式不能为空')
+                
+                sale = SaleService.create_sale(
+                    customer_id=entry['customer_id'],
+                    payment_type=entry['payment_type'],
+                    items_data=entry.get('items'),
+                    discount=entry.get('discount') or 0,
+                    manual_total_amount=entry.get('manual_total_amount'),
+                    created_by=entry.get('created_by') or 'system',
+                    sale_time=SaleService._parse_offline_time(entry.get('sale_time'))
+                )
+            except DayClosedError as e:
+                db.session.rollback()
+                release_key(client_id, SaleService.SYNC_ENDPOINT)
+                results.append(dict(result, status='day_closed', error=str(e), closed_date=e.day.isoformat()))
+                continue
+            except (ValueError, KeyError, TypeError) as e:
+                db.session.rollback()
+                release_key(client_id, SaleService.SYNC_ENDPOINT)
+                results.append(dict(result, status='rejected', error=str(e)))
+                continue
+            except Exception:
+                db.session.rollback()
+                release_key(client_id, SaleService.SYNC_ENDPOINT)
+                raise
+            
+            result.update({
+                'sale_id': sale.id,
+                'reference_data_changed': bool(
+                    reference_data_version and entry.get('reference_data_version')
+                    and entry['reference_data_version'] != reference_data_version
+                )
+            })
+            complete_key(client_id, SaleService.SYNC_ENDPOINT, 201, json.dumps(result))
+            results.append(dict(result, status='created'))
+        
+        return results
+    
+    @staticmethod
+    def _parse_offline_time(value):
+        """解析离线销售时间（带时区时转换为本地时间，不允许晚于当前时间）"""
+        if not value:
+            return None
+        moment = timezone.localize(datetime.fromisoformat(value.replace('Z', '+00:00')))
+        return min(moment, timezone.now())
+    
     @staticmethod
     def void_sale(sale_id, void_reason, void_by):
         """
@@ -199,6 +333,8 @@ class SaleService:
         if not void_reason:
             raise ValueError('必须填写作废原因')
         
+        CloseService.ensure_open(sale.sale_time)
+        
         # 记录旧值
         old_value = json.dumps({
             'status': sale.status,
@@ -212,6 +348,12 @@ class SaleService:
         sale.updated_by = void_by
         sale.updated_at = timezone.now()
         
+        # 冲销客户账簿中的赊销金额
+        LedgerService.post_void(sale, void_by)
+        
+        # 按明细成本退回加权平均成本的结存
+        CostService.restore_sale(sale)
+        
         # 记录审计日志
         audit_log = AuditLog(
             table_name='sale',
@@ -247,7 +389,8 @@ class SaleService:
         Returns:
             Pagination: 分页对象
         """
-        query = Sale.query
+        # 一次IN查询加载本页客户（to_dict 包含完整客户信息）
+        query = Sale.query.options(selectinload(Sale.customer))
         
         if status:
             query = query.filter(Sale.status == status)
@@ -264,7 +407,70 @@ class SaleService:
         return query.order_by(Sale.sale_time.desc()).paginate(
             page=page, per_page=per_page, error_out=False
         )
-    
+
+    # 销售明细原始数据导出的列（销售单、明细、规格、商品、客户）
+    LINE_COLUMNS = (
+        'sale_id', 'sale_time', 'status', 'customer_id', 'customer_name', 'payment_type',
+        'payment_status', 'sale_total_kg', 'sale_total_amount', 'discount', 'manual_total_amount',
+        'created_by', 'item_id', 'spec_id', 'spec_name', 'kg_per_box', 'product_id', 'product_name',
+        'box_qty', 'extra_kg', 'subtotal_kg', 'unit_price', 'total_amount', 'unit_cost', 'cost_amount'
+    )
+
+    # 流式读取的每批行数
+    STREAM_BATCH_SIZE = 1000
+
+    @staticmethod
+    def iter_sale_lines(date_from=None, date_to=None, status='active', customer_id=None):
+        """
+        按销售时间顺序流式读取销售明细（一条连接查询，服务器端游标分批读取，内存占用固定）
+
+        Args:
+            date_from: 开始时间（含）
+            date_to: 结束时间（含）
+            status: 销售单状态（None 表示全部）
+            customer_id: 客户ID过滤
+
+        Returns:
+            generator: 每批一个行列表，列顺序见 LINE_COLUMNS
+        """
+        query = db.session.query(
+            Sale.id, Sale.sale_time, Sale.status, Sale.customer_id,
+            func.coalesce(Sale.customer_name, Customer.name), Sale.payment_type,
+            Sale.payment_status, Sale.total_kg, Sale.total_amount, Sale.discount, Sale.manual_total_amount,
+            Sale.created_by, SaleItem.id, SaleItem.spec_id,
+            func.coalesce(SaleItem.spec_name, Spec.name), func.coalesce(SaleItem.kg_per_box, Spec.kg_per_box),
+            SaleItem.product_id, Product.name,
+            SaleItem.box_qty, SaleItem.extra_kg, SaleItem.subtotal_kg, SaleItem.unit_price,
+            SaleItem.total_amount, SaleItem.unit_cost, SaleItem.cost_amount
+        ).join(
+            SaleItem, SaleItem.sale_id == Sale.id
+        ).join(
+            Customer, Sale.customer_id == Customer.id
+        ).join(
+            Spec, SaleItem.spec_id == Spec.id
+        ).outerjoin(
+            Product, SaleItem.product_id == Product.id
+        )
+
+        if status:
+            query = query.filter(Sale.status == status)
+        if customer_id:
+            query = query.filter(Sale.customer_id == customer_id)
+        if date_from:
+            query = query.filter(Sale.sale_time >= date_from)
+        if date_to:
+            query = query.filter(Sale.sale_time <= date_to)
+
+        result = db.session.execute(
+            query.order_by(Sale.sale_time, Sale.id, SaleItem.id).statement,
+            execution_options={'yield_per': SaleService.STREAM_BATCH_SIZE}
+        )
+        try:
+            for rows in result.partitions():
+                yield rows
+        finally:
+            result.close()
+
     @staticmethod
     def get_sale_detail(sale_id):
         """获取销售单详情"""
@@ -277,11 +483,18 @@ class SaleService:
     @staticmethod
     def get_today_summary():
         """获取今日销售汇总"""
+        from datetime import timedelta
+        
         today = timezone.get_current_date()
         
+        # 使用 sale_time 范围条件（而非 date(sale_time)），以便命中有效销售的部分索引
+        start_datetime = datetime.combine(today, datetime.min.time())
+        end_datetime = start_datetime + timedelta(days=1)
+        
         result = db.session.query(
             func.count(Sale.id).label('order_count'),
             func.sum(Sale.total_kg).label('total_kg'),
+            func.sum(Sale.total_amount).label('total_amount'),
             func.sum(
                 db.case(
                     (Sale.payment_type == '现金', Sale.total_kg),
@@ -293,41 +506,44 @@ class SaleService:
                     (Sale.payment_type == 'Crédito', Sale.total_kg),
                     else_=0
                 )
-            ).label('credit_kg')
+            ).label('credit_kg'),
+            # 已收现金和未收信用
+            func.sum(
+                db.case(
+                    (db.and_(Sale.payment_type == '现金', Sale.payment_status == 'paid'), Sale.total_amount),
+                    else_=0
+                )
+            ).label('cash_received_amount'),
+            func.sum(
+                db.case(
+                    (db.and_(Sale.payment_type == 'Crédito', Sale.payment_status == 'unpaid'), Sale.total_amount),
+                    else_=0
+                )
+            ).label('credit_outstanding_amount')
         ).filter(
-            func.date(Sale.sale_time) == today,
+            Sale.sale_time >= start_datetime,
+            Sale.sale_time < end_datetime,
             Sale.status == 'active'
         ).first()
         
-        # 查询已收现金和未收信用
-        sales_today = Sale.query.filter(
-            func.date(Sale.sale_time) == today,
-            Sale.status == 'active'
-        ).all()
-        
-        cash_received = sum(float(s.total_amount) for s in sales_today 
-                           if s.payment_type == '现金' and s.payment_status == 'paid')
-        credit_outstanding = sum(float(s.total_amount) for s in sales_today 
-                                if s.payment_type == 'Crédito' and s.payment_status == 'unpaid')
-        total_amount = sum(float(s.total_amount) for s in sales_today)
-        
         return {
             'order_count': result.order_count or 0,
             'total_kg': float(result.total_kg or 0),
             'cash_kg': float(result.cash_kg or 0),
             'credit_kg': float(result.credit_kg or 0),
-            'cash_received_amount': cash_received,
-            'credit_outstanding_amount': credit_outstanding,
-            'total_amount': total_amount
+            'cash_received_amount': float(result.cash_received_amount or 0),
+            'credit_outstanding_amount': float(result.credit_outstanding_amount or 0),
+            'total_amount': float(result.total_amount or 0)
         }
     
     @staticmethod
-    def get_sales_by_date(sale_date):
+    def get_sales_by_date(sale_date, use_close=True):
         """
         获取指定日期的所有销售记录及汇总统计
         
         Args:
             sale_date: 销售日期 (date对象)
+            use_close: 已日结时直接使用日结记录中冻结的汇总
             
         Returns:
             tuple: (销售记录列表, 汇总统计字典)
@@ -353,6 +569,12 @@ class SaleService:
         
         logger.info(f"找到 {len(sales)} 条销售记录")
         
+        # 已日结：汇总读取日结记录，不再重新计算成本和回款
+        if use_close:
+            close = CloseService.get_close(sale_date)
+            if close is not None:
+                return sales, close.to_summary()
+        
         # 调试：打印每条记录的total_kg
         for i, sale in enumerate(sales):
             logger.info(f"Sale {i+1}: ID={sale.id}, total_kg={sale.total_kg} (type={type(sale.total_kg).__name__}), float={float(sale.total_kg)}")
@@ -365,8 +587,11 @@ class SaleService:
         cash_amount = sum(float(sale.total_amount) for sale in sales if sale.payment_type == '现金')
         credit_amount = sum(float(sale.total_amount) for sale in sales if sale.payment_type == 'Crédito')
         
-        # 计算FIFO成本
-        total_cost = SaleService.calculate_daily_cost_fifo(sale_date, total_kg)
+        # 计算成本：加权平均法读取销售明细创建时记录的成本，否则按FIFO计算
+        if CostService.get_method() == CostService.METHOD_WEIGHTED_AVERAGE:
+            total_cost = CostService.get_daily_cost(start_datetime, end_datetime)
+        else:
+            total_cost = SaleService.calculate_daily_cost_fifo(sale_date, total_kg)
         
         # 计算当天销售的回款金额（回款计入销售日期，而非回款日期）
         remittances_amount = SaleService.get_daily_remittances(sale_date)
@@ -0,0 +1,182 @@
+"""
+基础资料搜索服务（输入联想）
+按名称前缀（不区分大小写）匹配启用的客户、商品、规格，并按近期销量排序
+"""
+from app import db
+from app.models import Customer, Product, Spec, Sale, SaleItem
+from datetime import timedelta
+from sqlalchemy import func
+from app.utils import timezone
+
+
+class SearchService:
+    """前缀搜索业务逻辑"""
+
+    # 近期销量统计天数
+    RANKING_DAYS = 90
+
+    # 返回数量上限
+    MAX_LIMIT = 50
+
+    # 销售单页面预先列出的常用客户数量（其余客户通过搜索选择）
+    RECENT_CUSTOMERS = 20
+
+    @staticmethod
+    def _prefix_filter(name_column, q):
+        """
+        生成 lower(name) 前缀匹配条件，使其能够命中 lower(name) 表达式索引
+
+        PostgreSQL 使用 LIKE 'q%'（text_pattern_ops 索引）；
+        SQLite 的 LIKE 无法使用表达式索引，改用等价的范围条件。
+        SQLite 的 lower() 只转换 ASCII 字母，关键字按同样规则转换，
+        两边一致（Ñ、É 等非 ASCII 字母在 SQLite 下区分大小写，完整的 Unicode 不区分大小写仅限 PostgreSQL）
+        """
+        expr = func.lower(name_column)
+
+        if db.engine.dialect.name == 'postgresql':
+            prefix = q.lower()
+            escaped = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            return expr.like(f'{escaped}%', escape='\\')
+
+        prefix = ''.join(char.lower() if char.isascii() else char for char in q)
+        upper_bound = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        return db.and_(expr >= prefix, expr < upper_bound)
+
+    @staticmethod
+    def _normalize(q, limit):
+        q = (q or '').strip()
+        limit = max(1, min(limit or 10, SearchService.MAX_LIMIT))
+        return q, limit
+
+    @staticmethod
+    def _recent_since():
+        return timezone.now() - timedelta(days=SearchService.RANKING_DAYS)
+
+    @staticmethod
+    def _ranked(model, columns, key_column, kg_column, q, limit):
+        """
+        前缀匹配并按近期销量降序、名称升序取前 limit 个（排序和截取都在数据库中完成）
+
+        Args:
+            model: Customer / Product / Spec
+            columns: 返回的列
+            key_column: 销量统计的分组列（Sale.customer_id / SaleItem.product_id / SaleItem.spec_id）
+            kg_column: 销量列（Sale.total_kg / SaleItem.subtotal_kg）
+            q: 名称前缀，为空时不按名称过滤
+        """
+        conditions = [model.active == True]
+        if q:
+            conditions.append(SearchService._prefix_filter(model.name, q))
+        matched = db.select(model.id).where(*conditions)
+
+        volume = db.select(
+            key_column.label('id'),
+            func.sum(kg_column).label('kg')
+        )
+        if key_column.class_ is SaleItem:
+            volume = volume.join(Sale, SaleItem.sale_id == Sale.id)
+        volume = volume.where(
+            key_column.in_(matched),
+            Sale.status == 'active',
+            Sale.sale_time >= SearchService._recent_since()
+        ).group_by(key_column).subquery()
+
+        recent_kg = func.coalesce(volume.c.kg, 0).label('recent_kg')
+        return db.session.query(*columns, recent_kg).outerjoin(
+            volume, volume.c.id == model.id
+        ).filter(
+            *conditions
+        ).order_by(
+            recent_kg.desc(), func.lower(model.name), model.id
+        ).limit(limit).all()
+
+    @staticmethod
+    def search_customers(q, limit=10):
+        """
+        客户前缀搜索
+
+        Args:
+            q: 搜索关键字（名称前缀）
+            limit: 返回数量
+
+        Returns:
+            list: [{'id', 'name', 'credit_allowed', 'recent_kg'}, ...]
+        """
+        q, limit = SearchService._normalize(q, limit)
+        if not q:
+            return []
+        return SearchService._customers(q, limit)
+
+    @staticmethod
+    def recent_customers(limit=None):
+        """近期销量最高的启用客户（销售单页面预先列出，其余客户通过搜索选择）"""
+        return SearchService._customers(None, limit or SearchService.RECENT_CUSTOMERS)
+
+    @staticmethod
+    def _customers(q, limit):
+        rows = SearchService._ranked(
+            Customer, (Customer.id, Customer.name, Customer.credit_allowed),
+            Sale.customer_id, Sale.total_kg, q, limit
+        )
+        return [
+            {
+                'id': row.id,
+                'name': row.name,
+                'credit_allowed': row.credit_allowed,
+                'recent_kg': float(row.recent_kg or 0)
+            }
+            for row in rows
+        ]
+
+    @staticmethod
+    def search_products(q, limit=10):
+        """
+        商品前缀搜索
+
+        Returns:
+            list: [{'id', 'name', 'cash_price', 'credit_price', 'recent_kg'}, ...]
+        """
+        q, limit = SearchService._normalize(q, limit)
+        if not q:
+            return []
+
+        rows = SearchService._ranked(
+            Product, (Product.id, Product.name, Product.cash_price, Product.credit_price),
+            SaleItem.product_id, SaleItem.subtotal_kg, q, limit
+        )
+        return [
+            {
+                'id': row.id,
+                'name': row.name,
+                'cash_price': float(row.cash_price),
+                'credit_price': float(row.credit_price),
+                'recent_kg': float(row.recent_kg or 0)
+            }
+            for row in rows
+        ]
+
+    @staticmethod
+    def search_specs(q, limit=10):
+        """
+        规格前缀搜索
+
+        Returns:
+            list: [{'id', 'name', 'kg_per_box', 'recent_kg'}, ...]
+        """
+        q, limit = SearchService._normalize(q, limit)
+        if not q:
+            return []
+
+        rows = SearchService._ranked(
+            Spec, (Spec.id, Spec.name, Spec.kg_per_box),
+            SaleItem.spec_id, SaleItem.subtotal_kg, q, limit
+        )
+        return [
+            {
+                'id': row.id,
+                'name': row.name,
+                'kg_per_box': float(row.kg_per_box),
+                'recent_kg': float(row.recent_kg or 0)
+            }
+            for row in rows
+        ]
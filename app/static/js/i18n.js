@@ -1,923 +1,24 @@
-// 多语言翻译字典 - 完整版
-const translations = {
-    zh: {
-        // 导航栏
-        'nav.home': '首页',
-        'nav.sales': '销售管理',
-        'nav.inventory': '库存管理',
-        'nav.reports': '报表统计',
-        'nav.admin': '系统管理',
-        'nav.specs': '规格管理',
-        'nav.customers': '客户管理',
-        'nav.products': '商品管理',
-        'nav.audit': '审计日志',
+// 多语言运行时 - 翻译字典按语言拆分在 js/i18n/<lang>.js 中，按需加载
+const translations = window.I18N_BUNDLES = window.I18N_BUNDLES || {};
 
-        // 首页
-        'auth.login_title': '系统登录',
-        'auth.username': '用户名',
-        'auth.password': '密码',
-        'auth.remember_me': '记住我',
-        'auth.button': '登录',
-        'auth.restricted': '仅授权人员访问',
-        'auth.logout': '退出登录',
-
-        'home.title': '系统概览',
-        'home.orders_today': '今日订单',
-        'home.sales_today': '今日销售',
-        'home.cash_sales': '现金销售',
-        'home.credit_sales': '信用销售',
-        'home.current_stock': '当前库存',
-        'home.stock_warning': '库存预警',
-        'home.quick_actions': '快速操作',
-        'home.create_sale': '创建销售单',
-        'home.stock_moves': '库存变动',
-        'home.view_reports': '查看报表',
-        'home.received_amount': '已入账',
-        'home.outstanding_amount': '未入账',
-        'home.quick_date_select': '快速查看日销售',
-        'home.today': '今天',
-        'home.yesterday': '昨天',
-
-        // 通用
-        'common.search': '查询',
-        'common.add': '添加',
-        'common.edit': '编辑',
-        'common.delete': '删除',
-        'common.save': '保存',
-        'common.cancel': '取消',
-        'common.submit': '提交',
-        'common.back': '返回',
-        'common.view': '查看',
-        'common.active': '有效',
-        'common.void': '已作废',
-        'common.status': '状态',
-        'common.system_name': 'Comercializadora de Camarón Lizfer',
-        'common.footer': '© 2026 Comercializadora de Camarón Lizfer | 严格遵循业务规则：禁止自由输入、自动计算、可追溯、禁止删除',
-        'common.actions': '操作',
-        'common.kg': 'KG',
-        'common.pieces': '笔',
-        'common.enabled': '启用',
-        'common.disabled': '禁用',
-        'common.yes': '是',
-        'common.no': '否',
-        'common.confirm': '确认',
-        'common.close': '关闭',
-        'common.export': '导出Excel',
-        'common.prev': '上一页',
-        'common.next': '下一页',
-        'common.total': '共',
-        'common.margin': '毛利率',
-        'sales.breakdown': '销售构成',
-
-        // 销售
-        'sales.list': '销售单列表',
-        'sales.create': '创建销售单',
-        'sales.detail': '销售单详情',
-        'sales.void': '作废',
-        'sales.customer': '客户',
-        'sales.payment_type': '支付方式',
-        'sales.total_weight': '总重量',
-        'sales.sale_time': '销售时间',
-        'sales.items': '销售明细',
-        'sales.sale_id': '销售单号',
-        'sales.filter': '筛选',
-        'sales.all_status': '全部状态',
-        'sales.all_payment': '全部支付方式',
-        'sales.cash': '现金',
-        'sales.credit': 'Crédito',
-        'sales.product': '商品',
-        'sales.select_product': '请选择商品',
-        'sales.spec': '规格',
-        'sales.select_spec': '请选择规格',
-        'sales.box_qty': '箱数',
-        'sales.extra_kg': '散货(KG)',
-        'sales.subtotal': '小计(KG)',
-        'sales.add_item': '添加明细',
-        'sales.void_reason': '作废原因',
-        'sales.void_confirm': '确认作废',
-        'sales.basic_info': '基本信息',
-        'sales.total': '总计',
-        'sales.created_by': '创建人',
-        'sales.void_time': '作废时间',
-        'sales.void_by': '作废人',
-        'sales.auto_calculated': '系统自动计算',
-        'sales.daily_detail': '每日销售详情',
-        'sales.total_amount': '金额',
-        'sales.total_orders': '条销售记录',
-        'sales.payment_details': '收款明细',
-        'sales.subtotal_amount': '小计金额',
-        'sales.discount_amount': '折扣金额',
-        'sales.manual_total': '手动总金额 (可选)',
-        'sales.manual_total_placeholder': '自动计算',
-        'sales.manual_total_help': '输入后将作为最终金额',
-        'sales.final_total': '最终总金额',
-        'sales.remittance': '回款管理',
-        'sales.remittance_desc': '管理信用销售的回款记录',
-        'sales.paid_amount': '已回款',
-        'sales.unpaid_amount': '未回款',
-        'sales.remittance_amount': '回款金额',
-        'sales.remittance_history': '回款历史',
-        'sales.remit': '回款',
-        'sales.status_paid': '已付清',
-        'sales.status_partial': '部分回款',
-        'sales.status_unpaid': '未回款',
-        'sales.payment_status': '收款状态',
-        'sales.remittance_amount_hint': '请输入回款金额，不能超过未回款金额',
-        'sales.daily_profit': '当天利润',
-        'sales.daily_cash_income': '当天入账',
-        'sales.remittances_received': '回款金额',
-        'sales.total_cost': '总成本',
-        'sales.includes_remittances': '含回款',
-        'common.notes': '备注',
-
-        // 库存
-        'inventory.current': '当前库存',
-        'inventory.moves': '库存变动',
-        'inventory.check': '库存盘点',
-        'inventory.total_stock': '库存总量',
-        'inventory.last_move': '最后变动',
-        'inventory.add_move': '添加库存变动',
-        'inventory.product': '商品',
-        'inventory.stock': '库存',
-        'inventory.move_type': '变动类型',
-        'inventory.source': '来源/去向',
-        'inventory.weight': '重量(KG)',
-        'inventory.notes': '备注',
-        'inventory.move_time': '变动时间',
-        'inventory.reference': '关联单据',
-        'inventory.theoretical': '理论库存',
-        'inventory.actual': '实际库存',
-        'inventory.difference': '差异',
-        'inventory.overview': '库存概览',
-        'inventory.type_purchase': '进货',
-        'inventory.type_transfer': '调拨',
-        'inventory.type_return': '退货',
-        'inventory.type_surplus': '盘盈',
-        'inventory.type_loss': '盘亏',
-        'inventory.type_sale': '销售',
-        'inventory.all_types': '全部',
-        'inventory.last_move': '最后变动',
-        'inventory.check_title': '库存盘点对账',
-        'inventory.check_instructions': '盘点说明',
-        'inventory.theoretical_note': '理论库存由系统自动计算（所有有效库存变动的总和）',
-        'inventory.actual_input': '请输入实际盘点的库存数量',
-        'inventory.auto_calculate_diff': '系统将自动计算差异并记录',
-        'inventory.actual_stock': '实际库存',
-        'inventory.diff_formula': '实际库存 - 理论库存',
-        'inventory.notes_placeholder': '请说明差异原因（如有）',
-        'inventory.submit_check': '提交盘点记录',
-        'inventory.enter_actual': '请输入实际库存',
-        'inventory.confirm_submit': '确认提交盘点记录？',
-        'inventory.check_submitted': '盘点记录已提交',
-        'inventory.by_product': '按商品统计',
-        'inventory.stock_kg': '库存(KG)',
-        'inventory.out_of_stock': '缺货',
-        'inventory.low_stock': '库存偏低',
-        'inventory.in_stock': '正常',
-
-        // 采购
-        'purchase.list': '采购单列表',
-        'purchase.create': '采购入库',
-        'purchase.detail': '采购单详情',
-        'purchase.supplier': '供应商',
-        'purchase.items': '采购明细',
-        'purchase.product_name': '商品名称',
-        'purchase.weight': '重量(KG)',
-        'purchase.unit_price': '单价($/KG)',
-        'purchase.subtotal': '小计',
-        'purchase.add_item': '添加明细',
-        'purchase.total_weight': '总重量',
-        'purchase.total_amount': '总金额',
-        'purchase.submit': '提交采购单',
-        'purchase.notes': '备注',
-        'purchase.purchase_time': '采购时间',
-        'purchase.payment_status': '付款状态',
-        'purchase.unpaid': '未付款',
-        'purchase.partial': '部分付款',
-        'purchase.paid': '已付款',
-        'purchase.basic_info': '基本信息',
-        'purchase.summary': '汇总信息',
-        'purchase.item_list': '明细列表',
-        'purchase.void': '作废采购单',
-        'purchase.void_confirm': '确认作废',
-        'purchase.void_reason': '作废原因',
-        'purchase.supplier_placeholder': '请输入供应商名称',
-        'purchase.notes_placeholder': '可选',
-        'purchase.product_name_placeholder': '商品名称',
-
-        // 报表
-        'reports.daily': '按日期统计',
-        'reports.customer': '按客户统计',
-        'reports.spec': '按规格统计',
-        'reports.daily_desc': '查看每日销售趋势',
-        'reports.customer_desc': '客户销售排名',
-        'reports.spec_desc': '规格使用分析',
-        'reports.date_from': '开始日期',
-        'reports.date_to': '结束日期',
-        'reports.total_orders': '总订单数',
-        'reports.total_sales': '总销售量',
-        'reports.avg_order': '平均订单',
-        'reports.customer_count': '客户数量',
-        'reports.ranking': '排名',
-        'reports.customer_name': '客户名称',
-        'reports.customer_ranking': '客户销售排名',
-        'reports.display_count': '显示数量',
-        'reports.top_10': '前10名',
-        'reports.top_20': '前20名',
-        'reports.top_50': '前50名',
-        'reports.order_count': '订单数',
-        'reports.last_sale': '最后交易',
-        'reports.usage_count': '使用次数',
-        'reports.total_boxes': '总箱数',
-        'reports.spec_name': '规格名称',
-        'reports.spec_ranking': '规格使用排名',
-        'reports.extra_kg': '散货(KG)',
-        'reports.index': '报表首页',
-        'reports.summary': '汇总统计',
-        'reports.date': '日期',
-        'reports.total_sales': '总销售',
-        'reports.cash_sales': '现金销售',
-        'reports.credit_sales': '信用销售',
-        'reports.sales_trend': '销售趋势图',
-        'reports.detailed_data': '详细数据',
-        'reports.select_date_range': '请选择日期范围查询',
-        'reports.no_data': '暂无数据',
-        'reports.query': '查询',
-        'reports.trend': '销售趋势图',
-        'reports.detailed_data': '详细数据',
-        'common.no_data': '暂无数据',
-        'reports.by_representative': '按销售员统计',
-        'reports.representative_desc': '销售员业绩排名',
-        'reports.representative': '销售员',
-        'reports.representative_ranking': '销售员排名',
-        'reports.total_amount': '总金额',
-        'reports.sales_detail': '销售详情',
-        'common.loading': '加载中...',
-
-        // 系统管理
-        'admin.specs': '规格管理',
-        'admin.customers': '客户管理',
-        'admin.audit': '审计日志',
-        'admin.spec_name': '规格名称',
-        'admin.length': '长度(cm)',
-        'admin.width': '宽度(cm)',
-        'admin.kg_per_box': '单箱重量(KG)',
-        'admin.customer_name': '客户名称',
-        'admin.credit_allowed': '信用支付',
-        'admin.allow_credit': '允许信用支付',
-        'admin.table_name': '表名',
-        'admin.record_id': '记录ID',
-        'admin.action': '操作',
-        'admin.operator': '操作人',
-        'admin.old_value': '旧值',
-        'admin.new_value': '新值',
-        'admin.created_time': '创建时间',
-        'admin.add_spec': '添加规格',
-        'admin.add_customer': '添加客户',
-        'admin.deactivate': '禁用',
-        'admin.users': '用户管理',
-        'admin.role': '角色',
-        'admin.last_login': '最后登录',
-        'admin.add_user': '添加用户',
-        'admin.edit_user': '编辑用户',
-        'admin.password': '密码',
-        'admin.password_hint': '如果不修改密码请留空',
-        'admin.roles_management': '角色管理',
-        'admin.add_role': '添加角色',
-        'admin.edit_role': '编辑角色',
-        'admin.permissions': '权限配置',
-        'admin.role_name': '角色名称',
-        'admin.permission_view_sales': '查看销售',
-        'admin.permission_view_inventory': '查看库存',
-        'admin.permission_view_reports': '查看报表',
-        'admin.permission_admin': '系统管理',
-        'admin.system_settings': '系统设置',
-        'admin.system_memo': '备忘录',
-        'admin.memo_placeholder': '输入备忘录内容...',
-        'admin.price_settings': '价格设置',
-        'admin.cash_price': '现金价格',
-        'admin.credit_price': '信用价格',
-        'admin.price_management': '价格管理',
-        'admin.set_price': '设置价格',
-        'admin.products': '商品管理',
-        'admin.product_name': '商品名称',
-        'admin.add_product': '添加商品',
-        'admin.edit_product': '编辑商品',
-        'admin.activate': '启用',
-        'admin.copy_to_memo': '复制到备忘录'
-    },
-
-    en: {
-        // Navigation
-        'nav.home': 'Home',
-        'nav.sales': 'Sales',
-        'nav.inventory': 'Inventory',
-        'nav.reports': 'Reports',
-        'nav.admin': 'Admin',
-        'nav.specs': 'Specifications',
-        'nav.customers': 'Customers',
-        'nav.products': 'Products',
-        'nav.audit': 'Audit Log',
-
-        // Home
-        'auth.login_title': 'System Login',
-        'auth.username': 'Username',
-        'auth.password': 'Password',
-        'auth.remember_me': 'Remember Me',
-        'auth.button': 'Login',
-        'auth.restricted': 'Authorized Personnel Only',
-        'auth.logout': 'Logout',
-
-        'home.title': 'System Overview',
-        'home.orders_today': 'Orders Today',
-        'home.sales_today': 'Sales Today',
-        'home.cash_sales': 'Cash Sales',
-        'home.credit_sales': 'Credit Sales',
-        'home.current_stock': 'Current Stock',
-        'home.stock_warning': 'Stock Warning',
-        'home.quick_actions': 'Quick Actions',
-        'home.create_sale': 'Create Sale',
-        'home.stock_moves': 'Stock Moves',
-        'home.view_reports': 'View Reports',
-        'home.received_amount': 'Received',
-        'home.outstanding_amount': 'Outstanding',
-        'home.quick_date_select': 'Quick Daily Sales',
-        'home.today': 'Today',
-        'home.yesterday': 'Yesterday',
-
-        // Common
-        'common.search': 'Search',
-        'common.add': 'Add',
-        'common.edit': 'Edit',
-        'common.delete': 'Delete',
-        'common.save': 'Save',
-        'common.cancel': 'Cancel',
-        'common.submit': 'Submit',
-        'common.back': 'Back',
-        'common.view': 'View',
-        'common.active': 'Active',
-        'common.void': 'Void',
-        'common.status': 'Status',
-        'common.system_name': 'Comercializadora de Camarón Lizfer',
-        'common.footer': '© 2026 Comercializadora de Camarón Lizfer. All rights reserved. | Strict Business Rules: No Free Input, Auto-calculation, Traceable, No Deletion',
-        'common.actions': 'Actions',
-        'common.kg': 'KG',
-        'common.pieces': 'pcs',
-        'common.enabled': 'Enabled',
-        'common.disabled': 'Disabled',
-        'common.yes': 'Yes',
-        'common.no': 'No',
-        'common.confirm': 'Confirm',
-        'common.close': 'Close',
-        'common.export': 'Export Excel',
-        'common.prev': 'Previous',
-        'common.next': 'Next',
-        'common.total': '',
-        'common.margin': 'Margin',
-        'sales.breakdown': 'Sales Breakdown',
-
-        // Sales
-        'sales.list': 'Sales List',
-        'sales.create': 'Create Sale',
-        'sales.detail': 'Sale Detail',
-        'sales.void': 'Void',
-        'sales.customer': 'Customer',
-        'sales.payment_type': 'Payment Type',
-        'sales.total_weight': 'Total Weight',
-        'sales.sale_time': 'Sale Time',
-        'sales.items': 'Sale Items',
-        'sales.sale_id': 'Sale ID',
-        'sales.filter': 'Filter',
-        'sales.all_status': 'All Status',
-        'sales.all_payment': 'All Payment Types',
-        'sales.cash': 'Cash',
-        'sales.credit': 'Credit',
-        'sales.product': 'Product',
-        'sales.select_product': 'Select Product',
-        'sales.spec': 'Specification',
-        'sales.select_spec': 'Select Specification',
-        'sales.box_qty': 'Box Qty',
-        'sales.extra_kg': 'Extra KG',
-        'sales.subtotal': 'Subtotal (KG)',
-        'sales.add_item': 'Add Item',
-        'sales.void_reason': 'Void Reason',
-        'sales.void_confirm': 'Confirm Void',
-        'sales.basic_info': 'Basic Information',
-        'sales.total': 'Total',
-        'sales.created_by': 'Created By',
-        'sales.void_time': 'Void Time',
-        'sales.void_by': 'Voided By',
-        'sales.auto_calculated': 'Auto-calculated by system',
-        'sales.daily_detail': 'Daily Sales Detail',
-        'sales.total_amount': 'Amount',
-        'sales.total_orders': 'Sales Records',
-        'sales.payment_details': 'Payment Details',
-        'sales.subtotal_amount': 'Subtotal Amount',
-        'sales.discount_amount': 'Discount Amount',
-        'sales.manual_total': 'Manual Total (Optional)',
-        'sales.manual_total_placeholder': 'Auto-calc',
-        'sales.manual_total_help': 'Input will be final amount',
-        'sales.final_total': 'Final Total Amount',
-        'sales.remittance': 'Remittance Management',
-        'sales.remittance_desc': 'Manage credit sales remittances',
-        'sales.paid_amount': 'Paid Amount',
-        'sales.unpaid_amount': 'Unpaid Amount',
-        'sales.remittance_amount': 'Remittance Amount',
-        'sales.remittance_history': 'Remittance History',
-        'sales.remit': 'Remit',
-        'sales.status_paid': 'Paid',
-        'sales.status_partial': 'Partial Payment',
-        'sales.status_unpaid': 'Unpaid',
-        'sales.payment_status': 'Payment Status',
-        'sales.remittance_amount_hint': 'Enter remittance amount, cannot exceed unpaid amount',
-        'sales.daily_profit': 'Daily Profit',
-        'sales.daily_cash_income': 'Daily Cash Income',
-        'sales.remittances_received': 'Remittances Received',
-        'sales.total_cost': 'Total Cost',
-        'sales.includes_remittances': 'Incl. Remittances',
-        'common.notes': 'Notes',
-
-        // Inventory
-        'inventory.current': 'Current Stock',
-        'inventory.moves': 'Stock Moves',
-        'inventory.check': 'Stock Check',
-        'inventory.total_stock': 'Total Stock',
-        'inventory.last_move': 'Last Move',
-        'inventory.add_move': 'Add Stock Move',
-        'inventory.product': 'Product',
-        'inventory.stock': 'Stock',
-        'inventory.move_type': 'Move Type',
-        'inventory.source': 'Source/Destination',
-        'inventory.weight': 'Weight (KG)',
-        'inventory.notes': 'Notes',
-        'inventory.move_time': 'Move Time',
-        'inventory.reference': 'Reference',
-        'inventory.theoretical': 'Theoretical Stock',
-        'inventory.actual': 'Actual Stock',
-        'inventory.difference': 'Difference',
-        'inventory.overview': 'Stock Overview',
-        'inventory.type_purchase': 'Purchase',
-        'inventory.type_transfer': 'Transfer',
-        'inventory.type_return': 'Return',
-        'inventory.type_surplus': 'Surplus',
-        'inventory.type_loss': 'Loss',
-        'inventory.type_sale': 'Sale',
-        'inventory.all_types': 'All Types',
-        'inventory.last_move': 'Last Movement',
-        'inventory.check_title': 'Inventory Reconciliation',
-        'inventory.check_instructions': 'Check Instructions',
-        'inventory.theoretical_note': 'Theoretical stock is automatically calculated by the system (sum of all active stock movements)',
-        'inventory.actual_input': 'Please enter the actual counted stock quantity',
-        'inventory.auto_calculate_diff': 'The system will automatically calculate and record the difference',
-        'inventory.actual_stock': 'Actual Stock',
-        'inventory.diff_formula': 'Actual Stock - Theoretical Stock',
-        'inventory.notes_placeholder': 'Please explain the reason for the difference (if any)',
-        'inventory.submit_check': 'Submit Check Record',
-        'inventory.enter_actual': 'Please enter actual stock',
-        'inventory.confirm_submit': 'Confirm submission of check record?',
-        'inventory.check_submitted': 'Inventory Check Submitted',
-        'inventory.by_product': 'By Product',
-        'inventory.stock_kg': 'Stock (KG)',
-        'inventory.out_of_stock': 'Out of Stock',
-        'inventory.low_stock': 'Low Stock',
-        'inventory.in_stock': 'In Stock',
-
-        // Purchase
-        'purchase.list': 'Purchase List',
-        'purchase.create': 'Purchase Receiving',
-        'purchase.detail': 'Purchase Detail',
-        'purchase.supplier': 'Supplier',
-        'purchase.items': 'Purchase Items',
-        'purchase.product_name': 'Product Name',
-        'purchase.weight': 'Weight (KG)',
-        'purchase.unit_price': 'Unit Price ($/KG)',
-        'purchase.subtotal': 'Subtotal',
-        'purchase.add_item': 'Add Item',
-        'purchase.total_weight': 'Total Weight',
-        'purchase.total_amount': 'Total Amount',
-        'purchase.submit': 'Submit Purchase',
-        'purchase.notes': 'Notes',
-        'purchase.purchase_time': 'Purchase Time',
-        'purchase.payment_status': 'Payment Status',
-        'purchase.unpaid': 'Unpaid',
-        'purchase.partial': 'Partial',
-        'purchase.paid': 'Paid',
-        'purchase.basic_info': 'Basic Information',
-        'purchase.summary': 'Summary',
-        'purchase.item_list': 'Item List',
-        'purchase.supplier_placeholder': 'Enter supplier name',
-        'purchase.notes_placeholder': 'Optional',
-        'purchase.product_name_placeholder': 'Product name',
-
-        // Reports
-        'reports.daily': 'Daily Sales',
-        'reports.customer': 'By Customer',
-        'reports.spec': 'By Specification',
-        'reports.daily_desc': 'View daily sales trends',
-        'reports.customer_desc': 'Customer sales ranking',
-        'reports.spec_desc': 'Spec usage analysis',
-        'reports.date_from': 'From Date',
-        'reports.date_to': 'To Date',
-        'reports.total_orders': 'Total Orders',
-        'reports.total_sales': 'Total Sales',
-        'reports.avg_order': 'Avg Order',
-        'reports.customer_count': 'Customer Count',
-        'reports.ranking': 'Ranking',
-        'reports.customer_name': 'Customer Name',
-        'reports.customer_ranking': 'Customer Sales Ranking',
-        'reports.display_count': 'Display Count',
-        'reports.top_10': 'Top 10',
-        'reports.top_20': 'Top 20',
-        'reports.top_50': 'Top 50',
-        'reports.order_count': 'Order Count',
-        'reports.last_sale': 'Last Sale',
-        'reports.usage_count': 'Usage Count',
-        'reports.total_boxes': 'Total Boxes',
-        'reports.spec_name': 'Spec Name',
-        'reports.spec_ranking': 'Spec Usage Ranking',
-        'reports.extra_kg': 'Extra (KG)',
-        'reports.index': 'Reports Home',
-        'reports.summary': 'Summary Statistics',
-        'reports.date': 'Date',
-        'reports.total_sales': 'Total Sales (KG)',
-        'reports.cash_sales': 'Cash Sales (KG)',
-        'reports.credit_sales': 'Credit Sales (KG)',
-        'reports.sales_trend': 'Sales Trend Chart',
-        'reports.detailed_data': 'Detailed Data',
-        'reports.select_date_range': 'Please select date range',
-        'reports.no_data': 'No data available',
-        'reports.query': 'Query',
-        'reports.trend': 'Sales Trend',
-        'reports.detailed_data': 'Detailed Data',
-        'common.no_data': 'No data available',
-        'reports.by_representative': 'By Representative',
-        'reports.representative_desc': 'Sales representative performance ranking',
-        'reports.representative': 'Sales Representative',
-        'reports.representative_ranking': 'Sales Representative Ranking',
-        'reports.total_amount': 'Total Amount',
-        'reports.sales_detail': 'Sales Detail',
-        'common.loading': 'Loading...',
-
-        // Admin
-        'admin.specs': 'Specifications',
-        'admin.customers': 'Customers',
-        'admin.audit': 'Audit Log',
-        'admin.spec_name': 'Spec Name',
-        'admin.length': 'Length (cm)',
-        'admin.width': 'Width (cm)',
-        'admin.kg_per_box': 'KG per Box',
-        'admin.customer_name': 'Customer Name',
-        'admin.credit_allowed': 'Credit Allowed',
-        'admin.allow_credit': 'Allow Credit',
-        'admin.table_name': 'Table',
-        'admin.record_id': 'Record ID',
-        'admin.action': 'Action',
-        'admin.operator': 'Operator',
-        'admin.old_value': 'Old Value',
-        'admin.new_value': 'New Value',
-        'admin.created_time': 'Created Time',
-        'admin.add_spec': 'Add Specification',
-        'admin.add_customer': 'Add Customer',
-        'admin.deactivate': 'Deactivate',
-        'admin.users': 'User Management',
-        'admin.role': 'Role',
-        'admin.last_login': 'Last Login',
-        'admin.add_user': 'Add User',
-        'admin.edit_user': 'Edit User',
-        'admin.password': 'Password',
-        'admin.password_hint': 'Leave blank to keep unchanged',
-        'admin.roles_management': 'Role Management',
-        'admin.add_role': 'Add Role',
-        'admin.edit_role': 'Edit Role',
-        'admin.permissions': 'Permissions',
-        'admin.role_name': 'Role Name',
-        'admin.permission_view_sales': 'View Sales',
-        'admin.permission_view_inventory': 'View Inventory',
-        'admin.permission_view_reports': 'View Reports',
-        'admin.permission_admin': 'System Administration',
-        'admin.system_settings': 'System Settings',
-        'admin.system_memo': 'Memo',
-        'admin.memo_placeholder': 'Enter memo content...',
-        'admin.price_settings': 'Price Settings',
-        'admin.cash_price': 'Cash Price',
-        'admin.credit_price': 'Credit Price',
-        'admin.price_management': 'Price Management',
-        'admin.set_price': 'Set Price',
-        'admin.products': 'Product Management',
-        'admin.product_name': 'Product Name',
-        'admin.add_product': 'Add Product',
-        'admin.edit_product': 'Edit Product',
-        'admin.activate': 'Activate',
-        'admin.copy_to_memo': 'Copy to Memo'
-    },
-
-    es: {
-        // Navegación
-        'nav.home': 'Inicio',
-        'nav.sales': 'Ventas',
-        'nav.inventory': 'Inventario',
-        'nav.reports': 'Informes',
-        'nav.admin': 'Administración',
-        'nav.specs': 'Especificaciones',
-        'nav.customers': 'Clientes',
-        'nav.products': 'Productos',
-        'nav.audit': 'Registro de Auditoría',
-
-        // Inicio
-        'auth.login_title': 'Inicio de Sesión',
-        'auth.username': 'Usuario',
-        'auth.password': 'Contraseña',
-        'auth.remember_me': 'Recuérdame',
-        'auth.button': 'Iniciar Sesión',
-        'auth.restricted': 'Solo Personal Autorizado',
-        'auth.logout': 'Cerrar Sesión',
-
-        'home.title': 'Resumen del Sistema',
-        'home.orders_today': 'Pedidos Hoy',
-        'home.sales_today': 'Ventas Hoy',
-        'home.cash_sales': 'Ventas en Efectivo',
-        'home.credit_sales': 'Ventas a Crédito',
-        'home.current_stock': 'Stock Actual',
-        'home.stock_warning': 'Alerta de Stock',
-        'home.quick_actions': 'Acciones Rápidas',
-        'home.create_sale': 'Crear Venta',
-        'home.stock_moves': 'Movimientos de Stock',
-        'home.view_reports': 'Ver Informes',
-        'home.received_amount': 'Recibido',
-        'home.outstanding_amount': 'Pendiente',
-        'home.quick_date_select': 'Ver Ventas Diarias',
-        'home.today': 'Hoy',
-        'home.yesterday': 'Ayer',
-
-        // Común
-        'common.search': 'Buscar',
-        'common.add': 'Agregar',
-        'common.edit': 'Editar',
-        'common.delete': 'Eliminar',
-        'common.save': 'Guardar',
-        'common.cancel': 'Cancelar',
-        'common.submit': 'Enviar',
-        'common.back': 'Volver',
-        'common.view': 'Ver',
-        'common.active': 'Activo',
-        'common.void': 'Anulado',
-        'common.status': 'Estado',
-        'common.system_name': 'Comercializadora de Camarón Lizfer',
-        'common.footer': '© 2026 Comercializadora de Camarón Lizfer. Todos los derechos reservados. | Reglas Estrictas: Sin Entrada Libre, Cálculo Automático, Rastreable, Sin Eliminación',
-        'common.actions': 'Acciones',
-        'common.kg': 'KG',
-        'common.pieces': 'pzs',
-        'common.enabled': 'Habilitado',
-        'common.disabled': 'Deshabilitado',
-        'common.yes': 'Sí',
-        'common.no': 'No',
-        'common.confirm': 'Confirmar',
-        'common.close': 'Cerrar',
-        'common.export': 'Exportar Excel',
-        'common.prev': 'Anterior',
-        'common.next': 'Siguiente',
-        'common.total': '',
-        'common.margin': 'Margen',
-        'sales.breakdown': 'Desglose de Ventas',
-
-        // Ventas
-        'sales.list': 'Lista de Ventas',
-        'sales.create': 'Crear Venta',
-        'sales.detail': 'Detalle de Venta',
-        'sales.void': 'Anular',
-        'sales.customer': 'Cliente',
-        'sales.payment_type': 'Tipo de Pago',
-        'sales.total_weight': 'Peso Total',
-        'sales.sale_time': 'Hora de Venta',
-        'sales.items': 'Artículos de Venta',
-        'sales.sale_id': 'ID de Venta',
-        'sales.filter': 'Filtrar',
-        'sales.all_status': 'Todos los Estados',
-        'sales.all_payment': 'Todos los Tipos de Pago',
-        'sales.cash': 'Efectivo',
-        'sales.credit': 'Crédito',
-        'sales.product': 'Producto',
-        'sales.select_product': 'Seleccionar Producto',
-        'sales.spec': 'Especificación',
-        'sales.select_spec': 'Seleccionar Especificación',
-        'sales.box_qty': 'Cant. Cajas',
-        'sales.extra_kg': 'KG Extra',
-        'sales.subtotal': 'Subtotal (KG)',
-        'sales.add_item': 'Agregar Artículo',
-        'sales.void_reason': 'Razón de Anulación',
-        'sales.void_confirm': '¿Confirmar Anulación?',
-        'sales.basic_info': 'Información Básica',
-        'sales.total': 'Total',
-        'sales.created_by': 'Creado Por',
-        'sales.void_time': 'Hora de Anulación',
-        'sales.void_by': 'Anulado Por',
-        'sales.auto_calculated': 'Calculado automáticamente por el sistema',
-        'sales.daily_detail': 'Detalle de Ventas Diarias',
-        'sales.total_amount': 'Monto',
-        'sales.total_orders': 'Registros de Ventas',
-        'sales.payment_details': 'Detalles de Pago',
-        'sales.subtotal_amount': 'Monto Subtotal',
-        'sales.discount_amount': 'Monto de Descuento',
-        'sales.manual_total': 'Total Manual (Opcional)',
-        'sales.manual_total_placeholder': 'Calc. Auto',
-        'sales.manual_total_help': 'El valor ingresado será el monto final',
-        'sales.final_total': 'Monto Total Final',
-        'sales.remittance': 'Gestión de Cobros',
-        'sales.remittance_desc': 'Gestionar cobros de ventas a crédito',
-        'sales.paid_amount': 'Monto Cobrado',
-        'sales.unpaid_amount': 'Monto Pendiente',
-        'sales.remittance_amount': 'Monto del Cobro',
-        'sales.remittance_history': 'Historial de Cobros',
-        'sales.remit': 'Cobrar',
-        'sales.status_paid': 'Pagado',
-        'sales.status_partial': 'Pago Parcial',
-        'sales.status_unpaid': 'No Pagado',
-        'sales.payment_status': 'Estado de Pago',
-        'sales.remittance_amount_hint': 'Ingrese el monto del cobro, no puede exceder el monto pendiente',
-        'sales.daily_profit': 'Ganancia Diaria',
-        'sales.daily_cash_income': 'Ingreso Diario en Efectivo',
-        'sales.remittances_received': 'Cobros Recibidos',
-        'sales.total_cost': 'Costo Total',
-        'sales.includes_remittances': 'Incl. Cobros',
-        'common.notes': 'Notas',
-
-        // Inventario
-        'inventory.current': 'Stock Actual',
-        'inventory.moves': 'Movimientos de Stock',
-        'inventory.check': 'Verificación de Stock',
-        'inventory.total_stock': 'Stock Total',
-        'inventory.last_move': 'Último Movimiento',
-        'inventory.product': 'Producto',
-        'inventory.stock': 'Stock',
-        'inventory.check_title': 'Reconciliación de Inventario',
-        'inventory.check_instructions': 'Instrucciones de Verificación',
-        'inventory.theoretical_note': 'El stock teórico es calculado automáticamente por el sistema (suma de todos los movimientos de stock activos)',
-        'inventory.actual_input': 'Por favor ingrese la cantidad de stock contada realmente',
-        'inventory.auto_calculate_diff': 'El sistema calculará y registrará automáticamente la diferencia',
-        'inventory.actual_stock': 'Stock Real',
-        'inventory.diff_formula': 'Stock Real - Stock Teórico',
-        'inventory.notes_placeholder': 'Por favor explique la razón de la diferencia (si existe)',
-        'inventory.submit_check': 'Enviar Registro de Verificación',
-        'inventory.enter_actual': 'Por favor ingrese el stock real',
-        'inventory.confirm_submit': '¿Confirmar envío del registro de verificación?',
-        'inventory.check_submitted': 'Control de Inventario Enviado',
-        'inventory.add_move': 'Agregar Movimiento',
-        'inventory.move_type': 'Tipo de Movimiento',
-        'inventory.source': 'Origen/Destino',
-        'inventory.weight': 'Peso (KG)',
-        'inventory.notes': 'Notas',
-        'inventory.move_time': 'Hora del Movimiento',
-        'inventory.reference': 'Referencia',
-        'inventory.theoretical': 'Stock Teórico',
-        'inventory.actual': 'Stock Real',
-        'inventory.difference': 'Diferencia',
-        'inventory.overview': 'Resumen de Stock',
-        'inventory.type_purchase': 'Compra',
-        'inventory.type_transfer': 'Transferencia',
-        'inventory.type_return': 'Devolución',
-        'inventory.type_surplus': 'Excedente',
-        'inventory.type_loss': 'Pérdida',
-        'inventory.type_sale': 'Venta',
-        'inventory.all_types': 'Todos los Tipos',
-        'inventory.last_move': 'Último Movimiento',
-        'inventory.by_product': 'Por Producto',
-        'inventory.stock_kg': 'Stock (KG)',
-        'inventory.out_of_stock': 'Sin Stock',
-        'inventory.low_stock': 'Stock Bajo',
-        'inventory.in_stock': 'En Stock',
-
-        // Compras
-        'purchase.list': 'Lista de Compras',
-        'purchase.create': 'Recepción de Compras',
-        'purchase.detail': 'Detalle de Compra',
-        'purchase.supplier': 'Proveedor',
-        'purchase.items': 'Artículos de Compra',
-        'purchase.product_name': 'Nombre del Producto',
-        'purchase.weight': 'Peso (KG)',
-        'purchase.unit_price': 'Precio Unitario ($/KG)',
-        'purchase.subtotal': 'Subtotal',
-        'purchase.add_item': 'Agregar Artículo',
-        'purchase.total_weight': 'Peso Total',
-        'purchase.total_amount': 'Monto Total',
-        'purchase.submit': 'Enviar Compra',
-        'purchase.notes': 'Notas',
-        'purchase.purchase_time': 'Hora de Compra',
-        'purchase.payment_status': 'Estado de Pago',
-        'purchase.unpaid': 'No Pagado',
-        'purchase.partial': 'Parcial',
-        'purchase.paid': 'Pagado',
-        'purchase.basic_info': 'Información Básica',
-        'purchase.summary': 'Resumen',
-        'purchase.item_list': 'Lista de Artículos',
-        'purchase.supplier_placeholder': 'Ingrese nombre del proveedor',
-        'purchase.notes_placeholder': 'Opcional',
-        'purchase.product_name_placeholder': 'Nombre del producto',
-
-        // Informes
-        'reports.daily': 'Ventas Diarias',
-        'reports.customer': 'Por Cliente',
-        'reports.spec': 'Por Especificación',
-        'reports.daily_desc': 'Ver tendencias de ventas diarias',
-        'reports.customer_desc': 'Clasificación de ventas por cliente',
-        'reports.spec_desc': 'Análisis de uso de especificaciones',
-        'reports.date_from': 'Desde',
-        'reports.date_to': 'Hasta',
-        'reports.total_orders': 'Total de Pedidos',
-        'reports.total_sales': 'Ventas Totales',
-        'reports.avg_order': 'Pedido Promedio',
-        'reports.customer_count': 'Cantidad de Clientes',
-        'reports.ranking': 'Clasificación',
-        'reports.customer_name': 'Nombre del Cliente',
-        'reports.customer_ranking': 'Clasificación de Ventas por Cliente',
-        'reports.display_count': 'Cantidad a Mostrar',
-        'reports.top_10': 'Top 10',
-        'reports.top_20': 'Top 20',
-        'reports.top_50': 'Top 50',
-        'reports.order_count': 'Cantidad de Pedidos',
-        'reports.last_sale': 'Última Venta',
-        'reports.usage_count': 'Cantidad de Usos',
-        'reports.total_boxes': 'Total de Cajas',
-        'reports.spec_name': 'Nombre de Especificación',
-        'reports.spec_ranking': 'Clasificación de Uso de Especificaciones',
-        'reports.extra_kg': 'Extra (KG)',
-        'reports.index': 'Inicio de Informes',
-        'reports.summary': 'Estadísticas Resumidas',
-        'reports.date': 'Fecha',
-        'reports.total_sales': 'Ventas Totales (KG)',
-        'reports.cash_sales': 'Ventas en Efectivo (KG)',
-        'reports.credit_sales': 'Ventas a Crédito (KG)',
-        'reports.sales_trend': 'Gráfico de Tendencia de Ventas',
-        'reports.detailed_data': 'Datos Detallados',
-        'reports.select_date_range': 'Por favor seleccione el rango de fechas',
-        'reports.no_data': 'No hay datos disponibles',
-        'reports.query': 'Consultar',
-        'reports.trend': 'Tendencia de Ventas',
-        'reports.detailed_data': 'Datos Detallados',
-        'common.no_data': 'No hay datos disponibles',
-        'reports.by_representative': 'Por Vendedor',
-        'reports.representative_desc': 'Clasificación de rendimiento de vendedores',
-        'reports.representative': 'Vendedor',
-        'reports.representative_ranking': 'Clasificación de Vendedores',
-        'reports.total_amount': 'Monto Total',
-        'reports.sales_detail': 'Detalle de Ventas',
-        'common.loading': 'Cargando...',
+// 当前语言
+let currentLanguage = localStorage.getItem('language') || document.documentElement.dataset.locale || 'zh';
 
-        // Administración
-        'admin.specs': 'Especificaciones',
-        'admin.customers': 'Clientes',
-        'admin.audit': 'Registro de Auditoría',
-        'admin.spec_name': 'Nombre de Especificación',
-        'admin.length': 'Longitud (cm)',
-        'admin.width': 'Ancho (cm)',
-        'admin.kg_per_box': 'KG por Caja',
-        'admin.customer_name': 'Nombre del Cliente',
-        'admin.credit_allowed': 'Crédito Permitido',
-        'admin.allow_credit': 'Permitir Crédito',
-        'admin.table_name': 'Tabla',
-        'admin.record_id': 'ID de Registro',
-        'admin.action': 'Acción',
-        'admin.operator': 'Operador',
-        'admin.old_value': 'Valor Anterior',
-        'admin.new_value': 'Valor Nuevo',
-        'admin.created_time': 'Hora de Creación',
-        'admin.add_spec': 'Agregar Especificación',
-        'admin.add_customer': 'Agregar Cliente',
-        'admin.deactivate': 'Desactivar',
-        'admin.users': 'Gestión de Usuarios',
-        'admin.role': 'Rol',
-        'admin.last_login': 'Último Acceso',
-        'admin.add_user': 'Agregar Usuario',
-        'admin.edit_user': 'Editar Usuario',
-        'admin.password': 'Contraseña',
-        'admin.password_hint': 'Dejar en blanco para mantener sin cambios',
-        'admin.roles_management': 'Gestión de Roles',
-        'admin.add_role': 'Agregar Rol',
-        'admin.edit_role': 'Editar Rol',
-        'admin.permissions': 'Permisos',
-        'admin.role_name': 'Nombre del Rol',
-        'admin.permission_view_sales': 'Ver Ventas',
-        'admin.permission_view_inventory': 'Ver Inventario',
-        'admin.permission_view_reports': 'Ver Reportes',
-        'admin.permission_admin': 'Administración del Sistema',
-        'admin.system_settings': 'Configuración del Sistema',
-        'admin.system_memo': 'Nota',
-        'admin.memo_placeholder': 'Ingrese el contenido de la nota...',
-        'admin.price_settings': 'Configuración de Precios',
-        'admin.cash_price': 'Precio en Efectivo',
-        'admin.credit_price': 'Precio a Crédito',
-        'admin.price_management': 'Gestión de Precios',
-        'admin.set_price': 'Establecer Precio',
-        'admin.products': 'Gestión de Productos',
-        'admin.product_name': 'Nombre del Producto',
-        'admin.add_product': 'Agregar Producto',
-        'admin.edit_product': 'Editar Producto',
-        'admin.activate': 'Activar',
-        'admin.copy_to_memo': 'Copiar a Nota'
+// 按需加载语言包
+function loadBundle(lang) {
+    if (translations[lang]) {
+        return Promise.resolve(translations[lang]);
     }
-};
-
-// 当前语言
-let currentLanguage = localStorage.getItem('language') || 'zh';
+    const urls = window.I18N_BUNDLE_URLS || {};
+    const src = urls[lang] || `/static/js/i18n/${lang}.js`;
+    return new Promise((resolve, reject) => {
+        const script = document.createElement('script');
+        script.src = src;
+        script.onload = () => resolve(translations[lang] || {});
+        script.onerror = reject;
+        document.head.appendChild(script);
+    });
+}
 
 // 切换语言
 function switchLanguage(lang) {
@@ -935,8 +36,8 @@ function switchLanguage(lang) {
         currentLangElement.textContent = langNames[lang];
     }
 
-    // 翻译页面
-    translatePage();
+    // 加载语言包后翻译页面
+    loadBundle(lang).then(translatePage);
 
     // 通知服务器（设置session）
     fetch(`/language/set-language/${lang}`)
@@ -948,9 +49,11 @@ function switchLanguage(lang) {
 
 // 翻译页面元素
 function translatePage() {
+    const dictionary = translations[currentLanguage] || {};
+
     document.querySelectorAll('[data-i18n]').forEach(element => {
         const key = element.getAttribute('data-i18n');
-        const translation = translations[currentLanguage][key];
+        const translation = dictionary[key];
         if (translation) {
             if (element.tagName === 'INPUT' || element.tagName === 'TEXTAREA') {
                 element.placeholder = translation;
@@ -962,7 +65,7 @@ function translatePage() {
 
     document.querySelectorAll('[data-i18n-placeholder]').forEach(element => {
         const key = element.getAttribute('data-i18n-placeholder');
-        const translation = translations[currentLanguage][key];
+        const translation = dictionary[key];
         if (translation) {
             element.placeholder = translation;
         }
@@ -971,7 +74,7 @@ function translatePage() {
     // Translate title attributes (tooltips)
     document.querySelectorAll('[data-i18n-title]').forEach(element => {
         const key = element.getAttribute('data-i18n-title');
-        const translation = translations[currentLanguage][key];
+        const translation = dictionary[key];
         if (translation) {
             element.title = translation;
         }
@@ -989,12 +92,13 @@ document.addEventListener('DOMContentLoaded', () => {
     if (currentLangElement) {
         currentLangElement.textContent = langNames[currentLanguage] || '中文';
     }
-    translatePage();
+    loadBundle(currentLanguage).then(translatePage);
 });
 
 // 导出供其他脚本使用
 window.i18n = {
-    t: (key) => translations[currentLanguage][key] || key,
+    t: (key) => (translations[currentLanguage] || {})[key] || key,
     switchLanguage,
+    loadBundle,
     currentLanguage: () => currentLanguage
 };
@@ -0,0 +1,324 @@
+// English translations
+window.I18N_BUNDLES = window.I18N_BUNDLES || {};
+window.I18N_BUNDLES.en = {
+    // Navigation
+    'nav.home': 'Home',
+    'nav.sales': 'Sales',
+    'nav.inventory': 'Inventory',
+    'nav.reports': 'Reports',
+    'nav.admin': 'Admin',
+    'nav.specs': 'Specifications',
+    'nav.customers': 'Customers',
+    'nav.products': 'Products',
+    'nav.audit': 'Audit Log',
+    'nav.jobs': 'Scheduled Jobs',
+
+    // Home
+    'auth.login_title': 'System Login',
+    'auth.username': 'Username',
+    'auth.password': 'Password',
+    'auth.remember_me': 'Remember Me',
+    'auth.button': 'Login',
+    'auth.restricted': 'Authorized Personnel Only',
+    'auth.logout': 'Logout',
+
+    'home.title': 'System Overview',
+    'home.orders_today': 'Orders Today',
+    'home.sales_today': 'Sales Today',
+    'home.cash_sales': 'Cash Sales',
+    'home.credit_sales': 'Credit Sales',
+    'home.current_stock': 'Current Stock',
+    'home.stock_warning': 'Stock Warning',
+    'home.quick_actions': 'Quick Actions',
+    'home.create_sale': 'Create Sale',
+    'home.stock_moves': 'Stock Moves',
+    'home.view_reports': 'View Reports',
+    'home.received_amount': 'Received',
+    'home.outstanding_amount': 'Outstanding',
+    'home.quick_date_select': 'Quick Daily Sales',
+    'home.today': 'Today',
+    'home.yesterday': 'Yesterday',
+
+    // Common
+    'common.search': 'Search',
+    'common.add': 'Add',
+    'common.edit': 'Edit',
+    'common.delete': 'Delete',
+    'common.save': 'Save',
+    'common.cancel': 'Cancel',
+    'common.submit': 'Submit',
+    'common.back': 'Back',
+    'common.view': 'View',
+    'common.active': 'Active',
+    'common.void': 'Void',
+    'common.status': 'Status',
+    'common.system_name': 'Comercializadora de Camarón Lizfer',
+    'common.footer': '© 2026 Comercializadora de Camarón Lizfer. All rights reserved. | Strict Business Rules: No Free Input, Auto-calculation, Traceable, No Deletion',
+    'common.actions': 'Actions',
+    'common.kg': 'KG',
+    'common.pieces': 'pcs',
+    'common.enabled': 'Enabled',
+    'common.disabled': 'Disabled',
+    'common.yes': 'Yes',
+    'common.no': 'No',
+    'common.confirm': 'Confirm',
+    'common.close': 'Close',
+    'common.export': 'Export Excel',
+    'common.exporting': 'Generating export…',
+    'common.export_failed': 'Export failed',
+    'common.prev': 'Previous',
+    'common.next': 'Next',
+    'common.total': '',
+    'common.margin': 'Margin',
+    'sales.breakdown': 'Sales Breakdown',
+
+    // Sales
+    'sales.list': 'Sales List',
+    'sales.create': 'Create Sale',
+    'sales.detail': 'Sale Detail',
+    'sales.void': 'Void',
+    'sales.customer': 'Customer',
+    'sales.search_customer': 'Search customer name...',
+    'sales.offline_pending': 'Pending sync',
+    'sales.offline_rejected': 'Rejected',
+    'sales.offline_error': 'Reason',
+    'sales.offline_retry': 'Retry',
+    'sales.offline_discard': 'Discard',
+    'sales.offline_discard_confirm': 'Discard this offline sale?',
+    'sales.payment_type': 'Payment Type',
+    'sales.total_weight': 'Total Weight',
+    'sales.sale_time': 'Sale Time',
+    'sales.items': 'Sale Items',
+    'sales.sale_id': 'Sale ID',
+    'sales.filter': 'Filter',
+    'sales.all_status': 'All Status',
+    'sales.all_payment': 'All Payment Types',
+    'sales.cash': 'Cash',
+    'sales.credit': 'Credit',
+    'sales.product': 'Product',
+    'sales.select_product': 'Select Product',
+    'sales.spec': 'Specification',
+    'sales.select_spec': 'Select Specification',
+    'sales.box_qty': 'Box Qty',
+    'sales.extra_kg': 'Extra KG',
+    'sales.subtotal': 'Subtotal (KG)',
+    'sales.add_item': 'Add Item',
+    'sales.void_reason': 'Void Reason',
+    'sales.void_confirm': 'Confirm Void',
+    'sales.basic_info': 'Basic Information',
+    'sales.total': 'Total',
+    'sales.created_by': 'Created By',
+    'sales.void_time': 'Void Time',
+    'sales.void_by': 'Voided By',
+    'sales.auto_calculated': 'Auto-calculated by system',
+    'sales.daily_detail': 'Daily Sales Detail',
+    'sales.total_amount': 'Amount',
+    'sales.total_orders': 'Sales Records',
+    'sales.payment_details': 'Payment Details',
+    'sales.subtotal_amount': 'Subtotal Amount',
+    'sales.discount_amount': 'Discount Amount',
+    'sales.manual_total': 'Manual Total (Optional)',
+    'sales.manual_total_placeholder': 'Auto-calc',
+    'sales.manual_total_help': 'Input will be final amount',
+    'sales.final_total': 'Final Total Amount',
+    'sales.remittance': 'Remittance Management',
+    'sales.remittance_desc': 'Manage credit sales remittances',
+    'sales.paid_amount': 'Paid Amount',
+    'sales.unpaid_amount': 'Unpaid Amount',
+    'sales.remittance_amount': 'Remittance Amount',
+    'sales.remittance_history': 'Remittance History',
+    'sales.remit': 'Remit',
+    'sales.status_paid': 'Paid',
+    'sales.status_partial': 'Partial Payment',
+    'sales.status_unpaid': 'Unpaid',
+    'sales.payment_status': 'Payment Status',
+    'sales.remittance_amount_hint': 'Enter remittance amount, cannot exceed unpaid amount',
+    'sales.daily_profit': 'Daily Profit',
+    'sales.daily_cash_income': 'Daily Cash Income',
+    'sales.remittances_received': 'Remittances Received',
+    'sales.total_cost': 'Total Cost',
+    'sales.includes_remittances': 'Incl. Remittances',
+    'sales.day_closed': 'Day Closed',
+    'sales.close_day': 'Close Day',
+    'sales.reopen_day': 'Reopen Day',
+    'common.notes': 'Notes',
+
+    // Inventory
+    'inventory.current': 'Current Stock',
+    'inventory.moves': 'Stock Moves',
+    'inventory.check': 'Stock Check',
+    'inventory.total_stock': 'Total Stock',
+    'inventory.last_move': 'Last Move',
+    'inventory.add_move': 'Add Stock Move',
+    'inventory.product': 'Product',
+    'inventory.stock': 'Stock',
+    'inventory.move_type': 'Move Type',
+    'inventory.source': 'Source/Destination',
+    'inventory.weight': 'Weight (KG)',
+    'inventory.notes': 'Notes',
+    'inventory.move_time': 'Move Time',
+    'inventory.reference': 'Reference',
+    'inventory.theoretical': 'Theoretical Stock',
+    'inventory.actual': 'Actual Stock',
+    'inventory.difference': 'Difference',
+    'inventory.overview': 'Stock Overview',
+    'inventory.type_purchase': 'Purchase',
+    'inventory.type_transfer': 'Transfer',
+    'inventory.type_return': 'Return',
+    'inventory.type_surplus': 'Surplus',
+    'inventory.type_loss': 'Loss',
+    'inventory.type_sale': 'Sale',
+    'inventory.all_types': 'All Types',
+    'inventory.last_move': 'Last Movement',
+    'inventory.check_title': 'Inventory Reconciliation',
+    'inventory.check_instructions': 'Check Instructions',
+    'inventory.theoretical_note': 'Theoretical stock is automatically calculated by the system (sum of all active stock movements)',
+    'inventory.actual_input': 'Please enter the actual counted stock quantity',
+    'inventory.auto_calculate_diff': 'The system will automatically calculate and record the difference',
+    'inventory.actual_stock': 'Actual Stock',
+    'inventory.diff_formula': 'Actual Stock - Theoretical Stock',
+    'inventory.notes_placeholder': 'Please explain the reason for the difference (if any)',
+    'inventory.submit_check': 'Submit Check Record',
+    'inventory.enter_actual': 'Please enter actual stock',
+    'inventory.confirm_submit': 'Confirm submission of check record?',
+    'inventory.check_submitted': 'Inventory Check Submitted',
+    'inventory.by_product': 'By Product',
+    'inventory.stock_kg': 'Stock (KG)',
+    'inventory.out_of_stock': 'Out of Stock',
+    'inventory.low_stock': 'Low Stock',
+    'inventory.in_stock': 'In Stock',
+
+    // Purchase
+    'purchase.list': 'Purchase List',
+    'purchase.create': 'Purchase Receiving',
+    'purchase.detail': 'Purchase Detail',
+    'purchase.supplier': 'Supplier',
+    'purchase.items': 'Purchase Items',
+    'purchase.product_name': 'Product Name',
+    'purchase.weight': 'Weight (KG)',
+    'purchase.unit_price': 'Unit Price ($/KG)',
+    'purchase.subtotal': 'Subtotal',
+    'purchase.add_item': 'Add Item',
+    'purchase.total_weight': 'Total Weight',
+    'purchase.total_amount': 'Total Amount',
+    'purchase.submit': 'Submit Purchase',
+    'purchase.notes': 'Notes',
+    'purchase.purchase_time': 'Purchase Time',
+    'purchase.payment_status': 'Payment Status',
+    'purchase.unpaid': 'Unpaid',
+    'purchase.partial': 'Partial',
+    'purchase.paid': 'Paid',
+    'purchase.basic_info': 'Basic Information',
+    'purchase.summary': 'Summary',
+    'purchase.item_list': 'Item List',
+    'purchase.supplier_placeholder': 'Enter supplier name',
+    'purchase.notes_placeholder': 'Optional',
+    'purchase.product_name_placeholder': 'Product name',
+
+    // Reports
+    'reports.daily': 'Daily Sales',
+    'reports.customer': 'By Customer',
+    'reports.spec': 'By Specification',
+    'reports.daily_desc': 'View daily sales trends',
+    'reports.customer_desc': 'Customer sales ranking',
+    'reports.spec_desc': 'Spec usage analysis',
+    'reports.date_from': 'From Date',
+    'reports.date_to': 'To Date',
+    'reports.total_orders': 'Total Orders',
+    'reports.total_sales': 'Total Sales',
+    'reports.avg_order': 'Avg Order',
+    'reports.customer_count': 'Customer Count',
+    'reports.ranking': 'Ranking',
+    'reports.customer_name': 'Customer Name',
+    'reports.customer_ranking': 'Customer Sales Ranking',
+    'reports.display_count': 'Display Count',
+    'reports.top_10': 'Top 10',
+    'reports.top_20': 'Top 20',
+    'reports.top_50': 'Top 50',
+    'reports.order_count': 'Order Count',
+    'reports.last_sale': 'Last Sale',
+    'reports.usage_count': 'Usage Count',
+    'reports.total_boxes': 'Total Boxes',
+    'reports.spec_name': 'Spec Name',
+    'reports.spec_ranking': 'Spec Usage Ranking',
+    'reports.extra_kg': 'Extra (KG)',
+    'reports.index': 'Reports Home',
+    'reports.summary': 'Summary Statistics',
+    'reports.date': 'Date',
+    'reports.total_sales': 'Total Sales (KG)',
+    'reports.cash_sales': 'Cash Sales (KG)',
+    'reports.credit_sales': 'Credit Sales (KG)',
+    'reports.sales_trend': 'Sales Trend Chart',
+    'reports.detailed_data': 'Detailed Data',
+    'reports.select_date_range': 'Please select date range',
+    'reports.no_data': 'No data available',
+    'reports.query': 'Query',
+    'reports.trend': 'Sales Trend',
+    'reports.detailed_data': 'Detailed Data',
+    'common.no_data': 'No data available',
+    'reports.by_representative': 'By Representative',
+    'reports.representative_desc': 'Sales representative performance ranking',
+    'reports.representative': 'Sales Representative',
+    'reports.representative_ranking': 'Sales Representative Ranking',
+    'reports.total_amount': 'Total Amount',
+    'reports.sales_detail': 'Sales Detail',
+    'common.loading': 'Loading...',
+
+    // Admin
+    'admin.specs': 'Specifications',
+    'admin.customers': 'Customers',
+    'admin.audit': 'Audit Log',
+    'admin.spec_name': 'Spec Name',
+    'admin.length': 'Length (cm)',
+    'admin.width': 'Width (cm)',
+    'admin.kg_per_box': 'KG per Box',
+    'admin.customer_name': 'Customer Name',
+    'admin.credit_allowed': 'Credit Allowed',
+    'admin.credit_limit': 'Credit Limit',
+    'admin.balance': 'Balance',
+    'admin.allow_credit': 'Allow Credit',
+    'admin.table_name': 'Table',
+    'admin.record_id': 'Record ID',
+    'admin.action': 'Action',
+    'admin.operator': 'Operator',
+    'admin.old_value': 'Old Value',
+    'admin.new_value': 'New Value',
+    'admin.created_time': 'Created Time',
+    'admin.add_spec': 'Add Specification',
+    'admin.add_customer': 'Add Customer',
+    'admin.deactivate': 'Deactivate',
+    'admin.users': 'User Management',
+    'admin.role': 'Role',
+    'admin.last_login': 'Last Login',
+    'admin.add_user': 'Add User',
+    'admin.edit_user': 'Edit User',
+    'admin.password': 'Password',
+    'admin.password_hint': 'Leave blank to keep unchanged',
+    'admin.roles_management': 'Role Management',
+    'admin.add_role': 'Add Role',
+    'admin.edit_role': 'Edit Role',
+    'admin.permissions': 'Permissions',
+    'admin.role_name': 'Role Name',
+    'admin.permission_view_sales': 'View Sales',
+    'admin.permission_view_inventory': 'View Inventory',
+    'admin.permission_view_reports': 'View Reports',
+    'admin.permission_admin': 'System Administration',
+    'admin.system_settings': 'System Settings',
+    'admin.system_memo': 'Memo',
+    'admin.memo_placeholder': 'Enter memo content...',
+    'admin.price_settings': 'Price Settings',
+    'admin.run_job_now': 'Run Now',
+    'admin.costing_method': 'Costing Method',
+    'admin.costing_fifo': 'First In, First Out (FIFO)',
+    'admin.costing_weighted_average': 'Weighted Average',
+    'admin.cash_price': 'Cash Price',
+    'admin.credit_price': 'Credit Price',
+    'admin.price_management': 'Price Management',
+    'admin.set_price': 'Set Price',
+    'admin.products': 'Product Management',
+    'admin.product_name': 'Product Name',
+    'admin.add_product': 'Add Product',
+    'admin.edit_product': 'Edit Product',
+    'admin.activate': 'Activate',
+    'admin.copy_to_memo': 'Copy to Memo'
+};
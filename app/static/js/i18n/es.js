@@ -0,0 +1,324 @@
+// Traducciones al español
+window.I18N_BUNDLES = window.I18N_BUNDLES || {};
+window.I18N_BUNDLES.es = {
+    // Navegación
+    'nav.home': 'Inicio',
+    'nav.sales': 'Ventas',
+    'nav.inventory': 'Inventario',
+    'nav.reports': 'Informes',
+    'nav.admin': 'Administración',
+    'nav.specs': 'Especificaciones',
+    'nav.customers': 'Clientes',
+    'nav.products': 'Productos',
+    'nav.audit': 'Registro de Auditoría',
+    'nav.jobs': 'Tareas Programadas',
+
+    // Inicio
+    'auth.login_title': 'Inicio de Sesión',
+    'auth.username': 'Usuario',
+    'auth.password': 'Contraseña',
+    'auth.remember_me': 'Recuérdame',
+    'auth.button': 'Iniciar Sesión',
+    'auth.restricted': 'Solo Personal Autorizado',
+    'auth.logout': 'Cerrar Sesión',
+
+    'home.title': 'Resumen del Sistema',
+    'home.orders_today': 'Pedidos Hoy',
+    'home.sales_today': 'Ventas Hoy',
+    'home.cash_sales': 'Ventas en Efectivo',
+    'home.credit_sales': 'Ventas a Crédito',
+    'home.current_stock': 'Stock Actual',
+    'home.stock_warning': 'Alerta de Stock',
+    'home.quick_actions': 'Acciones Rápidas',
+    'home.create_sale': 'Crear Venta',
+    'home.stock_moves': 'Movimientos de Stock',
+    'home.view_reports': 'Ver Informes',
+    'home.received_amount': 'Recibido',
+    'home.outstanding_amount': 'Pendiente',
+    'home.quick_date_select': 'Ver Ventas Diarias',
+    'home.today': 'Hoy',
+    'home.yesterday': 'Ayer',
+
+    // Común
+    'common.search': 'Buscar',
+    'common.add': 'Agregar',
+    'common.edit': 'Editar',
+    'common.delete': 'Eliminar',
+    'common.save': 'Guardar',
+    'common.cancel': 'Cancelar',
+    'common.submit': 'Enviar',
+    'common.back': 'Volver',
+    'common.view': 'Ver',
+    'common.active': 'Activo',
+    'common.void': 'Anulado',
+    'common.status': 'Estado',
+    'common.system_name': 'Comercializadora de Camarón Lizfer',
+    'common.footer': '© 2026 Comercializadora de Camarón Lizfer. Todos los derechos reservados. | Reglas Estrictas: Sin Entrada Libre, Cálculo Automático, Rastreable, Sin Eliminación',
+    'common.actions': 'Acciones',
+    'common.kg': 'KG',
+    'common.pieces': 'pzs',
+    'common.enabled': 'Habilitado',
+    'common.disabled': 'Deshabilitado',
+    'common.yes': 'Sí',
+    'common.no': 'No',
+    'common.confirm': 'Confirmar',
+    'common.close': 'Cerrar',
+    'common.export': 'Exportar Excel',
+    'common.exporting': 'Generando exportación…',
+    'common.export_failed': 'Error al exportar',
+    'common.prev': 'Anterior',
+    'common.next': 'Siguiente',
+    'common.total': '',
+    'common.margin': 'Margen',
+    'sales.breakdown': 'Desglose de Ventas',
+
+    // Ventas
+    'sales.list': 'Lista de Ventas',
+    'sales.create': 'Crear Venta',
+    'sales.detail': 'Detalle de Venta',
+    'sales.void': 'Anular',
+    'sales.customer': 'Cliente',
+    'sales.search_customer': 'Buscar nombre del cliente...',
+    'sales.offline_pending': 'Pendiente de sincronizar',
+    'sales.offline_rejected': 'Rechazadas',
+    'sales.offline_error': 'Motivo',
+    'sales.offline_retry': 'Reintentar',
+    'sales.offline_discard': 'Descartar',
+    'sales.offline_discard_confirm': '¿Descartar esta venta sin conexión?',
+    'sales.payment_type': 'Tipo de Pago',
+    'sales.total_weight': 'Peso Total',
+    'sales.sale_time': 'Hora de Venta',
+    'sales.items': 'Artículos de Venta',
+    'sales.sale_id': 'ID de Venta',
+    'sales.filter': 'Filtrar',
+    'sales.all_status': 'Todos los Estados',
+    'sales.all_payment': 'Todos los Tipos de Pago',
+    'sales.cash': 'Efectivo',
+    'sales.credit': 'Crédito',
+    'sales.product': 'Producto',
+    'sales.select_product': 'Seleccionar Producto',
+    'sales.spec': 'Especificación',
+    'sales.select_spec': 'Seleccionar Especificación',
+    'sales.box_qty': 'Cant. Cajas',
+    'sales.extra_kg': 'KG Extra',
+    'sales.subtotal': 'Subtotal (KG)',
+    'sales.add_item': 'Agregar Artículo',
+    'sales.void_reason': 'Razón de Anulación',
+    'sales.void_confirm': '¿Confirmar Anulación?',
+    'sales.basic_info': 'Información Básica',
+    'sales.total': 'Total',
+    'sales.created_by': 'Creado Por',
+    'sales.void_time': 'Hora de Anulación',
+    'sales.void_by': 'Anulado Por',
+    'sales.auto_calculated': 'Calculado automáticamente por el sistema',
+    'sales.daily_detail': 'Detalle de Ventas Diarias',
+    'sales.total_amount': 'Monto',
+    'sales.total_orders': 'Registros de Ventas',
+    'sales.payment_details': 'Detalles de Pago',
+    'sales.subtotal_amount': 'Monto Subtotal',
+    'sales.discount_amount': 'Monto de Descuento',
+    'sales.manual_total': 'Total Manual (Opcional)',
+    'sales.manual_total_placeholder': 'Calc. Auto',
+    'sales.manual_total_help': 'El valor ingresado será el monto final',
+    'sales.final_total': 'Monto Total Final',
+    'sales.remittance': 'Gestión de Cobros',
+    'sales.remittance_desc': 'Gestionar cobros de ventas a crédito',
+    'sales.paid_amount': 'Monto Cobrado',
+    'sales.unpaid_amount': 'Monto Pendiente',
+    'sales.remittance_amount': 'Monto del Cobro',
+    'sales.remittance_history': 'Historial de Cobros',
+    'sales.remit': 'Cobrar',
+    'sales.status_paid': 'Pagado',
+    'sales.status_partial': 'Pago Parcial',
+    'sales.status_unpaid': 'No Pagado',
+    'sales.payment_status': 'Estado de Pago',
+    'sales.remittance_amount_hint': 'Ingrese el monto del cobro, no puede exceder el monto pendiente',
+    'sales.daily_profit': 'Ganancia Diaria',
+    'sales.daily_cash_income': 'Ingreso Diario en Efectivo',
+    'sales.remittances_received': 'Cobros Recibidos',
+    'sales.total_cost': 'Costo Total',
+    'sales.includes_remittances': 'Incl. Cobros',
+    'sales.day_closed': 'Día Cerrado',
+    'sales.close_day': 'Cerrar Día',
+    'sales.reopen_day': 'Reabrir Día',
+    'common.notes': 'Notas',
+
+    // Inventario
+    'inventory.current': 'Stock Actual',
+    'inventory.moves': 'Movimientos de Stock',
+    'inventory.check': 'Verificación de Stock',
+    'inventory.total_stock': 'Stock Total',
+    'inventory.last_move': 'Último Movimiento',
+    'inventory.product': 'Producto',
+    'inventory.stock': 'Stock',
+    'inventory.check_title': 'Reconciliación de Inventario',
+    'inventory.check_instructions': 'Instrucciones de Verificación',
+    'inventory.theoretical_note': 'El stock teórico es calculado automáticamente por el sistema (suma de todos los movimientos de stock activos)',
+    'inventory.actual_input': 'Por favor ingrese la cantidad de stock contada realmente',
+    'inventory.auto_calculate_diff': 'El sistema calculará y registrará automáticamente la diferencia',
+    'inventory.actual_stock': 'Stock Real',
+    'inventory.diff_formula': 'Stock Real - Stock Teórico',
+    'inventory.notes_placeholder': 'Por favor explique la razón de la diferencia (si existe)',
+    'inventory.submit_check': 'Enviar Registro de Verificación',
+    'inventory.enter_actual': 'Por favor ingrese el stock real',
+    'inventory.confirm_submit': '¿Confirmar envío del registro de verificación?',
+    'inventory.check_submitted': 'Control de Inventario Enviado',
+    'inventory.add_move': 'Agregar Movimiento',
+    'inventory.move_type': 'Tipo de Movimiento',
+    'inventory.source': 'Origen/Destino',
+    'inventory.weight': 'Peso (KG)',
+    'inventory.notes': 'Notas',
+    'inventory.move_time': 'Hora del Movimiento',
+    'inventory.reference': 'Referencia',
+    'inventory.theoretical': 'Stock Teórico',
+    'inventory.actual': 'Stock Real',
+    'inventory.difference': 'Diferencia',
+    'inventory.overview': 'Resumen de Stock',
+    'inventory.type_purchase': 'Compra',
+    'inventory.type_transfer': 'Transferencia',
+    'inventory.type_return': 'Devolución',
+    'inventory.type_surplus': 'Excedente',
+    'inventory.type_loss': 'Pérdida',
+    'inventory.type_sale': 'Venta',
+    'inventory.all_types': 'Todos los Tipos',
+    'inventory.last_move': 'Último Movimiento',
+    'inventory.by_product': 'Por Producto',
+    'inventory.stock_kg': 'Stock (KG)',
+    'inventory.out_of_stock': 'Sin Stock',
+    'inventory.low_stock': 'Stock Bajo',
+    'inventory.in_stock': 'En Stock',
+
+    // Compras
+    'purchase.list': 'Lista de Compras',
+    'purchase.create': 'Recepción de Compras',
+    'purchase.detail': 'Detalle de Compra',
+    'purchase.supplier': 'Proveedor',
+    'purchase.items': 'Artículos de Compra',
+    'purchase.product_name': 'Nombre del Producto',
+    'purchase.weight': 'Peso (KG)',
+    'purchase.unit_price': 'Precio Unitario ($/KG)',
+    'purchase.subtotal': 'Subtotal',
+    'purchase.add_item': 'Agregar Artículo',
+    'purchase.total_weight': 'Peso Total',
+    'purchase.total_amount': 'Monto Total',
+    'purchase.submit': 'Enviar Compra',
+    'purchase.notes': 'Notas',
+    'purchase.purchase_time': 'Hora de Compra',
+    'purchase.payment_status': 'Estado de Pago',
+    'purchase.unpaid': 'No Pagado',
+    'purchase.partial': 'Parcial',
+    'purchase.paid': 'Pagado',
+    'purchase.basic_info': 'Información Básica',
+    'purchase.summary': 'Resumen',
+    'purchase.item_list': 'Lista de Artículos',
+    'purchase.supplier_placeholder': 'Ingrese nombre del proveedor',
+    'purchase.notes_placeholder': 'Opcional',
+    'purchase.product_name_placeholder': 'Nombre del producto',
+
+    // Informes
+    'reports.daily': 'Ventas Diarias',
+    'reports.customer': 'Por Cliente',
+    'reports.spec': 'Por Especificación',
+    'reports.daily_desc': 'Ver tendencias de ventas diarias',
+    'reports.customer_desc': 'Clasificación de ventas por cliente',
+    'reports.spec_desc': 'Análisis de uso de especificaciones',
+    'reports.date_from': 'Desde',
+    'reports.date_to': 'Hasta',
+    'reports.total_orders': 'Total de Pedidos',
+    'reports.total_sales': 'Ventas Totales',
+    'reports.avg_order': 'Pedido Promedio',
+    'reports.customer_count': 'Cantidad de Clientes',
+    'reports.ranking': 'Clasificación',
+    'reports.customer_name': 'Nombre del Cliente',
+    'reports.customer_ranking': 'Clasificación de Ventas por Cliente',
+    'reports.display_count': 'Cantidad a Mostrar',
+    'reports.top_10': 'Top 10',
+    'reports.top_20': 'Top 20',
+    'reports.top_50': 'Top 50',
+    'reports.order_count': 'Cantidad de Pedidos',
+    'reports.last_sale': 'Última Venta',
+    'reports.usage_count': 'Cantidad de Usos',
+    'reports.total_boxes': 'Total de Cajas',
+    'reports.spec_name': 'Nombre de Especificación',
+    'reports.spec_ranking': 'Clasificación de Uso de Especificaciones',
+    'reports.extra_kg': 'Extra (KG)',
+    'reports.index': 'Inicio de Informes',
+    'reports.summary': 'Estadísticas Resumidas',
+    'reports.date': 'Fecha',
+    'reports.total_sales': 'Ventas Totales (KG)',
+    'reports.cash_sales': 'Ventas en Efectivo (KG)',
+    'reports.credit_sales': 'Ventas a Crédito (KG)',
+    'reports.sales_trend': 'Gráfico de Tendencia de Ventas',
+    'reports.detailed_data': 'Datos Detallados',
+    'reports.select_date_range': 'Por favor seleccione el rango de fechas',
+    'reports.no_data': 'No hay datos disponibles',
+    'reports.query': 'Consultar',
+    'reports.trend': 'Tendencia de Ventas',
+    'reports.detailed_data': 'Datos Detallados',
+    'common.no_data': 'No hay datos disponibles',
+    'reports.by_representative': 'Por Vendedor',
+    'reports.representative_desc': 'Clasificación de rendimiento de vendedores',
+    'reports.representative': 'Vendedor',
+    'reports.representative_ranking': 'Clasificación de Vendedores',
+    'reports.total_amount': 'Monto Total',
+    'reports.sales_detail': 'Detalle de Ventas',
+    'common.loading': 'Cargando...',
+
+    // Administración
+    'admin.specs': 'Especificaciones',
+    'admin.customers': 'Clientes',
+    'admin.audit': 'Registro de Auditoría',
+    'admin.spec_name': 'Nombre de Especificación',
+    'admin.length': 'Longitud (cm)',
+    'admin.width': 'Ancho (cm)',
+    'admin.kg_per_box': 'KG por Caja',
+    'admin.customer_name': 'Nombre del Cliente',
+    'admin.credit_allowed': 'Crédito Permitido',
+    'admin.credit_limit': 'Límite de Crédito',
+    'admin.balance': 'Saldo',
+    'admin.allow_credit': 'Permitir Crédito',
+    'admin.table_name': 'Tabla',
+    'admin.record_id': 'ID de Registro',
+    'admin.action': 'Acción',
+    'admin.operator': 'Operador',
+    'admin.old_value': 'Valor Anterior',
+    'admin.new_value': 'Valor Nuevo',
+    'admin.created_time': 'Hora de Creación',
+    'admin.add_spec': 'Agregar Especificación',
+    'admin.add_customer': 'Agregar Cliente',
+    'admin.deactivate': 'Desactivar',
+    'admin.users': 'Gestión de Usuarios',
+    'admin.role': 'Rol',
+    'admin.last_login': 'Último Acceso',
+    'admin.add_user': 'Agregar Usuario',
+    'admin.edit_user': 'Editar Usuario',
+    'admin.password': 'Contraseña',
+    'admin.password_hint': 'Dejar en blanco para mantener sin cambios',
+    'admin.roles_management': 'Gestión de Roles',
+    'admin.add_role': 'Agregar Rol',
+    'admin.edit_role': 'Editar Rol',
+    'admin.permissions': 'Permisos',
+    'admin.role_name': 'Nombre del Rol',
+    'admin.permission_view_sales': 'Ver Ventas',
+    'admin.permission_view_inventory': 'Ver Inventario',
+    'admin.permission_view_reports': 'Ver Reportes',
+    'admin.permission_admin': 'Administración del Sistema',
+    'admin.system_settings': 'Configuración del Sistema',
+    'admin.system_memo': 'Nota',
+    'admin.memo_placeholder': 'Ingrese el contenido de la nota...',
+    'admin.price_settings': 'Configuración de Precios',
+    'admin.run_job_now': 'Ejecutar Ahora',
+    'admin.costing_method': 'Método de Costeo',
+    'admin.costing_fifo': 'Primeras Entradas, Primeras Salidas (PEPS)',
+    'admin.costing_weighted_average': 'Costo Promedio Ponderado',
+    'admin.cash_price': 'Precio en Efectivo',
+    'admin.credit_price': 'Precio a Crédito',
+    'admin.price_management': 'Gestión de Precios',
+    'admin.set_price': 'Establecer Precio',
+    'admin.products': 'Gestión de Productos',
+    'admin.product_name': 'Nombre del Producto',
+    'admin.add_product': 'Agregar Producto',
+    'admin.edit_product': 'Editar Producto',
+    'admin.activate': 'Activar',
+    'admin.copy_to_memo': 'Copiar a Nota'
+};
@@ -0,0 +1,327 @@
+// 中文翻译字典
+window.I18N_BUNDLES = window.I18N_BUNDLES || {};
+window.I18N_BUNDLES.zh = {
+    // 导航栏
+    'nav.home': '首页',
+    'nav.sales': '销售管理',
+    'nav.inventory': '库存管理',
+    'nav.reports': '报表统计',
+    'nav.admin': '系统管理',
+    'nav.specs': '规格管理',
+    'nav.customers': '客户管理',
+    'nav.products': '商品管理',
+    'nav.audit': '审计日志',
+    'nav.jobs': '定时任务',
+
+    // 首页
+    'auth.login_title': '系统登录',
+    'auth.username': '用户名',
+    'auth.password': '密码',
+    'auth.remember_me': '记住我',
+    'auth.button': '登录',
+    'auth.restricted': '仅授权人员访问',
+    'auth.logout': '退出登录',
+
+    'home.title': '系统概览',
+    'home.orders_today': '今日订单',
+    'home.sales_today': '今日销售',
+    'home.cash_sales': '现金销售',
+    'home.credit_sales': '信用销售',
+    'home.current_stock': '当前库存',
+    'home.stock_warning': '库存预警',
+    'home.quick_actions': '快速操作',
+    'home.create_sale': '创建销售单',
+    'home.stock_moves': '库存变动',
+    'home.view_reports': '查看报表',
+    'home.received_amount': '已入账',
+    'home.outstanding_amount': '未入账',
+    'home.quick_date_select': '快速查看日销售',
+    'home.today': '今天',
+    'home.yesterday': '昨天',
+
+    // 通用
+    'common.search': '查询',
+    'common.add': '添加',
+    'common.edit': '编辑',
+    'common.delete': '删除',
+    'common.save': '保存',
+    'common.cancel': '取消',
+    'common.submit': '提交',
+    'common.back': '返回',
+    'common.view': '查看',
+    'common.active': '有效',
+    'common.void': '已作废',
+    'common.status': '状态',
+    'common.system_name': 'Comercializadora de Camarón Lizfer',
+    'common.footer': '© 2026 Comercializadora de Camarón Lizfer | 严格遵循业务规则：禁止自由输入、自动计算、可追溯、禁止删除',
+    'common.actions': '操作',
+    'common.kg': 'KG',
+    'common.pieces': '笔',
+    'common.enabled': '启用',
+    'common.disabled': '禁用',
+    'common.yes': '是',
+    'common.no': '否',
+    'common.confirm': '确认',
+    'common.close': '关闭',
+    'common.export': '导出Excel',
+    'common.exporting': '正在生成导出文件…',
+    'common.export_failed': '导出失败',
+    'common.prev': '上一页',
+    'common.next': '下一页',
+    'common.total': '共',
+    'common.margin': '毛利率',
+    'sales.breakdown': '销售构成',
+
+    // 销售
+    'sales.list': '销售单列表',
+    'sales.create': '创建销售单',
+    'sales.detail': '销售单详情',
+    'sales.void': '作废',
+    'sales.customer': '客户',
+    'sales.search_customer': '搜索客户名称...',
+    'sales.offline_pending': '待同步',
+    'sales.offline_rejected': '被拒绝',
+    'sales.offline_error': '拒绝原因',
+    'sales.offline_retry': '重新提交',
+    'sales.offline_discard': '放弃',
+    'sales.offline_discard_confirm': '确定放弃这张离线销售单吗？',
+    'sales.payment_type': '支付方式',
+    'sales.total_weight': '总重量',
+    'sales.sale_time': '销售时间',
+    'sales.items': '销售明细',
+    'sales.sale_id': '销售单号',
+    'sales.filter': '筛选',
+    'sales.all_status': '全部状态',
+    'sales.all_payment': '全部支付方式',
+    'sales.cash': '现金',
+    'sales.credit': 'Crédito',
+    'sales.product': '商品',
+    'sales.select_product': '请选择商品',
+    'sales.spec': '规格',
+    'sales.select_spec': '请选择规格',
+    'sales.box_qty': '箱数',
+    'sales.extra_kg': '散货(KG)',
+    'sales.subtotal': '小计(KG)',
+    'sales.add_item': '添加明细',
+    'sales.void_reason': '作废原因',
+    'sales.void_confirm': '确认作废',
+    'sales.basic_info': '基本信息',
+    'sales.total': '总计',
+    'sales.created_by': '创建人',
+    'sales.void_time': '作废时间',
+    'sales.void_by': '作废人',
+    'sales.auto_calculated': '系统自动计算',
+    'sales.daily_detail': '每日销售详情',
+    'sales.total_amount': '金额',
+    'sales.total_orders': '条销售记录',
+    'sales.payment_details': '收款明细',
+    'sales.subtotal_amount': '小计金额',
+    'sales.discount_amount': '折扣金额',
+    'sales.manual_total': '手动总金额 (可选)',
+    'sales.manual_total_placeholder': '自动计算',
+    'sales.manual_total_help': '输入后将作为最终金额',
+    'sales.final_total': '最终总金额',
+    'sales.remittance': '回款管理',
+    'sales.remittance_desc': '管理信用销售的回款记录',
+    'sales.paid_amount': '已回款',
+    'sales.unpaid_amount': '未回款',
+    'sales.remittance_amount': '回款金额',
+    'sales.remittance_history': '回款历史',
+    'sales.remit': '回款',
+    'sales.status_paid': '已付清',
+    'sales.status_partial': '部分回款',
+    'sales.status_unpaid': '未回款',
+    'sales.payment_status': '收款状态',
+    'sales.remittance_amount_hint': '请输入回款金额，不能超过未回款金额',
+    'sales.daily_profit': '当天利润',
+    'sales.daily_cash_income': '当天入账',
+    'sales.remittances_received': '回款金额',
+    'sales.total_cost': '总成本',
+    'sales.includes_remittances': '含回款',
+    'sales.day_closed': '已日结',
+    'sales.close_day': '日结',
+    'sales.reopen_day': '反结账',
+    'common.notes': '备注',
+
+    // 库存
+    'inventory.current': '当前库存',
+    'inventory.moves': '库存变动',
+    'inventory.check': '库存盘点',
+    'inventory.total_stock': '库存总量',
+    'inventory.last_move': '最后变动',
+    'inventory.add_move': '添加库存变动',
+    'inventory.product': '商品',
+    'inventory.stock': '库存',
+    'inventory.move_type': '变动类型',
+    'inventory.source': '来源/去向',
+    'inventory.weight': '重量(KG)',
+    'inventory.notes': '备注',
+    'inventory.move_time': '变动时间',
+    'inventory.reference': '关联单据',
+    'inventory.theoretical': '理论库存',
+    'inventory.actual': '实际库存',
+    'inventory.difference': '差异',
+    'inventory.overview': '库存概览',
+    'inventory.type_purchase': '进货',
+    'inventory.type_transfer': '调拨',
+    'inventory.type_return': '退货',
+    'inventory.type_surplus': '盘盈',
+    'inventory.type_loss': '盘亏',
+    'inventory.type_sale': '销售',
+    'inventory.all_types': '全部',
+    'inventory.last_move': '最后变动',
+    'inventory.check_title': '库存盘点对账',
+    'inventory.check_instructions': '盘点说明',
+    'inventory.theoretical_note': '理论库存由系统自动计算（所有有效库存变动的总和）',
+    'inventory.actual_input': '请输入实际盘点的库存数量',
+    'inventory.auto_calculate_diff': '系统将自动计算差异并记录',
+    'inventory.actual_stock': '实际库存',
+    'inventory.diff_formula': '实际库存 - 理论库存',
+    'inventory.notes_placeholder': '请说明差异原因（如有）',
+    'inventory.submit_check': '提交盘点记录',
+    'inventory.enter_actual': '请输入实际库存',
+    'inventory.confirm_submit': '确认提交盘点记录？',
+    'inventory.check_submitted': '盘点记录已提交',
+    'inventory.by_product': '按商品统计',
+    'inventory.stock_kg': '库存(KG)',
+    'inventory.out_of_stock': '缺货',
+    'inventory.low_stock': '库存偏低',
+    'inventory.in_stock': '正常',
+
+    // 采购
+    'purchase.list': '采购单列表',
+    'purchase.create': '采购入库',
+    'purchase.detail': '采购单详情',
+    'purchase.supplier': '供应商',
+    'purchase.items': '采购明细',
+    'purchase.product_name': '商品名称',
+    'purchase.weight': '重量(KG)',
+    'purchase.unit_price': '单价($/KG)',
+    'purchase.subtotal': '小计',
+    'purchase.add_item': '添加明细',
+    'purchase.total_weight': '总重量',
+    'purchase.total_amount': '总金额',
+    'purchase.submit': '提交采购单',
+    'purchase.notes': '备注',
+    'purchase.purchase_time': '采购时间',
+    'purchase.payment_status': '付款状态',
+    'purchase.unpaid': '未付款',
+    'purchase.partial': '部分付款',
+    'purchase.paid': '已付款',
+    'purchase.basic_info': '基本信息',
+    'purchase.summary': '汇总信息',
+    'purchase.item_list': '明细列表',
+    'purchase.void': '作废采购单',
+    'purchase.void_confirm': '确认作废',
+    'purchase.void_reason': '作废原因',
+    'purchase.supplier_placeholder': '请输入供应商名称',
+    'purchase.notes_placeholder': '可选',
+    'purchase.product_name_placeholder': '商品名称',
+
+    // 报表
+    'reports.daily': '按日期统计',
+    'reports.customer': '按客户统计',
+    'reports.spec': '按规格统计',
+    'reports.daily_desc': '查看每日销售趋势',
+    'reports.customer_desc': '客户销售排名',
+    'reports.spec_desc': '规格使用分析',
+    'reports.date_from': '开始日期',
+    'reports.date_to': '结束日期',
+    'reports.total_orders': '总订单数',
+    'reports.total_sales': '总销售量',
+    'reports.avg_order': '平均订单',
+    'reports.customer_count': '客户数量',
+    'reports.ranking': '排名',
+    'reports.customer_name': '客户名称',
+    'reports.customer_ranking': '客户销售排名',
+    'reports.display_count': '显示数量',
+    'reports.top_10': '前10名',
+    'reports.top_20': '前20名',
+    'reports.top_50': '前50名',
+    'reports.order_count': '订单数',
+    'reports.last_sale': '最后交易',
+    'reports.usage_count': '使用次数',
+    'reports.total_boxes': '总箱数',
+    'reports.spec_name': '规格名称',
+    'reports.spec_ranking': '规格使用排名',
+    'reports.extra_kg': '散货(KG)',
+    'reports.index': '报表首页',
+    'reports.summary': '汇总统计',
+    'reports.date': '日期',
+    'reports.total_sales': '总销售',
+    'reports.cash_sales': '现金销售',
+    'reports.credit_sales': '信用销售',
+    'reports.sales_trend': '销售趋势图',
+    'reports.detailed_data': '详细数据',
+    'reports.select_date_range': '请选择日期范围查询',
+    'reports.no_data': '暂无数据',
+    'reports.query': '查询',
+    'reports.trend': '销售趋势图',
+    'reports.detailed_data': '详细数据',
+    'common.no_data': '暂无数据',
+    'reports.by_representative': '按销售员统计',
+    'reports.representative_desc': '销售员业绩排名',
+    'reports.representative': '销售员',
+    'reports.representative_ranking': '销售员排名',
+    'reports.total_amount': '总金额',
+    'reports.sales_detail': '销售详情',
+    'common.loading': '加载中...',
+
+    // 系统管理
+    'admin.specs': '规格管理',
+    'admin.customers': '客户管理',
+    'admin.audit': '审计日志',
+    'admin.spec_name': '规格名称',
+    'admin.length': '长度(cm)',
+    'admin.width': '宽度(cm)',
+    'admin.kg_per_box': '单箱重量(KG)',
+    'admin.customer_name': '客户名称',
+    'admin.credit_allowed': '信用支付',
+    'admin.credit_limit': '信用额度',
+    'admin.balance': '当前欠款',
+    'admin.allow_credit': '允许信用支付',
+    'admin.table_name': '表名',
+    'admin.record_id': '记录ID',
+    'admin.action': '操作',
+    'admin.operator': '操作人',
+    'admin.old_value': '旧值',
+    'admin.new_value': '新值',
+    'admin.created_time': '创建时间',
+    'admin.add_spec': '添加规格',
+    'admin.add_customer': '添加客户',
+    'admin.deactivate': '禁用',
+    'admin.users': '用户管理',
+    'admin.role': '角色',
+    'admin.last_login': '最后登录',
+    'admin.add_user': '添加用户',
+    'admin.edit_user': '编辑用户',
+    'admin.password': '密码',
+    'admin.password_hint': '如果不修改密码请留空',
+    'admin.roles_management': '角色管理',
+    'admin.add_role': '添加角色',
+    'admin.edit_role': '编辑角色',
+    'admin.permissions': '权限配置',
+    'admin.role_name': '角色名称',
+    'admin.permission_view_sales': '查看销售',
+    'admin.permission_view_inventory': '查看库存',
+    'admin.permission_view_reports': '查看报表',
+    'admin.permission_admin': '系统管理',
+    'admin.system_settings': '系统设置',
+    'admin.system_memo': '备忘录',
+    'admin.memo_placeholder': '输入备忘录内容...',
+    'admin.price_settings': '价格设置',
+    'admin.run_job_now': '立即运行',
+    'admin.costing_method': '成本方法',
+    'admin.costing_fifo': '先进先出（FIFO）',
+    'admin.costing_weighted_average': '加权平均',
+    'admin.cash_price': '现金价格',
+    'admin.credit_price': '信用价格',
+    'admin.price_management': '价格管理',
+    'admin.set_price': '设置价格',
+    'admin.products': '商品管理',
+    'admin.product_name': '商品名称',
+    'admin.add_product': '添加商品',
+    'admin.edit_product': '编辑商品',
+    'admin.activate': '启用',
+    'admin.copy_to_memo': '复制到备忘录'
+};
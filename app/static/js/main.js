@@ -25,15 +25,29 @@ const utils = {
         }, 3000);
     },
 
+    // 幂等键：同一请求体的重试复用同一个键，请求体变化后生成新键
+    idempotencyKey: (scope, body) => {
+        const last = utils._idempotencyKeys[scope];
+        if (last && last.body === body) {
+            return last.key;
+        }
+        const key = window.crypto && crypto.randomUUID
+            ? crypto.randomUUID()
+            : `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}-${Math.random().toString(36).slice(2)}`;
+        utils._idempotencyKeys[scope] = { body, key };
+        return key;
+    },
+    _idempotencyKeys: {},
+
     // API请求封装
     apiRequest: async (url, options = {}) => {
         try {
             const response = await fetch(url, {
+                ...options,
                 headers: {
                     'Content-Type': 'application/json',
                     ...options.headers
-                },
-                ...options
+                }
             });
 
             const data = await response.json();
@@ -47,6 +61,25 @@ const utils = {
             console.error('API请求错误:', error);
             throw error;
         }
+    },
+
+    // 后台导出：提交导出任务，轮询状态，完成后下载
+    exportFile: async (url, pollInterval = 1000) => {
+        const separator = url.includes('?') ? '&' : '?';
+        utils.showAlert(i18n.t('common.exporting'), 'info');
+        try {
+            let job = await utils.apiRequest(`${url}${separator}async=1`);
+            while (job.status === 'queued' || job.status === 'running') {
+                await new Promise(resolve => setTimeout(resolve, pollInterval));
+                job = await utils.apiRequest(job.status_url);
+            }
+            if (job.status !== 'success') {
+                throw new Error(job.error || i18n.t('common.export_failed'));
+            }
+            window.location.href = job.download_url;
+        } catch (error) {
+            utils.showAlert(`${i18n.t('common.export_failed')}: ${error.message}`, 'danger');
+        }
     }
 };
 
@@ -0,0 +1,213 @@
+// 离线销售单队列：网络不可用时销售单保存在 IndexedDB，联网后批量同步到服务器
+
+const offlineQueue = (() => {
+    const DB_NAME = 'joseshrimp-offline';
+    const STORE = 'pending_sales';
+    const SYNC_URL = '/api/sales/sync';
+    const BATCH_SIZE = 50;  // 与服务器 SaleService.SYNC_BATCH_LIMIT 一致
+    const SYNC_INTERVAL = 60 * 1000;
+
+    let dbPromise = null;
+    let syncing = false;
+
+    const openDb = () => {
+        if (!dbPromise) {
+            dbPromise = new Promise((resolve, reject) => {
+                const request = indexedDB.open(DB_NAME, 1);
+                request.onupgradeneeded = () => {
+                    const store = request.result.createObjectStore(STORE, { keyPath: 'client_id' });
+                    store.createIndex('queued_at', 'queued_at');
+                };
+                request.onsuccess = () => resolve(request.result);
+                request.onerror = () => reject(request.error);
+            });
+        }
+        return dbPromise;
+    };
+
+    // 在一个事务中执行操作，事务完成后返回结果
+    const withStore = async (mode, operation) => {
+        const db = await openDb();
+        return new Promise((resolve, reject) => {
+            const tx = db.transaction(STORE, mode);
+            const result = operation(tx.objectStore(STORE));
+            tx.oncomplete = () => resolve(result && 'result' in result ? result.result : undefined);
+            tx.onerror = () => reject(tx.error);
+            tx.onabort = () => reject(tx.error);
+        });
+    };
+
+    // 加入队列（client_id 即幂等键，重复加入同一张单据只保留一份）
+    const add = (sale) => withStore('readwrite', store => store.put({
+        ...sale,
+        status: 'pending',
+        error: null,
+        queued_at: sale.queued_at || new Date().toISOString()
+    }));
+
+    // 按加入顺序返回全部单据
+    const all = () => withStore('readonly', store => store.index('queued_at').getAll());
+
+    const remove = (clientIds) => withStore('readwrite', store => {
+        clientIds.forEach(id => store.delete(id));
+    });
+
+    const markRejected = (rejected) => withStore('readwrite', store => {
+        rejected.forEach(entry => store.put(entry));
+    });
+
+    const get = (clientId) => withStore('readonly', store => store.get(clientId));
+
+    // 被拒绝的单据改回待同步并立即同步（例如调整客户额度或基础资料之后）
+    const retry = async (clientId) => {
+        const entry = await get(clientId);
+        if (!entry) return;
+        await markRejected([{ ...entry, status: 'pending', error: null, closed_date: null }]);
+        await renderStatus();
+        await sync();
+    };
+
+    // 放弃被拒绝的单据
+    const discard = async (clientId) => {
+        await remove([clientId]);
+        await renderStatus();
+    };
+
+    const escapeHtml = (text) => String(text ?? '').replace(/[&<>"']/g, char => ({
+        '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'
+    })[char]);
+
+    // 列出被拒绝的单据，提供重新提交/放弃按钮
+    const renderRejected = (entries) => {
+        const list = document.getElementById('offlineRejectedList');
+        if (!list) return;
+        const rejected = entries.filter(entry => entry.status === 'rejected');
+        list.hidden = rejected.length === 0;
+        list.querySelector('tbody').innerHTML = rejected.map(entry => {
+            const option = document.querySelector(`#customerId option[value="${entry.customer_id}"]`);
+            const customer = option ? option.textContent : `#${entry.customer_id}`;
+            return `
+                <tr data-client-id="${escapeHtml(entry.client_id)}">
+                    <td>${escapeHtml(new Date(entry.sale_time || entry.queued_at).toLocaleString())}</td>
+                    <td>${escapeHtml(customer)}</td>
+                    <td class="text-danger">${escapeHtml(entry.error)}</td>
+                    <td class="text-nowrap">
+                        <button type="button" class="btn btn-sm btn-outline-primary offline-retry">${i18n.t('sales.offline_retry')}</button>
+                        <button type="button" class="btn btn-sm btn-outline-danger offline-discard">${i18n.t('sales.offline_discard')}</button>
+                    </td>
+                </tr>`;
+        }).join('');
+    };
+
+    // 更新页面上的待同步数量
+    const renderStatus = async () => {
+        const badge = document.getElementById('offlineQueueStatus');
+        if (!badge) return;
+        const entries = await all();
+        const pending = entries.filter(entry => entry.status === 'pending').length;
+        const rejected = entries.length - pending;
+        badge.hidden = entries.length === 0;
+        badge.querySelector('.offline-pending-count').textContent = pending;
+        badge.querySelector('.offline-rejected').hidden = rejected === 0;
+        badge.querySelector('.offline-rejected-count').textContent = rejected;
+        renderRejected(entries);
+    };
+
+    // 按批同步待同步的单据，返回 {created, rejected, dayClosed}
+    const sync = async () => {
+        if (syncing || !navigator.onLine) {
+            return { created: 0, rejected: 0, dayClosed: 0 };
+        }
+        syncing = true;
+        let created = 0;
+        let rejected = 0;
+        let dayClosed = 0;
+        try {
+            const pending = (await all()).filter(entry => entry.status === 'pending');
+            for (let i = 0; i < pending.length; i += BATCH_SIZE) {
+                const batch = pending.slice(i, i + BATCH_SIZE);
+                const data = await utils.apiRequest(SYNC_URL, {
+                    method: 'POST',
+                    body: JSON.stringify({
+                        sales: batch.map(({ status, error, closed_date, queued_at, ...sale }) => sale)
+                    })
+                });
+
+                const byId = Object.fromEntries(batch.map(entry => [entry.client_id, entry]));
+                const done = [];
+                const failed = [];
+                data.results.forEach(result => {
+                    const entry = byId[result.client_id];
+                    if (!entry) return;
+                    if (result.status === 'created' || result.status === 'duplicate') {
+                        done.push(result.client_id);
+                    } else if (result.status === 'rejected') {
+                        // 被拒绝的单据保留在本机，显示原因，需要人工处理
+                        failed.push({ ...entry, status: 'rejected', error: result.error });
+                    } else if (result.status === 'day_closed') {
+                        // 所在日期离线期间已日结：保留在本机，反结账后点重新提交
+                        failed.push({ ...entry, status: 'rejected', error: result.error, closed_date: result.closed_date });
+                        dayClosed += 1;
+                    }
+                    // conflict（同一单据正在同步）保持待同步，下次再试
+                });
+
+                await remove(done);
+                await markRejected(failed);
+                created += done.length;
+                rejected += failed.filter(entry => !entry.closed_date).length;
+            }
+        } catch (error) {
+            // 网络再次中断，保留队列下次再同步
+            console.error('离线销售单同步失败:', error);
+        } finally {
+            syncing = false;
+            await renderStatus();
+        }
+
+        if (created > 0) {
+            utils.showAlert(`已同步 ${created} 张离线销售单`, 'success');
+        }
+        if (rejected > 0) {
+            utils.showAlert(`${rejected} 张离线销售单被服务器拒绝，请检查`, 'danger');
+        }
+        if (dayClosed > 0) {
+            utils.showAlert(`${dayClosed} 张离线销售单所在日期已日结，请反结账后重新提交`, 'warning');
+        }
+        return { created, rejected, dayClosed };
+    };
+
+    const start = () => {
+        if (!('indexedDB' in window)) return;
+        const list = document.getElementById('offlineRejectedList');
+        if (list) {
+            list.addEventListener('click', async (event) => {
+                const row = event.target.closest('tr[data-client-id]');
+                if (!row) return;
+                if (event.target.closest('.offline-retry')) {
+                    await retry(row.dataset.clientId);
+                } else if (event.target.closest('.offline-discard') && confirm(i18n.t('sales.offline_discard_confirm'))) {
+                    await discard(row.dataset.clientId);
+                }
+            });
+        }
+        window.addEventListener('online', sync);
+        setInterval(sync, SYNC_INTERVAL);
+        renderStatus().then(sync);
+    };
+
+    return { add, all, remove, retry, discard, sync, renderStatus, start };
+})();
+
+window.offlineQueue = offlineQueue;
+
+document.addEventListener('DOMContentLoaded', () => {
+    offlineQueue.start();
+
+    // 注册 Service Worker（缓存销售单页面和基础资料）
+    if ('serviceWorker' in navigator) {
+        navigator.serviceWorker.register('/sw.js').catch(error => {
+            console.error('Service Worker 注册失败:', error);
+        });
+    }
+});
@@ -15,6 +15,64 @@ document.addEventListener('DOMContentLoaded', () => {
     const manualTotalInput = document.getElementById('manualTotalAmount');
     const finalTotalSpan = document.getElementById('finalTotalAmount');
 
+    // 客户输入联想：按名称前缀搜索，结果替换下拉选项（页面只预先列出近期常用客户）
+    const customerSearch = document.getElementById('customerSearch');
+    if (customerSearch) {
+        const originalOptions = Array.from(customerSelect.options).map(option => option.cloneNode(true));
+        let searchTimer = null;
+
+        // 网络不可用时在 Service Worker 缓存的基础资料中按前缀查找
+        const searchCachedCustomers = async (q) => {
+            const data = await utils.apiRequest('/api/admin/reference-data');
+            const prefix = q.toLowerCase();
+            return data.customers
+                .filter(customer => customer.name.toLowerCase().startsWith(prefix))
+                .slice(0, 20);
+        };
+
+        const renderCustomerOptions = (options) => {
+            customerSelect.innerHTML = '';
+            customerSelect.appendChild(originalOptions[0].cloneNode(true));
+            options.forEach(option => customerSelect.appendChild(option));
+        };
+
+        customerSearch.addEventListener('input', () => {
+            clearTimeout(searchTimer);
+            const q = customerSearch.value.trim();
+
+            if (!q) {
+                renderCustomerOptions(originalOptions.slice(1).map(option => option.cloneNode(true)));
+                return;
+            }
+
+            searchTimer = setTimeout(async () => {
+                try {
+                    let items;
+                    try {
+                        items = (await utils.apiRequest(`/api/admin/customers/search?q=${encodeURIComponent(q)}&limit=20`)).items;
+                    } catch (error) {
+                        // fetch 在网络中断时抛出 TypeError
+                        if (!(error instanceof TypeError)) throw error;
+                        items = await searchCachedCustomers(q);
+                    }
+                    renderCustomerOptions(items.map(customer => {
+                        const option = document.createElement('option');
+                        option.value = customer.id;
+                        option.dataset.credit = String(customer.credit_allowed);
+                        option.textContent = customer.name;
+                        return option;
+                    }));
+                    if (items.length === 1) {
+                        customerSelect.value = items[0].id;
+                        customerSelect.dispatchEvent(new Event('change'));
+                    }
+                } catch (error) {
+                    // 搜索失败时保留现有选项
+                }
+            }, 200);
+        });
+    }
+
     // 客户选择变化时检查信用
     customerSelect.addEventListener('change', () => {
         const selectedOption = customerSelect.options[customerSelect.selectedIndex];
@@ -197,27 +255,80 @@ document.addEventListener('DOMContentLoaded', () => {
             submitBtn.disabled = true;
             submitBtn.innerHTML = '<span class="spinner-border spinner-border-sm"></span> 创建中...';
 
-            const data = await utils.apiRequest('/api/sales', {
-                method: 'POST',
-                body: JSON.stringify({
-                    customer_id: customerId,
-                    payment_type: paymentType,
-                    items: items,
-                    discount: parseFloat(discountInput.value) || 0,
-                    manual_total_amount: manualTotalInput.value ? parseFloat(manualTotalInput.value) : null,
-                    created_by: 'Jose Burgueno'
-                })
+            const body = JSON.stringify({
+                customer_id: customerId,
+                payment_type: paymentType,
+                items: items,
+                discount: parseFloat(discountInput.value) || 0,
+                manual_total_amount: manualTotalInput.value ? parseFloat(manualTotalInput.value) : null,
+                created_by: 'Jose Burgueno'
             });
 
+            // 网络重试时带相同的幂等键，服务器不会重复创建销售单
+            const idempotencyKey = utils.idempotencyKey('sale', body);
+
+            // 离线时直接保存到本机队列
+            if (!navigator.onLine && window.offlineQueue) {
+                await queueOfflineSale(idempotencyKey, body);
+                return;
+            }
+
+            let data;
+            try {
+                data = await utils.apiRequest('/api/sales', {
+                    method: 'POST',
+                    headers: { 'Idempotency-Key': idempotencyKey },
+                    body: body
+                });
+            } catch (error) {
+                // fetch 在网络中断时抛出 TypeError，服务器返回的业务错误照常提示
+                if (error instanceof TypeError && window.offlineQueue) {
+                    await queueOfflineSale(idempotencyKey, body);
+                    return;
+                }
+                throw error;
+            }
+
             utils.showAlert('销售单创建成功！', 'success');
             setTimeout(() => {
                 window.location.href = `/sales/${data.id}`;
             }, 1000);
         } catch (error) {
             utils.showAlert(error.message, 'danger');
-            const submitBtn = form.querySelector('button[type="submit"]');
-            submitBtn.disabled = false;
-            submitBtn.innerHTML = '<i class="bi bi-check-circle"></i> 创建销售单';
+            resetSubmitButton();
         }
     });
+
+    const resetSubmitButton = () => {
+        const submitBtn = form.querySelector('button[type="submit"]');
+        submitBtn.disabled = false;
+        submitBtn.innerHTML = '<i class="bi bi-check-circle"></i> 创建销售单';
+    };
+
+    // 保存到离线队列（幂等键作为 client_id，同步时服务器据此去重），然后清空表单继续录入
+    const queueOfflineSale = async (clientId, body) => {
+        await offlineQueue.add({
+            ...JSON.parse(body),
+            client_id: clientId,
+            sale_time: new Date().toISOString(),
+            reference_data_version: window.REFERENCE_DATA_VERSION || null
+        });
+        // 页面不刷新，继续录入的下一张单据内容可能完全相同（同一客户、同样箱数），
+        // 必须使用新的幂等键，否则会覆盖队列中的这张单据，或在同步时被当作重复丢弃
+        delete utils._idempotencyKeys.sale;
+        await offlineQueue.renderStatus();
+
+        utils.showAlert('网络不可用，销售单已保存在本机，联网后自动同步', 'warning');
+
+        form.reset();
+        document.querySelectorAll('.item-row').forEach((row, index) => {
+            if (index > 0) {
+                row.remove();
+            } else {
+                row.querySelector('.subtotal-kg').value = '';
+            }
+        });
+        calculateTotal();
+        resetSubmitButton();
+    };
 });
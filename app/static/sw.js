@@ -0,0 +1,106 @@
+// Service Worker：离线时仍可打开销售单页面并录入销售单
+// 页面与基础资料网络优先（离线时使用缓存），静态文件先用缓存再后台更新
+
+const CACHE_NAME = 'joseshrimp-offline-v1';
+
+// 安装时预缓存的页面和数据
+const PRECACHE_URLS = [
+    '/sales/create',
+    '/api/admin/reference-data'
+];
+
+// 离线时需要使用缓存的页面和接口
+const NETWORK_FIRST_PATHS = [
+    '/sales/create',
+    '/api/admin/reference-data'
+];
+
+self.addEventListener('install', (event) => {
+    event.waitUntil(
+        caches.open(CACHE_NAME).then(cache =>
+            // 单个地址缓存失败（如未登录）不影响安装
+            Promise.allSettled(PRECACHE_URLS.map(url => cache.add(url)))
+        ).then(() => self.skipWaiting())
+    );
+});
+
+self.addEventListener('activate', (event) => {
+    event.waitUntil(
+        caches.keys().then(keys =>
+            Promise.all(keys.filter(key => key !== CACHE_NAME).map(key => caches.delete(key)))
+        ).then(() => self.clients.claim())
+    );
+});
+
+// 网络优先：成功时更新缓存，失败时返回缓存
+async function networkFirst(request) {
+    const cache = await caches.open(CACHE_NAME);
+    try {
+        const response = await fetch(request);
+        // 只缓存正常页面（未登录时会被重定向到登录页）
+        if (response.ok && !response.redirected) {
+            cache.put(request, response.clone());
+        }
+        return response;
+    } catch (error) {
+        const cached = await cache.match(request, { ignoreSearch: true });
+        if (cached) {
+            return cached;
+        }
+        throw error;
+    }
+}
+
+// 缓存优先：带版本号的 CDN 资源（跨域资源为 opaque 响应，同样缓存）
+async function cacheFirst(request) {
+    const cache = await caches.open(CACHE_NAME);
+    const cached = await cache.match(request);
+    if (cached) {
+        return cached;
+    }
+    const response = await fetch(request);
+    if (response.ok || response.type === 'opaque') {
+        cache.put(request, response.clone());
+    }
+    return response;
+}
+
+// 先返回缓存再后台更新：本站静态文件（开发环境未做指纹，不能只用缓存）
+async function staleWhileRevalidate(request) {
+    const cache = await caches.open(CACHE_NAME);
+    const cached = await cache.match(request);
+    const update = fetch(request).then(response => {
+        if (response.ok) {
+            cache.put(request, response.clone());
+        }
+        return response;
+    });
+    if (cached) {
+        update.catch(() => {});
+        return cached;
+    }
+    return update;
+}
+
+self.addEventListener('fetch', (event) => {
+    const request = event.request;
+    if (request.method !== 'GET') {
+        return;
+    }
+
+    const url = new URL(request.url);
+
+    if (url.origin === self.location.origin) {
+        if (NETWORK_FIRST_PATHS.includes(url.pathname)) {
+            event.respondWith(networkFirst(request));
+        } else if (url.pathname.startsWith('/static/')) {
+            event.respondWith(staleWhileRevalidate(request));
+        }
+        return;
+    }
+
+    // 页面使用的 CDN 资源（Bootstrap、jQuery 等）
+    if (request.destination === 'script' || request.destination === 'style' || request.destination === 'font') {
+        event.respondWith(cacheFirst(request));
+    }
+});
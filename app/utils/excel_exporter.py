@@ -227,6 +227,146 @@ class ExcelExporter:
         
         return ExcelExporter.create_response(wb, f'sales_detail_{representative}_{datetime.now().strftime("%Y%m%d")}.xlsx')
     
+    @staticmethod
+    def export_receivables_aging(data):
+        """导出应收账龄报表"""
+        wb, ws = ExcelExporter.create_workbook("Receivables Aging")
+        
+        # 标题
+        ws['A1'] = f'Receivables Aging (as of {data["as_of"]})'
+        ws.merge_cells('A1:H1')
+        ws['A1'].font = Font(size=14, bold=True)
+        ws['A1'].alignment = Alignment(horizontal="center")
+        
+        # 表头
+        headers = ['Customer', 'Open Invoices', '0-15 Days ($)', '16-30 Days ($)',
+                  '31-60 Days ($)', '60+ Days ($)', 'Total Outstanding ($)', 'Oldest Sale']
+        ws.append([])
+        ws.append(headers)
+        ExcelExporter.style_header(ws, row=3)
+        
+        # 数据
+        for row in data['customers']:
+            ws.append([
+                row['customer_name'],
+                row['invoice_count'],
+                row['days_0_15'],
+                row['days_16_30'],
+                row['days_31_60'],
+                row['days_60_plus'],
+                row['total_outstanding'],
+                (row['oldest_sale_time'] or '')[:10]
+            ])
+        
+        # 合计
+        totals = data['totals']
+        ws.append([
+            'Total',
+            totals['invoice_count'],
+            totals['days_0_15'],
+            totals['days_16_30'],
+            totals['days_31_60'],
+            totals['days_60_plus'],
+            totals['total_outstanding'],
+            ''
+        ])
+        for cell in ws[ws.max_row]:
+            cell.font = Font(bold=True)
+        
+        ExcelExporter.auto_adjust_column_width(ws)
+        
+        return ExcelExporter.create_response(wb, f'receivables_aging_{data["as_of"]}.xlsx')
+    
+    @staticmethod
+    def export_period_comparison(data):
+        """导出期间对比报表（每个指标：本期、上期、差额、增长率并排）"""
+        wb, ws = ExcelExporter.create_workbook("Comparison")
+        
+        current = data['current']
+        prior = data['prior']
+        metrics = data['metrics']
+        is_daily = data['report'] == 'daily'
+        
+        # 标题
+        ws['A1'] = (f'{data["report"].title()} Comparison: '
+                    f'{current["date_from"]} ~ {current["date_to"]} vs {prior["date_from"]} ~ {prior["date_to"]}')
+        ws['A1'].font = Font(size=14, bold=True)
+        
+        # 表头
+        headers = ['Date', 'Prior Date'] if is_daily else [data['report'].title()]
+        for metric in metrics:
+            title = metric.replace('_', ' ').title()
+            headers.extend([f'{title} (Current)', f'{title} (Prior)', f'{title} Δ', f'{title} Growth %'])
+        ws.append([])
+        ws.append(headers)
+        ExcelExporter.style_header(ws, row=3)
+        
+        def metric_cells(item):
+            cells = []
+            for metric in metrics:
+                cells.extend([
+                    item['current'][metric],
+                    item['prior'][metric],
+                    item['delta'][metric],
+                    item['growth'][metric] if item['growth'][metric] is not None else '-'
+                ])
+            return cells
+        
+        # 数据
+        for row in data['rows']:
+            labels = [row['label'] or '', row['prior_label'] or ''] if is_daily else [row['label']]
+            ws.append(labels + metric_cells(row))
+        
+        # 合计
+        ws.append((['Total', ''] if is_daily else ['Total']) + metric_cells(data['totals']))
+        for cell in ws[ws.max_row]:
+            cell.font = Font(bold=True)
+        
+        ExcelExporter.auto_adjust_column_width(ws)
+        
+        return ExcelExporter.create_response(
+            wb, f'{data["report"]}_comparison_{current["date_from"]}_{current["date_to"]}.xlsx'
+        )
+    
+    @staticmethod
+    def build_customer_statement(statement):
+        """生成客户月结对账单工作簿（供批量导出在子进程中调用）"""
+        wb, ws = ExcelExporter.create_workbook("Statement")
+        
+        # 标题
+        ws['A1'] = f'Statement - {statement["customer_name"]} ({statement["year"]}-{statement["month"]:02d})'
+        ws.merge_cells('A1:E1')
+        ws['A1'].font = Font(size=14, bold=True)
+        ws['A1'].alignment = Alignment(horizontal="center")
+        
+        ws.append([])
+        ws.append(['Opening Balance ($)', statement['opening_balance']])
+        ws['A3'].font = Font(bold=True)
+        
+        # 表头
+        headers = ['Date', 'Type', 'Reference', 'Amount ($)', 'Balance ($)']
+        ws.append([])
+        ws.append(headers)
+        ExcelExporter.style_header(ws, row=5)
+        
+        # 分录
+        for entry in statement['entries']:
+            ws.append([
+                (entry['entry_time'] or '')[:19].replace('T', ' '),
+                entry['entry_type'],
+                entry['reference_id'],
+                entry['amount'],
+                entry['balance']
+            ])
+        
+        ws.append(['Closing Balance ($)', '', '', '', statement['closing_balance']])
+        for cell in ws[ws.max_row]:
+            cell.font = Font(bold=True)
+        
+        ExcelExporter.auto_adjust_column_width(ws)
+        
+        return wb
+    
     @staticmethod
     def create_response(wb, filename):
         """创建Flask响应"""
@@ -295,7 +435,7 @@ class ExcelExporter:
             ws.append([
                 sale.id,
                 sale.sale_time.strftime('%H:%M:%S'),
-                sale.customer.name if sale.customer else 'N/A',
+                sale.customer_name or 'N/A',
                 sale.payment_type,
                 round(float(sale.total_kg), 2),
                 round(float(sale.total_amount), 2),
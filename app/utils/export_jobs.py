@@ -0,0 +1,254 @@
+"""
+后台导出任务模块
+导出接口带参数 async=1 时不在请求线程中生成文件：登记任务后立即返回 202 和任务ID，
+导出在有界线程池中执行，结果写入临时目录并在 EXPORT_TTL_SECONDS 后删除，客户端轮询状态后下载。
+
+准入控制：排队和运行中的后台导出超过 EXPORT_MAX_QUEUED、同时在请求线程中执行的导出
+超过 EXPORT_MAX_INLINE、或同时进行的流式下载超过 EXPORT_MAX_STREAMS 时直接返回 429，
+导出高峰不会占满 Waitress 的请求线程（默认 4 个），录入销售单的请求始终有线程可用
+"""
+import logging
+import os
+import tempfile
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from functools import wraps
+from flask import current_app, jsonify, request, url_for
+from flask_login import current_user
+from werkzeug.http import parse_options_header
+from app.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# 请求参数：为真时作为后台任务提交
+ASYNC_ARG = 'async'
+
+# 准入失败时建议的重试间隔（秒）
+RETRY_AFTER_SECONDS = 10
+
+
+def _local_now():
+    """当前本地时间（naive）"""
+    return timezone.now().replace(tzinfo=None)
+
+
+def _owner():
+    """任务所有者（登录用户ID，未登录为 None）"""
+    return current_user.get_id() if current_user.is_authenticated else None
+
+
+class ExportJobs:
+    """进程内导出任务：有界线程池 + 临时文件存储"""
+
+    def __init__(self, app):
+        self.app = app
+        self.directory = app.config.get('EXPORT_DIR') or os.path.join(tempfile.gettempdir(), 'sales_exports')
+        self.ttl = timedelta(seconds=app.config.get('EXPORT_TTL_SECONDS', 3600))
+        self.max_queued = app.config.get('EXPORT_MAX_QUEUED', 10)
+        self.inline_slots = threading.BoundedSemaphore(app.config.get('EXPORT_MAX_INLINE', 1))
+        self.stream_slots = threading.BoundedSemaphore(app.config.get('EXPORT_MAX_STREAMS', 1))
+        self.executor = ThreadPoolExecutor(
+            max_workers=app.config.get('EXPORT_MAX_WORKERS', 2),
+            thread_name_prefix='export'
+        )
+        self.jobs = {}
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, job_id):
+        return os.path.join(self.directory, job_id)
+
+    def purge_expired(self):
+        """删除过期的任务和结果文件（包括之前进程遗留的文件）"""
+        now = _local_now()
+        with self._lock:
+            expired = {
+                job_id for job_id, job in self.jobs.items()
+                if job['expires_at'] is not None and job['expires_at'] < now
+            }
+            for job_id in expired:
+                del self.jobs[job_id]
+            active = set(self.jobs)
+
+        cutoff = timezone.now().timestamp() - self.ttl.total_seconds()
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                if name in expired or (name not in active and os.path.getmtime(path) < cutoff):
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def submit(self, func, args, kwargs, path, query):
+        """
+        登记并提交导出任务（在请求上下文中调用）
+
+        Returns:
+            dict: 任务；排队任务已满时返回 None
+        """
+        self.purge_expired()
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            active = sum(1 for job in self.jobs.values() if job['status'] in ('queued', 'running'))
+            if active >= self.max_queued:
+                return None
+            job = self.jobs[job_id] = {
+                'id': job_id,
+                'endpoint': request.endpoint,
+                'owner': _owner(),
+                'status': 'queued',
+                'created_at': _local_now(),
+                'started_at': None,
+                'finished_at': None,
+                'expires_at': None,
+                'filename': None,
+                'mimetype': None,
+                'size': None,
+                'error': None
+            }
+        self.executor.submit(self._run, job_id, func, args, kwargs, path, query)
+        return job
+
+    def _run(self, job_id, func, args, kwargs, path, query):
+        """工作线程：在模拟的请求上下文中调用原导出函数，把响应内容写入结果文件"""
+        job = self.jobs[job_id]
+        with self.app.test_request_context(path, query_string=query):
+            job['status'] = 'running'
+            job['started_at'] = _local_now()
+            try:
+                response = self.app.make_response(func(*args, **kwargs))
+                if response.status_code != 200:
+                    data = response.get_json(silent=True) or {}
+                    raise ValueError(data.get('error') or f'导出失败（HTTP {response.status_code}）')
+
+                _, options = parse_options_header(response.headers.get('Content-Disposition', ''))
+                body = response.get_data()
+                with open(self._path(job_id), 'wb') as f:
+                    f.write(body)
+
+                job['filename'] = options.get('filename') or f'export_{job_id}'
+                job['mimetype'] = response.mimetype
+                job['size'] = len(body)
+                job['status'] = 'success'
+            except Exception as e:
+                logger.exception(f'导出任务 {job_id} 失败')
+                job['error'] = str(e)
+                job['status'] = 'failed'
+            finally:
+                job['finished_at'] = _local_now()
+                job['expires_at'] = job['finished_at'] + self.ttl
+
+    def get(self, job_id):
+        """当前用户的任务（不存在、已过期或属于其他用户时返回 None）"""
+        job = self.jobs.get(job_id)
+        if job is None or (job['owner'] is not None and job['owner'] != _owner()):
+            return None
+        return job
+
+    def file_path(self, job):
+        return self._path(job['id'])
+
+    @staticmethod
+    def to_dict(job):
+        data = {
+            key: value.isoformat() if hasattr(value, 'isoformat') else value
+            for key, value in job.items() if key not in ('owner', 'endpoint')
+        }
+        data['status_url'] = url_for('reports_api.get_export_job', job_id=job['id'])
+        data['download_url'] = (
+            url_for('reports_api.download_export_job', job_id=job['id']) if job['status'] == 'success' else None
+        )
+        return data
+
+
+def _busy():
+    response = jsonify({'error': '导出任务繁忙，请稍后重试'})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(RETRY_AFTER_SECONDS)
+    return response
+
+
+def export_job(f):
+    """
+    导出接口装饰器
+
+    - async=1：提交后台任务，返回 202 和任务状态
+    - 否则在请求线程中执行，同时执行的数量受 EXPORT_MAX_INLINE 限制
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        jobs = current_app.extensions.get('export_jobs')
+        if jobs is None:
+            return f(*args, **kwargs)
+
+        if request.args.get(ASYNC_ARG, '').lower() in ('1', 'true'):
+            query = request.args.to_dict(flat=False)
+            query.pop(ASYNC_ARG, None)
+            job = jobs.submit(f, args, kwargs, request.path, query)
+            if job is None:
+                return _busy()
+            return jsonify(jobs.to_dict(job)), 202
+
+        if not jobs.inline_slots.acquire(blocking=False):
+            return _busy()
+        try:
+            return f(*args, **kwargs)
+        finally:
+            jobs.inline_slots.release()
+    return decorated_function
+
+
+def streaming_export(f):
+    """
+    流式导出接口装饰器
+
+    流式响应在视图返回后才逐块生成，整个下载期间都占用请求线程；
+    同时进行的下载数量受 EXPORT_MAX_STREAMS 限制，名额在响应关闭（发送完毕或客户端断开）时释放
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        jobs = current_app.extensions.get('export_jobs')
+        if jobs is None:
+            return f(*args, **kwargs)
+
+        if not jobs.stream_slots.acquire(blocking=False):
+            return _busy()
+
+        released = threading.Event()
+
+        def release():
+            # 生成结束和响应关闭都会调用，只释放一次
+            if not released.is_set():
+                released.set()
+                jobs.stream_slots.release()
+
+        try:
+            response = current_app.make_response(f(*args, **kwargs))
+        except BaseException:
+            release()
+            raise
+
+        if not response.is_streamed:
+            # 参数错误等普通响应
+            release()
+            return response
+
+        body = response.response
+
+        def generate():
+            try:
+                yield from body
+            finally:
+                release()
+
+        response.response = generate()
+        response.call_on_close(release)
+        return response
+    return decorated_function
+
+
+def init_app(app):
+    """创建进程内导出任务管理器"""
+    app.extensions['export_jobs'] = ExportJobs(app)
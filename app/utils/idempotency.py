@@ -0,0 +1,156 @@
+"""
+幂等键模块
+客户端在创建类接口上携带 Idempotency-Key 请求头，重试时直接返回首次请求保存的响应，
+不会再次调用业务逻辑（避免网络不稳定时重复创建销售单、采购单、回款）
+"""
+import hashlib
+from datetime import timedelta
+from functools import wraps
+from flask import current_app, jsonify, request
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models import IdempotencyKey
+from app.utils import timezone
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+
+# 幂等键最大长度（与 idempotency_key.key 列一致）
+MAX_KEY_LENGTH = 100
+
+
+def _local_now():
+    """当前本地时间（naive，与数据库中保存的时间一致）"""
+    return timezone.now().replace(tzinfo=None)
+
+
+def claim_key(key, endpoint, request_hash):
+    """
+    登记幂等键（单独提交，使并发的重复请求能看到）
+
+    处理中（pending）的键超过 IDEMPOTENCY_PENDING_TIMEOUT_SECONDS 仍未完成时，
+    视为首次请求已中断（进程在业务提交与 complete_key 之间退出），相同请求可以重新登记
+
+    Returns:
+        IdempotencyKey: 已存在的记录；登记成功返回 None
+    """
+    now = _local_now()
+    ttl = timedelta(hours=current_app.config.get('IDEMPOTENCY_KEY_TTL_HOURS', 24))
+    pending_timeout = timedelta(seconds=current_app.config.get('IDEMPOTENCY_PENDING_TIMEOUT_SECONDS', 300))
+
+    # 清理过期的键（按 expires_at 索引删除）
+    IdempotencyKey.query.filter(
+        IdempotencyKey.expires_at < now
+    ).delete(synchronize_session=False)
+
+    db.session.add(IdempotencyKey(
+        key=key,
+        endpoint=endpoint,
+        request_hash=request_hash,
+        created_at=now,
+        expires_at=now + ttl
+    ))
+    try:
+        db.session.commit()
+        return None
+    except IntegrityError:
+        db.session.rollback()
+
+    existing = IdempotencyKey.query.filter_by(endpoint=endpoint, key=key).first()
+    if (existing is not None and existing.status == 'pending'
+            and existing.request_hash == request_hash
+            and existing.created_at < now - pending_timeout):
+        # 条件更新：并发的重试只有一个能接管
+        reclaimed = IdempotencyKey.query.filter(
+            IdempotencyKey.id == existing.id,
+            IdempotencyKey.status == 'pending',
+            IdempotencyKey.created_at < now - pending_timeout
+        ).update({
+            'created_at': now,
+            'expires_at': now + ttl
+        }, synchronize_session=False)
+        db.session.commit()
+        if reclaimed:
+            return None
+        existing = IdempotencyKey.query.filter_by(endpoint=endpoint, key=key).first()
+
+    return existing
+
+
+def complete_key(key, endpoint, status_code, body, mimetype='application/json'):
+    """保存请求结果，之后相同键的请求直接返回该结果"""
+    IdempotencyKey.query.filter_by(endpoint=endpoint, key=key).update({
+        'status': 'completed',
+        'response_status': status_code,
+        'response_body': body,
+        'response_mimetype': mimetype
+    }, synchronize_session=False)
+    db.session.commit()
+
+
+def release_key(key, endpoint):
+    """请求未成功（非 2xx 或异常）时删除登记，允许客户端重试"""
+    db.session.rollback()
+    IdempotencyKey.query.filter_by(
+        endpoint=endpoint, key=key, status='pending'
+    ).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def _replay(record):
+    """返回保存的响应"""
+    response = current_app.response_class(
+        record.response_body,
+        status=record.response_status,
+        mimetype=record.response_mimetype or 'application/json'
+    )
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def idempotent(f):
+    """
+    创建类接口的幂等装饰器
+
+    - 没有 Idempotency-Key 请求头时直接执行
+    - 首次请求：登记键 -> 执行 -> 只保存 2xx 响应；
+      4xx（校验失败、额度不足、409 并发冲突等）和 5xx 不保存，客户端可用同一个键重试
+    - 重复请求：返回保存的响应；首次请求仍在处理中返回 409（超时未完成的可重新执行）；
+      同一个键用于不同的请求体返回 422
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return f(*args, **kwargs)
+
+        key = key.strip()
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return jsonify({'error': f'{IDEMPOTENCY_HEADER} 无效'}), 400
+
+        endpoint = request.endpoint
+        request_hash = hashlib.sha256(request.get_data()).hexdigest()
+
+        existing = claim_key(key, endpoint, request_hash)
+        if existing is not None:
+            if existing.request_hash != request_hash:
+                return jsonify({'error': f'{IDEMPOTENCY_HEADER} 已用于不同的请求'}), 422
+            if existing.status != 'completed':
+                return jsonify({'error': '相同的请求正在处理中，请稍后重试'}), 409
+            return _replay(existing)
+
+        try:
+            response = current_app.make_response(f(*args, **kwargs))
+        except Exception:
+            release_key(key, endpoint)
+            raise
+
+        if not 200 <= response.status_code < 300:
+            release_key(key, endpoint)
+            return response
+
+        db.session.rollback()
+        complete_key(key, endpoint, response.status_code,
+                     response.get_data(as_text=True), response.mimetype)
+
+        return response
+    return decorated_function
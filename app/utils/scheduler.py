@@ -0,0 +1,295 @@
+"""
+进程内定时任务调度器
+任务计划使用 cron 格式（分 时 日 月 星期，本地时区），由配置 SCHEDULER_JOBS 定义，
+执行函数见 MaintenanceService.JOBS；只在 SCHEDULER_ENABLED 的进程中启动调度线程。
+多个进程同时启用时，每次计划执行通过 job_lease 表的条件 UPDATE 领取，只有一个进程运行
+"""
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import timedelta
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models import JobLease, JobRun
+from app.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# 任务运行中租约的有效时间：进程异常退出后，租约到期即可再次领取
+LEASE_SECONDS = 3600
+
+# 查找下一次执行时间时最多向后查找的天数
+MAX_LOOKAHEAD_DAYS = 366
+
+
+def _local_now():
+    """当前本地时间（naive，与数据库中保存的时间一致）"""
+    return timezone.now().replace(tzinfo=None)
+
+
+def _owner():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+class CronSchedule:
+    """
+    cron 表达式：分 时 日 月 星期
+    支持 *、*/n、a、a-b、a-b/n 及逗号分隔的列表；星期 0 和 7 都表示周日，
+    日和星期都不是 * 时满足其一即可（与 cron 相同）
+    """
+
+    FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+    def __init__(self, expression):
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError(f'cron 表达式必须有 5 个字段: {expression}')
+
+        self.expression = expression
+        values = [self._parse(part, low, high) for part, (low, high) in zip(parts, self.FIELDS)]
+        self.minutes, self.hours, self.days, self.months, weekdays = values
+        self.weekdays = {day % 7 for day in weekdays}
+        self.any_day = parts[2] == '*'
+        self.any_weekday = parts[4] == '*'
+
+    @staticmethod
+    def _parse(field, low, high):
+        result = set()
+        for part in field.split(','):
+            step = 1
+            if '/' in part:
+                part, step = part.split('/', 1)
+                step = int(step)
+            if part == '*':
+                start, end = low, high
+            elif '-' in part:
+                start, end = (int(value) for value in part.split('-', 1))
+            else:
+                start = end = int(part)
+            if start < low or end > high or start > end or step < 1:
+                raise ValueError(f'cron 字段超出范围: {field}')
+            result.update(range(start, end + 1, step))
+        return result
+
+    def _day_matches(self, moment):
+        # isoweekday：周一 1 … 周日 7
+        day_ok = moment.day in self.days
+        weekday_ok = moment.isoweekday() % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, moment):
+        """moment 之后（不含）的下一次执行时间"""
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=MAX_LOOKAHEAD_DAYS)
+        while candidate < limit:
+            if candidate.month not in self.months or not self._day_matches(candidate):
+                candidate = (candidate + timedelta(days=1)).replace(hour=0, minute=0)
+            elif candidate.hour not in self.hours:
+                candidate = (candidate + timedelta(hours=1)).replace(minute=0)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        return None
+
+
+def get_jobs(app):
+    """
+    已配置的任务
+
+    Returns:
+        dict: {任务名称: {'func', 'description', 'schedule'}}
+    """
+    from app.services.maintenance_service import MaintenanceService
+
+    jobs = {}
+    for name, expression in app.config.get('SCHEDULER_JOBS', {}).items():
+        if not expression or name not in MaintenanceService.JOBS:
+            continue
+        func, description = MaintenanceService.JOBS[name]
+        jobs[name] = {'func': func, 'description': description, 'schedule': CronSchedule(expression)}
+    return jobs
+
+
+def claim(job_name, slot):
+    """
+    领取一次计划执行（单独提交）
+
+    同一个 slot 只能领取一次，且上一次运行的租约必须已释放或到期
+
+    Returns:
+        bool: 是否领取成功
+    """
+    now = _local_now()
+    try:
+        db.session.add(JobLease(job_name=job_name))
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+
+    result = db.session.execute(
+        update(JobLease).where(
+            JobLease.job_name == job_name,
+            db.or_(JobLease.last_slot.is_(None), JobLease.last_slot < slot),
+            db.or_(JobLease.lease_until.is_(None), JobLease.lease_until < now)
+        ).values(
+            last_slot=slot,
+            owner=_owner(),
+            lease_until=now + timedelta(seconds=LEASE_SECONDS)
+        ),
+        execution_options={'synchronize_session': False}
+    )
+    db.session.commit()
+    return result.rowcount == 1
+
+
+def _release(job_name):
+    db.session.execute(
+        update(JobLease).where(
+            JobLease.job_name == job_name,
+            JobLease.owner == _owner()
+        ).values(owner=None, lease_until=None),
+        execution_options={'synchronize_session': False}
+    )
+    db.session.commit()
+
+
+def run_job(job_name, func, trigger='schedule'):
+    """
+    运行已领取的任务并记录运行结果，结束后释放租约
+
+    Returns:
+        JobRun: 运行记录
+    """
+    run = JobRun(job_name=job_name, trigger=trigger, owner=_owner(), started_at=_local_now())
+    db.session.add(run)
+    db.session.commit()
+    run_id = run.id
+
+    started = time.monotonic()
+    try:
+        message = func()
+        status = 'success'
+    except Exception as e:
+        db.session.rollback()
+        logger.exception(f'定时任务 {job_name} 执行失败')
+        message = f'{type(e).__name__}: {e}'
+        status = 'failed'
+
+    run = db.session.get(JobRun, run_id)
+    run.status = status
+    run.message = str(message) if message is not None else None
+    run.finished_at = _local_now()
+    run.duration_ms = int((time.monotonic() - started) * 1000)
+    db.session.commit()
+
+    _release(job_name)
+    return run
+
+
+def run_now(app, job_name):
+    """
+    手动运行任务（不等待计划时间）
+
+    Raises:
+        ValueError: 任务不存在或正在运行
+    """
+    jobs = get_jobs(app)
+    if job_name not in jobs:
+        raise ValueError(f'任务 {job_name} 不存在或已停用')
+    if not claim(job_name, _local_now()):
+        raise ValueError(f'任务 {job_name} 正在运行')
+    return run_job(job_name, jobs[job_name]['func'], trigger='manual')
+
+
+def get_overview(app):
+    """
+    任务概览（管理页面使用）
+
+    Returns:
+        list: [{'name', 'description', 'schedule', 'next_run', 'running', 'owner', 'last_run'}, ...]
+    """
+    jobs = get_jobs(app)
+    now = _local_now()
+    leases = {lease.job_name: lease for lease in JobLease.query.filter(JobLease.job_name.in_(jobs)).all()}
+    latest_ids = db.session.query(db.func.max(JobRun.id)).filter(
+        JobRun.job_name.in_(jobs)
+    ).group_by(JobRun.job_name)
+    last_runs = {run.job_name: run for run in JobRun.query.filter(JobRun.id.in_(latest_ids)).all()}
+
+    overview = []
+    for name, job in jobs.items():
+        lease = leases.get(name)
+        running = lease is not None and lease.lease_until is not None and lease.lease_until >= now
+        last_run = last_runs.get(name)
+        overview.append({
+            'name': name,
+            'description': job['description'],
+            'schedule': job['schedule'].expression,
+            'next_run': job['schedule'].next_after(now),
+            'running': running,
+            'owner': lease.owner if running else None,
+            'last_run': last_run
+        })
+    return overview
+
+
+class Scheduler:
+    """调度线程：每隔 SCHEDULER_POLL_SECONDS 检查一次到期任务，依次运行"""
+
+    def __init__(self, app):
+        self.app = app
+        self.jobs = get_jobs(app)
+        self.poll_seconds = app.config.get('SCHEDULER_POLL_SECONDS', 30)
+        self._stop = threading.Event()
+        self._thread = None
+
+        # 从启动时间开始计算，不补跑停机期间错过的执行
+        now = _local_now()
+        self.next_runs = {name: job['schedule'].next_after(now) for name, job in self.jobs.items()}
+
+    def tick(self, now=None):
+        """运行所有到期的任务"""
+        now = now or _local_now()
+        for name, job in self.jobs.items():
+            slot = self.next_runs.get(name)
+            if slot is None or slot > now:
+                continue
+            self.next_runs[name] = job['schedule'].next_after(now)
+            try:
+                if claim(name, slot):
+                    run_job(name, job['func'])
+            except Exception:
+                db.session.rollback()
+                logger.exception(f'定时任务 {name} 调度失败')
+
+    def _loop(self):
+        logger.info(f'定时任务调度器已启动（{_owner()}）：{", ".join(self.jobs) or "无任务"}')
+        while not self._stop.wait(self.poll_seconds):
+            with self.app.app_context():
+                try:
+                    self.tick()
+                finally:
+                    db.session.remove()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, name='scheduler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+
+def start_scheduler(app):
+    """在 SCHEDULER_ENABLED 的进程中启动调度线程"""
+    if not app.config.get('SCHEDULER_ENABLED'):
+        return None
+    scheduler = Scheduler(app)
+    app.extensions['scheduler'] = scheduler
+    return scheduler.start()
@@ -0,0 +1,87 @@
+"""
+静态资源指纹模块
+启动时为静态文件计算内容哈希，url_for('static') 输出带哈希的文件名，
+带哈希的请求以 Cache-Control: immutable 长期缓存
+"""
+import hashlib
+import os
+from flask import current_app, send_from_directory, url_for
+from flask_babel import get_locale
+
+# 参与指纹的文件类型
+FINGERPRINT_EXTENSIONS = ('.js', '.css')
+
+# 带哈希文件的缓存时间（一年）
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+
+def _hashed_name(filename, digest):
+    """js/main.js -> js/main.<digest>.js"""
+    root, ext = os.path.splitext(filename)
+    return f'{root}.{digest}{ext}'
+
+
+def build_manifest(static_folder):
+    """
+    扫描静态目录并计算内容哈希
+
+    Args:
+        static_folder: 静态文件根目录
+
+    Returns:
+        dict: {原始文件名: 带哈希文件名}
+    """
+    manifest = {}
+    for dirpath, _, filenames in os.walk(static_folder):
+        for name in filenames:
+            if not name.endswith(FINGERPRINT_EXTENSIONS):
+                continue
+            path = os.path.join(dirpath, name)
+            with open(path, 'rb') as f:
+                digest = hashlib.md5(f.read()).hexdigest()[:12]
+            filename = os.path.relpath(path, static_folder).replace(os.sep, '/')
+            manifest[filename] = _hashed_name(filename, digest)
+    return manifest
+
+
+def init_app(app):
+    """注册静态资源指纹（STATIC_FINGERPRINT 关闭时只注册模板辅助函数）"""
+    manifest = {}
+    if app.config.get('STATIC_FINGERPRINT') and app.static_folder:
+        manifest = build_manifest(app.static_folder)
+    reverse = {hashed: original for original, hashed in manifest.items()}
+    app.extensions['static_manifest'] = manifest
+
+    @app.url_defaults
+    def fingerprint_static_url(endpoint, values):
+        """url_for('static', filename=...) 自动替换为带哈希的文件名"""
+        if endpoint == 'static' and 'filename' in values:
+            values['filename'] = manifest.get(values['filename'], values['filename'])
+
+    def serve_static(filename):
+        """带哈希的文件长期缓存，其他文件走默认逻辑"""
+        original = reverse.get(filename)
+        if original is None:
+            return app.send_static_file(filename)
+        response = send_from_directory(app.static_folder, original, max_age=IMMUTABLE_MAX_AGE)
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
+
+    if manifest and 'static' in app.view_functions:
+        app.view_functions['static'] = serve_static
+
+    @app.context_processor
+    def inject_static_helpers():
+        return {
+            'current_locale': str(get_locale() or app.config['BABEL_DEFAULT_LOCALE']),
+            'i18n_bundle_urls': i18n_bundle_urls
+        }
+
+
+def i18n_bundle_urls():
+    """返回各语言包的URL（供前端按需加载）"""
+    return {
+        lang: url_for('static', filename=f'js/i18n/{lang}.js')
+        for lang in current_app.config['BABEL_SUPPORTED_LOCALES']
+    }
@@ -0,0 +1,88 @@
+"""
+流式导出模块
+按批把查询结果编码为 NDJSON 或 CSV 逐块发送，不在内存中拼接整个文件；
+客户端 Accept-Encoding 含 gzip 时逐块压缩并同步刷新，客户端可以边接收边解析
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+from flask import Response, request, stream_with_context
+
+MIMETYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+# gzip 压缩级别（流式导出以速度优先）
+GZIP_LEVEL = 6
+
+
+def _json_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _encode_ndjson(columns, rows):
+    return ''.join(
+        json.dumps(dict(zip(columns, map(_json_value, row))), ensure_ascii=False) + '\n'
+        for row in rows
+    )
+
+
+def _encode_csv(rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+
+def stream_rows(columns, batches, fmt, filename):
+    """
+    流式响应
+
+    Args:
+        columns: 列名
+        batches: 行批次的迭代器（惰性执行：查询在发送第一块之后才开始）
+        fmt: 'ndjson' 或 'csv'
+        filename: 下载文件名
+
+    Returns:
+        Response: 分块传输的响应
+    """
+    compress = request.accept_encodings['gzip'] > 0
+
+    def generate():
+        # wbits=31：gzip 格式
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31) if compress else None
+
+        def encode(text):
+            data = text.encode('utf-8')
+            if compressor is None:
+                return data
+            return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+        # 第一块立即发送：CSV 表头（NDJSON 没有表头，压缩时先发送 gzip 文件头）
+        if fmt == 'csv':
+            yield encode(_encode_csv([columns]))
+        elif compressor is not None:
+            yield encode('')
+
+        for rows in batches:
+            yield encode(_encode_ndjson(columns, rows) if fmt == 'ndjson' else _encode_csv(rows))
+
+        if compressor is not None:
+            yield compressor.flush()
+
+    response = Response(stream_with_context(generate()), mimetype=MIMETYPES[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    response.headers['Vary'] = 'Accept-Encoding'
+    # 反向代理不缓冲，数据到达即转发
+    response.headers['X-Accel-Buffering'] = 'no'
+    if compress:
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
@@ -67,6 +67,29 @@ def system_settings():
 
 
 
+@admin_bp.route('/jobs')
+def scheduled_jobs():
+    """定时任务（计划、运行记录、耗时和失败信息）"""
+    from flask import current_app
+    from app.models import JobRun
+    from app.utils.scheduler import get_overview
+    
+    page = request.args.get('page', 1, type=int)
+    job_name = request.args.get('job')
+    status = request.args.get('status')
+    
+    query = JobRun.query
+    if job_name:
+        query = query.filter(JobRun.job_name == job_name)
+    if status:
+        query = query.filter(JobRun.status == status)
+    pagination = query.order_by(JobRun.id.desc()).paginate(page=page, per_page=50, error_out=False)
+    
+    return render_template('admin/jobs.html',
+                         jobs=get_overview(current_app),
+                         pagination=pagination,
+                         scheduler_enabled=current_app.config.get('SCHEDULER_ENABLED'))
+
 @admin_bp.route('/audit')
 def audit_logs():
     """审计日志"""
@@ -9,6 +9,7 @@ from app.services.purchase_service import PurchaseService
 from app.models import InventoryCheck
 from datetime import datetime
 from app.utils.decorators import permission_required
+from app.utils.export_jobs import export_job
 from app.utils import timezone
 
 inventory_bp = Blueprint('inventory', __name__)
@@ -103,6 +104,7 @@ def product_sales(product_name):
                          pagination=pagination)
 
 @inventory_bp.route('/purchase/export')
+@export_job
 def export_purchases():
     """导出采购单列表为Excel"""
     from app.utils.excel_exporter import export_purchases_to_excel
@@ -1,7 +1,7 @@
 """
 主页面视图
 """
-from flask import Blueprint, render_template, jsonify, request
+from flask import Blueprint, render_template, jsonify, request, current_app, send_from_directory
 from app.services.sale_service import SaleService
 from app.services.inventory_service import InventoryService
 from datetime import datetime, date
@@ -31,6 +31,13 @@ def index():
                              today_summary={},
                              current_stock={})
 
+@main_bp.route('/sw.js')
+def service_worker():
+    """Service Worker（必须从根路径提供才能控制 /sales/create 等页面，不做长期缓存）"""
+    response = send_from_directory(current_app.static_folder, 'sw.js', max_age=0)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
 @main_bp.route('/api/sales-summary/<date_str>')
 def get_sales_summary(date_str):
     """获取指定日期的销售汇总数据"""
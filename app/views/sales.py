@@ -4,11 +4,15 @@
 from flask import Blueprint, render_template, request, jsonify, flash
 from flask_login import login_required
 from app.services.sale_service import SaleService
-from app.models import Customer, Spec, Product
+from app.services.reference_data_service import ReferenceDataService
+from app.services.search_service import SearchService
+from app.models import DailyClose
+from app import db
 from datetime import datetime
 from app.utils import timezone
 
 from app.utils.decorators import permission_required
+from app.utils.export_jobs import export_job
 
 sales_bp = Blueprint('sales', __name__)
 
@@ -34,14 +38,15 @@ def list_sales():
 @sales_bp.route('/create')
 def create_sale():
     """创建销售单页面"""
-    customers = Customer.query.filter_by(active=True).order_by(Customer.name).all()
-    specs = Spec.query.filter_by(active=True).order_by(Spec.name).all()
-    products = Product.query.filter_by(active=True).order_by(Product.name).all()
+    # 基础资料从内存快照读取，不再每次渲染都查询数据库；
+    # 客户只列出近期销量最高的一部分，其余通过输入联想搜索
+    reference_data = ReferenceDataService.get_snapshot()
     
     return render_template('sales/create.html',
-                         customers=customers,
-                         specs=specs,
-                         products=products)
+                         customers=SearchService.recent_customers(),
+                         specs=reference_data['specs'],
+                         products=reference_data['products'],
+                         reference_data=reference_data)
 
 @sales_bp.route('/<sale_id>')
 def view_sale(sale_id):
@@ -62,12 +67,14 @@ def daily_sales(date):
         # 验证日期格式
         sale_date = datetime.strptime(date, '%Y-%m-%d').date()
         
-        # 获取当天的所有销售记录和汇总统计
+        # 获取当天的所有销售记录和汇总统计（已日结时汇总读取日结记录）
         sales, summary = SaleService.get_sales_by_date(sale_date)
+        close = db.session.get(DailyClose, sale_date)
         
         return render_template('sales/daily_detail.html',
                              sales=sales,
                              summary=summary,
+                             close=close,
                              date=sale_date)
     except ValueError as e:
         flash('Invalid date format', 'error')
@@ -78,6 +85,7 @@ def daily_sales(date):
 
 
 @sales_bp.route('/daily/<date>/export')
+@export_job
 def export_daily_sales(date):
     """导出指定日期的销售详情为Excel"""
     from flask import redirect, url_for
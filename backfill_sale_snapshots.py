@@ -0,0 +1,33 @@
+"""
+回填销售单客户名称、销售明细规格快照
+应用启动时新增快照列后会自动回填一次；通过SQL直接导入的数据可以手动再运行
+"""
+import logging
+import os
+import sys
+
+# 添加项目路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app, backfill_sale_snapshots
+
+def main():
+    """回填快照为空的销售单和销售明细"""
+    app = create_app()
+    
+    with app.app_context():
+        print("=" * 60)
+        print("Backfilling sale snapshots")
+        print("=" * 60)
+        
+        counts = backfill_sale_snapshots(logging.getLogger(__name__))
+        
+        if counts is None:
+            print("\n[ERROR] Backfill failed, see log for details")
+            sys.exit(1)
+        
+        print(f"\n[OK] Updated {counts[0]} sale(s), {counts[1]} sale item(s)")
+        print("\nDone!")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,33 @@
+"""
+生成每日库存收盘快照
+建议每天凌晨通过计划任务运行；未运行时首次查询历史库存也会按需生成
+"""
+import os
+import sys
+
+# 添加项目路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.services.inventory_service import InventoryService
+
+def build_stock_snapshots():
+    """生成截至昨天的库存快照"""
+    app = create_app()
+    
+    with app.app_context():
+        print("=" * 60)
+        print("Building daily stock snapshots")
+        print("=" * 60)
+        
+        days = InventoryService.build_snapshots()
+        
+        if days > 0:
+            print(f"\n[OK] Created snapshots for {days} day(s)")
+        else:
+            print("\n[OK] Stock snapshots are already up to date")
+        
+        print("\nDone!")
+
+if __name__ == '__main__':
+    build_stock_snapshots()
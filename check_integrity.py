@@ -0,0 +1,53 @@
+"""
+数据一致性检查（取代 check_sales_total_kg.py、fix_total_kg.py、fix_zero_total_kg.py 等脚本）
+用法：python check_integrity.py [--fix] [--batch-size N] [检查名称 ...]
+不指定检查名称时运行全部检查；--fix 分批修正可自动修正的项目，已日结日期的单据只报告
+"""
+import argparse
+import os
+import sys
+
+# 添加项目路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.services.integrity_service import IntegrityService
+
+def check_integrity(names=None, fix=False, batch_size=None):
+    """运行检查，有不一致（修正后仍有未修正）时返回 False"""
+    app = create_app()
+
+    with app.app_context():
+        print("=" * 60)
+        print("Checking data integrity" + (" (fix mode)" if fix else ""))
+        print("=" * 60)
+
+        ok = True
+        for result in IntegrityService.run(names, fix=fix, batch_size=batch_size):
+            if result['count'] == 0:
+                print(f"[OK] {result['name']}: {result['description']}")
+                continue
+
+            print(f"[FAIL] {result['name']}: {result['count']} rows - {result['description']}")
+            print(f"       e.g. {', '.join(result['sample'])}")
+            if fix and result['fixable']:
+                print(f"       fixed {result['fixed']}")
+                if result['skipped']:
+                    print(f"       skipped (day closed): {', '.join(result['skipped'])}")
+            elif fix:
+                print("       not fixable automatically, please review")
+            if not fix or result['fixed'] < result['count']:
+                ok = False
+
+        print("\nDone!")
+        return ok
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='数据一致性检查')
+    parser.add_argument('checks', nargs='*',
+                        help=f"检查名称（默认全部）：{', '.join(IntegrityService.CHECKS)}")
+    parser.add_argument('--fix', action='store_true', help='分批修正可自动修正的项目')
+    parser.add_argument('--batch-size', type=int, default=None, help='修正时每批单据数')
+    args = parser.parse_args()
+
+    sys.exit(0 if check_integrity(args.checks or None, args.fix, args.batch_size) else 1)
@@ -0,0 +1,37 @@
+"""
+日结：冻结指定日期（默认昨天）以及之前有销售、尚未日结日期的汇总
+用法：python close_day.py [YYYY-MM-DD]，可由 cron 在每天营业结束后执行
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+
+# 添加项目路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.services.close_service import CloseService
+from app.utils import timezone
+
+def close_day(close_date=None):
+    """日结到指定日期"""
+    app = create_app()
+    
+    with app.app_context():
+        if close_date is None:
+            close_date = timezone.get_current_date() - timedelta(days=1)
+        
+        print("=" * 60)
+        print(f"Closing sales days up to {close_date}")
+        print("=" * 60)
+        
+        closed = CloseService.close_pending(close_date, 'system')
+        
+        for day in closed:
+            print(f"[OK] Closed {day}")
+        print(f"\n[OK] Closed {len(closed)} days")
+        print("\nDone!")
+
+if __name__ == '__main__':
+    close_date = datetime.strptime(sys.argv[1], '%Y-%m-%d').date() if len(sys.argv) > 1 else None
+    close_day(close_date)
@@ -0,0 +1,44 @@
+"""
+导出分析数据快照（Parquet，按月分区）
+用法：python export_analytics.py [--full] [数据集 ...]
+默认增量导出全部数据集，只重写新增或有变化的月份；--full 删除已有快照后全部重写
+"""
+import argparse
+import os
+import sys
+
+# 添加项目路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.services.analytics_service import AnalyticsService
+
+def export_analytics(datasets=None, full=False):
+    """导出分析数据快照"""
+    app = create_app()
+
+    with app.app_context():
+        print("=" * 60)
+        print(f"Exporting analytics snapshot to {AnalyticsService.get_directory()}" + (" (full)" if full else ""))
+        print("=" * 60)
+
+        summary = AnalyticsService.export(datasets, full=full)
+
+        for name, result in summary.items():
+            if result['months']:
+                print(f"[OK] {name}: {len(result['months'])} month(s), {result['rows']} rows "
+                      f"({', '.join(result['months'])})")
+            else:
+                print(f"[OK] {name}: up to date")
+            if result['removed']:
+                print(f"     removed: {', '.join(result['removed'])}")
+
+        print("\nDone!")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='导出分析数据快照')
+    parser.add_argument('datasets', nargs='*', help=f"数据集（默认全部）：{', '.join(AnalyticsService.DATASETS)}")
+    parser.add_argument('--full', action='store_true', help='删除已有快照后全部重写')
+    args = parser.parse_args()
+
+    export_analytics(args.datasets or None, args.full)
@@ -0,0 +1,38 @@
+"""
+批量导出客户月结对账单（每个客户一个 Excel 文件）
+用法: python export_monthly_statements.py 2026-09 [输出目录]
+不指定月份时导出上个月
+"""
+import os
+import sys
+
+# 添加项目路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.services.ledger_service import LedgerService
+from app.utils import timezone
+
+def export_monthly_statements():
+    """导出指定月份的全部客户对账单"""
+    if len(sys.argv) > 1:
+        year, month = (int(part) for part in sys.argv[1].split('-'))
+    else:
+        today = timezone.get_current_date()
+        year, month = (today.year, today.month - 1) if today.month > 1 else (today.year - 1, 12)
+    output_dir = sys.argv[2] if len(sys.argv) > 2 else os.path.join('statements', f'{year}{month:02d}')
+    
+    app = create_app()
+    
+    with app.app_context():
+        print("=" * 60)
+        print(f"Exporting customer statements for {year}-{month:02d}")
+        print("=" * 60)
+        
+        paths = LedgerService.export_monthly_statements(year, month, output_dir)
+        
+        print(f"\n[OK] Wrote {len(paths)} statement(s) to {output_dir}")
+        print("\nDone!")
+
+if __name__ == '__main__':
+    export_monthly_statements()
@@ -0,0 +1,29 @@
+"""
+按历史销售单、回款记录重建客户账簿和客户欠款（信用额度校验使用的余额）
+余额与实际数据不一致（例如直接通过SQL修改过单据）时运行，建议在非营业时间执行
+"""
+import os
+import sys
+
+# 添加项目路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.services.ledger_service import LedgerService
+
+def rebuild_customer_ledger():
+    """重建客户账簿和余额"""
+    app = create_app()
+    
+    with app.app_context():
+        print("=" * 60)
+        print("Rebuilding customer ledger and balances")
+        print("=" * 60)
+        
+        count = LedgerService.rebuild()
+        
+        print(f"\n[OK] Posted {count} ledger entries")
+        print("\nDone!")
+
+if __name__ == '__main__':
+    rebuild_customer_ledger()
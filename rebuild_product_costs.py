@@ -0,0 +1,30 @@
+"""
+按时间顺序重放全部有效采购和销售，重建加权平均成本和销售明细成本
+作废采购单、补录历史单据之后运行，建议在非营业时间执行
+"""
+import os
+import sys
+
+# 添加项目路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.services.cost_service import CostService
+
+def rebuild_product_costs():
+    """重建加权平均成本"""
+    app = create_app()
+    
+    with app.app_context():
+        print("=" * 60)
+        print("Rebuilding weighted-average product costs")
+        print("=" * 60)
+        
+        count = CostService.rebuild()
+        
+        print(f"\n[OK] Costed {count} sale items")
+        print(f"[OK] Costing method in use: {CostService.get_method()}")
+        print("\nDone!")
+
+if __name__ == '__main__':
+    rebuild_product_costs()
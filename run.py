@@ -22,4 +22,8 @@ def make_shell_context():
     }
 
 if __name__ == '__main__':
+    # 调试模式的自动重载会启动两个进程，只在实际提供服务的子进程中启动定时任务
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        from app.utils.scheduler import start_scheduler
+        start_scheduler(app)
     app.run(debug=True, host='0.0.0.0', port=5000)
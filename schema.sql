@@ -26,6 +26,7 @@ CREATE TABLE IF NOT EXISTS spec (
 -- 索引
 CREATE UNIQUE INDEX idx_spec_name ON spec(name);
 CREATE INDEX idx_spec_active ON spec(active);
+CREATE INDEX idx_spec_name_lower ON spec(lower(name));  -- 名称前缀搜索
 
 -- ============================================================================
 -- 2. 客户表（customer）
@@ -36,6 +37,8 @@ CREATE TABLE IF NOT EXISTS customer (
     name VARCHAR(100) NOT NULL UNIQUE,               -- 客户名称
     credit_allowed BOOLEAN NOT NULL DEFAULT 0,       -- 是否允许信用支付
     active BOOLEAN NOT NULL DEFAULT 1,               -- 是否启用
+    credit_limit DECIMAL(12,2) NULL,                 -- 信用额度（为空表示不限额）
+    balance DECIMAL(12,2) NOT NULL DEFAULT 0,        -- 当前应收余额（客户账簿记账时维护）
     created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
     created_by VARCHAR(50) NOT NULL,
     updated_at DATETIME NULL,
@@ -45,6 +48,7 @@ CREATE TABLE IF NOT EXISTS customer (
 -- 索引
 CREATE UNIQUE INDEX idx_customer_name ON customer(name);
 CREATE INDEX idx_customer_active ON customer(active);
+CREATE INDEX idx_customer_name_lower ON customer(lower(name));  -- 名称前缀搜索
 
 -- ============================================================================
 -- 3. 销售单主表（sale）
@@ -58,6 +62,7 @@ CREATE TABLE IF NOT EXISTS sale (
     id VARCHAR(50) PRIMARY KEY,                      -- 单据号，格式：SALE-YYYYMMDD-序号
     sale_time DATETIME NOT NULL,                     -- 销售时间
     customer_id INTEGER NOT NULL,                    -- 客户ID
+    customer_name VARCHAR(100) NULL,                 -- 客户名称快照（创建时写入）
     payment_type VARCHAR(20) NOT NULL CHECK(payment_type IN ('现金','Crédito')),  -- 支付方式
     total_kg DECIMAL(12,3) NOT NULL DEFAULT 0,       -- 总重量（自动汇总，禁止人工输入）
     status VARCHAR(20) NOT NULL DEFAULT 'active' CHECK(status IN ('active','void')),  -- 状态
@@ -76,22 +81,33 @@ CREATE INDEX idx_sale_time ON sale(sale_time);
 CREATE INDEX idx_sale_customer ON sale(customer_id);
 CREATE INDEX idx_sale_status ON sale(status);
 CREATE INDEX idx_sale_created_by ON sale(created_by);
+CREATE INDEX idx_sale_customer_time ON sale(customer_id, sale_time);
+-- 有效销售按时间统计（部分索引，覆盖统计列）
+CREATE INDEX idx_sale_active_time ON sale(sale_time, payment_type, payment_status, customer_id, created_by, total_kg, total_amount) WHERE status = 'active';
+-- 未结清信用销售（应收账龄）
+CREATE INDEX idx_sale_open_credit ON sale(customer_id, sale_time, total_amount) WHERE status = 'active' AND payment_type = 'Crédito' AND payment_status <> 'paid';
 
 -- ============================================================================
 -- 4. 销售明细表（sale_item）
 -- 用途：存储销售单明细，每行代表一个规格的销售
 -- 业务规则：
---   1. subtotal_kg = box_qty × spec.kg_per_box + extra_kg
+--   1. subtotal_kg = box_qty × kg_per_box + extra_kg
 --   2. subtotal_kg 由系统自动计算，禁止人工修改
 --   3. 规格必须来自 spec 表，禁止自由输入
+--   4. spec_name、kg_per_box 为创建时的规格快照，之后修改规格不影响历史明细
+--   5. unit_cost、cost_amount 为创建时的加权平均成本，作废或补录单据后由 rebuild_product_costs.py 重算
 -- ============================================================================
 CREATE TABLE IF NOT EXISTS sale_item (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     sale_id VARCHAR(50) NOT NULL,                    -- 销售单号
     spec_id INTEGER NOT NULL,                        -- 规格ID
+    spec_name VARCHAR(100) NULL,                     -- 规格名称快照
+    kg_per_box DECIMAL(10,3) NULL,                   -- 单箱重量快照
     box_qty INTEGER NOT NULL DEFAULT 0 CHECK(box_qty >= 0),  -- 箱数
     extra_kg DECIMAL(10,3) NOT NULL DEFAULT 0 CHECK(extra_kg >= 0),  -- 散货重量（KG）
     subtotal_kg DECIMAL(12,3) NOT NULL DEFAULT 0,    -- 小计重量（系统计算）
+    unit_cost DECIMAL(12,4) NULL,                    -- 加权平均成本（每KG）
+    cost_amount DECIMAL(12,2) NULL,                  -- 成本金额
     created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (sale_id) REFERENCES sale(id),
     FOREIGN KEY (spec_id) REFERENCES spec(id)
@@ -132,6 +148,7 @@ CREATE INDEX idx_stock_move_time ON stock_move(move_time);
 CREATE INDEX idx_stock_move_type ON stock_move(move_type);
 CREATE INDEX idx_stock_move_status ON stock_move(status);
 CREATE INDEX idx_stock_move_reference ON stock_move(reference_type, reference_id);
+CREATE INDEX idx_stock_move_active_time ON stock_move(move_time, kg) WHERE status = 'active';
 
 -- ============================================================================
 -- 6. 审计日志表（audit_log）
@@ -200,6 +217,160 @@ CREATE TABLE IF NOT EXISTS memo (
 CREATE INDEX idx_memo_date ON memo(memo_date);
 CREATE INDEX idx_memo_active ON memo(active);
 CREATE INDEX idx_memo_created_at ON memo(created_at);
+CREATE INDEX idx_memo_active_date ON memo(active, memo_date);
+
+-- ============================================================================
+-- 9. 库存日结快照表（stock_snapshot）
+-- 用途：每日收盘库存（按商品及合计），用于任意时刻库存查询和库存趋势
+-- 业务规则：
+--   1. product_name = '__total__' 为合计行，'__none__' 为未指定商品的销售明细
+--   2. 商品行按 product_id 关联（商品改名不影响已生成的快照），product_name 只是生成时的名称
+--   3. 补录/作废历史单据时删除该日期及之后的快照，由定时任务重建（查询不写快照）
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS stock_snapshot (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    snapshot_date DATE NOT NULL,                     -- 快照日期
+    product_id INTEGER NULL,                         -- 商品ID（合计行、未指定商品行为空）
+    product_name VARCHAR(100) NOT NULL,              -- 生成快照时的商品名称（合计行为 __total__，未指定商品为 __none__）
+    closing_kg DECIMAL(12,3) NOT NULL DEFAULT 0,     -- 当日收盘库存（KG）
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT uq_stock_snapshot_product_date UNIQUE (product_name, snapshot_date)
+);
+
+-- 索引
+CREATE INDEX idx_stock_snapshot_date ON stock_snapshot(snapshot_date);
+
+-- ============================================================================
+-- 10. 客户账簿表（customer_ledger）
+-- 用途：客户应收往来明细（赊销、回款、作废冲销），用于对账单
+-- 业务规则：
+--   1. amount 正数增加应收，负数减少应收
+--   2. balance 为该分录记账后的客户余额，与 customer.balance 同一事务更新
+--   3. 同一单据同一类型只记账一次
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS customer_ledger (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    customer_id INTEGER NOT NULL,                    -- 客户ID
+    entry_time DATETIME NOT NULL,                    -- 业务时间
+    entry_type VARCHAR(20) NOT NULL CHECK(entry_type IN ('charge','payment','void')),  -- 分录类型
+    reference_type VARCHAR(20) NOT NULL,             -- 关联单据类型（sale/remittance）
+    reference_id VARCHAR(50) NOT NULL,               -- 关联单据号
+    amount DECIMAL(12,2) NOT NULL,                   -- 金额
+    balance DECIMAL(12,2) NOT NULL,                  -- 记账后余额
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    created_by VARCHAR(50) NOT NULL,
+    FOREIGN KEY (customer_id) REFERENCES customer(id),
+    CONSTRAINT uq_customer_ledger_reference UNIQUE (reference_type, reference_id, entry_type)
+);
+
+-- 索引
+CREATE INDEX idx_customer_ledger_customer ON customer_ledger(customer_id, id);
+CREATE INDEX idx_customer_ledger_entry_time ON customer_ledger(entry_time);
+
+-- ============================================================================
+-- 11. 利润缓存表（daily_profit）
+-- 用途：已结束日期的销售收入与 FIFO 成本（按商品及合计），由利润报表按需生成
+-- 业务规则：
+--   1. product_name 为 '__total__' 的行是当日合计，存在即表示该日已缓存
+--   2. 已结束日期的销售/采购发生变化时，删除该日期及之后的缓存
+--   3. 每次缓存的最后一天的合计行保存当日结束时的批次，之后的遍历从该日继续，不必从第一张单据开始
+--   4. 商品行与采购批次都按 product_id 匹配（商品改名不影响），product_name 只是缓存时的名称
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS daily_profit (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    profit_date DATE NOT NULL,                       -- 日期
+    product_id INTEGER NULL,                         -- 商品ID（合计行、未指定商品行为空）
+    product_name VARCHAR(100) NOT NULL,              -- 缓存时的商品名称（'__total__' 合计，'__none__' 未指定商品）
+    sold_kg DECIMAL(12,3) NOT NULL DEFAULT 0,        -- 销售重量
+    revenue DECIMAL(12,2) NOT NULL DEFAULT 0,        -- 销售收入
+    cost DECIMAL(12,2) NOT NULL DEFAULT 0,           -- FIFO成本
+    uncosted_kg DECIMAL(12,3) NOT NULL DEFAULT 0,    -- 没有采购批次可匹配的重量
+    lot_state TEXT NULL,                             -- 当日结束时剩余的 FIFO 批次（JSON），供下次从该日继续遍历
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT uq_daily_profit_product_date UNIQUE (product_name, profit_date)
+);
+
+-- 索引
+CREATE INDEX idx_daily_profit_date ON daily_profit(profit_date);
+
+-- ============================================================================
+-- 12. 商品成本表（product_cost）
+-- 用途：加权平均成本，每次采购、销售增量更新（系统配置 costing_method = weighted_average 时用于利润）
+-- 业务规则：
+--   1. 采购：avg_cost = (qty_kg × avg_cost + 采购重量 × 单价) / (qty_kg + 采购重量)
+--   2. 销售：按当前 avg_cost 记录明细成本，qty_kg 减少，avg_cost 不变
+--   3. product_name 为 '__all__' 的行是全部商品合计，用于未指定商品或从未采购的商品
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS product_cost (
+    product_name VARCHAR(100) PRIMARY KEY,           -- 商品名称
+    qty_kg DECIMAL(14,3) NOT NULL DEFAULT 0,         -- 按成本记录的结存重量
+    avg_cost DECIMAL(12,4) NOT NULL DEFAULT 0,       -- 加权平均成本（每KG）
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+-- ============================================================================
+-- 13. 日结表（daily_close）
+-- 用途：结账时冻结的每日销售汇总，历史日期的每日详情和导出直接读取
+-- 业务规则：
+--   1. status = 'closed' 时该日的销售单、采购单不能新增或作废，需先反结账（status = 'reopened'）
+--   2. 结账后收到的该日销售的回款累加到 remittances_amount、daily_cash_income
+--   3. 再次日结时按当前数据重新冻结
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS daily_close (
+    close_date DATE PRIMARY KEY,                     -- 日结日期
+    status VARCHAR(20) NOT NULL DEFAULT 'closed' CHECK(status IN ('closed','reopened')),
+    order_count INTEGER NOT NULL DEFAULT 0,          -- 订单数
+    total_kg DECIMAL(12,3) NOT NULL DEFAULT 0,
+    total_amount DECIMAL(12,2) NOT NULL DEFAULT 0,
+    cash_kg DECIMAL(12,3) NOT NULL DEFAULT 0,
+    credit_kg DECIMAL(12,3) NOT NULL DEFAULT 0,
+    cash_amount DECIMAL(12,2) NOT NULL DEFAULT 0,
+    credit_amount DECIMAL(12,2) NOT NULL DEFAULT 0,
+    total_cost DECIMAL(12,2) NOT NULL DEFAULT 0,     -- 成本（按结账时的成本方法）
+    profit DECIMAL(12,2) NOT NULL DEFAULT 0,
+    remittances_amount DECIMAL(12,2) NOT NULL DEFAULT 0,  -- 当天销售的回款
+    daily_cash_income DECIMAL(12,2) NOT NULL DEFAULT 0,   -- 当天入账
+    costing_method VARCHAR(20) NULL,                 -- 结账时的成本方法
+    closed_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    closed_by VARCHAR(50) NOT NULL,
+    reopened_at DATETIME NULL,
+    reopened_by VARCHAR(50) NULL,
+    reopen_reason TEXT NULL
+);
+
+-- ============================================================================
+-- 14. 定时任务租约表（job_lease）
+-- 用途：多个进程启用调度器时，每次计划执行只由一个进程运行
+-- 业务规则：
+--   1. 领取条件：last_slot 早于本次计划时间，且 lease_until 为空或已到期
+--   2. 运行结束释放租约（owner、lease_until 置空）；进程异常退出时租约到期自动释放
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS job_lease (
+    job_name VARCHAR(50) PRIMARY KEY,                -- 任务名称
+    last_slot DATETIME NULL,                         -- 最近一次被领取的计划执行时间
+    owner VARCHAR(100) NULL,                         -- 持有租约的进程（主机名:进程号）
+    lease_until DATETIME NULL                        -- 租约到期时间
+);
+
+-- ============================================================================
+-- 15. 定时任务运行记录表（job_run）
+-- 用途：任务运行历史、耗时和失败信息（/admin/jobs）
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS job_run (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_name VARCHAR(50) NOT NULL,                   -- 任务名称
+    trigger VARCHAR(20) NOT NULL DEFAULT 'schedule', -- schedule/manual
+    owner VARCHAR(100) NOT NULL,                     -- 运行的进程
+    started_at DATETIME NOT NULL,
+    finished_at DATETIME NULL,
+    duration_ms INTEGER NULL,                        -- 耗时（毫秒）
+    status VARCHAR(20) NOT NULL DEFAULT 'running' CHECK(status IN ('running','success','failed')),
+    message TEXT NULL                                -- 结果说明或错误信息
+);
+
+-- 索引
+CREATE INDEX idx_job_run_job ON job_run(job_name, id);
+CREATE INDEX idx_job_run_started_at ON job_run(started_at);
 
 -- ============================================================================
 -- 触发器部分
@@ -213,7 +384,9 @@ AFTER INSERT ON sale_item
 FOR EACH ROW
 BEGIN
     UPDATE sale_item
-    SET subtotal_kg = NEW.box_qty * (SELECT kg_per_box FROM spec WHERE id = NEW.spec_id) + NEW.extra_kg
+    SET spec_name = COALESCE(NEW.spec_name, (SELECT name FROM spec WHERE id = NEW.spec_id)),
+        kg_per_box = COALESCE(NEW.kg_per_box, (SELECT kg_per_box FROM spec WHERE id = NEW.spec_id)),
+        subtotal_kg = NEW.box_qty * COALESCE(NEW.kg_per_box, (SELECT kg_per_box FROM spec WHERE id = NEW.spec_id)) + NEW.extra_kg
     WHERE id = NEW.id;
 END;
 
@@ -224,8 +397,11 @@ CREATE TRIGGER trg_sale_item_calc_subtotal_update
 AFTER UPDATE OF box_qty, extra_kg, spec_id ON sale_item
 FOR EACH ROW
 BEGIN
+    -- 更换规格时刷新快照，否则沿用原单箱重量
     UPDATE sale_item
-    SET subtotal_kg = NEW.box_qty * (SELECT kg_per_box FROM spec WHERE id = NEW.spec_id) + NEW.extra_kg
+    SET spec_name = CASE WHEN NEW.spec_id <> OLD.spec_id THEN (SELECT name FROM spec WHERE id = NEW.spec_id) ELSE NEW.spec_name END,
+        kg_per_box = CASE WHEN NEW.spec_id <> OLD.spec_id OR NEW.kg_per_box IS NULL THEN (SELECT kg_per_box FROM spec WHERE id = NEW.spec_id) ELSE NEW.kg_per_box END,
+        subtotal_kg = NEW.box_qty * CASE WHEN NEW.spec_id <> OLD.spec_id OR NEW.kg_per_box IS NULL THEN (SELECT kg_per_box FROM spec WHERE id = NEW.spec_id) ELSE NEW.kg_per_box END + NEW.extra_kg
     WHERE id = NEW.id;
 END;
 
@@ -481,15 +657,14 @@ CREATE VIEW IF NOT EXISTS v_extra_kg_analysis AS
 SELECT 
     s.id as sale_id,
     s.sale_time,
-    c.name as customer_name,
+    s.customer_name,
     s.total_kg,
     SUM(si.extra_kg) as extra_kg,
     ROUND(SUM(si.extra_kg) * 100.0 / NULLIF(s.total_kg, 0), 2) as extra_percent
 FROM sale s
-JOIN customer c ON s.customer_id = c.id
 JOIN sale_item si ON s.id = si.sale_id
 WHERE s.status = 'active'
-GROUP BY s.id, s.sale_time, c.name, s.total_kg
+GROUP BY s.id, s.sale_time, s.customer_name, s.total_kg
 HAVING extra_percent > 0
 ORDER BY extra_percent DESC;
 
@@ -7,6 +7,10 @@ try:
     app = create_app(os.getenv('FLASK_ENV', 'production'))
 
     if __name__ == "__main__":
+        # 定时任务只在设置了 SCHEDULER_ENABLED 的进程中运行
+        from app.utils.scheduler import start_scheduler
+        start_scheduler(app)
+
         # Waitress will default to 0.0.0.0:8080 if not specified
         # Render provides PORT in environment
         port = int(os.environ.get("PORT", 10000))
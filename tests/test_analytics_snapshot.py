@@ -0,0 +1,64 @@
+"""
+验证分析数据快照：按月导出 Parquet，增量导出只重写有变化的月份，即席查询从快照聚合
+"""
+import sys
+import os
+from datetime import datetime
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from app import create_app, db
+from app.models import Customer, Spec
+from app.services.sale_service import SaleService
+from app.services.analytics_service import AnalyticsService
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app('testing')
+    app.config['ANALYTICS_DIR'] = str(tmp_path)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add(Customer(id=1, name='Cliente', created_by='test'))
+        db.session.add(Spec(id=1, name='S1', length=1, width=1, kg_per_box=10, created_by='test'))
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def _sale(day, boxes):
+    return SaleService.create_sale(1, '现金', [{'spec_id': 1, 'box_qty': boxes}], 'test', sale_time=day)
+
+
+def test_incremental_export_and_query(app):
+    with app.app_context():
+        _sale(datetime(2026, 1, 10, 9), 1)
+        _sale(datetime(2026, 2, 10, 9), 2)
+
+        summary = AnalyticsService.export(['sales', 'sale_items'])
+        assert summary['sales']['months'] == ['2026-01', '2026-02']
+
+        # 没有变化时不重写任何月份
+        assert AnalyticsService.export(['sales'])['sales']['months'] == []
+
+        # 只有新增销售的月份被重写
+        _sale(datetime(2026, 2, 20, 9), 3)
+        assert AnalyticsService.export(['sales', 'sale_items'])['sale_items']['months'] == ['2026-02']
+
+        rows = AnalyticsService.query('sale_items', group_by=['month'], metrics=[('subtotal_kg', 'sum')])
+        assert rows == [
+            {'month': '2026-01', 'subtotal_kg_sum': 10.0},
+            {'month': '2026-02', 'subtotal_kg_sum': 50.0},
+        ]
+
+        client = app.test_client()
+        response = client.get('/api/reports/analytics/sales?metrics=total_kg:sum&date_from=2026-02-15')
+        assert response.get_json()['data'] == [{'total_kg_sum': 30.0}]
+        assert client.get('/api/reports/analytics/unknown').status_code == 400
@@ -0,0 +1,98 @@
+"""
+验证客户账簿：增量记账的余额与按历史数据重建的结果一致，对账单键集分页不重不漏，
+赊销超过信用额度时拒绝
+"""
+import sys
+import os
+from decimal import Decimal
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+from app import create_app, db
+from app.models import Customer, Spec, Sale, CustomerLedger
+from app.services.sale_service import SaleService
+from app.services.remittance_service import RemittanceService
+from app.services.ledger_service import LedgerService, CreditLimitExceededError
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add(Customer(id=1, name='Ana', credit_allowed=True, created_by='test'))
+        db.session.add(Spec(id=1, name='S10', length=1, width=1, kg_per_box=Decimal('10'), created_by='test'))
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def ledger_rows():
+    return [
+        (row.entry_type, row.reference_id, row.amount, row.balance)
+        for row in CustomerLedger.query.order_by(CustomerLedger.id)
+    ]
+
+
+def test_incremental_ledger_matches_rebuild(app):
+    with app.app_context():
+        sales = [
+            SaleService.create_sale(1, 'Crédito', [{'spec_id': 1, 'box_qty': 1, 'extra_kg': 0}], 'test',
+                                    manual_total_amount=Decimal('100'))
+            for _ in range(3)
+        ]
+        SaleService.create_sale(1, '现金', [{'spec_id': 1, 'box_qty': 1, 'extra_kg': 0}], 'test',
+                                manual_total_amount=Decimal('40'))
+        RemittanceService.create_remittance(sales[0].id, 50, 'test')
+        RemittanceService.allocate_remittance(1, 80, 'test')
+        SaleService.void_sale(sales[2].id, 'wrong customer', 'test')
+
+        # 300 赊销 - 130 回款 - 100 作废
+        assert LedgerService.get_balance(1) == 70
+        incremental = ledger_rows()
+
+        LedgerService.rebuild()
+        db.session.expire_all()
+        assert ledger_rows() == incremental
+        assert LedgerService.get_balance(1) == 70
+
+
+def test_statement_keyset_pagination(app):
+    with app.app_context():
+        for _ in range(5):
+            SaleService.create_sale(1, 'Crédito', [{'spec_id': 1, 'box_qty': 1, 'extra_kg': 0}], 'test',
+                                    manual_total_amount=Decimal('10'))
+
+        seen, cursor = [], None
+        while True:
+            page = LedgerService.get_statement(1, limit=2, before_id=cursor)
+            seen.extend(entry['id'] for entry in page['entries'])
+            cursor = page['next_cursor']
+            if cursor is None:
+                break
+
+        assert seen == sorted(seen, reverse=True)
+        assert len(seen) == 5
+        assert page['balance'] == 50
+
+
+def test_credit_sale_over_limit_is_rejected(app):
+    with app.app_context():
+        db.session.get(Customer, 1).credit_limit = Decimal('150')
+        db.session.commit()
+        items = [{'spec_id': 1, 'box_qty': 1, 'extra_kg': 0}]
+
+        SaleService.create_sale(1, 'Crédito', items, 'test', manual_total_amount=Decimal('100'))
+        with pytest.raises(CreditLimitExceededError):
+            SaleService.create_sale(1, 'Crédito', items, 'test', manual_total_amount=Decimal('60'))
+
+        # 现金销售不占用额度
+        SaleService.create_sale(1, '现金', items, 'test', manual_total_amount=Decimal('500'))
+
+        assert Sale.query.count() == 2
+        assert LedgerService.get_credit_status(1)['available'] == 50
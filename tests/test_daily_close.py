@@ -0,0 +1,108 @@
+"""
+验证日结：冻结的汇总与实时计算一致，日结后该日单据不能修改，反结账后恢复，
+结账后收到的回款累加到日结记录
+"""
+import sys
+import os
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+from app import create_app, db
+from app.models import Customer, Spec
+from app.services.sale_service import SaleService
+from app.services.remittance_service import RemittanceService
+from app.services.close_service import CloseService, DayClosedError
+from app.utils import timezone
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add(Customer(id=1, name='Ana', credit_allowed=True, created_by='test'))
+        db.session.add(Spec(id=1, name='S10', length=1, width=1, kg_per_box=Decimal('10'), created_by='test'))
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def sell(moment, payment_type='Crédito'):
+    return SaleService.create_sale(1, payment_type, [{'spec_id': 1, 'box_qty': 1, 'extra_kg': 0}], 'test',
+                                   manual_total_amount=Decimal('100'), sale_time=moment)
+
+
+def test_close_freezes_summary_and_blocks_edits(app):
+    with app.app_context():
+        day = timezone.get_current_date() - timedelta(days=1)
+        noon = datetime.combine(day, datetime.min.time()) + timedelta(hours=12)
+        credit = sell(noon)
+        sell(noon, '现金')
+
+        _, live = SaleService.get_sales_by_date(day)
+        close = CloseService.close_day(day, 'test')
+        assert close.order_count == 2
+        assert SaleService.get_sales_by_date(day)[1] == live
+
+        with pytest.raises(DayClosedError):
+            sell(noon)
+        with pytest.raises(DayClosedError):
+            SaleService.void_sale(credit.id, 'wrong', 'test')
+
+        # 结账后收到的回款计入销售日期的日结记录
+        RemittanceService.create_remittance(credit.id, 40, 'test')
+        summary = SaleService.get_sales_by_date(day)[1]
+        assert summary['remittances_amount'] == live['remittances_amount'] + 40
+        assert summary['daily_cash_income'] == live['daily_cash_income'] + 40
+
+        CloseService.reopen_day(day, 'late sale', 'test')
+        sell(noon)
+        assert CloseService.close_pending(day, 'test') == [day]
+        assert CloseService.get_close(day).order_count == 3
+
+
+def test_offline_sale_for_closed_day_is_reported(app):
+    with app.app_context():
+        day = timezone.get_current_date() - timedelta(days=1)
+        noon = datetime.combine(day, datetime.min.time()) + timedelta(hours=12)
+        sell(noon)
+        CloseService.close_day(day, 'test')
+
+        # 离线期间录入的单据在该日日结后才同步上来
+        entry = {
+            'client_id': 'offline-1', 'customer_id': 1, 'payment_type': '现金',
+            'items': [{'spec_id': 1, 'box_qty': 1, 'extra_kg': 0}],
+            'manual_total_amount': 100, 'created_by': 'test', 'sale_time': noon.isoformat()
+        }
+        [result] = SaleService.sync_offline_sales([entry])
+        assert result['status'] == 'day_closed'
+        assert result['closed_date'] == day.isoformat()
+        assert CloseService.get_close(day).order_count == 1
+
+        # 反结账后用同一个 client_id 重新提交
+        CloseService.reopen_day(day, 'late offline sale', 'test')
+        [result] = SaleService.sync_offline_sales([entry])
+        assert result['status'] == 'created'
+        assert CloseService.close_pending(day, 'test') == [day]
+        assert CloseService.get_close(day).order_count == 2
+
+
+def test_close_pending_is_bounded(app):
+    with app.app_context():
+        today = timezone.get_current_date()
+        old = today - timedelta(days=30)
+        recent = today - timedelta(days=2)
+        for day in (old, recent):
+            sell(datetime.combine(day, datetime.min.time()) + timedelta(hours=12))
+
+        # 只结回看期内有销售的日期，更早的历史和没有销售的日期都不处理
+        assert CloseService.close_pending(today - timedelta(days=1), 'test', lookback_days=7) == [recent]
+        assert CloseService.get_close(old) is None
+        assert CloseService.get_close(today - timedelta(days=1)) is None
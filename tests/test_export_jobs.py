@@ -0,0 +1,75 @@
+"""
+验证后台导出任务：async=1 返回任务ID，任务完成后可下载；排队任务已满时返回 429
+"""
+import sys
+import os
+import time
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+from app import create_app, db
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app('testing')
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        app.extensions['export_jobs'].directory = str(tmp_path)
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def _wait(client, status_url, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(status_url).get_json()
+        if job['status'] not in ('queued', 'running'):
+            return job
+        time.sleep(0.05)
+    raise AssertionError('export job did not finish')
+
+
+def test_async_export_runs_in_background_and_can_be_downloaded(app):
+    client = app.test_client()
+    response = client.get('/api/reports/export/daily-sales?date_from=2026-03-01&date_to=2026-03-07&async=1')
+    assert response.status_code == 202
+
+    job = _wait(client, response.get_json()['status_url'])
+    assert job['status'] == 'success'
+    assert job['filename'] == 'daily_sales_2026-03-01_2026-03-07.xlsx'
+
+    download = client.get(job['download_url'])
+    assert download.status_code == 200
+    assert download.data[:2] == b'PK'  # xlsx 为 zip 格式
+
+    # 原导出函数返回的错误记录为任务失败
+    response = client.get('/api/reports/export/daily-sales?async=1')
+    failed = _wait(client, response.get_json()['status_url'])
+    assert failed['status'] == 'failed'
+    assert failed['download_url'] is None
+
+
+def test_admission_control_rejects_when_full(app):
+    client = app.test_client()
+    jobs = app.extensions['export_jobs']
+
+    jobs.max_queued = 0
+    response = client.get('/api/reports/export/receivables-aging?async=1')
+    assert response.status_code == 429
+    assert response.headers['Retry-After']
+
+    # 请求线程中的导出槽位已被占用
+    jobs.inline_slots.acquire()
+    try:
+        assert client.get('/api/reports/export/receivables-aging').status_code == 429
+    finally:
+        jobs.inline_slots.release()
+    assert client.get('/api/reports/export/receivables-aging').status_code == 200
+
+    assert client.get('/api/reports/export-jobs/missing').status_code == 404
@@ -0,0 +1,101 @@
+"""
+验证幂等键：重复请求返回保存的响应，处理中的重复请求返回 409，同一个键用于不同请求体返回 422，
+非 2xx 响应释放键，超时未完成的键可以重新登记
+"""
+import sys
+import os
+import json
+import hashlib
+from datetime import timedelta
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from flask import jsonify, request
+
+from app import create_app, db
+from app.models import IdempotencyKey
+from app.utils import timezone
+from app.utils.idempotency import idempotent, claim_key
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    app.config['IDEMPOTENCY_PENDING_TIMEOUT_SECONDS'] = 60
+    calls = []
+
+    @app.route('/test/idempotent', methods=['POST'])
+    @idempotent
+    def create_thing():
+        data = request.get_json()
+        calls.append(data)
+        return jsonify({'call': len(calls)}), data.get('status', 201)
+
+    app.calls = calls
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def post(client, key, body):
+    return client.post('/test/idempotent', data=json.dumps(body), content_type='application/json',
+                       headers={'Idempotency-Key': key})
+
+
+def test_replay_returns_stored_response(app):
+    client = app.test_client()
+
+    first = post(client, 'k1', {'a': 1})
+    assert first.status_code == 201
+    assert 'Idempotent-Replayed' not in first.headers
+
+    second = post(client, 'k1', {'a': 1})
+    assert second.status_code == 201
+    assert second.headers['Idempotent-Replayed'] == 'true'
+    assert second.get_json() == first.get_json()
+    assert len(app.calls) == 1
+
+    # 同一个键用于不同的请求体
+    assert post(client, 'k1', {'a': 2}).status_code == 422
+    assert len(app.calls) == 1
+
+
+def test_pending_key_conflicts_until_stale(app):
+    client = app.test_client()
+    body = {'a': 1}
+    request_hash = hashlib.sha256(json.dumps(body).encode('utf-8')).hexdigest()
+
+    # 模拟首次请求仍在处理中
+    assert claim_key('k2', 'create_thing', request_hash) is None
+    assert post(client, 'k2', body).status_code == 409
+    assert len(app.calls) == 0
+
+    # 首次请求中断（超过处理超时仍未完成）：重试重新执行并保存结果
+    IdempotencyKey.query.filter_by(key='k2').update({
+        'created_at': timezone.now().replace(tzinfo=None) - timedelta(minutes=5)
+    })
+    db.session.commit()
+    response = post(client, 'k2', body)
+    assert response.status_code == 201
+    assert len(app.calls) == 1
+    assert IdempotencyKey.query.filter_by(key='k2').one().status == 'completed'
+    assert post(client, 'k2', body).headers['Idempotent-Replayed'] == 'true'
+
+
+def test_failed_response_releases_key(app):
+    client = app.test_client()
+    body = {'a': 1, 'status': 400}
+
+    assert post(client, 'k3', body).status_code == 400
+    assert IdempotencyKey.query.filter_by(key='k3').count() == 0
+
+    # 客户端可以用同一个键重试
+    response = post(client, 'k3', body)
+    assert response.status_code == 400
+    assert 'Idempotent-Replayed' not in response.headers
+    assert len(app.calls) == 2
@@ -0,0 +1,93 @@
+"""
+验证数据一致性检查：找出重量、库存变动、收款状态不一致的销售单，修正模式分批修正并跳过已日结日期
+"""
+import sys
+import os
+from datetime import timedelta
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+from app import create_app, db
+from app.models import Customer, Spec, Sale, StockMove, DailyClose
+from app.services.sale_service import SaleService
+from app.services.integrity_service import IntegrityService
+from app.utils import timezone
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add(Customer(id=1, name='Cliente', credit_allowed=True, created_by='test'))
+        db.session.add(Spec(id=1, name='S1', length=1, width=1, kg_per_box=10, created_by='test'))
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def _counts(**kwargs):
+    return {result['name']: result['count'] for result in IntegrityService.run(**kwargs)}
+
+
+def test_checks_find_and_fix_inconsistent_sales(app):
+    with app.app_context():
+        sale_time = timezone.now().replace(tzinfo=None) - timedelta(days=2)
+        sale_ids = [
+            SaleService.create_sale(1, 'Crédito', [{'spec_id': 1, 'box_qty': 2, 'extra_kg': 1}], 'test',
+                                    sale_time=sale_time).id
+            for _ in range(3)
+        ]
+        # 先补齐库存变动，得到一致的基线
+        IntegrityService.run(['missing_stock_move'], fix=True)
+        assert not any(_counts().values())
+
+        broken = db.session.get(Sale, sale_ids[0])
+        broken.total_kg = 99
+        broken.payment_status = 'paid'
+        db.session.get(Sale, sale_ids[1]).total_amount = 1
+        db.session.commit()
+
+        counts = _counts()
+        assert counts['sale_total_kg'] == 1
+        assert counts['stock_move_kg'] == 1
+        assert counts['payment_status'] == 1
+        assert counts['sale_total_amount'] == 1
+
+        results = {result['name']: result for result in IntegrityService.run(fix=True, batch_size=1)}
+        assert results['sale_total_kg']['fixed'] == 1
+        # 金额不一致只报告
+        assert not results['sale_total_amount']['fixable']
+
+        counts = _counts()
+        assert counts.pop('sale_total_amount') == 1
+        assert not any(counts.values())
+
+        db.session.expire_all()
+        fixed = db.session.get(Sale, sale_ids[0])
+        assert float(fixed.total_kg) == 21
+        assert fixed.payment_status == 'unpaid'
+        moves = StockMove.query.filter_by(reference_id=sale_ids[0], status='active').all()
+        assert [float(move.kg) for move in moves] == [-21]
+
+
+def test_fix_skips_closed_days(app):
+    with app.app_context():
+        sale_time = timezone.now().replace(tzinfo=None) - timedelta(days=2)
+        sale = SaleService.create_sale(1, '现金', [{'spec_id': 1, 'box_qty': 1}], 'test', sale_time=sale_time)
+        sale.total_kg = 50
+        db.session.add(DailyClose(close_date=sale_time.date(), status='closed', closed_by='test'))
+        db.session.commit()
+
+        result, = IntegrityService.run(['sale_total_kg'], fix=True)
+        assert result['fixed'] == 0
+        assert result['skipped'] == [sale.id]
+        assert _counts(names=['sale_total_kg'])['sale_total_kg'] == 1
+
+        with pytest.raises(ValueError):
+            IntegrityService.run(['unknown'])
@@ -0,0 +1,127 @@
+"""
+验证利润报表：FIFO 批次跨日连续扣减，已结束日期的结果被缓存，补录单据后缓存失效
+"""
+import sys
+import os
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+from app import create_app, db
+from app.models import Customer, Spec, Product, DailyProfit
+from app.services.sale_service import SaleService
+from app.services.purchase_service import PurchaseService
+from app.services.profit_service import ProfitService
+from app.utils import timezone
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add(Customer(id=1, name='Ana', credit_allowed=True, created_by='test'))
+        db.session.add(Spec(id=1, name='S10', length=1, width=1, kg_per_box=Decimal('10'), created_by='test'))
+        db.session.add(Product(id=1, name='Camarón', cash_price=Decimal('8'), credit_price=Decimal('8'), created_by='test'))
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def at(day, hour):
+    return datetime.combine(day, datetime.min.time()) + timedelta(hours=hour)
+
+
+def sell(day, kg, amount):
+    SaleService.create_sale(1, '现金', [{'spec_id': 1, 'product_id': 1, 'box_qty': kg // 10, 'extra_kg': 0}], 'test',
+                            manual_total_amount=Decimal(amount), sale_time=at(day, 12))
+
+
+def test_fifo_lots_carry_across_days_and_cache_closed_days(app):
+    with app.app_context():
+        today = timezone.get_current_date()
+        day1, day2 = today - timedelta(days=3), today - timedelta(days=2)
+
+        PurchaseService.create_purchase('S', [{'product_name': 'Camarón', 'kg': 30, 'unit_price': 5}], 'test',
+                                        purchase_time=at(day1, 8))
+        PurchaseService.create_purchase('S', [{'product_name': 'Camarón', 'kg': 30, 'unit_price': 6}], 'test',
+                                        purchase_time=at(day2, 8))
+        db.session.commit()
+        sell(day1, 20, '200')
+        # 第二天先用完第一天剩余的 10 KG（@5），再用第二天的批次（@6）
+        sell(day2, 20, '220')
+
+        report = ProfitService.get_profit(day1, today)
+        days = {row['date']: row for row in report['days']}
+        assert days[day1.isoformat()]['cost'] == 100
+        assert days[day2.isoformat()]['cost'] == 110
+        assert days[day2.isoformat()]['margin'] == 110
+        assert report['totals']['revenue'] == 420
+        assert report['products'][0]['product_name'] == 'Camarón'
+        assert db.session.query(DailyProfit).filter(DailyProfit.product_name == DailyProfit.TOTAL).count() == 3
+
+        # 缓存命中的结果与遍历结果一致
+        assert ProfitService.get_profit(day1, day2 + timedelta(days=1))['totals'] == \
+            ProfitService.get_profit(day1, today)['totals']
+
+        # 补录第一天的销售：该日及之后的缓存失效，第二天的成本随之变化
+        sell(day1, 10, '100')
+        assert db.session.query(DailyProfit).count() == 0
+        report = ProfitService.get_profit(day1, day2)
+        assert report['days'][1]['cost'] == 120
+
+
+def test_open_range_resumes_from_cached_lot_state(app, monkeypatch):
+    with app.app_context():
+        today = timezone.get_current_date()
+        day1, day2 = today - timedelta(days=3), today - timedelta(days=2)
+
+        PurchaseService.create_purchase('S', [{'product_name': 'Camarón', 'kg': 30, 'unit_price': 5}], 'test',
+                                        purchase_time=at(day1, 8))
+        db.session.commit()
+        sell(day1, 20, '200')
+        sell(day2, 20, '220')
+        ProfitService.get_profit(day1, today - timedelta(days=1))
+
+        # 包含今天的区间只遍历今天的单据，前一天剩余的批次从缓存恢复
+        starts = []
+        sweep = ProfitService._sweep
+        monkeypatch.setattr(ProfitService, '_sweep',
+                            lambda *args, **kwargs: starts.append(args[1]) or sweep(*args, **kwargs))
+        sell(today, 10, '100')
+        report = ProfitService.get_profit(day1, today)
+        assert starts == [today]
+        # 第二天只有 10 KG 有批次，今天的销售没有批次可扣
+        assert [row['uncosted_kg'] for row in report['days']] == [0, 10, 0, 10]
+        assert report['totals']['cost'] == 150
+
+
+def test_renamed_product_keeps_its_lots(app):
+    with app.app_context():
+        today = timezone.get_current_date()
+        day1, day2 = today - timedelta(days=3), today - timedelta(days=2)
+
+        PurchaseService.create_purchase('S', [{'product_name': 'Camarón', 'kg': 30, 'unit_price': 5}], 'test',
+                                        purchase_time=at(day1, 8))
+        # 另一个商品的更贵批次：改名后的销售若按名称匹配不到，会落到全部批次
+        PurchaseService.create_purchase('S', [{'product_name': 'Almeja', 'kg': 30, 'unit_price': 9}], 'test',
+                                        purchase_time=at(day1, 7))
+        db.session.commit()
+        sell(day1, 10, '100')
+        ProfitService.get_profit(day1, day1)
+
+        db.session.get(Product, 1).name = 'Gamba'
+        db.session.commit()
+        sell(day2, 10, '100')
+
+        report = ProfitService.get_profit(day1, day2)
+        assert [row['cost'] for row in report['days']] == [50, 50]
+        camaron, = [row for row in report['products'] if row['product_id'] == 1]
+        assert camaron['product_name'] == 'Gamba'
+        assert camaron['sold_kg'] == 20
@@ -0,0 +1,115 @@
+"""
+验证报表/首页查询使用有效单据的部分索引
+捕获服务方法实际执行的 SQL 再取查询计划，服务查询偏离部分索引条件时测试会失败
+SQLite 使用 EXPLAIN QUERY PLAN，PostgreSQL 使用 EXPLAIN（设置 TEST_DATABASE_URL 指向 PostgreSQL 库）
+"""
+import sys
+import os
+import logging
+from contextlib import contextmanager
+from datetime import date, datetime
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from sqlalchemy import event, inspect, text
+
+from app import create_app, db, ensure_indexes
+from app.services.report_service import ReportService
+from app.services.sale_service import SaleService
+from app.services.inventory_service import InventoryService
+
+
+@pytest.fixture(scope='module')
+def app():
+    app = create_app('testing')
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        ensure_indexes(inspect(db.engine).get_table_names(), logging.getLogger(__name__))
+        if db.engine.dialect.name == 'postgresql':
+            # 测试数据量很小，禁止顺序扫描以观察索引是否可用
+            db.session.execute(text('SET enable_seqscan = off'))
+        yield app
+        db.session.rollback()
+        db.drop_all()
+
+
+@contextmanager
+def captured_statements():
+    """记录代码块内执行的 SELECT 语句及参数"""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', capture)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', capture)
+
+
+def plans(statements, table):
+    """返回访问指定表的语句的查询计划文本"""
+    prefix = 'EXPLAIN' if db.engine.dialect.name == 'postgresql' else 'EXPLAIN QUERY PLAN'
+    result = []
+    for statement, parameters in statements:
+        if f'FROM {table} ' not in statement and f'JOIN {table} ' not in statement:
+            continue
+        rows = db.session.connection().exec_driver_sql(f'{prefix} {statement}', parameters).all()
+        result.append('\n'.join(str(row[0] if prefix == 'EXPLAIN' else row[-1]) for row in rows))
+    assert result, f'没有捕获到访问 {table} 的查询'
+    return result
+
+
+def test_today_summary_uses_active_sale_index(app):
+    with app.app_context():
+        with captured_statements() as statements:
+            SaleService.get_today_summary()
+        for plan in plans(statements, 'sale'):
+            assert 'idx_sale_active_time' in plan, plan
+
+
+def test_daily_sales_uses_active_sale_index(app):
+    with app.app_context():
+        with captured_statements() as statements:
+            ReportService.get_daily_sales(datetime(2026, 1, 1), datetime(2026, 1, 31, 23, 59, 59))
+        for plan in plans(statements, 'sale'):
+            assert 'idx_sale_active_time' in plan, plan
+
+
+def test_summary_stats_uses_active_sale_index(app):
+    with app.app_context():
+        with captured_statements() as statements:
+            ReportService.get_summary_stats(datetime(2026, 1, 1), datetime(2026, 1, 31, 23, 59, 59))
+        # 作废单统计是单独的小查询，不要求走有效单据索引
+        active = [item for item in statements if 'void_count' not in item[0]]
+        for plan in plans(active, 'sale'):
+            assert 'idx_sale_active_time' in plan, plan
+
+
+def test_sales_by_representative_uses_active_sale_index(app):
+    with app.app_context():
+        with captured_statements() as statements:
+            ReportService.get_sales_by_representative(datetime(2026, 1, 1))
+        for plan in plans(statements, 'sale'):
+            assert 'idx_sale_active_time' in plan, plan
+
+
+def test_fifo_purchase_range_uses_active_purchase_index(app):
+    with app.app_context():
+        with captured_statements() as statements:
+            SaleService.calculate_daily_cost_fifo(date(2026, 1, 31), 10)
+        for plan in plans(statements, 'purchase'):
+            assert 'idx_purchase_active_time' in plan, plan
+
+
+def test_stock_daily_changes_use_active_stock_move_index(app):
+    with app.app_context():
+        with captured_statements() as statements:
+            InventoryService._daily_changes(date(2026, 1, 1), date(2026, 1, 31))
+        for plan in plans(statements, 'stock_move'):
+            assert 'idx_stock_move_active_time' in plan, plan
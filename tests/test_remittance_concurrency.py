@@ -0,0 +1,109 @@
+"""
+验证并发回款不会超付
+多个线程同时对同一销售单回款：PostgreSQL 依赖行锁（设置 TEST_DATABASE_URL），
+SQLite 使用临时数据库文件，依赖版本号校验
+"""
+import sys
+import os
+import threading
+from datetime import datetime
+from decimal import Decimal
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+from app import create_app, db
+from app.config import TestingConfig
+from app.models import Customer, Sale, Remittance
+from app.services.remittance_service import RemittanceService
+
+THREADS = 8
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    if not os.environ.get('TEST_DATABASE_URL'):
+        # 内存数据库只有一个共享连接，并发测试需要数据库文件
+        monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'concurrency.db'}")
+    monkeypatch.setattr(TestingConfig, 'REMITTANCE_RETRY_ATTEMPTS', THREADS, raising=False)
+
+    app = create_app('testing')
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add(Customer(id=1, name='concurrency', created_by='test'))
+        for sale_id in ('C-1', 'C-2'):
+            db.session.add(Sale(
+                id=sale_id, sale_time=datetime(2026, 1, 1), customer_id=1,
+                payment_type='Crédito', payment_status='unpaid',
+                total_kg=0, total_amount=Decimal('100'), created_by='test'
+            ))
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+        db.engine.dispose()
+
+
+def run_in_threads(app, target):
+    """所有线程在同一时刻开始执行 target，返回每个线程的结果或异常"""
+    barrier = threading.Barrier(THREADS)
+    results = [None] * THREADS
+
+    def worker(index):
+        with app.app_context():
+            barrier.wait()
+            try:
+                results[index] = target(index)
+            except Exception as e:
+                results[index] = e
+            finally:
+                db.session.remove()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def paid_total(sale_id):
+    return db.session.query(db.func.sum(Remittance.amount)).filter(
+        Remittance.sale_id == sale_id
+    ).scalar() or Decimal('0')
+
+
+def test_parallel_remittances_never_overpay(app):
+    # 每个线程回款 30，销售单金额 100：最多 3 笔成功
+    results = run_in_threads(
+        app, lambda i: RemittanceService.create_remittance('C-1', 30, f'clerk{i}')
+    )
+
+    succeeded = [r for r in results if isinstance(r, Remittance)]
+    failed = [r for r in results if isinstance(r, Exception)]
+    assert len(succeeded) == 3, results
+    assert all(isinstance(e, ValueError) for e in failed), failed
+
+    with app.app_context():
+        assert paid_total('C-1') == Decimal('90')
+        assert db.session.get(Sale, 'C-1').payment_status == 'partial'
+
+
+def test_parallel_allocations_never_overpay(app):
+    # 客户未回款合计 200，每个线程分配 60：最多 3 笔成功
+    results = run_in_threads(
+        app, lambda i: RemittanceService.allocate_remittance(1, 60, f'clerk{i}')
+    )
+
+    succeeded = [r for r in results if isinstance(r, dict)]
+    assert len(succeeded) == 3, results
+
+    with app.app_context():
+        assert paid_total('C-1') == Decimal('100')
+        assert paid_total('C-2') == Decimal('80')
+        assert db.session.get(Sale, 'C-1').payment_status == 'paid'
+        assert db.session.get(Sale, 'C-2').payment_status == 'partial'
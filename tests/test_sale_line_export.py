@@ -0,0 +1,85 @@
+"""
+验证销售明细流式导出：NDJSON/CSV 每条明细一行，分批读取，支持 gzip 和状态过滤
+"""
+import sys
+import os
+import csv
+import gzip
+import io
+import json
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+from app import create_app, db
+from app.models import Customer, Spec, Product
+from app.services.sale_service import SaleService
+
+
+@pytest.fixture
+def app(monkeypatch):
+    app = create_app('testing')
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add(Customer(id=1, name='Cliente', created_by='test'))
+        db.session.add(Spec(id=1, name='S1', length=1, width=1, kg_per_box=10, created_by='test'))
+        db.session.add(Product(id=1, name='Camarón', cash_price=5, credit_price=6, created_by='test'))
+        db.session.commit()
+        # 小批次，验证跨批次输出
+        monkeypatch.setattr(SaleService, 'STREAM_BATCH_SIZE', 2)
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def test_streams_one_line_per_item(app):
+    with app.app_context():
+        sale_ids = [
+            SaleService.create_sale(1, '现金', [
+                {'spec_id': 1, 'product_id': 1, 'box_qty': 2},
+                {'spec_id': 1, 'box_qty': 1, 'extra_kg': 0.5}
+            ], 'test').id
+            for _ in range(3)
+        ]
+        SaleService.void_sale(sale_ids[2], 'duplicated', 'test')
+
+        client = app.test_client()
+        response = client.get('/api/sales/export.ndjson')
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+        lines = [json.loads(line) for line in response.data.decode().splitlines()]
+        assert len(lines) == 4
+        assert lines[0]['sale_id'] == sale_ids[0]
+        assert lines[0]['product_name'] == 'Camarón'
+        assert lines[0]['subtotal_kg'] == 20.0
+        assert lines[1]['product_name'] is None
+
+        response = client.get('/api/sales/export.csv?status=all', headers={'Accept-Encoding': 'gzip'})
+        assert response.headers['Content-Encoding'] == 'gzip'
+        rows = list(csv.reader(io.StringIO(gzip.decompress(response.data).decode())))
+        assert rows[0] == list(SaleService.LINE_COLUMNS)
+        assert len(rows) == 7
+        assert [row[2] for row in rows[1:]].count('void') == 2
+
+        assert client.get('/api/sales/export.csv?status=open').status_code == 400
+
+
+def test_concurrent_streams_are_limited(app):
+    with app.app_context():
+        SaleService.create_sale(1, '现金', [{'spec_id': 1, 'box_qty': 1}], 'test')
+
+        client = app.test_client()
+        # 第一个下载尚未发送完毕，占用唯一的名额
+        first = client.get('/api/sales/export.ndjson', buffered=False)
+        assert first.status_code == 200
+        busy = client.get('/api/sales/export.csv')
+        assert busy.status_code == 429
+        assert busy.headers['Retry-After']
+
+        # 响应关闭后名额释放
+        first.close()
+        assert client.get('/api/sales/export.csv').status_code == 200
+        assert client.get('/api/sales/export.csv').status_code == 200
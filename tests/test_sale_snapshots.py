@@ -0,0 +1,81 @@
+"""
+验证销售单/销售明细的客户名称、规格快照
+修改客户或规格后，历史销售单的名称和单箱重量保持不变
+"""
+import sys
+import os
+import logging
+from decimal import Decimal
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from sqlalchemy import text
+
+from app import create_app, db, backfill_sale_snapshots
+from app.models import Customer, Spec, SaleItem
+from app.services.sale_service import SaleService
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add(Customer(id=1, name='Ana', credit_allowed=True, created_by='test'))
+        db.session.add(Spec(id=1, name='S10', length=1, width=1, kg_per_box=Decimal('10'), created_by='test'))
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def test_snapshots_survive_master_data_changes(app):
+    with app.app_context():
+        sale = SaleService.create_sale(1, 'Crédito', [{'spec_id': 1, 'box_qty': 2, 'extra_kg': 1}], 'test')
+        item = sale.items.one()
+        assert (sale.customer_name, item.spec_name, item.kg_per_box) == ('Ana', 'S10', Decimal('10'))
+
+        db.session.get(Customer, 1).name = 'Ana B'
+        db.session.get(Spec, 1).kg_per_box = Decimal('12')
+        db.session.commit()
+
+        # 重新计算旧明细时仍使用创建时的单箱重量
+        item.box_qty = 3
+        db.session.commit()
+        assert item.subtotal_kg == Decimal('31')
+        # 客户名称快照与完整的当前客户信息并列返回
+        data = sale.to_dict()
+        assert data['customer_name'] == 'Ana'
+        assert data['customer']['name'] == 'Ana B'
+        assert data['customer']['credit_allowed'] is True
+
+
+def test_backfill_derives_weight_from_subtotal(app):
+    with app.app_context():
+        sale = SaleService.create_sale(1, 'Crédito', [{'spec_id': 1, 'box_qty': 2, 'extra_kg': 1}], 'test')
+        db.session.get(Spec, 1).kg_per_box = Decimal('12')
+        db.session.execute(text('UPDATE sale SET customer_name = NULL'))
+        db.session.execute(text('UPDATE sale_item SET spec_name = NULL, kg_per_box = NULL'))
+        db.session.commit()
+
+        assert backfill_sale_snapshots(logging.getLogger(__name__)) == [1, 1]
+        db.session.expire_all()
+        item = SaleItem.query.one()
+        assert sale.customer_name == 'Ana'
+        assert (item.spec_name, item.kg_per_box) == ('S10', Decimal('10'))
+
+
+def test_backfill_keeps_fractional_weight(app):
+    with app.app_context():
+        db.session.add(Spec(id=2, name='S2.5', length=1, width=1, kg_per_box=Decimal('2.5'), created_by='test'))
+        db.session.commit()
+        SaleService.create_sale(1, 'Crédito', [{'spec_id': 2, 'box_qty': 2}], 'test')
+        db.session.execute(text('UPDATE sale_item SET spec_name = NULL, kg_per_box = NULL'))
+        db.session.commit()
+
+        backfill_sale_snapshots(logging.getLogger(__name__))
+        db.session.expire_all()
+        assert SaleItem.query.one().kg_per_box == Decimal('2.5')
@@ -0,0 +1,59 @@
+"""
+验证定时任务：cron 计划的下一次执行时间，同一次计划执行只能被领取一次，失败的运行被记录
+"""
+import sys
+import os
+from datetime import datetime
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+from app import create_app, db
+from app.models import JobRun
+from app.utils.scheduler import CronSchedule, claim, run_job
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def test_cron_next_run():
+    moment = datetime(2026, 3, 14, 10, 7)  # 周六
+    assert CronSchedule('*/15 * * * *').next_after(moment) == datetime(2026, 3, 14, 10, 15)
+    assert CronSchedule('30 0 * * *').next_after(moment) == datetime(2026, 3, 15, 0, 30)
+    assert CronSchedule('0 3 * * 1-5').next_after(moment) == datetime(2026, 3, 16, 3, 0)
+    assert CronSchedule('0 0 1 * *').next_after(moment) == datetime(2026, 4, 1, 0, 0)
+    with pytest.raises(ValueError):
+        CronSchedule('61 * * * *')
+
+
+def test_slot_is_claimed_once_and_failures_are_recorded(app):
+    with app.app_context():
+        slot = datetime(2026, 3, 14, 0, 30)
+        assert claim('nightly', slot)
+        # 运行中：其他进程不能领取同一次执行，也不能领取下一次
+        assert not claim('nightly', slot)
+        assert not claim('nightly', datetime(2026, 3, 15, 0, 30))
+
+        def broken():
+            raise RuntimeError('disk full')
+
+        run = run_job('nightly', broken)
+        assert run.status == 'failed'
+        assert 'disk full' in run.message
+        assert run.duration_ms is not None
+
+        # 租约已释放：同一次执行仍然不能重复领取，下一次可以
+        assert not claim('nightly', slot)
+        assert claim('nightly', datetime(2026, 3, 15, 0, 30))
+        assert run_job('nightly', lambda: 'ok').status == 'success'
+        assert JobRun.query.count() == 2
@@ -0,0 +1,139 @@
+"""
+验证库存快照：按商品ID统计（商品改名不影响），未指定商品的销售计入 UNASSIGNED，
+任意时刻库存与实时累计一致，补录/作废历史单据后快照失效，查询本身不写快照
+"""
+import sys
+import os
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+from app import create_app, db
+from app.models import Customer, Spec, Product, StockSnapshot
+from app.services.sale_service import SaleService
+from app.services.purchase_service import PurchaseService
+from app.services.inventory_service import InventoryService
+from app.utils import timezone
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add(Customer(id=1, name='Ana', credit_allowed=True, created_by='test'))
+        db.session.add(Spec(id=1, name='S10', length=1, width=1, kg_per_box=Decimal('10'), created_by='test'))
+        db.session.add(Product(id=1, name='Camarón', cash_price=Decimal('8'), credit_price=Decimal('8'), created_by='test'))
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def at(day, hour):
+    return datetime.combine(day, datetime.min.time()) + timedelta(hours=hour)
+
+
+def buy(day, kg, product_name='Camarón'):
+    PurchaseService.create_purchase('S', [{'product_name': product_name, 'kg': kg, 'unit_price': 5}], 'test',
+                                    purchase_time=at(day, 8))
+    db.session.commit()
+
+
+def sell(day, boxes, product_id=1):
+    return SaleService.create_sale(1, '现金', [{'spec_id': 1, 'product_id': product_id, 'box_qty': boxes, 'extra_kg': 0}],
+                                   'test', manual_total_amount=Decimal('100'), sale_time=at(day, 12))
+
+
+def closing(day):
+    """某日各商品的收盘快照（合计行取自库存变动表，单独验证）"""
+    rows = StockSnapshot.query.filter_by(snapshot_date=day).all()
+    assert any(row.product_name == StockSnapshot.TOTAL for row in rows)
+    return {
+        InventoryService._snapshot_key(row): float(row.closing_kg)
+        for row in rows
+        if row.product_name != StockSnapshot.TOTAL
+    }
+
+
+def test_snapshots_follow_product_id_and_keep_unassigned_sales(app):
+    with app.app_context():
+        today = timezone.get_current_date()
+        day1, day2 = today - timedelta(days=3), today - timedelta(days=2)
+
+        buy(day1, 50)
+        sell(day1, 2)
+        # 未指定商品的销售明细
+        sell(day2, 1, product_id=None)
+
+        assert InventoryService.build_snapshots() == 3
+        assert closing(day1) == {1: 30.0}
+        assert closing(day2) == {1: 30.0, StockSnapshot.UNASSIGNED: -10.0}
+        assert InventoryService.build_snapshots() == 0
+
+        # 商品改名后，已生成的快照与之后的单据仍归属同一商品
+        db.session.get(Product, 1).name = 'Gamba'
+        db.session.commit()
+        buy(today, 5, product_name='Gamba')
+
+        # 快照日内的时刻：前一天没有快照，从头累计
+        result = InventoryService.get_stock_as_of(at(day1, 10), product_id=1)
+        assert result['stock_kg'] == 50
+        assert result['snapshot_date'] is None
+        assert InventoryService.get_stock_as_of(at(day1, 10))['stock_kg'] == 50
+
+        # 快照范围之后的时刻：昨天的快照加上今天的变动
+        now = timezone.now()
+        result = InventoryService.get_stock_as_of(now, product_id=1)
+        assert result['stock_kg'] == 35
+        assert result['snapshot_date'] == (today - timedelta(days=1)).isoformat()
+        assert InventoryService.get_stock_as_of(now)['stock_kg'] == InventoryService.get_current_stock()['current_stock_kg']
+
+
+def test_backdated_documents_invalidate_snapshots_from_their_day(app):
+    with app.app_context():
+        today = timezone.get_current_date()
+        day1, day2 = today - timedelta(days=3), today - timedelta(days=2)
+
+        buy(day1, 50)
+        sale = sell(day2, 2)
+        InventoryService.build_snapshots()
+        assert StockSnapshot.query.filter_by(snapshot_date=day2).count() == 2
+
+        # 补录第二天的采购：第二天及之后的快照删除，第一天保留
+        buy(day2, 10)
+        assert {row.snapshot_date for row in StockSnapshot.query} == {day1}
+
+        InventoryService.build_snapshots()
+        assert closing(day2)[1] == 40
+
+        # 作废第二天的销售：同样从该日开始失效
+        SaleService.void_sale(sale.id, 'test', 'test')
+        db.session.commit()
+        assert {row.snapshot_date for row in StockSnapshot.query} == {day1}
+        assert InventoryService.get_stock_as_of(timezone.now(), product_id=1)['stock_kg'] == 60
+
+
+def test_read_queries_do_not_write_snapshots(app):
+    with app.app_context():
+        today = timezone.get_current_date()
+        day1 = today - timedelta(days=3)
+
+        buy(day1, 50)
+        buy(day1 + timedelta(days=1), 10)
+
+        history = {row['date']: row['cumulative_stock'] for row in InventoryService.get_stock_history(5)}
+        assert history[day1.isoformat()] == 50
+        assert history[(day1 + timedelta(days=1)).isoformat()] == 60
+        assert history[today.isoformat()] == 60
+        assert InventoryService.get_stock_as_of(timezone.now(), product_id=1)['stock_kg'] == 60
+        assert StockSnapshot.query.count() == 0
+
+        # 快照生成后读取结果不变
+        InventoryService.build_snapshots()
+        assert {row['date']: row['cumulative_stock'] for row in InventoryService.get_stock_history(5)} == history
@@ -0,0 +1,109 @@
+"""
+验证加权平均成本：采购、销售时增量更新的平均成本和明细成本与按历史重放的结果一致，
+选择加权平均法后每日汇总读取销售明细记录的成本
+"""
+import sys
+import os
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+from app import create_app, db
+from app.models import Customer, Spec, Product, ProductCost, SaleItem
+from app.services.sale_service import SaleService
+from app.services.purchase_service import PurchaseService
+from app.services.cost_service import CostService
+from app.utils import timezone
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add(Customer(id=1, name='Ana', credit_allowed=True, created_by='test'))
+        db.session.add(Spec(id=1, name='S10', length=1, width=1, kg_per_box=Decimal('10'), created_by='test'))
+        db.session.add(Product(id=1, name='Camarón', cash_price=Decimal('8'), credit_price=Decimal('8'), created_by='test'))
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def cost_state():
+    costs = [(row.product_name, row.qty_kg, row.avg_cost) for row in ProductCost.query.order_by(ProductCost.product_name)]
+    items = [(row.id, row.unit_cost, row.cost_amount) for row in SaleItem.query.order_by(SaleItem.id)]
+    return costs, items
+
+
+def test_incremental_average_matches_rebuild(app):
+    with app.app_context():
+        start = datetime.combine(timezone.get_current_date() - timedelta(days=1), datetime.min.time())
+
+        def buy(hour, kg, price):
+            PurchaseService.create_purchase('S', [{'product_name': 'Camarón', 'kg': kg, 'unit_price': price}], 'test',
+                                            purchase_time=start + timedelta(hours=hour))
+
+        def sell(hour, boxes, product_id=1):
+            return SaleService.create_sale(1, '现金', [{'spec_id': 1, 'product_id': product_id, 'box_qty': boxes, 'extra_kg': 0}],
+                                           'test', manual_total_amount=Decimal('100'), sale_time=start + timedelta(hours=hour))
+
+        buy(1, 30, 5)
+        buy(2, 10, 9)
+        first = sell(3, 2)
+        # 未指定商品的明细使用全部商品的平均成本
+        sell(4, 1, product_id=None)
+        buy(5, 20, 7)
+        sell(6, 1)
+
+        assert first.items[0].unit_cost == Decimal('6')
+        assert first.items[0].cost_amount == Decimal('120')
+
+        incremental = cost_state()
+        CostService.rebuild()
+        db.session.expire_all()
+        assert cost_state() == incremental
+
+        CostService.set_method(CostService.METHOD_WEIGHTED_AVERAGE)
+        _, summary = SaleService.get_sales_by_date(start.date())
+        assert summary['total_cost'] == float(sum(item[2] for item in incremental[1]))
+
+
+def test_cost_rows_locked_in_fixed_order(app):
+    """商品顺序不同的单据按相同顺序更新成本记录（商品名称排序，全部商品最后且只更新一次）"""
+    from sqlalchemy import event
+
+    with app.app_context():
+        db.session.add(Product(id=2, name='Almeja', cash_price=Decimal('8'), credit_price=Decimal('8'), created_by='test'))
+        db.session.commit()
+        CostService.set_method(CostService.METHOD_WEIGHTED_AVERAGE)
+        db.session.commit()
+
+        updated = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith('UPDATE product_cost'):
+                updated.append(parameters[-1])
+
+        event.listen(db.engine, 'before_cursor_execute', capture)
+        try:
+            PurchaseService.create_purchase('S', [
+                {'product_name': 'Camarón', 'kg': 30, 'unit_price': 5},
+                {'product_name': 'Almeja', 'kg': 20, 'unit_price': 7}
+            ], 'test')
+            db.session.commit()
+            updated.clear()
+            SaleService.create_sale(1, '现金', [
+                {'spec_id': 1, 'product_id': 1, 'box_qty': 1},
+                {'spec_id': 1, 'product_id': 2, 'box_qty': 1},
+                {'spec_id': 1, 'product_id': 1, 'box_qty': 1}
+            ], 'test')
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', capture)
+
+        assert updated == ['Almeja', 'Camarón', ProductCost.ALL_PRODUCTS]